@@ -0,0 +1,24 @@
+"""
+Pytest configuration for the root test scripts
+Keeps the runtime SQLite files the fetcher creates out of the repo's data/ directory
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(autouse=True, scope='session')
+def _runtime_files_in_tmp(tmp_path_factory):
+    """Point the shared instrument index and rate-limit bucket at a per-session tmp path"""
+    from src.utils.instrument_index import instrument_index
+    from src.utils.rate_limiter import rate_limiter
+
+    runtime_dir = tmp_path_factory.mktemp('runtime')
+    instrument_index.refresh()
+    instrument_index.index_file = str(runtime_dir / 'instrument_index.db')
+    rate_limiter.db_file = str(runtime_dir / 'rate_limit.db')
+    yield runtime_dir
@@ -39,6 +39,15 @@ def main():
         print(f"\n❌ ISSUES: Low success rate ({result['success_rate']:.1f}%)")
         print("Check logs and NSE data availability.")
 
+    # Precompute tomorrow's bot prep data from the freshly updated cache
+    print("\n📦 Building prep pack for the next session...")
+    try:
+        from src.trading.live_trading.prep_pack import build_prep_pack
+        pack = build_prep_pack()
+        print(f"Prep pack ready for {pack['trading_date']}: {len(pack['stocks'])} stocks")
+    except Exception as e:
+        print(f"❌ Prep pack build failed: {e} (bots will fetch prep data live)")
+
     print("\n💡 Next update will run automatically tomorrow at 6 PM")
 
 if __name__ == "__main__":
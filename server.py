@@ -540,6 +540,29 @@ async def get_vah_results():
         logger.error(f"Failed to read VAH results: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to read VAH results: {str(e)}")
 
+@app.get("/api/live-trading/latency")
+async def get_tick_latency(instruments: bool = Query(False, description="Include per-instrument histograms")):
+    """Get the running bot's tick latency histograms (exchange -> receive -> decoded -> decision)"""
+    try:
+        latency_file = Path('tick_latency.json')
+
+        if latency_file.exists():
+            with open(latency_file, 'r') as f:
+                data = json.load(f)
+            if not instruments:
+                data.pop('instruments', None)
+            data['is_running'] = bot_process is not None and bot_process.poll() is None
+            return data
+        else:
+            return {
+                'message': 'Tick latency not available yet. Start the bot to record latency.',
+                'timestamp': datetime.now().isoformat()
+            }
+
+    except Exception as e:
+        logger.error(f"Failed to read tick latency: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to read tick latency: {str(e)}")
+
 # Data Management
 
 @app.post("/api/data/update-bhavcopy")
@@ -20,6 +20,7 @@ from PyQt6.QtCore import Qt, QThread, pyqtSignal
 from PyQt6.QtGui import QFont, QColor
 
 from src.utils.cache_manager import cache_manager
+from src.utils.trading_calendar import trading_calendar
 from src.scanner.color_utils import get_up_4_5_color
 
 logger = logging.getLogger(__name__)
@@ -139,11 +140,11 @@ class BreadthCalculator(QThread):
         for df in all_stocks_data.values():
             all_dates.update(df.index.date)
 
-        # Filter to only weekdays (Monday=0 to Friday=4, exclude Saturday=5, Sunday=6)
-        weekday_dates = {d for d in all_dates if d.weekday() < 5}
+        # Keep only NSE sessions (drops holidays, keeps weekend special sessions)
+        session_dates = {d for d in all_dates if trading_calendar.is_trading_day(d)}
 
         # Sort dates
-        sorted_dates = sorted(weekday_dates)
+        sorted_dates = sorted(session_dates)
 
         # Check cache and calculate only needed dates
         breadth_results = {}
@@ -213,11 +214,7 @@ class BreadthCalculator(QThread):
 
         # Always include the most recent trading day, even if incomplete
         today = date.today()
-        recent_dates = []
-        for i in range(7):  # Check last 7 days
-            check_date = today - timedelta(days=i)
-            if check_date.weekday() < 5:  # Weekday
-                recent_dates.append(check_date)
+        recent_dates = trading_calendar.trading_days(today - timedelta(days=6), today)[::-1]  # Last 7 days
 
         for recent_date in recent_dates:
             date_key = recent_date.strftime('%Y-%m-%d')
@@ -11,6 +11,7 @@ import pandas as pd
 from src.utils.database import db
 from src.utils.data_fetcher import data_fetcher
 from src.utils.cache_manager import cache_manager
+from src.utils.trading_calendar import trading_calendar
 from .filters import FilterEngine
 from .continuation_analyzer import ContinuationAnalyzer
 from .reversal_analyzer import ReversalAnalyzer
@@ -419,11 +420,8 @@ class Scanner:
             return []
 
     def _get_previous_trading_day(self, current_date: date) -> date:
-        """Get the previous trading day, skipping weekends"""
-        prev = current_date - timedelta(days=1)
-        while prev.weekday() >= 5:  # Saturday=5, Sunday=6
-            prev -= timedelta(days=1)
-        return prev
+        """Get the previous trading day, skipping weekends and NSE holidays"""
+        return trading_calendar.previous_trading_day(current_date)
 
     def _find_latest_available_scan_date(self) -> Optional[date]:
         """
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Clocks for the Live Bot Runtimes
+WallClock reads and sleeps on real IST time; SimulatedClock jumps straight to
+every wait's target (running anything scheduled on the way) so whole sessions
+can run faster than real time
+"""
+
+import time
+import heapq
+import threading
+from datetime import datetime, timedelta, time as dt_time
+from typing import Callable, Optional
+import pytz
+
+IST = pytz.timezone('Asia/Kolkata')
+
+
+class WallClock:
+    """Real time in IST"""
+
+    def now(self) -> datetime:
+        return datetime.now(IST)
+
+    def sleep(self, seconds: float):
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def today_at(self, at: dt_time) -> datetime:
+        """Today's date in IST at the given time of day"""
+        return IST.localize(datetime.combine(self.now().date(), at))
+
+    def seconds_until(self, when: datetime) -> float:
+        return (when - self.now()).total_seconds()
+
+    def sleep_until(self, when: datetime) -> float:
+        """Block until when; returns the seconds waited (0 if already past)"""
+        wait_seconds = self.seconds_until(when)
+        if wait_seconds > 0:
+            self.sleep(wait_seconds)
+            return wait_seconds
+        return 0.0
+
+
+class SimulatedClock(WallClock):
+    """
+    Simulated IST time that never blocks
+
+    sleep() and sleep_until() move the clock forward immediately. Callbacks
+    registered with call_at() run in time order as the clock passes them,
+    with now() set to their scheduled time. Time only moves forward, so
+    concurrent sleepers (e.g. PREP tasks) each return at once and the clock
+    ends at the latest target.
+    """
+
+    def __init__(self, start: datetime):
+        if start.tzinfo is None:
+            start = IST.localize(start)
+        self._now = start
+        self._events = []  # (at, order, fn)
+        self._order = 0
+        self._lock = threading.RLock()
+
+    def now(self) -> datetime:
+        return self._now
+
+    def sleep(self, seconds: float):
+        if seconds > 0:
+            self.advance_to(self._now + timedelta(seconds=seconds))
+
+    def call_at(self, when: datetime, fn: Callable):
+        """Run fn once the clock reaches when"""
+        with self._lock:
+            heapq.heappush(self._events, (when, self._order, fn))
+            self._order += 1
+
+    def next_event(self) -> Optional[datetime]:
+        with self._lock:
+            return self._events[0][0] if self._events else None
+
+    def advance_to(self, when: Optional[datetime]):
+        """Move to when, first running every callback scheduled at or before it (None: run all)"""
+        with self._lock:
+            while self._events and (when is None or self._events[0][0] <= when):
+                at, _, fn = heapq.heappop(self._events)
+                if at > self._now:
+                    self._now = at
+                fn()
+            if when is not None and when > self._now:
+                self._now = when
+
+    def run_pending(self):
+        """Run every remaining callback in order"""
+        self.advance_to(None)
+
+
+SYSTEM_CLOCK = WallClock()
@@ -5,17 +5,22 @@ Trading Bot Configuration
 Real market trading configuration - no simulation or test modes
 """
 
+import os
+import tempfile
 from datetime import time, timedelta, datetime
 
 # Market timing (IST)
 MARKET_OPEN = time(9, 15)      
 WINDOW_LENGTH = 5            
 PREP_START = (datetime.combine(datetime.today(), MARKET_OPEN) - timedelta(seconds=30)).time()  # 30 seconds before market open
+PREWARM_START = (datetime.combine(datetime.today(), PREP_START) - timedelta(minutes=3)).time()  # Open HTTPS/websocket 3 minutes before PREP_START
 ENTRY_TIME = (datetime.combine(datetime.today(), MARKET_OPEN) + timedelta(minutes=WINDOW_LENGTH)).time()  # MARKET_OPEN + WINDOW_LENGTH
 
 # API timing for opening price capture
 API_POLL_DELAY_SECONDS = 5     # Poll for opening prices at MARKET_OPEN + 5 seconds
 API_RETRY_DELAY_SECONDS = 30   # Retry failed API calls after 30 seconds
+IEP_POLL_INTERVAL_SECONDS = 1.0  # Re-poll IEP from PREP_START until just before open
+IEP_POLL_STOP_SECONDS = 2      # Last IEP poll starts this many seconds before market open
 
 # Trading parameters
 MAX_POSITIONS = 2              # Maximum concurrent positions
@@ -52,10 +57,24 @@ PAPER_TRADING = True           # Enable paper trading mode
 PAPER_TRADING_LOG_FILE = 'paper_trades.csv'  # Paper trading log file
 TRADE_LOG_DIR = 'trade_logs'   # Directory for trade logs
 
+# Feed recording (raw websocket frames for replay)
+RECORD_FEED = True             # Record every live-feed frame for the session
+FEED_RECORDING_DIR = 'data/feed_recordings'  # One .bin.zst per bot session
+
+# Shared feed hub (one upstream websocket for every bot on the machine)
+USE_FEED_HUB = False           # Subscribe through the hub process, starting it if needed (Unix sockets only)
+FEED_HUB_SOCKET = os.path.join(tempfile.gettempdir(), 'ma_stock_trader_feed_hub.sock')  # Unix socket the hub listens on
+
+# Sharded upstream feed (watchlists larger than one websocket may carry)
+FEED_SHARD_INSTRUMENTS = 2000  # Instruments per websocket connection in 'full' mode
+FEED_MAX_CONNECTIONS = 2       # Websocket connections the account may hold open at once
+
 print("CONFIG: Real market trading configuration loaded")
 print(f"CONFIG: Market open: {MARKET_OPEN}")
 print(f"CONFIG: Entry time: {ENTRY_TIME}")
+print(f"CONFIG: Pre-warm start: {PREWARM_START}")
 print(f"CONFIG: API poll delay: {API_POLL_DELAY_SECONDS} seconds")
+print(f"CONFIG: IEP poll interval: {IEP_POLL_INTERVAL_SECONDS} seconds")
 print(f"CONFIG: Max positions: {MAX_POSITIONS}")
 print(f"CONFIG: Entry SL: {ENTRY_SL_PCT*100}%")
 print(f"CONFIG: Low violation: {LOW_VIOLATION_PCT*100}%")
@@ -6,25 +6,31 @@ Handles pre-market timing logic and coordination for continuation bot
 """
 
 import logging
-import time as time_module
 from datetime import datetime, time
 import pytz
 from typing import Dict, List, Optional
 
+try:
+    from ..clock import SYSTEM_CLOCK
+except ImportError:
+    from clock import SYSTEM_CLOCK
+
 logger = logging.getLogger(__name__)
 
 
 class ContinuationTimingManager:
     """Manages timing coordination for continuation bot pre-market sequence"""
     
-    def __init__(self, config):
+    def __init__(self, config, clock=None):
         """
         Initialize with configuration
         
         Args:
             config: Configuration module with timing settings
+            clock: WallClock (default) or SimulatedClock
         """
         self.config = config
+        self.clock = clock or SYSTEM_CLOCK
         self.IST = pytz.timezone('Asia/Kolkata')
     
     def schedule_iep_fetch(self, symbols: List[str], iep_manager, monitor) -> bool:
@@ -69,12 +75,7 @@ class ContinuationTimingManager:
         # 2. Set opening prices for all stocks
         logger.info("Setting opening prices from IEP...")
         for symbol, iep_price in iep_prices.items():
-            # Find stock by symbol - check both instrument_key and symbol
-            stock = None
-            for s in monitor.stocks.values():
-                if s.symbol == symbol:
-                    stock = s
-                    break
+            stock = monitor.get_stock_by_symbol(symbol)
             
             if stock:
                 stock.set_open_price(iep_price)
@@ -153,20 +154,18 @@ class ContinuationTimingManager:
             True if market opened successfully, False if interrupted
         """
         market_open = self.config.MARKET_OPEN
-        current_time = datetime.now(self.IST).time()
+        current_time = self.clock.now().time()
         
         if current_time >= market_open:
             logger.info("Already past market open time")
             return True
         
-        market_datetime = datetime.combine(datetime.now(self.IST).date(), market_open)
-        market_datetime = self.IST.localize(market_datetime)
-        current_datetime = datetime.now(self.IST)
-        wait_seconds = (market_datetime - current_datetime).total_seconds()
+        market_datetime = self.clock.today_at(market_open)
+        wait_seconds = self.clock.seconds_until(market_datetime)
         
         if wait_seconds > 0:
             logger.info(f"Waiting {wait_seconds:.0f} seconds for market open...")
-            time_module.sleep(wait_seconds)
+            self.clock.sleep_until(market_datetime)
         
         logger.info("MARKET OPEN! Starting live monitoring...")
         return True
@@ -178,8 +177,8 @@ class ContinuationTimingManager:
         Returns:
             Dictionary with time information
         """
-        current_time = datetime.now(self.IST).time()
-        current_datetime = datetime.now(self.IST)
+        current_datetime = self.clock.now()
+        current_time = current_datetime.time()
         
         return {
             'current_time': current_time,
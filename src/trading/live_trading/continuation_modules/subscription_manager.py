@@ -48,25 +48,23 @@ class ContinuationSubscriptionManager:
         Unsubscribe remaining stocks after 2 positions are filled
         Implements first-come-first-serve logic
         """
-        # Count entered positions
-        entered_positions = 0
-        subscribed_stocks = []
-        
-        for stock in self.monitor.stocks.values():
-            if stock.instrument_key in self.subscribed_keys:
-                subscribed_stocks.append(stock)
-                if stock.entered:
-                    entered_positions += 1
-        
+        # Runs after every tick: the monitor's index keeps this O(1) until two positions are in
+        index = self.monitor.index
+        if index.entered_count < 2 or len(self.subscribed_keys) <= 2:
+            return
+
+        subscribed_keys = index.ordered(self.subscribed_keys)
+        entered_keys = index.entered.intersection(subscribed_keys)
+
         # If we have 2 entered positions and more than 2 subscribed stocks,
         # unsubscribe the remaining ones
-        if entered_positions >= 2 and len(subscribed_stocks) > 2:
-            remaining_stocks = [stock for stock in subscribed_stocks if not stock.entered]
+        if len(entered_keys) >= 2 and len(subscribed_keys) > 2:
+            remaining_keys = [key for key in subscribed_keys if key not in entered_keys]
             
-            if remaining_stocks:
-                remaining_keys = [stock.instrument_key for stock in remaining_stocks]
+            if remaining_keys:
+                remaining_symbols = [self.monitor.stocks[key].symbol for key in remaining_keys]
                 logger.info(f"\n=== UNSUBSCRIBING REMAINING STOCKS AFTER 2 POSITIONS FILLED ===")
-                logger.info(f"Unsubscribing {len(remaining_stocks)} remaining stocks: {[s.symbol for s in remaining_stocks]}")
+                logger.info(f"Unsubscribing {len(remaining_keys)} remaining stocks: {remaining_symbols}")
                 
                 self.safe_unsubscribe(remaining_keys, "positions_filled")
                 self.mark_stocks_unsubscribed(remaining_keys)
@@ -159,18 +157,18 @@ class ContinuationSubscriptionManager:
         """
         low_volume_failed = []
         
-        for stock in self.monitor.stocks.values():
-            if stock.instrument_key in self.subscribed_keys:
-                # Check if stock failed low violation check
-                low_failed = stock.low_violation_checked and not stock.is_active
-                
-                # Check if stock failed volume validation (continuation only)
-                volume_failed = False
-                if stock.situation == 'continuation':
-                    volume_failed = stock.volume_validated and not stock.is_active
-                
-                if low_failed or volume_failed:
-                    low_volume_failed.append(stock)
+        # Only stocks rejected so far can have failed (index of inactive stocks, not a full scan)
+        index = self.monitor.index
+        for key in index.ordered(index.inactive & self.subscribed_keys):
+            stock = self.monitor.stocks[key]
+            # Check if stock failed low violation check
+            low_failed = stock.low_violation_checked
+            
+            # Check if stock failed volume validation (continuation only)
+            volume_failed = stock.situation == 'continuation' and stock.volume_validated
+            
+            if low_failed or volume_failed:
+                low_volume_failed.append(stock)
         
         if low_volume_failed:
             failed_keys = [stock.instrument_key for stock in low_volume_failed]
@@ -22,6 +22,11 @@ from config import (
     FLAT_GAP_THRESHOLD,
     ENTRY_TIME
 )
+from clock import SYSTEM_CLOCK, IST
+from stock_index import StockIndex, indexed_flag, INDEXED_FLAGS, NO_HIGH, NO_LOW
+
+# Lifecycle flags a stock must pass to qualify (volume only for continuation)
+QUALIFICATION_FLAGS = ('gap_validated', 'low_violation_checked', 'volume_validated')
 
 logger = logging.getLogger(__name__)
 
@@ -29,7 +34,30 @@ logger = logging.getLogger(__name__)
 class StockState:
     """Tracks the state of a single stock during trading session"""
 
+    # Fixed attribute slots keep per-stock memory and attribute access flat for
+    # large watchlists; __dict__ is only materialised for ad-hoc attributes
+    __slots__ = (
+        '_index', 'symbol', 'instrument_key', 'previous_close', 'situation',
+        'open_price', 'current_price', 'daily_high', 'daily_low', 'last_update',
+        '_is_active', '_is_subscribed', '_entered', '_gap_validated',
+        '_low_violation_checked', '_volume_validated', 'entry_ready', 'entry_logged',
+        'oops_triggered', 'strong_start_triggered',
+        'early_volume', 'initial_volume', 'volume_baseline', 'vah_price',
+        'entry_high', 'entry_sl', 'entry_time_reached',
+        'entry_price', 'entry_time', 'exit_price', 'exit_time', 'pnl',
+        'rejection_reason', '__dict__',
+    )
+
+    # Flags mirrored into the monitor's StockIndex on every change
+    is_active = indexed_flag('is_active')
+    is_subscribed = indexed_flag('is_subscribed')
+    entered = indexed_flag('entered')
+    gap_validated = indexed_flag('gap_validated')
+    low_violation_checked = indexed_flag('low_violation_checked')
+    volume_validated = indexed_flag('volume_validated')
+
     def __init__(self, symbol: str, instrument_key: str, previous_close: float, situation: str = 'continuation'):
+        self._index = None  # Set by StockIndex.add
         self.symbol = symbol
         self.instrument_key = instrument_key
         self.previous_close = previous_close
@@ -39,8 +67,8 @@ class StockState:
         # Market data
         self.open_price: Optional[float] = None
         self.current_price: Optional[float] = None
-        self.daily_high: float = float('-inf')
-        self.daily_low: float = float('inf')
+        self.daily_high: float = NO_HIGH
+        self.daily_low: float = NO_LOW
         self.last_update: Optional[datetime] = None
 
         # Status flags
@@ -224,8 +252,8 @@ class StockState:
         logger.info(f"[{self.symbol}] Volume: {volume_ratio:.1%} ({cumulative_vol_str}) >= {min_ratio:.1%} of ({baseline_vol_str})")
         return True
 
-    def prepare_entry(self):
-        """Called at 9:20 to set entry levels"""
+    def prepare_entry(self, current_time: Optional[time] = None):
+        """Called at 9:20 to set entry levels (current_time: IST time of day, default now)"""
         if not self.is_active:
             return
 
@@ -238,7 +266,8 @@ class StockState:
         # CRITICAL FIX: Only set entry_ready = True if entry time has been reached
         # This prevents entries from happening before 11:16:00
         from config import ENTRY_TIME
-        current_time = datetime.now().time()
+        if current_time is None:
+            current_time = SYSTEM_CLOCK.now().time()
         
         if current_time >= ENTRY_TIME:
             self.entry_time_reached = True
@@ -311,11 +340,24 @@ class StockState:
 
 
 class StockMonitor:
-    """Manages monitoring of multiple stocks"""
-
-    def __init__(self):
+    """
+    Registry of monitored stocks
+
+    Stocks are looked up by instrument key (stocks) or symbol (by_symbol).
+    Membership per lifecycle stage (active, gap validated, low checked,
+    volume validated, entered, subscribed) lives in the StockIndex the
+    stocks update themselves, and the active / qualified lists are cached
+    until the next transition. Qualification status logging is a separate
+    on-demand report (log_qualification_report).
+    """
+
+    def __init__(self, clock=None):
         self.stocks: Dict[str, StockState] = {}  # instrument_key -> StockState
+        self.by_symbol: Dict[str, StockState] = {}  # symbol -> StockState
+        self.index = StockIndex(INDEXED_FLAGS + QUALIFICATION_FLAGS)  # Keys by flag, kept current by the stocks themselves
+        self._snapshots = {}  # name -> (index version, list)
         self.session_start_time = None
+        self.clock = clock or SYSTEM_CLOCK  # WallClock live, SimulatedClock for replay/simulation
 
     def add_stock(self, symbol: str, instrument_key: str, previous_close: float, situation: str = 'continuation'):
         """Add a stock to monitor"""
@@ -323,55 +365,69 @@ class StockMonitor:
             logger.warning(f"Stock {symbol} already being monitored")
             return
 
-        self.stocks[instrument_key] = StockState(symbol, instrument_key, previous_close, situation)
+        stock = StockState(symbol, instrument_key, previous_close, situation)
+        self.stocks[instrument_key] = stock
+        self.by_symbol.setdefault(symbol, stock)
+        self.index.add(stock)
         logger.info(f"Added {symbol} ({situation}) to monitor (prev close: {previous_close:.2f})")
 
     def remove_stock(self, instrument_key: str):
         """Remove a stock from monitoring"""
         if instrument_key in self.stocks:
-            symbol = self.stocks[instrument_key].symbol
-            del self.stocks[instrument_key]
-            logger.info(f"Removed {symbol} from monitor")
+            stock = self.stocks.pop(instrument_key)
+            if self.by_symbol.get(stock.symbol) is stock:
+                del self.by_symbol[stock.symbol]
+            self.index.remove(stock)
+            logger.info(f"Removed {stock.symbol} from monitor")
+
+    def get_stock_by_symbol(self, symbol: str) -> Optional[StockState]:
+        """Monitored stock for a trading symbol (first added wins, like a scan of stocks)"""
+        return self.by_symbol.get(symbol)
+
+    def _snapshot(self, name: str, build) -> List[StockState]:
+        """List from build(), rebuilt only after a stock changes lifecycle stage"""
+        version = self.index.version
+        cached = self._snapshots.get(name)
+        if cached is None or cached[0] != version:
+            cached = self._snapshots[name] = (version, build())
+        return list(cached[1])
 
     def get_active_stocks(self) -> List[StockState]:
         """Get list of currently active stocks"""
-        return [stock for stock in self.stocks.values() if stock.is_active]
+        return self._snapshot('active', lambda: [self.stocks[key] for key in self.index.ordered(self.index.active)])
+
+    def _build_qualified(self) -> List[StockState]:
+        # For SVRO continuation all 4 conditions must be met; reversals need only gap and low
+        keys = self.index.with_flags('is_active', 'gap_validated', 'low_violation_checked')
+        volume_validated = self.index.flags['volume_validated']
+        return [self.stocks[key] for key in self.index.ordered(keys)
+                if self.stocks[key].situation != 'continuation' or key in volume_validated]
 
     def get_qualified_stocks(self) -> List[StockState]:
         """Get stocks that passed all checks and are ready for selection"""
-        qualified = []
-        rejected = []
+        return self._snapshot('qualified', self._build_qualified)
 
-        for stock in self.stocks.values():
-            # For SVRO continuation: all 4 conditions must be met
-            if stock.situation == 'continuation':
-                if (stock.is_active and stock.gap_validated and
-                    stock.low_violation_checked and stock.volume_validated):
-                    qualified.append(stock)
-                else:
-                    rejected.append(stock)
-            else:
-                # For reversals: only gap and low violation required
-                if stock.is_active and stock.gap_validated and stock.low_violation_checked:
-                    qualified.append(stock)
-                else:
-                    rejected.append(stock)
+    def qualification_report(self) -> List[str]:
+        """Qualification status lines for every stock (qualified list, per-stock checks, summary)"""
+        qualified = self.get_qualified_stocks()
+        lines = []
 
-        # Log qualified stocks
+        # Qualified stocks
         if qualified:
             # Determine system name based on trading situation
             system_name = "SVRO" if qualified[0].situation == 'continuation' else "SS"
-            logger.info(f"QUALIFIED STOCKS ({len(qualified)}) - {system_name}:")
+            lines.append(f"QUALIFIED STOCKS ({len(qualified)}) - {system_name}:")
             for stock in qualified:
                 gap_pct = ((stock.open_price - stock.previous_close) / stock.previous_close) if stock.open_price and stock.previous_close else 0
                 entry_high = stock.entry_high if stock.entry_high else 0
                 entry_sl = stock.entry_sl if stock.entry_sl else 0
-                logger.info(f"   {stock.symbol}: Gap {gap_pct:+.1f}%, Entry: Rs{entry_high:.2f}, SL: Rs{entry_sl:.2f}")
+                lines.append(f"   {stock.symbol}: Gap {gap_pct:+.1f}%, Entry: Rs{entry_high:.2f}, SL: Rs{entry_sl:.2f}")
 
-        # Log ALL stocks with detailed status (including rejected)
+        # ALL stocks with detailed status (including rejected)
         # Determine system name based on first stock's situation
-        system_name = "SVRO" if self.stocks and list(self.stocks.values())[0].situation == 'continuation' else "SS"
-        logger.info(f"STOCK QUALIFICATION STATUS ({len(self.stocks)} total) - {system_name}:")
+        system_name = "SVRO" if self.stocks and next(iter(self.stocks.values())).situation == 'continuation' else "SS"
+        lines.append(f"STOCK QUALIFICATION STATUS ({len(self.stocks)} total) - {system_name}:")
+        stock_scorer = None
         for stock in self.stocks.values():
             status_parts = []
 
@@ -400,7 +456,6 @@ class StockMonitor:
 
             # Volume validation status with detailed information
             if stock.volume_validated:
-                # Format volume information for display using stock's method
                 # Use early_volume directly as cumulative volume (simplified approach)
                 cumulative_volume = stock.early_volume
                 cumulative_vol_str = stock._format_volume(cumulative_volume)
@@ -410,12 +465,11 @@ class StockMonitor:
                 # If volume_baseline is 0 or the fallback value, try to get it from stock_scorer metadata
                 if volume_baseline <= 0 or volume_baseline == 1000000:
                     try:
-                        import sys
-                        import os
-                        parent_dir = os.path.dirname(os.path.dirname(__file__))
-                        if parent_dir not in sys.path:
-                            sys.path.insert(0, parent_dir)
-                        from src.trading.live_trading.stock_scorer import stock_scorer
+                        if stock_scorer is None:
+                            parent_dir = os.path.dirname(os.path.dirname(__file__))
+                            if parent_dir not in sys.path:
+                                sys.path.insert(0, parent_dir)
+                            from src.trading.live_trading.stock_scorer import stock_scorer
                         metadata = stock_scorer.stock_metadata.get(stock.symbol, {})
                         volume_baseline = metadata.get('volume_baseline', 1000000)
                         stock.volume_baseline = volume_baseline  # Update the stored value
@@ -437,12 +491,17 @@ class StockMonitor:
             else:
                 overall = "REJECTED"
 
-            logger.info(f"   {stock.symbol}: {overall}")
+            lines.append(f"   {stock.symbol}: {overall}")
             for part in status_parts:
-                logger.info(f"      {part}")
+                lines.append(f"      {part}")
+
+        lines.append(f"SUMMARY: {len(qualified)} qualified, {len(self.stocks) - len(qualified)} rejected")
+        return lines
 
-        logger.info(f"SUMMARY: {len(qualified)} qualified, {len(rejected)} rejected")
-        return qualified
+    def log_qualification_report(self):
+        """Log the qualification report (call when the status is wanted, e.g. at entry time)"""
+        for line in self.qualification_report():
+            logger.info(line)
 
     def process_candle_data(self, instrument_key: str, symbol: str, ohlc_list: list):
         """Process 1-minute candle data for continuation stocks - only track high/low, opening price already set from IEP"""
@@ -467,7 +526,7 @@ class StockMonitor:
             if isinstance(candle_data, dict) and candle_data.get('interval') == 'I1':
                 # Get candle timestamp
                 ts_ms = int(candle_data.get('ts', 0))
-                candle_time = datetime.fromtimestamp(ts_ms / 1000)
+                candle_time = datetime.fromtimestamp(ts_ms / 1000, IST).replace(tzinfo=None)
 
                 # Calculate expected OHLC time: MARKET_OPEN + 1 minute
                 from config import MARKET_OPEN
@@ -520,8 +579,14 @@ class StockMonitor:
             if stock.gap_validated and not stock.low_violation_checked and stock.open_price:
                 stock.check_low_violation()
 
-    def check_volume_validations(self):
-        """Check volume validations for continuation stocks that haven't been checked yet"""
+    def check_volume_validations(self, volumes: Dict[str, float] = None):
+        """
+        Check volume validations for continuation stocks that haven't been checked yet
+
+        Args:
+            volumes: Cumulative volume by symbol to validate against instead of
+                     a live snapshot (e.g. feed volumes during replay)
+        """
         # Lazy import to avoid circular dependencies
         import sys
         import os
@@ -532,46 +597,71 @@ class StockMonitor:
 
         # DIRECT VOLUME VALIDATION - No timing logic needed
         # Just check volume for any qualified stocks that haven't been validated yet
-        for stock in self.get_active_stocks():
-            if (stock.situation == 'continuation' and stock.gap_validated and
-                stock.low_violation_checked and not stock.volume_validated):
-                
-                # Get current volume using the volume-only method
-                try:
-                    current_volume = upstox_fetcher.get_current_volume(stock.symbol)
-                    if current_volume > 0:
-                        # Use current volume directly as cumulative volume (simplified approach)
-                        # Since daily volume starts at 0, current_volume IS the cumulative volume for the session
-                        cumulative_volume = current_volume
-                        
-                        # Use the pre-loaded volume baseline from run_continuation.py
-                        volume_baseline = stock.volume_baseline
-                        
-                        # CRITICAL: If baseline is still 0 or default, show ERROR instead of using fallback
-                        if volume_baseline <= 0 or volume_baseline == 1000000:
-                            logger.error(f"ERROR: No valid volume baseline for {stock.symbol}")
-                            logger.error(f"   stock.volume_baseline = {volume_baseline}")
-                            logger.error(f"   This should have been set during PREP time")
-                            stock.reject("Volume baseline not available - check PREP time loading")
-                            continue
-                        
-                        # Set the cumulative volume (this is the current volume since market open)
-                        stock.early_volume = cumulative_volume
-                        
-                        # Validate volume
-                        stock.validate_volume(volume_baseline)
-                        
-                        # Log the volume validation result for debugging
-                        volume_ratio = (cumulative_volume / volume_baseline * 100) if volume_baseline > 0 else 0
-                        logger.info(f"[{stock.symbol}] Volume validation: {volume_ratio:.1f}% ({cumulative_volume:,.0f}) vs baseline {volume_baseline:,.0f}")
-                        
-                    else:
-                        logger.warning(f"No volume data for {stock.symbol}")
-                        stock.reject("No volume data available")
-                        
-                except Exception as e:
-                    logger.error(f"Error validating volume for {stock.symbol}: {e}")
-                    stock.reject("Volume validation error")
+        index = self.index
+        pending_keys = index.with_flags('is_active', 'gap_validated', 'low_violation_checked') - index.flags['volume_validated']
+        pending_stocks = [self.stocks[key] for key in index.ordered(pending_keys)
+                          if self.stocks[key].situation == 'continuation']
+        if not pending_stocks:
+            return
+
+        # Fetch volumes for all pending stocks in one batched snapshot so every
+        # validation uses the same point in time (no serial per-stock staleness)
+        if volumes is None:
+            try:
+                volumes, snapshot_time = upstox_fetcher.get_volume_snapshot([stock.symbol for stock in pending_stocks])
+                logger.info(f"Volume snapshot taken at {snapshot_time.strftime('%H:%M:%S')} for {len(pending_stocks)} stocks")
+            except Exception as e:
+                logger.error(f"Error fetching volume snapshot: {e}")
+                volumes = {}
+
+            # A failed chunk must not reject its stocks: fetch the missing ones
+            # individually; a stock whose fetch fails stays pending for the next check
+            unavailable = set()
+            for stock in pending_stocks:
+                if stock.symbol not in volumes:
+                    try:
+                        volumes[stock.symbol] = upstox_fetcher.get_current_volume(stock.symbol, raise_on_error=True)
+                    except Exception as e:
+                        logger.error(f"Error fetching volume for {stock.symbol}: {e}")
+                        unavailable.add(stock.symbol)
+            pending_stocks = [stock for stock in pending_stocks if stock.symbol not in unavailable]
+
+        for stock in pending_stocks:
+            try:
+                current_volume = volumes.get(stock.symbol, 0.0)
+                if current_volume > 0:
+                    # Use current volume directly as cumulative volume (simplified approach)
+                    # Since daily volume starts at 0, current_volume IS the cumulative volume for the session
+                    cumulative_volume = current_volume
+                    
+                    # Use the pre-loaded volume baseline from run_continuation.py
+                    volume_baseline = stock.volume_baseline
+                    
+                    # CRITICAL: If baseline is still 0 or default, show ERROR instead of using fallback
+                    if volume_baseline <= 0 or volume_baseline == 1000000:
+                        logger.error(f"ERROR: No valid volume baseline for {stock.symbol}")
+                        logger.error(f"   stock.volume_baseline = {volume_baseline}")
+                        logger.error(f"   This should have been set during PREP time")
+                        stock.reject("Volume baseline not available - check PREP time loading")
+                        continue
+                    
+                    # Set the cumulative volume (this is the current volume since market open)
+                    stock.early_volume = cumulative_volume
+                    
+                    # Validate volume
+                    stock.validate_volume(volume_baseline)
+                    
+                    # Log the volume validation result for debugging
+                    volume_ratio = (cumulative_volume / volume_baseline * 100) if volume_baseline > 0 else 0
+                    logger.info(f"[{stock.symbol}] Volume validation: {volume_ratio:.1f}% ({cumulative_volume:,.0f}) vs baseline {volume_baseline:,.0f}")
+                    
+                else:
+                    logger.warning(f"No volume data for {stock.symbol}")
+                    stock.reject("No volume data available")
+                    
+            except Exception as e:
+                logger.error(f"Error validating volume for {stock.symbol}: {e}")
+                stock.reject("Volume validation error")
 
     def accumulate_volume(self, instrument_key: str, volume: float):
         """Accumulate volume during market hours using the new volume-only method"""
@@ -579,7 +669,7 @@ class StockMonitor:
             return
 
         stock = self.stocks[instrument_key]
-        current_time = datetime.now().time()
+        current_time = self.clock.now().time()
 
         # Only accumulate volume during the monitoring window
         if MARKET_OPEN <= current_time <= ENTRY_TIME:
@@ -587,8 +677,9 @@ class StockMonitor:
 
     def prepare_entries(self):
         """Called at 9:20 to prepare entry levels"""
+        current_time = self.clock.now().time()
         for stock in self.get_qualified_stocks():
-            stock.prepare_entry()
+            stock.prepare_entry(current_time)
 
     def check_entry_signals(self) -> List[StockState]:
         """Check for entry signals on all qualified stocks"""
@@ -614,8 +705,8 @@ class StockMonitor:
         """Get summary of all stocks"""
         return {
             'total_stocks': len(self.stocks),
-            'active_stocks': len(self.get_active_stocks()),
+            'active_stocks': len(self.index.active),
             'qualified_stocks': len(self.get_qualified_stocks()),
-            'entered_positions': len([s for s in self.stocks.values() if s.entered]),
+            'entered_positions': self.index.entered_count,
             'stock_details': {k: v.get_status() for k, v in self.stocks.items()}
         }
\ No newline at end of file
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Protobuf Feed Decoder for the Market Data Streamer
+Parses raw MarketDataFeedV3 FeedResponse bytes straight into tick tuples,
+skipping the SDK's MessageToDict conversion
+"""
+
+from typing import Dict, List, Tuple
+
+try:
+    from .MarketDataFeedV3_pb2 import FeedResponse
+except ImportError:
+    from MarketDataFeedV3_pb2 import FeedResponse
+
+# (instrument_key, symbol, ltp, ltt_ms, vtt, ohlc_list)
+Tick = Tuple[str, str, float, int, int, list]
+
+
+class FeedDecoder:
+    """
+    Decodes FeedResponse bytes for the subscribed instruments
+
+    Only the fields the bots use are read: ltp, ltt, vtt and the 1-minute
+    (I1) OHLC candles. Candles are handed on as dicts with the same keys the
+    dict path produces ('interval', 'open', 'high', 'low', 'close', 'vol',
+    'ts') so tick handlers work unchanged.
+    """
+
+    def __init__(self, stock_symbols: Dict[str, str]):
+        self.stock_symbols = stock_symbols
+        # Reused for every message - ParseFromString clears it first
+        self._response = FeedResponse()
+
+    def decode(self, payload: bytes) -> List[Tick]:
+        """Parse one websocket message into ticks for known instruments with a price"""
+        response = self._response
+        response.ParseFromString(payload)
+
+        ticks = []
+        stock_symbols = self.stock_symbols
+        for instrument_key, feed in response.feeds.items():
+            symbol = stock_symbols.get(instrument_key)
+            if symbol is None:
+                continue
+
+            kind = feed.WhichOneof('FeedUnion')
+            if kind == 'fullFeed':
+                full_feed = feed.fullFeed
+                if full_feed.WhichOneof('FullFeedUnion') != 'marketFF':
+                    continue
+                market_ff = full_feed.marketFF
+                ltpc = market_ff.ltpc
+                vtt = market_ff.vtt
+                ohlc_list = [{'interval': 'I1', 'open': c.open, 'high': c.high, 'low': c.low,
+                              'close': c.close, 'vol': c.vol, 'ts': c.ts}
+                             for c in market_ff.marketOHLC.ohlc if c.interval == 'I1']
+            elif kind == 'ltpc':
+                ltpc = feed.ltpc
+                vtt = 0
+                ohlc_list = []
+            else:
+                continue
+
+            ltp = ltpc.ltp
+            if not ltp:
+                continue
+            ticks.append((instrument_key, symbol, ltp, ltpc.ltt, vtt, ohlc_list))
+
+        return ticks
@@ -0,0 +1,669 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Shared Market Data Feed Hub
+One local process holds the upstream Upstox websocket(s) for every bot,
+reference-counts instrument subscriptions from its clients and fans each raw
+feed frame out over a Unix socket, filtered to what each client subscribed
+
+The hub exits when its last client has been gone for FEED_HUB_IDLE_SECONDS,
+at FEED_HUB_SESSION_END, or when the access token in upstox_config.json
+changes; the bots restart it on their next (re)connect.
+
+Needs Unix domain sockets (Linux / macOS); where they are missing the bots
+connect directly.
+
+Usage:
+    python src/trading/live_trading/feed_hub.py            # started on demand by the bots
+    python src/trading/live_trading/feed_hub.py --socket /tmp/other_feed_hub.sock
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import socket
+import struct
+import logging
+import argparse
+import tempfile
+import threading
+import subprocess
+from collections import deque
+from datetime import datetime, timedelta, time as dt_time
+from typing import Dict, Iterable, List, Optional, Set
+import pytz
+
+try:
+    from .MarketDataFeedV3_pb2 import FeedResponse
+except ImportError:
+    from MarketDataFeedV3_pb2 import FeedResponse
+
+logger = logging.getLogger(__name__)
+IST = pytz.timezone('Asia/Kolkata')
+
+FEED_HUB_SOCKET = os.path.join(tempfile.gettempdir(), 'ma_stock_trader_feed_hub.sock')
+
+# Message header: payload length (u32), kind (u8)
+MESSAGE_HEADER = struct.Struct('<IB')
+
+# Message kinds
+MSG_HELLO = 0        # client -> hub: {"name": ...}
+MSG_SUBSCRIBE = 1    # client -> hub: {"keys": [...], "mode": "full"}
+MSG_UNSUBSCRIBE = 2  # client -> hub: {"keys": [...]}
+MSG_FEED = 3         # hub -> client: raw FeedResponse bytes
+MSG_STATUS = 4       # client -> hub: {} ; hub -> client: {"token": ..., "pid": ..., ...}
+MSG_SHUTDOWN = 5     # client -> hub: stop now (hub holds an outdated access token)
+
+# Frames queued per client before the oldest are dropped (a stalled bot never blocks the feed)
+CLIENT_QUEUE_FRAMES = 10000
+
+# Hub lifetime: exit this long after the last client leaves, and at the end of the session
+FEED_HUB_IDLE_SECONDS = 120
+FEED_HUB_SESSION_END = dt_time(15, 35)
+
+
+def token_fingerprint(token: Optional[str]) -> Optional[str]:
+    """Short hash identifying an access token without exposing it in the hub status"""
+    if not token:
+        return None
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()[:16]
+
+
+def _config_file(config_file: Optional[str] = None) -> str:
+    if config_file:
+        return config_file
+    try:
+        from .simple_data_streamer import UPSTOX_CONFIG_FILE
+    except ImportError:
+        from simple_data_streamer import UPSTOX_CONFIG_FILE
+    return UPSTOX_CONFIG_FILE
+
+
+def current_token_fingerprint(config_file: Optional[str] = None) -> Optional[str]:
+    """Fingerprint of the access token in upstox_config.json (None if unreadable)"""
+    try:
+        with open(_config_file(config_file), 'r') as f:
+            return token_fingerprint(json.load(f).get('access_token'))
+    except (OSError, ValueError):
+        return None
+
+
+def send_message(sock: socket.socket, kind: int, payload: bytes = b''):
+    sock.sendall(MESSAGE_HEADER.pack(len(payload), kind) + payload)
+
+
+def read_message(reader) -> Optional[tuple]:
+    """(kind, payload) from a socket makefile('rb'), or None at end of stream"""
+    header = reader.read(MESSAGE_HEADER.size)
+    if len(header) < MESSAGE_HEADER.size:
+        return None
+    length, kind = MESSAGE_HEADER.unpack(header)
+    payload = reader.read(length) if length else b''
+    if len(payload) < length:
+        return None
+    return kind, payload
+
+
+class _HubClient:
+    """Hub-side state for one connected bot: its subscriptions and outgoing frame queue"""
+
+    def __init__(self, sock: socket.socket, client_id: int):
+        self.sock = sock
+        self.client_id = client_id
+        self.name = f"client-{client_id}"
+        self.subscriptions: Set[str] = set()
+        self.queue = deque()
+        self.cond = threading.Condition()
+        self.send_lock = threading.Lock()  # Writer thread and status replies share the socket
+        self.closed = False
+        self.sent = 0
+        self.dropped = 0
+
+    def enqueue(self, payload: bytes):
+        with self.cond:
+            if len(self.queue) >= CLIENT_QUEUE_FRAMES:
+                self.queue.popleft()
+                self.dropped += 1
+                if self.dropped == 1 or self.dropped % 1000 == 0:
+                    logger.warning(f"Feed hub: {self.name} is not keeping up - dropped {self.dropped} frame(s)")
+            self.queue.append(payload)
+            self.cond.notify()
+
+    def write_loop(self):
+        """Writer thread: send queued frames until the client goes away"""
+        while True:
+            with self.cond:
+                while not self.queue and not self.closed:
+                    self.cond.wait()
+                if self.closed:
+                    return
+                payload = self.queue.popleft()
+            try:
+                self.send(MSG_FEED, payload)
+                self.sent += 1
+            except OSError:
+                self.close()
+                return
+
+    def send(self, kind: int, payload: bytes = b''):
+        with self.send_lock:
+            send_message(self.sock, kind, payload)
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify()
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+
+class FeedHub:
+    """
+    Local feed hub: one upstream feed (sharded over connections), many client bots
+
+    Each instrument is subscribed upstream when its first client subscribes
+    and unsubscribed when its last client releases it (unsubscribe or
+    disconnect), so overlapping symbols cost one upstream subscription.
+    broadcast() runs on the upstream websocket threads (one per shard): it
+    parses each frame once and queues either the raw bytes (client wants every instrument in
+    it) or a re-serialized subset, so every bot only sees its own instruments.
+
+    The upstream connects with the access token current at start; status
+    replies carry its fingerprint so clients never attach to a hub streaming
+    on yesterday's token. serve_forever() returns once lifetime_expired()
+    gives a reason (idle, end of session, token changed).
+
+    Args:
+        socket_path: Unix socket to listen on
+        upstream: Object with add_instruments(keys) / remove_instruments(keys)
+                  that calls broadcast() with raw frames (default: create_upstream())
+        idle_timeout: Seconds without clients before the hub exits
+        session_end: Time of day (IST) at which the hub exits
+        config_file: upstox_config.json to take the access token from (default: the bots' file)
+    """
+
+    def __init__(self, socket_path: str = FEED_HUB_SOCKET, upstream=None,
+                 idle_timeout: float = FEED_HUB_IDLE_SECONDS, session_end: dt_time = FEED_HUB_SESSION_END,
+                 config_file: str = None):
+        self.socket_path = socket_path
+        self.upstream = upstream
+        self.idle_timeout = idle_timeout
+        self.session_end = session_end
+        self.config_file = _config_file(config_file)
+        self.token = None  # Fingerprint of the access token the upstream connected with
+        self.idle_since = None  # When the last client left (or the hub started)
+        self.stop_at = None  # First session end after start (timestamp)
+        self.stop_reason = None
+        self._config_mtime = None
+        self.refcounts: Dict[str, int] = {}
+        self.clients: Dict[int, _HubClient] = {}
+        self._lock = threading.Lock()
+        self._server = None
+        self._next_client_id = 1
+        self._stopped = threading.Event()
+        self._parse = threading.local()  # One FeedResponse per upstream shard thread
+
+        self.frames_received = 0
+        self.frames_sent = 0
+
+    def start(self):
+        """Listen on the socket and connect upstream"""
+        if os.path.exists(self.socket_path):
+            if feed_hub_running(self.socket_path):
+                raise RuntimeError(f"A feed hub is already listening on {self.socket_path}")
+            os.remove(self.socket_path)
+
+        self.token = current_token_fingerprint(self.config_file)
+        self._config_mtime = self._read_config_mtime()
+        self.idle_since = time.time()
+        now = datetime.now(IST)
+        session_end = IST.localize(datetime.combine(now.date(), self.session_end))
+        if session_end <= now:
+            session_end += timedelta(days=1)
+        self.stop_at = session_end.timestamp()
+
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._server.bind(self.socket_path)
+        self._server.listen(16)
+        threading.Thread(target=self._accept_loop, name="feed-hub-accept", daemon=True).start()
+
+        if self.upstream is None:
+            self.upstream = create_upstream(self)
+            self.upstream.connect()
+        logger.info(f"Feed hub listening on {self.socket_path}")
+
+    def serve_forever(self):
+        self.start()
+        try:
+            while not self._stopped.wait(1):
+                reason = self.lifetime_expired()
+                if reason:
+                    self.stop_reason = reason
+                    logger.info(f"Feed hub stopping: {reason}")
+                    break
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def _read_config_mtime(self) -> Optional[float]:
+        try:
+            return os.path.getmtime(self.config_file)
+        except OSError:
+            return None
+
+    def lifetime_expired(self, now: float = None) -> Optional[str]:
+        """Why the hub should exit now, or None to keep serving"""
+        now = time.time() if now is None else now
+        with self._lock:
+            idle_since = None if self.clients else self.idle_since
+        if idle_since is not None and now - idle_since >= self.idle_timeout:
+            return f"no clients for {self.idle_timeout:g}s"
+        if self.stop_at is not None and now >= self.stop_at:
+            return "end of session"
+
+        # Tokens are refreshed daily: exit so the bots restart the hub on the new token
+        mtime = self._read_config_mtime()
+        if mtime != self._config_mtime:
+            self._config_mtime = mtime
+            token = current_token_fingerprint(self.config_file)
+            if token is not None and token != self.token:
+                return "access token changed"
+        return None
+
+    def status(self) -> Dict:
+        """Status reply for clients deciding whether to reuse this hub"""
+        with self._lock:
+            return {'token': self.token, 'pid': os.getpid(), 'clients': len(self.clients),
+                    'instruments': len(self.refcounts)}
+
+    def stop(self):
+        self._stopped.set()
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+            try:
+                os.remove(self.socket_path)
+            except OSError:
+                pass
+        for client in list(self.clients.values()):
+            client.close()
+        if self.upstream is not None and hasattr(self.upstream, 'disconnect'):
+            self.upstream.disconnect()
+
+    def _accept_loop(self):
+        while not self._stopped.is_set():
+            try:
+                sock, _ = self._server.accept()
+            except OSError:
+                return
+            with self._lock:
+                client = _HubClient(sock, self._next_client_id)
+                self._next_client_id += 1
+                self.clients[client.client_id] = client
+            threading.Thread(target=client.write_loop, name=f"feed-hub-write-{client.client_id}", daemon=True).start()
+            threading.Thread(target=self._read_loop, args=(client,), name=f"feed-hub-read-{client.client_id}",
+                             daemon=True).start()
+
+    def _read_loop(self, client: _HubClient):
+        """Handle one client's hello / subscribe / unsubscribe messages until it disconnects"""
+        reader = client.sock.makefile('rb')
+        try:
+            while True:
+                message = read_message(reader)
+                if message is None:
+                    break
+                kind, payload = message
+                request = json.loads(payload) if payload else {}
+                if kind == MSG_HELLO:
+                    client.name = request.get('name') or client.name
+                    logger.info(f"Feed hub: {client.name} connected")
+                elif kind == MSG_SUBSCRIBE:
+                    self.subscribe(client, request.get('keys', []))
+                elif kind == MSG_UNSUBSCRIBE:
+                    self.unsubscribe(client, request.get('keys', []))
+                elif kind == MSG_STATUS:
+                    client.send(MSG_STATUS, json.dumps(self.status()).encode('utf-8'))
+                elif kind == MSG_SHUTDOWN:
+                    logger.info(f"Feed hub: shutdown requested by {client.name}")
+                    self.stop_reason = "shutdown requested"
+                    threading.Thread(target=self.stop, name="feed-hub-stop", daemon=True).start()
+        except (OSError, ValueError) as e:
+            if not self._stopped.is_set():
+                logger.warning(f"Feed hub: {client.name} read error: {e}")
+        finally:
+            reader.close()
+            self._release(client)
+
+    def subscribe(self, client: _HubClient, keys: Iterable[str]):
+        """Add keys to a client; subscribe upstream the ones no other client holds"""
+        added = []
+        with self._lock:
+            for key in keys:
+                if key in client.subscriptions:
+                    continue
+                client.subscriptions.add(key)
+                count = self.refcounts.get(key, 0)
+                self.refcounts[key] = count + 1
+                if count == 0:
+                    added.append(key)
+        if added:
+            self.upstream.add_instruments(added)
+        logger.info(f"Feed hub: {client.name} subscribed {len(client.subscriptions)} "
+                    f"({len(added)} new upstream, {len(self.refcounts)} total)")
+
+    def unsubscribe(self, client: _HubClient, keys: Iterable[str]):
+        """Remove keys from a client; unsubscribe upstream the ones no client holds any more"""
+        removed = []
+        with self._lock:
+            for key in keys:
+                if key not in client.subscriptions:
+                    continue
+                client.subscriptions.discard(key)
+                count = self.refcounts.get(key, 0) - 1
+                if count <= 0:
+                    self.refcounts.pop(key, None)
+                    removed.append(key)
+                else:
+                    self.refcounts[key] = count
+        if removed:
+            self.upstream.remove_instruments(removed)
+
+    def _release(self, client: _HubClient):
+        """Client disconnected: drop all of its subscriptions"""
+        self.unsubscribe(client, list(client.subscriptions))
+        with self._lock:
+            self.clients.pop(client.client_id, None)
+            if not self.clients:
+                self.idle_since = time.time()
+        client.close()
+        logger.info(f"Feed hub: {client.name} disconnected ({client.sent:,} frames sent, {client.dropped:,} dropped)")
+
+    def broadcast(self, payload: bytes):
+        """Fan one upstream frame out to the clients subscribed to its instruments (any shard thread)"""
+        with self._lock:
+            self.frames_received += 1
+            clients = [(client, client.subscriptions & self.refcounts.keys()) for client in self.clients.values()]
+        if not clients:
+            return
+
+        response = getattr(self._parse, 'response', None)
+        if response is None:
+            response = self._parse.response = FeedResponse()
+        response.ParseFromString(payload)
+        keys = set(response.feeds.keys())
+        subsets = {}
+        sent = 0
+        for client, subscriptions in clients:
+            if not keys:
+                # Market status and other non-tick frames go to everyone
+                client.enqueue(payload)
+                sent += 1
+                continue
+            wanted = keys & subscriptions
+            if not wanted:
+                continue
+            if len(wanted) == len(keys):
+                client.enqueue(payload)
+            else:
+                subset = frozenset(wanted)
+                data = subsets.get(subset)
+                if data is None:
+                    filtered = FeedResponse()
+                    filtered.type = response.type
+                    filtered.currentTs = response.currentTs
+                    for key in subset:
+                        filtered.feeds[key].CopyFrom(response.feeds[key])
+                    data = subsets[subset] = filtered.SerializeToString()
+                client.enqueue(data)
+            sent += 1
+        with self._lock:
+            self.frames_sent += sent
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'clients': {client.name: {'subscriptions': len(client.subscriptions), 'sent': client.sent,
+                                          'dropped': client.dropped, 'queued': len(client.queue)}
+                            for client in self.clients.values()},
+                'upstream_instruments': len(self.refcounts),
+                'frames_received': self.frames_received,
+                'frames_sent': self.frames_sent,
+            }
+
+
+def create_upstream(hub: FeedHub):
+    """
+    Upstox connection(s) for the hub passing raw frames to broadcast(): a
+    ShardedStockStreamer whose shards open as the subscribed instruments
+    outgrow one connection
+    """
+    try:
+        from .simple_data_streamer import SimpleStockStreamer
+        from .sharded_streamer import ShardedStockStreamer
+    except ImportError:
+        from simple_data_streamer import SimpleStockStreamer
+        from sharded_streamer import ShardedStockStreamer
+
+    class HubUpstreamStreamer(SimpleStockStreamer):
+        """Upstream connection: subscriptions follow the hub's refcounts, frames go to broadcast()"""
+
+        def on_message(self, message):
+            if isinstance(message, (bytes, bytearray)):
+                hub.broadcast(bytes(message))
+
+        def _subscribe(self, active_list):
+            if not active_list:
+                return True
+            return super()._subscribe(active_list)
+
+        def remove_instruments(self, keys: List[str]):
+            self.unsubscribe(keys)
+
+    # Decoder only selects the raw-bytes streamer; the hub never decodes ticks itself
+    return ShardedStockStreamer([], {}, shard_factory=lambda keys, symbols: HubUpstreamStreamer(
+        keys, symbols, decode_mode='protobuf'))
+
+
+class FeedHubConnection:
+    """
+    Client connection to the feed hub with the MarketDataStreamerV3 surface
+    SimpleStockStreamer uses (on / connect / subscribe / unsubscribe / disconnect)
+
+    Frames arrive on a reader thread and go to the "message" callback as raw
+    FeedResponse bytes; losing the hub fires "close" so the streamer's normal
+    reconnect path (which re-subscribes its active instruments) takes over.
+    """
+
+    def __init__(self, socket_path: str = FEED_HUB_SOCKET, name: str = None):
+        self.socket_path = socket_path
+        self.name = name or f"bot-{os.getpid()}"
+        self._callbacks = {}
+        self._sock = None
+        self._send_lock = threading.Lock()
+        self._closing = False
+
+    def on(self, event: str, callback):
+        self._callbacks[event] = callback
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(self.socket_path)
+        self._sock = sock
+        self._send(MSG_HELLO, {'name': self.name})
+        threading.Thread(target=self._read_loop, name="feed-hub-client", daemon=True).start()
+
+    def _send(self, kind: int, request: Dict):
+        with self._send_lock:
+            send_message(self._sock, kind, json.dumps(request).encode('utf-8'))
+
+    def subscribe(self, instrument_keys, mode="full"):
+        self._send(MSG_SUBSCRIBE, {'keys': list(instrument_keys), 'mode': mode})
+
+    def unsubscribe(self, instrument_keys):
+        self._send(MSG_UNSUBSCRIBE, {'keys': list(instrument_keys)})
+
+    def disconnect(self):
+        self._closing = True
+        if self._sock is not None:
+            try:
+                self._sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def _read_loop(self):
+        callback = self._callbacks.get('open')
+        if callback:
+            callback()
+        on_message = self._callbacks.get('message')
+        reader = self._sock.makefile('rb')
+        try:
+            while True:
+                message = read_message(reader)
+                if message is None:
+                    break
+                kind, payload = message
+                if kind == MSG_FEED and on_message:
+                    on_message(payload)
+        except OSError as e:
+            logger.warning(f"Feed hub connection error: {e}")
+        finally:
+            reader.close()
+            self._sock.close()
+            callback = self._callbacks.get('close')
+            if callback:
+                if self._closing:
+                    callback(1000, "client disconnect")
+                else:
+                    callback(1006, "feed hub connection lost")
+
+
+def feed_hub_supported() -> bool:
+    """Unix domain sockets are available (not on Windows builds without AF_UNIX)"""
+    return hasattr(socket, 'AF_UNIX')
+
+
+def feed_hub_running(socket_path: str = FEED_HUB_SOCKET) -> bool:
+    """True if a hub answers on socket_path"""
+    if not feed_hub_supported():
+        return False
+    try:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    except OSError:
+        return False
+    try:
+        sock.connect(socket_path)
+        return True
+    except OSError:
+        return False
+    finally:
+        sock.close()
+
+
+def feed_hub_status(socket_path: str = FEED_HUB_SOCKET, timeout: float = 2.0) -> Optional[Dict]:
+    """The status of the hub on socket_path (access token fingerprint, pid, clients), or None"""
+    if not feed_hub_supported():
+        return None
+    try:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    except OSError:
+        return None
+    try:
+        sock.settimeout(timeout)
+        sock.connect(socket_path)
+        send_message(sock, MSG_STATUS)
+        reader = sock.makefile('rb')
+        try:
+            while True:
+                message = read_message(reader)
+                if message is None:
+                    return None
+                kind, payload = message
+                # Market status frames go to every client - skip them
+                if kind == MSG_STATUS:
+                    return json.loads(payload)
+        finally:
+            reader.close()
+    except (OSError, ValueError):
+        return None
+    finally:
+        sock.close()
+
+
+def stop_feed_hub(socket_path: str = FEED_HUB_SOCKET, timeout: float = 10.0) -> bool:
+    """Ask the hub on socket_path to exit; True once nothing answers there"""
+    try:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(socket_path)
+            send_message(sock, MSG_SHUTDOWN)
+        finally:
+            sock.close()
+    except OSError:
+        pass
+
+    deadline = time.time() + timeout
+    while feed_hub_running(socket_path):
+        if time.time() >= deadline:
+            return False
+        time.sleep(0.1)
+    return True
+
+
+def ensure_feed_hub(socket_path: str = FEED_HUB_SOCKET, timeout: float = 10.0) -> bool:
+    """
+    Start the feed hub in its own process unless one is already running with
+    the current access token (a hub left over from an earlier session would
+    stream nothing on its expired token, so it is replaced)
+
+    Returns:
+        True once a hub answers on socket_path; False if it could not be
+        started or the platform has no Unix sockets (the caller connects directly)
+    """
+    if not feed_hub_supported():
+        print("Feed hub needs Unix domain sockets - not available on this platform")
+        return False
+    status = feed_hub_status(socket_path)
+    if status is not None:
+        if status.get('token') == current_token_fingerprint():
+            return True
+        print(f"Feed hub (pid {status.get('pid')}) holds an outdated access token - restarting it")
+        if not stop_feed_hub(socket_path):
+            print("Outdated feed hub did not stop")
+            return False
+
+    log_path = os.path.join('logs', 'feed_hub.log')
+    try:
+        os.makedirs('logs', exist_ok=True)
+        with open(log_path, 'a') as log:
+            subprocess.Popen([sys.executable, os.path.abspath(__file__), '--socket', socket_path],
+                             stdout=log, stderr=subprocess.STDOUT, start_new_session=True)
+    except OSError as e:
+        print(f"Feed hub could not be started: {e}")
+        return False
+
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if feed_hub_status(socket_path) is not None:
+            print(f"Feed hub started on {socket_path}")
+            return True
+        time.sleep(0.1)
+    print(f"Feed hub did not start within {timeout:.0f}s (see {log_path})")
+    return False
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Shared market data feed hub")
+    parser.add_argument('--socket', default=FEED_HUB_SOCKET, help="Unix socket path")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    print(f"FEED HUB starting at {datetime.now(IST).strftime('%H:%M:%S')} on {args.socket}")
+    hub = FeedHub(args.socket)
+    hub.serve_forever()
+    print(f"FEED HUB stopped ({hub.stop_reason or 'interrupted'}): {hub.stats()}")
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Live Feed Recorder for the Market Data Streamer
+Appends every raw websocket frame with its receive timestamp to a memory-mapped,
+length-prefixed binary log (one file per session, zstd-compressed after close)
+so a session can be replayed exactly
+"""
+
+import os
+import json
+import mmap
+import time
+import struct
+import logging
+import threading
+from enum import Enum
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+import pytz
+
+try:
+    import zstandard
+except ImportError:
+    # Recordings stay uncompressed without zstandard
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+IST = pytz.timezone('Asia/Kolkata')
+
+FEED_RECORDING_DIR = 'data/feed_recordings'
+
+# File header: magic + format version
+FILE_MAGIC = b'MAFEED\x00\x01'
+# Record header: payload length (u32), receive time in ns since epoch (i64), kind (u8)
+RECORD_HEADER = struct.Struct('<IqB')
+
+# Record kinds
+KIND_PROTOBUF = 0  # Raw FeedResponse bytes from the websocket
+KIND_JSON = 1      # SDK dict message (dict decode mode), JSON-encoded
+KIND_META = 2      # Session metadata (bot, instrument -> symbol map), JSON-encoded
+
+# Mapped file grows in steps of this size; trimmed to the written length on close
+MAP_CHUNK_BYTES = 64 * 1024 * 1024
+ZSTD_LEVEL = 10
+
+
+class FeedRecorder:
+    """
+    Per-session binary log of raw feed frames
+
+    record() runs on the websocket receive thread: it packs a 13-byte header
+    and copies the frame into the mapped file, taking no syscalls except when
+    the file grows by another chunk. A crash leaves the records written so far
+    readable (the zero-filled tail ends iteration). close() trims the file and
+    compresses it to .zst in the background.
+    """
+
+    def __init__(self, directory: str = FEED_RECORDING_DIR, prefix: str = 'feed',
+                 chunk_bytes: int = MAP_CHUNK_BYTES, compress: bool = True):
+        self.directory = directory
+        self.prefix = prefix
+        self.chunk_bytes = chunk_bytes
+        self.compress = compress
+        self.path = None
+        self.records = 0
+        self.bytes_written = 0
+        self._file = None
+        self._map = None
+        self._offset = 0
+        self._lock = threading.Lock()
+        self._compress_threads = []
+
+    @property
+    def is_open(self) -> bool:
+        return self._map is not None
+
+    def open(self, metadata: Optional[Dict] = None) -> str:
+        """Start a new session file (closing any open one) and write its metadata record"""
+        self.close(wait=False)
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = datetime.now(IST).strftime('%Y%m%d_%H%M%S')
+        path = os.path.join(self.directory, f"{self.prefix}_{stamp}.bin")
+        suffix = 1
+        while os.path.exists(path) or os.path.exists(path + '.zst'):
+            path = os.path.join(self.directory, f"{self.prefix}_{stamp}_{suffix}.bin")
+            suffix += 1
+
+        with self._lock:
+            self._file = open(path, 'w+b')
+            self._file.truncate(self.chunk_bytes)
+            self._map = mmap.mmap(self._file.fileno(), self.chunk_bytes)
+            self._map[:len(FILE_MAGIC)] = FILE_MAGIC
+            self._offset = len(FILE_MAGIC)
+            self.path = path
+            self.records = 0
+            self.bytes_written = 0
+
+        meta = {'opened_at': datetime.now(IST).isoformat(), **(metadata or {})}
+        self._write(KIND_META, json.dumps(meta).encode('utf-8'), time.time_ns())
+        logger.info(f"Recording live feed to {path}")
+        return path
+
+    def record(self, message, received_ns: Optional[int] = None):
+        """Append one websocket message (raw bytes, or an SDK dict/list in dict mode)"""
+        if self._map is None:
+            return
+        if isinstance(message, (bytes, bytearray)):
+            self._write(KIND_PROTOBUF, message, received_ns or time.time_ns())
+        else:
+            self._write(KIND_JSON, json.dumps(message).encode('utf-8'), received_ns or time.time_ns())
+
+    def record_meta(self, metadata: Dict):
+        """Append a metadata record in stream order (e.g. the prepared stocks at subscription)"""
+        if self._map is None:
+            return
+        self._write(KIND_META, json.dumps(metadata).encode('utf-8'), time.time_ns())
+
+    def _write(self, kind: int, payload, received_ns: int):
+        size = RECORD_HEADER.size + len(payload)
+        with self._lock:
+            buffer = self._map
+            if buffer is None:
+                return
+            offset = self._offset
+            if offset + size > len(buffer):
+                buffer = self._grow(offset + size)
+            RECORD_HEADER.pack_into(buffer, offset, len(payload), received_ns, kind)
+            buffer[offset + RECORD_HEADER.size:offset + size] = payload
+            self._offset = offset + size
+            self.records += 1
+            self.bytes_written += size
+
+    def _grow(self, needed: int) -> mmap.mmap:
+        """Extend the file by whole chunks and remap it (caller holds the lock)"""
+        new_size = len(self._map)
+        while new_size < needed:
+            new_size += self.chunk_bytes
+        self._map.flush()
+        self._map.close()
+        self._file.truncate(new_size)
+        self._map = mmap.mmap(self._file.fileno(), new_size)
+        return self._map
+
+    def close(self, wait: bool = True) -> Optional[str]:
+        """
+        Trim and close the session file, then compress it to .zst
+
+        Args:
+            wait: Block until compression finishes
+
+        Returns:
+            Path of the finished recording (.bin.zst, or .bin without zstandard)
+        """
+        with self._lock:
+            if self._map is None:
+                path = None
+            else:
+                self._map.flush()
+                self._map.close()
+                self._map = None
+                self._file.truncate(self._offset)
+                self._file.close()
+                self._file = None
+                path = self.path
+
+        if path is not None:
+            logger.info(f"Feed recording closed: {self.records:,} frames, {self.bytes_written / 1e6:.1f}MB in {path}")
+            if self.compress and zstandard is not None:
+                thread = threading.Thread(target=compress_recording, args=(path,), name="feed-recorder-zstd")
+                thread.start()
+                self._compress_threads.append(thread)
+                path = path + '.zst'
+            elif self.compress:
+                logger.warning("zstandard not installed - feed recording left uncompressed")
+
+        if wait:
+            for thread in self._compress_threads:
+                thread.join()
+            self._compress_threads = []
+        return path
+
+
+def _stock_attributes(stock):
+    """(name, value) for every set attribute of a stock, from its slots and any instance dict"""
+    for cls in type(stock).__mro__:
+        for name in cls.__dict__.get('__slots__', ()):
+            if name != '__dict__' and hasattr(stock, name):
+                yield name, getattr(stock, name)
+    yield from getattr(stock, '__dict__', {}).items()
+
+
+def snapshot_stocks(monitor) -> List[Dict]:
+    """
+    Plain attributes of every monitored stock, for replay to restore the prepared state
+
+    Numbers, strings, flags and state enums (as their value) are kept;
+    timestamps and objects are left out. Indexed flags stored as _<name>
+    behind a property are recorded under the property name, so restoring
+    them goes through the monitor's index.
+    """
+    snapshot = []
+    for stock in monitor.stocks.values():
+        attributes = {}
+        for name, value in _stock_attributes(stock):
+            if name.startswith('_'):
+                name = name[1:]
+                if not isinstance(getattr(type(stock), name, None), property):
+                    continue
+            if isinstance(value, Enum):
+                attributes[name] = value.value
+            elif value is None or isinstance(value, (bool, int, float, str)):
+                attributes[name] = value
+        snapshot.append(attributes)
+    return snapshot
+
+
+def compress_recording(path: str, level: int = ZSTD_LEVEL) -> str:
+    """Compress a closed recording to path.zst and remove the original"""
+    zst_path = path + '.zst'
+    tmp_path = zst_path + '.tmp'
+    try:
+        compressor = zstandard.ZstdCompressor(level=level)
+        with open(path, 'rb') as src, open(tmp_path, 'wb') as dst:
+            compressor.copy_stream(src, dst)
+        os.replace(tmp_path, zst_path)
+        os.remove(path)
+        return zst_path
+    except Exception as e:
+        logger.error(f"Error compressing feed recording {path}: {e}")
+        return path
+
+
+def iter_recording(path: str) -> Iterator[Tuple[int, int, bytes]]:
+    """
+    Iterate (received_ns, kind, payload) from a recording (.bin or .bin.zst)
+
+    Stops at the end of data, including the zero-filled tail of a file left
+    open by a crash.
+    """
+    if path.endswith('.zst'):
+        if zstandard is None:
+            raise ImportError("zstandard is required to read compressed feed recordings")
+        with open(path, 'rb') as f:
+            data = zstandard.ZstdDecompressor().stream_reader(f).read()
+    else:
+        with open(path, 'rb') as f:
+            data = f.read()
+
+    if data[:len(FILE_MAGIC)] != FILE_MAGIC:
+        raise ValueError(f"{path} is not a feed recording")
+
+    view = memoryview(data)
+    offset = len(FILE_MAGIC)
+    header_size = RECORD_HEADER.size
+    end = len(data)
+    while offset + header_size <= end:
+        length, received_ns, kind = RECORD_HEADER.unpack_from(data, offset)
+        if received_ns == 0:
+            break
+        start = offset + header_size
+        if start + length > end:
+            break
+        yield received_ns, kind, bytes(view[start:start + length])
+        offset = start + length
+
+
+def read_metadata(path: str) -> Dict:
+    """Session metadata written when the recording was opened"""
+    for _, kind, payload in iter_recording(path):
+        if kind == KIND_META:
+            return json.loads(payload)
+    return {}
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) < 2:
+        print("Usage: python feed_recorder.py <recording.bin[.zst]>")
+        sys.exit(1)
+    counts = {KIND_PROTOBUF: 0, KIND_JSON: 0, KIND_META: 0}
+    first = last = None
+    for received_ns, kind, payload in iter_recording(sys.argv[1]):
+        counts[kind] = counts.get(kind, 0) + 1
+        if kind != KIND_META:
+            first = first or received_ns
+            last = received_ns
+    print(f"Metadata: {read_metadata(sys.argv[1])}")
+    print(f"Frames: {counts[KIND_PROTOBUF]:,} protobuf, {counts[KIND_JSON]:,} json")
+    if first:
+        print(f"Span: {datetime.fromtimestamp(first / 1e9, IST)} -> {datetime.fromtimestamp(last / 1e9, IST)}")
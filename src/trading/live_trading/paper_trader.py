@@ -20,13 +20,16 @@ logger = logging.getLogger(__name__)
 class PaperTrader:
     """Handles paper trading operations and logging"""
 
-    def __init__(self, session_name: str = None):
-        self.session_name = session_name or datetime.now().strftime("%Y%m%d_%H%M%S")
+    def __init__(self, session_name: str = None, log_dir: str = TRADE_LOG_DIR, clock=None):
+        # clock: callable returning the current datetime (replay passes its recorded time)
+        self.clock = clock or datetime.now
+        self.log_dir = log_dir
+        self.session_name = session_name or self.clock().strftime("%Y%m%d_%H%M%S")
         self.trades_log = []
         self.positions = {}  # instrument_key -> position data
 
         # Create logs directory
-        os.makedirs(TRADE_LOG_DIR, exist_ok=True)
+        os.makedirs(self.log_dir, exist_ok=True)
 
         # Setup logging
         self.setup_logging()
@@ -35,7 +38,7 @@ class PaperTrader:
 
     def setup_logging(self):
         """Setup logging to file"""
-        log_file = os.path.join(TRADE_LOG_DIR, f"paper_trading_{self.session_name}.log")
+        log_file = os.path.join(self.log_dir, f"paper_trading_{self.session_name}.log")
 
         # Create file handler
         file_handler = logging.FileHandler(log_file)
@@ -119,7 +122,7 @@ class PaperTrader:
     def log_rejection(self, stock: StockState, reason: str):
         """Log stock rejection"""
         rejection = {
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': self.clock().isoformat(),
             'type': 'REJECTION',
             'symbol': stock.symbol,
             'instrument_key': stock.instrument_key,
@@ -141,7 +144,7 @@ class PaperTrader:
     def log_session_summary(self, summary: Dict):
         """Log session summary"""
         session_summary = {
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': self.clock().isoformat(),
             'type': 'SESSION_SUMMARY',
             'session': self.session_name,
             'summary': summary
@@ -157,7 +160,7 @@ class PaperTrader:
     def _save_trades(self):
         """Save trades to JSON file"""
         try:
-            json_file = os.path.join(TRADE_LOG_DIR, f"paper_trades_{self.session_name}.json")
+            json_file = os.path.join(self.log_dir, f"paper_trades_{self.session_name}.json")
 
             with open(json_file, 'w') as f:
                 json.dump(self.trades_log, f, indent=2, default=str)
@@ -198,7 +201,7 @@ class PaperTrader:
             import pandas as pd
 
             df = pd.DataFrame(self.trades_log)
-            csv_path = os.path.join(TRADE_LOG_DIR, filename)
+            csv_path = os.path.join(self.log_dir, filename)
             df.to_csv(csv_path, index=False)
 
             logger.info(f"Trades exported to CSV: {csv_path}")
@@ -0,0 +1,183 @@
+"""
+Prep Orchestrator for Live Trading Bots
+Runs PREP steps as dependent tasks, concurrently where possible, each against
+a hard deadline with a fallback when it misses its slot
+"""
+
+import logging
+import threading
+from datetime import time as dt_time
+from concurrent.futures import Future, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    from .clock import SYSTEM_CLOCK, IST
+except ImportError:
+    from clock import SYSTEM_CLOCK, IST
+
+logger = logging.getLogger(__name__)
+
+
+class PrepTask:
+    """One PREP step with its dependencies, deadline and fallback"""
+
+    def __init__(self, name: str, func: Callable[[], Any], depends_on: List[str] = None,
+                 deadline: Optional[dt_time] = None, fallback: Callable[[], Any] = None,
+                 fallback_note: str = ''):
+        self.name = name
+        self.func = func
+        self.depends_on = depends_on or []
+        self.deadline = deadline
+        self.fallback = fallback
+        self.fallback_note = fallback_note
+
+        self.status = 'pending'  # pending, running, ok, failed, timeout
+        self.result = None
+        self.error = None
+        self.started = None
+        self.finished = None
+        # Set when the task misses its deadline, before its fallback runs; a late
+        # func that writes shared state checks it so it cannot undo the fallback
+        self.superseded = threading.Event()
+
+
+class PrepOrchestrator:
+    """
+    Runs PREP tasks as a dependency graph
+
+    A task starts as soon as all of its dependencies have settled. If a task
+    raises or is still running at its deadline, its fallback result is used
+    and dependants carry on with it. A late task's thread is left to finish
+    in the background; its result is ignored and its superseded event is set
+    so it can stop before writing. Tasks run on daemon threads, so a hung
+    REST call never blocks interpreter exit. Deadlines are judged on the
+    given clock, so a SimulatedClock run keeps the same task outcomes.
+    """
+
+    def __init__(self, max_workers: int = 4, clock=None):
+        self.max_workers = max_workers
+        self.clock = clock or SYSTEM_CLOCK
+        self.tasks: Dict[str, PrepTask] = {}
+        self.results: Dict[str, Any] = {}
+        self._start = None
+
+    def add_task(self, name: str, func: Callable[[], Any], depends_on: List[str] = None,
+                 deadline: Optional[dt_time] = None, fallback: Callable[[], Any] = None,
+                 fallback_note: str = ''):
+        """Declare a task - func and fallback take no arguments, read self.results for inputs"""
+        for dep in depends_on or []:
+            if dep not in self.tasks:
+                raise ValueError(f"Task {name} depends on unknown task {dep}")
+        self.tasks[name] = PrepTask(name, func, depends_on, deadline, fallback, fallback_note)
+
+    def _deadline_ts(self, task: PrepTask) -> Optional[float]:
+        """Deadline as a timestamp today, or None if unset or already past at run start"""
+        if task.deadline is None:
+            return None
+        deadline = self.clock.today_at(task.deadline).timestamp()
+        return deadline if deadline > self._start else None
+
+    def _time(self) -> float:
+        return self.clock.now().timestamp()
+
+    def superseded(self, name: str) -> bool:
+        """True once a task's fallback has replaced it - checked by late tasks before writing"""
+        return self.tasks[name].superseded.is_set()
+
+    def _submit(self, task: PrepTask) -> Future:
+        """Run a task's func on its own daemon thread"""
+        future = Future()
+
+        def runner():
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                future.set_result(task.func())
+            except BaseException as e:
+                future.set_exception(e)
+
+        threading.Thread(target=runner, name=f"prep-{task.name}", daemon=True).start()
+        return future
+
+    def _settle(self, task: PrepTask, status: str, result: Any = None, error: Exception = None):
+        """Record a task outcome, applying its fallback on failure or timeout"""
+        task.finished = self._time()
+        task.status = status
+        task.error = error
+        if status == 'timeout':
+            task.superseded.set()
+        if status == 'ok':
+            task.result = result
+        elif task.fallback is not None:
+            try:
+                task.result = task.fallback()
+            except Exception as e:
+                logger.error(f"Fallback for {task.name} failed: {e}")
+                task.result = None
+        self.results[task.name] = task.result
+
+    def run(self) -> Dict[str, Any]:
+        """Run all tasks and return name -> result (fallback results for late or failed tasks)"""
+        self._start = self._time()
+        deadlines = {name: self._deadline_ts(task) for name, task in self.tasks.items()}
+        settled = set()
+        running = {}  # future -> task
+
+        while len(settled) < len(self.tasks):
+            # Start every task whose dependencies have settled (late tasks no longer hold a slot)
+            for task in self.tasks.values():
+                if len(running) >= self.max_workers:
+                    break
+                if task.status == 'pending' and all(dep in settled for dep in task.depends_on):
+                    task.status = 'running'
+                    task.started = self._time()
+                    running[self._submit(task)] = task
+
+            if not running:
+                break
+
+            now = self._time()
+            pending_deadlines = [deadlines[t.name] for t in running.values() if deadlines[t.name]]
+            timeout = max(0.0, min(pending_deadlines) - now) if pending_deadlines else None
+
+            done, _ = wait(list(running.keys()), timeout=timeout, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                task = running.pop(future)
+                try:
+                    self._settle(task, 'ok', future.result())
+                except Exception as e:
+                    logger.error(f"Prep task {task.name} failed: {e}")
+                    self._settle(task, 'failed', error=e)
+                settled.add(task.name)
+
+            # Anything past its deadline gets its fallback now
+            now = self._time()
+            for future, task in list(running.items()):
+                if deadlines[task.name] and now >= deadlines[task.name]:
+                    running.pop(future)
+                    self._settle(task, 'timeout')
+                    settled.add(task.name)
+
+        return self.results
+
+    def print_report(self):
+        """Print per-task timing against deadlines"""
+        print("=== PREP TIMING REPORT ===")
+        for task in self.tasks.values():
+            if task.started is None:
+                print(f"   {task.name:<18} NOT RUN")
+                continue
+
+            duration = (task.finished or self._time()) - task.started
+            offset = task.started - self._start
+            line = f"   {task.name:<18} {task.status.upper():<8} {duration:6.2f}s (started +{offset:.2f}s"
+            if task.deadline is not None:
+                deadline_ts = self._deadline_ts(task)
+                if deadline_ts:
+                    line += f", {deadline_ts - task.finished:+.1f}s vs {task.deadline}"
+            line += ")"
+            if task.status != 'ok':
+                reason = f"error: {task.error}" if task.error else "missed deadline"
+                line += f" - {reason}; fallback: {task.fallback_note or 'none'}"
+            print(line)
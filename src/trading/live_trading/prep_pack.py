@@ -0,0 +1,169 @@
+"""
+Prep Pack for Live Trading Bots
+Nightly precomputed per-stock data (previous close, instrument key, ADR,
+volume baseline, prior-day VAH) so the bots start without REST calls
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+from datetime import datetime, date
+from typing import Dict, List, Optional
+import pytz
+
+# Ensure we can import from the project root
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+logger = logging.getLogger(__name__)
+
+IST = pytz.timezone('Asia/Kolkata')
+
+# Bump when the pack layout changes - older packs are ignored
+PREP_PACK_VERSION = 1
+PREP_PACK_FILE = 'data/prep_pack.json'
+
+
+def next_trading_day(from_date: date) -> date:
+    """Next trading day after from_date (the session a nightly pack is built for)"""
+    from src.utils.trading_calendar import trading_calendar
+    return trading_calendar.next_trading_day(from_date)
+
+
+def build_prep_pack(trading_date: date = None, pack_file: str = PREP_PACK_FILE) -> Dict:
+    """
+    Build the prep pack for a trading session from the bhavcopy-updated cache
+
+    Args:
+        trading_date: Session the pack is for (default: next trading day after today)
+        pack_file: Where to write the pack
+
+    Returns:
+        The pack dict that was written
+    """
+    from src.utils.cache_manager import cache_manager
+    from src.utils.upstox_fetcher import upstox_fetcher
+    from src.trading.live_trading.stock_classifier import StockClassifier
+    from src.trading.live_trading.stock_scorer import stock_scorer
+    from src.trading.live_trading.volume_profile import volume_profile_calculator
+
+    if trading_date is None:
+        trading_date = next_trading_day(datetime.now(IST).date())
+
+    start = time.time()
+    classifier = StockClassifier()
+    continuation = classifier.get_continuation_stock_configuration()
+    reversal = classifier.get_reversal_stock_configuration()
+
+    situations = dict(reversal['situations'])
+    situations.update(continuation['situations'])
+    symbols = list(dict.fromkeys(continuation['symbols'] + reversal['symbols']))
+
+    # The session whose close/volume profile tomorrow's bots need
+    prev_session = volume_profile_calculator.get_previous_trading_day(trading_date)
+    logger.info(f"Building prep pack for {trading_date} from session {prev_session}: {len(symbols)} stocks")
+
+    stocks = {}
+    for symbol in symbols:
+        entry = {'situation': situations.get(symbol), 'instrument_key': upstox_fetcher.get_instrument_key(symbol)}
+
+        try:
+            cached = cache_manager.load_cached_data(symbol)
+            if cached is not None and not cached.empty:
+                last_date = cached.index[-1]
+                last_date = last_date.date() if hasattr(last_date, 'date') else last_date
+                if last_date == prev_session:
+                    entry['prev_close'] = float(cached['close'].iloc[-1])
+                else:
+                    logger.warning(f"{symbol}: cache ends {last_date}, expected {prev_session} - no prev close in pack")
+
+                if 'adr_percent' in cached.columns and not cached['adr_percent'].isna().iloc[-1]:
+                    entry['adr_percent'] = float(cached['adr_percent'].iloc[-1])
+
+            entry['volume_baseline'] = float(stock_scorer._get_volume_baseline(symbol))
+        except Exception as e:
+            logger.error(f"{symbol}: error reading cache for prep pack: {e}")
+
+        stocks[symbol] = entry
+
+    # Prior-day VAH for continuation stocks
+    continuation_symbols = [s for s in continuation['symbols'] if continuation['situations'].get(s) == 'continuation']
+    if continuation_symbols:
+        vah_dict = volume_profile_calculator.calculate_vah_for_stocks(continuation_symbols, prev_day=prev_session)
+        for symbol, vah in vah_dict.items():
+            stocks[symbol]['vah'] = float(vah)
+
+    pack = {
+        'version': PREP_PACK_VERSION,
+        'trading_date': trading_date.isoformat(),
+        'prev_session': prev_session.isoformat(),
+        'built_at': datetime.now(IST).isoformat(),
+        'stocks': stocks,
+    }
+
+    pack_dir = os.path.dirname(pack_file)
+    if pack_dir:
+        os.makedirs(pack_dir, exist_ok=True)
+    tmp_file = f"{pack_file}.tmp"
+    with open(tmp_file, 'w') as f:
+        json.dump(pack, f, indent=2)
+    os.replace(tmp_file, pack_file)
+
+    complete = sum(1 for e in stocks.values() if e.get('prev_close') is not None and e.get('instrument_key'))
+    logger.info(f"Prep pack written to {pack_file}: {complete}/{len(stocks)} stocks complete, "
+                f"{sum(1 for e in stocks.values() if 'vah' in e)} VAH, {time.time() - start:.1f}s")
+    return pack
+
+
+def load_prep_pack(trading_date: date = None, pack_file: str = PREP_PACK_FILE) -> Optional[Dict]:
+    """
+    Load the prep pack if it was built for this trading session
+
+    Args:
+        trading_date: Session being traded (default: today in IST)
+        pack_file: Pack location
+
+    Returns:
+        Pack dict, or None if missing, from another version or for another date
+    """
+    if trading_date is None:
+        trading_date = datetime.now(IST).date()
+
+    if not os.path.exists(pack_file):
+        logger.info(f"No prep pack at {pack_file}")
+        return None
+
+    try:
+        with open(pack_file, 'r') as f:
+            pack = json.load(f)
+    except Exception as e:
+        logger.error(f"Error reading prep pack: {e}")
+        return None
+
+    if pack.get('version') != PREP_PACK_VERSION:
+        logger.warning(f"Prep pack version {pack.get('version')} != {PREP_PACK_VERSION} - ignoring")
+        return None
+
+    if pack.get('trading_date') != trading_date.isoformat():
+        logger.warning(f"Prep pack is for {pack.get('trading_date')}, not {trading_date} - ignoring")
+        return None
+
+    return pack
+
+
+def get_pack_values(pack: Optional[Dict], symbols: List[str], field: str) -> Dict[str, float]:
+    """Get one field for the given symbols from a pack, skipping symbols without it"""
+    if not pack:
+        return {}
+    stocks = pack.get('stocks', {})
+    return {s: stocks[s][field] for s in symbols if stocks.get(s, {}).get(field) is not None}
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    target = date.fromisoformat(sys.argv[1]) if len(sys.argv) > 1 else None
+    pack = build_prep_pack(target)
+    print(f"Prep pack for {pack['trading_date']} (session {pack['prev_session']}): {len(pack['stocks'])} stocks")
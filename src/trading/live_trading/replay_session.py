@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Replay a Recorded Bot Session
+Rebuilds the prepared stocks from a feed recording and drives the production
+ContinuationIntegration / ReversalIntegration through the bot's market-time
+sequence with ReplayStreamer. Everything runs on the replay's SimulatedClock,
+so several days can be replayed back to back
+
+Usage:
+    python src/trading/live_trading/replay_session.py data/feed_recordings/continuation_feed_20260218_091200.bin.zst
+    python src/trading/live_trading/replay_session.py <recording> --speed 10
+    python src/trading/live_trading/replay_session.py data/feed_recordings/continuation_feed_*.bin.zst
+"""
+
+import os
+import sys
+import argparse
+from datetime import datetime
+from enum import Enum
+from typing import Dict, List, Optional
+
+# Add src to path
+sys.path.insert(0, 'src')
+sys.path.insert(0, 'src/trading/live_trading')
+
+from replay_streamer import ReplayStreamer, IST
+from paper_trader import PaperTrader
+from config import ENTRY_TIME, TRADE_LOG_DIR
+
+
+def restore_stocks(monitor, stocks: List[Dict]):
+    """Add every snapshotted stock to the monitor and restore its prepared attributes"""
+    for attributes in stocks:
+        monitor.add_stock(attributes['symbol'], attributes['instrument_key'],
+                          attributes['previous_close'], attributes['situation'])
+        stock = monitor.stocks[attributes['instrument_key']]
+        for name, value in attributes.items():
+            current = getattr(stock, name, None)
+            if isinstance(current, Enum):
+                value = type(current)(value)
+            setattr(stock, name, value)
+
+
+def _continuation_entry_sequence(streamer, monitor, integration):
+    """run_continuation.py from ENTRY_TIME: phase 2 checks, unsubscribe, prepare and arm entries"""
+    print(f"=== REPLAY {streamer.now().strftime('%H:%M:%S')}: PHASE 2 + PREPARING ENTRIES ===")
+    monitor.check_violations()
+    # Volume snapshot from the replayed feed (vtt) instead of the live REST snapshot
+    volumes = {stock.symbol: float(streamer.last_volume.get(key, 0)) for key, stock in monitor.stocks.items()}
+    monitor.check_volume_validations(volumes=volumes)
+    integration.phase_2_unsubscribe_after_low_and_volume()
+    monitor.prepare_entries()
+    monitor.log_qualification_report()
+    for stock in monitor.get_qualified_stocks():
+        stock.entry_ready = True
+        print(f"READY to trade: {stock.symbol} (Entry: Rs{stock.entry_high:.2f}, SL: Rs{stock.entry_sl:.2f})")
+
+
+def _reversal_open_sequence(monitor):
+    """run_reversal.py at market open: OOPS candidates are ready immediately"""
+    for stock in monitor.get_active_stocks():
+        if stock.situation == 'reversal_s2' and stock.gap_validated:
+            stock.entry_ready = True
+
+
+def _reversal_entry_sequence(streamer, monitor, integration):
+    """run_reversal.py from ENTRY_TIME: prepare entries, phase 2 unsubscribe, arm Strong Start"""
+    print(f"=== REPLAY {streamer.now().strftime('%H:%M:%S')}: PREPARING ENTRIES ===")
+    monitor.prepare_entries()
+    integration.phase_2_unsubscribe_after_low_violation()
+    for stock in monitor.get_qualified_stocks():
+        if stock.situation == 'reversal_s1':
+            stock.entry_ready = True
+            print(f"   {stock.symbol} (Strong Start): High Rs{stock.daily_high:.2f}, SL Rs{stock.entry_sl:.2f} - Ready for trigger")
+
+
+def replay_session(recording_path: str, speed: Optional[float] = None, session_name: str = None,
+                   log_dir: str = TRADE_LOG_DIR) -> Dict:
+    """
+    Replay one recorded session through the production bot modules
+
+    Args:
+        recording_path: FeedRecorder file with a 'prep' snapshot
+        speed: 1.0 real time, N times faster, None for as fast as possible
+        session_name: Paper-trader session (default: replay_<recording name>)
+        log_dir: Directory for the paper-trader output
+
+    Returns:
+        Dict with the monitor summary, paper-trader stats and trades
+    """
+    streamer = ReplayStreamer(recording_path, speed=speed)
+    prep = streamer.prep_snapshot()
+    if prep is None:
+        raise ValueError(f"{recording_path} has no prepared-stock snapshot to replay from")
+    bot = streamer.metadata.get('bot', 'continuation')
+
+    if session_name is None:
+        session_name = "replay_" + os.path.basename(recording_path).split('.')[0]
+    paper_trader = PaperTrader(session_name, log_dir=log_dir, clock=streamer.now)
+
+    if bot == 'reversal':
+        from reversal_stock_monitor import ReversalStockMonitor
+        from reversal_modules.integration import ReversalIntegration
+        monitor = ReversalStockMonitor()
+        restore_stocks(monitor, prep['stocks'])
+        integration = ReversalIntegration(streamer, monitor, paper_trader)
+        streamer.tick_handler = lambda key, symbol, price, ts, ohlc=None: \
+            integration.simplified_tick_handler(key, symbol, price, ts, ohlc, monitor)
+        _reversal_open_sequence(monitor)
+        entry_sequence = lambda: _reversal_entry_sequence(streamer, monitor, integration)
+    else:
+        from continuation_stock_monitor import StockMonitor
+        from src.trading.live_trading.continuation_modules.integration import ContinuationIntegration
+        monitor = StockMonitor(clock=streamer.clock)
+        restore_stocks(monitor, prep['stocks'])
+        integration = ContinuationIntegration(streamer, monitor, paper_trader)
+        streamer.tick_handler = integration.simplified_tick_handler
+        entry_sequence = lambda: _continuation_entry_sequence(streamer, monitor, integration)
+
+    streamer.active_instruments = {stock['instrument_key'] for stock in prep['stocks'] if stock.get('is_subscribed', True)}
+    session_date = streamer.now().date()
+    streamer.schedule(IST.localize(datetime.combine(session_date, ENTRY_TIME)), entry_sequence)
+
+    print(f"=== REPLAYING {bot.upper()} SESSION: {len(prep['stocks'])} stocks, "
+          f"speed {'max' if not streamer.speed else f'{streamer.speed:g}x'} ===")
+    streamer.connect()
+    streamer.run()
+
+    summary = monitor.get_summary()
+    paper_trader.log_session_summary(summary)
+    paper_trader.close()
+
+    return {
+        'bot': bot,
+        'summary': summary,
+        'stats': paper_trader.get_session_stats(),
+        'trades': [trade for trade in paper_trader.trades_log if trade['type'] in ('ENTRY', 'EXIT')],
+        'trades_file': os.path.join(log_dir, f"paper_trades_{session_name}.json"),
+        'frames': streamer.frames_replayed,
+        'ticks': streamer.ticks_delivered,
+    }
+
+
+def replay_sessions(recording_paths: List[str], speed: Optional[float] = None,
+                    log_dir: str = TRADE_LOG_DIR) -> List[Dict]:
+    """Replay several recorded sessions back to back (each on its own simulated clock)"""
+    results = []
+    for recording_path in recording_paths:
+        results.append(replay_session(recording_path, speed=speed, log_dir=log_dir))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded bot sessions")
+    parser.add_argument('recordings', nargs='+', help="FeedRecorder files (.bin or .bin.zst), replayed in order")
+    parser.add_argument('--speed', type=float, default=0, help="1 = real time, N = N times faster, 0 = as fast as possible")
+    parser.add_argument('--session', default=None, help="Paper-trader session name (single recording only)")
+    args = parser.parse_args()
+
+    if len(args.recordings) == 1:
+        results = [replay_session(args.recordings[0], speed=args.speed or None, session_name=args.session)]
+    else:
+        results = replay_sessions(args.recordings, speed=args.speed or None)
+
+    for recording, result in zip(args.recordings, results):
+        print(f"\n=== REPLAY COMPLETE: {os.path.basename(recording)} - {len(result['trades'])} trade events ===")
+        for trade in result['trades']:
+            print(f"   {trade['timestamp']} {trade['type']} {trade['symbol']}")
+        print(f"Stats: {result['stats']}")
+        print(f"Paper trades: {result['trades_file']}")
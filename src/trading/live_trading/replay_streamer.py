@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Replay Streamer for Recorded Live Feeds
+Drop-in replacement for SimpleStockStreamer that plays a FeedRecorder session
+through the same decode path into the production tick handlers, at 1x, Nx or
+as fast as possible
+"""
+
+import time
+import json
+import logging
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+import pytz
+
+try:
+    from .feed_recorder import iter_recording, KIND_PROTOBUF, KIND_JSON, KIND_META
+    from .feed_decoder import FeedDecoder
+    from .clock import SimulatedClock
+except ImportError:
+    from feed_recorder import iter_recording, KIND_PROTOBUF, KIND_JSON, KIND_META
+    from feed_decoder import FeedDecoder
+    from clock import SimulatedClock
+
+logger = logging.getLogger(__name__)
+IST = pytz.timezone('Asia/Kolkata')
+
+
+class ReplayStreamer:
+    """
+    Plays a recorded session with the SimpleStockStreamer interface
+
+    Frames are decoded exactly as live (protobuf through FeedDecoder, dict-mode
+    messages through the same fullFeed/marketFF walk) and delivered
+    synchronously to tick_handler with the recorded receive time as the tick
+    timestamp, so the same recording always produces the same calls in the
+    same order. unsubscribe() drops later ticks for those instruments, like
+    the live feed. Replay time is a SimulatedClock moved to each frame's
+    receive time; callbacks registered with schedule() run between frames
+    once the clock reaches them.
+
+    Args:
+        recording_path: FeedRecorder file (.bin or .bin.zst)
+        speed: 1.0 for real time, N for N times faster, None/0 for as fast as possible
+        clock: SimulatedClock to drive (default: one starting at the first frame)
+    """
+
+    def __init__(self, recording_path: str, instrument_keys: List[str] = None,
+                 stock_symbols: Dict[str, str] = None, speed: Optional[float] = None,
+                 clock: SimulatedClock = None):
+        self.recording_path = recording_path
+        self.speed = speed or None
+        self.frames = list(iter_recording(recording_path))
+        self.meta_records = [json.loads(payload) for _, kind, payload in self.frames if kind == KIND_META]
+        self.metadata = self.meta_records[0] if self.meta_records else {}
+
+        self.stock_symbols = stock_symbols or self.metadata.get('stock_symbols', {})
+        self.instrument_keys = instrument_keys or list(self.stock_symbols)
+        self.active_instruments = set(self.instrument_keys)
+        self.feed_decoder = FeedDecoder(self.stock_symbols)
+
+        # SimpleStockStreamer state the bots and subscription managers touch
+        self.streamer = None
+        self.connected = False
+        self.running = True
+        self.defer_subscription = False
+        self.market_open_time = None
+        self.tick_latency = None
+        self.feed_recorder = None
+        self.last_trade_time = {}
+        self.last_volume = {}
+
+        self.frames_replayed = 0
+        self.ticks_delivered = 0
+
+        feed_frames = [received_ns for received_ns, kind, _ in self.frames if kind != KIND_META]
+        self.first_frame_ns = feed_frames[0] if feed_frames else None
+        self.last_frame_ns = feed_frames[-1] if feed_frames else None
+
+        # Replay clock: starts at the first frame (or when the recording was opened)
+        if clock is None:
+            if self.first_frame_ns is not None:
+                start = self._to_datetime(self.first_frame_ns)
+            else:
+                start = datetime.fromisoformat(self.metadata['opened_at'])
+            clock = SimulatedClock(start)
+        self.clock = clock
+
+    @staticmethod
+    def _to_datetime(received_ns: int) -> datetime:
+        return datetime.fromtimestamp(received_ns / 1e9, IST)
+
+    def now(self) -> datetime:
+        """Current replay time (recorded receive time of the frame being played)"""
+        return self.clock.now()
+
+    def prep_snapshot(self) -> Optional[Dict]:
+        """Prepared stock state recorded at subscription, if the session recorded one"""
+        for meta in self.meta_records:
+            if meta.get('event') == 'prep':
+                return meta
+        return None
+
+    def schedule(self, at: datetime, fn: Callable):
+        """Run fn once replay time reaches at (before the first frame received at or after it)"""
+        self.clock.call_at(at, fn)
+
+    # --- SimpleStockStreamer interface ---
+
+    def connect(self):
+        self.connected = True
+        self.streamer = self
+        print(f"Replay connected: {self.recording_path} ({len(self.frames) - len(self.meta_records):,} frames)")
+        return True
+
+    def prewarm(self, timeout=10):
+        return self.connect()
+
+    def subscribe_active(self):
+        return True
+
+    def subscribe(self, instrument_keys, mode="full"):
+        self.active_instruments.update(instrument_keys)
+
+    def update_active_instruments(self, new_instrument_keys):
+        self.active_instruments = set(new_instrument_keys)
+        print(f"Active instruments updated to {len(new_instrument_keys)} validated stocks")
+
+    def update_active_instruments_reversal(self, new_instrument_keys):
+        self.active_instruments = set(new_instrument_keys)
+        print(f"Active instruments updated to {len(new_instrument_keys)} gap-validated stocks")
+
+    def unsubscribe(self, instrument_keys):
+        self.active_instruments.difference_update(instrument_keys)
+
+    def disconnect(self):
+        self.running = False
+        self.connected = False
+
+    def run(self):
+        """Play every frame (pacing to speed) then any callbacks scheduled past the end"""
+        if not self.connected:
+            self.connect()
+
+        started = time.perf_counter()
+        for received_ns, kind, payload in self.frames:
+            if not self.running:
+                break
+            if kind == KIND_META:
+                continue
+
+            frame_time = self._to_datetime(received_ns)
+            self.clock.advance_to(frame_time)
+
+            if self.speed:
+                wait = (received_ns - self.first_frame_ns) / 1e9 / self.speed - (time.perf_counter() - started)
+                if wait > 0:
+                    time.sleep(wait)
+
+            if kind == KIND_PROTOBUF:
+                ticks = self.feed_decoder.decode(payload)
+            elif kind == KIND_JSON:
+                ticks = self._decode_dict(json.loads(payload))
+            else:
+                continue
+            self.frames_replayed += 1
+            self._deliver(ticks, frame_time)
+
+        # The live bot keeps running past the last frame: fire what is left in order
+        self.clock.run_pending()
+        self.connected = False
+
+        elapsed = time.perf_counter() - started
+        if self.first_frame_ns is not None:
+            span = (self.last_frame_ns - self.first_frame_ns) / 1e9
+            print(f"Replayed {self.frames_replayed:,} frames ({self.ticks_delivered:,} ticks, "
+                  f"{span:.0f}s of feed) in {elapsed:.2f}s")
+        return True
+
+    def _deliver(self, ticks, frame_time: datetime):
+        tick_handler = getattr(self, 'tick_handler', None)
+        active = self.active_instruments
+        for instrument_key, symbol, ltp, ltt, vtt, ohlc_list in ticks:
+            if instrument_key not in active:
+                continue
+            self.last_trade_time[instrument_key] = ltt
+            if vtt:
+                self.last_volume[instrument_key] = vtt
+            self.ticks_delivered += 1
+            if tick_handler:
+                tick_handler(instrument_key, symbol, ltp, frame_time, ohlc_list)
+
+    def _decode_dict(self, message):
+        """Ticks from a dict-mode message, matching SimpleStockStreamer._process_message_dict"""
+        messages = message if isinstance(message, list) else [message]
+        ticks = []
+        for msg in messages:
+            feeds = msg.get('feeds', {}) if isinstance(msg, dict) else {}
+            for instrument_key, feed_data in feeds.items():
+                symbol = self.stock_symbols.get(instrument_key)
+                if symbol is None or not isinstance(feed_data, dict):
+                    continue
+                market_ff = feed_data.get('fullFeed', {}).get('marketFF')
+                if not isinstance(market_ff, dict):
+                    continue
+                ltpc = market_ff.get('ltpc', {})
+                ltp = ltpc.get('ltp') if isinstance(ltpc, dict) else None
+                if ltp is None:
+                    continue
+                ohlc_list = market_ff.get('marketOHLC', {}).get('ohlc', [])
+                ticks.append((instrument_key, symbol, float(ltp), int(ltpc.get('ltt') or 0),
+                              int(market_ff.get('vtt') or 0), ohlc_list))
+        return ticks
@@ -201,25 +201,23 @@ class ReversalIntegration:
         This implements the first-come-first-serve logic where unsubscription
         only happens after both slots are occupied.
         """
-        # Count entered positions
-        entered_positions = 0
-        subscribed_stocks = []
-        
-        for stock in self.monitor.stocks.values():
-            if stock.is_subscribed:
-                subscribed_stocks.append(stock)
-                if stock.entered:
-                    entered_positions += 1
+        # The monitor's index answers this without walking every stock
+        index = self.monitor.index
+        if index.entered_count < 2:
+            return
+
+        subscribed_keys = index.ordered(index.subscribed)
+        entered_keys = index.entered & index.subscribed
         
         # If we have 2 entered positions and more than 2 subscribed stocks,
         # unsubscribe the remaining ones
-        if entered_positions >= 2 and len(subscribed_stocks) > 2:
-            remaining_stocks = [stock for stock in subscribed_stocks if not stock.entered]
+        if len(entered_keys) >= 2 and len(subscribed_keys) > 2:
+            remaining_keys = [key for key in subscribed_keys if key not in entered_keys]
             
-            if remaining_stocks:
-                remaining_keys = [stock.instrument_key for stock in remaining_stocks]
+            if remaining_keys:
+                remaining_symbols = [self.monitor.stocks[key].symbol for key in remaining_keys]
                 print(f"\n=== UNSUBSCRIBING REMAINING STOCKS AFTER 2 POSITIONS FILLED ===")
-                print(f"Unsubscribing {len(remaining_stocks)} remaining stocks: {[s.symbol for s in remaining_stocks]}")
+                print(f"Unsubscribing {len(remaining_keys)} remaining stocks: {remaining_symbols}")
                 
                 self.subscription_manager.safe_unsubscribe(remaining_keys, "positions_filled")
                 self.subscription_manager.mark_stocks_unsubscribed(remaining_keys)
@@ -231,10 +229,7 @@ class ReversalIntegration:
         print("\n=== CLEANUP: UNSUBSCRIBING ALL STOCKS ===")
         
         # Get all subscribed stocks
-        subscribed_keys = []
-        for key, stock in self.monitor.stocks.items():
-            if stock.is_subscribed:
-                subscribed_keys.append(key)
+        subscribed_keys = self.monitor.index.ordered(self.monitor.index.subscribed)
         
         if subscribed_keys:
             self.subscription_manager.safe_unsubscribe(subscribed_keys, "end_of_day")
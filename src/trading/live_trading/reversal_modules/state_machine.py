@@ -32,6 +32,8 @@ class StockState(Enum):
 
 class StateMachineMixin:
     """Mixin class to add state machine functionality to ReversalStockState"""
+
+    __slots__ = ()  # Attributes live in ReversalStockState's slots
     
     def __init__(self):
         """Initialize state machine attributes"""
@@ -9,6 +9,8 @@ and methods to unsubscribe from rejected, unselected, and exited stocks.
 from typing import List, Optional
 import logging
 
+from .state_machine import StockState
+
 logger = logging.getLogger(__name__)
 
 
@@ -76,6 +78,11 @@ class SubscriptionManager:
             print(f"Unsubscribe error: {e}")
             print(f"Continuing with tick filtering for {len(instrument_keys)} stocks")
     
+    def _subscribed_in_state(self, state: StockState) -> List[str]:
+        """Still-subscribed keys in a state, from the monitor's index (in monitor order)"""
+        index = self.monitor.index
+        return index.ordered(index.in_state(state, subscribed_only=True))
+    
     def get_rejected_stocks(self) -> List[str]:
         """
         Get list of rejected stock instrument keys
@@ -83,15 +90,7 @@ class SubscriptionManager:
         Returns:
             List of instrument keys for stocks in REJECTED state
         """
-        from .state_machine import StockState
-        
-        rejected_keys = []
-        
-        for instrument_key, stock in self.monitor.stocks.items():
-            if stock.state == StockState.REJECTED and stock.is_subscribed:
-                rejected_keys.append(instrument_key)
-        
-        return rejected_keys
+        return self._subscribed_in_state(StockState.REJECTED)
     
     def get_unselected_stocks(self) -> List[str]:
         """
@@ -100,15 +99,7 @@ class SubscriptionManager:
         Returns:
             List of instrument keys for stocks in NOT_SELECTED state
         """
-        from .state_machine import StockState
-        
-        unselected_keys = []
-        
-        for instrument_key, stock in self.monitor.stocks.items():
-            if stock.state == StockState.NOT_SELECTED and stock.is_subscribed:
-                unselected_keys.append(instrument_key)
-        
-        return unselected_keys
+        return self._subscribed_in_state(StockState.NOT_SELECTED)
     
     def get_exited_stocks(self) -> List[str]:
         """
@@ -117,15 +108,7 @@ class SubscriptionManager:
         Returns:
             List of instrument keys for stocks in EXITED state
         """
-        from .state_machine import StockState
-        
-        exited_keys = []
-        
-        for instrument_key, stock in self.monitor.stocks.items():
-            if stock.state == StockState.EXITED and stock.is_subscribed:
-                exited_keys.append(instrument_key)
-        
-        return exited_keys
+        return self._subscribed_in_state(StockState.EXITED)
     
     def mark_stocks_unsubscribed(self, instrument_keys: List[str]):
         """
@@ -138,8 +121,6 @@ class SubscriptionManager:
             if instrument_key in self.monitor.stocks:
                 stock = self.monitor.stocks[instrument_key]
                 stock.is_subscribed = False
-                # Import StockState from state_machine
-                from .state_machine import StockState
                 stock.state = StockState.UNSUBSCRIBED
                 logger.info(f"[{stock.symbol}] Marked as UNSUBSCRIBED")
     
@@ -229,9 +210,6 @@ class SubscriptionManager:
         """Log current subscription status for all stocks"""
         print("\n=== SUBSCRIPTION STATUS ===")
         
-        # Import StockState from state_machine
-        from .state_machine import StockState
-        
         by_state = {}
         for stock in self.monitor.stocks.values():
             state_name = stock.state.value
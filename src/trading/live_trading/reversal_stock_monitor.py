@@ -30,6 +30,7 @@ from config import (
 # Import modular architecture
 from reversal_modules.state_machine import StateMachineMixin, StockState
 from reversal_modules.tick_processor import ReversalTickProcessor
+from stock_index import StockIndex, indexed_flag, indexed_state, NO_HIGH, NO_LOW
 
 logger = logging.getLogger(__name__)
 
@@ -41,7 +42,26 @@ class ReversalStockState(StateMachineMixin):
     and ReversalTickProcessor for self-contained tick processing.
     """
 
+    # Fixed attribute slots keep per-stock memory and attribute access flat for
+    # large watchlists; __dict__ is only materialised for ad-hoc attributes
+    __slots__ = (
+        '_index', '_state', 'symbol', 'instrument_key', 'previous_close', 'situation',
+        'open_price', 'current_price', 'daily_high', 'daily_low', 'last_update',
+        '_is_active', '_is_subscribed', '_entered', 'gap_validated',
+        'low_violation_checked', 'entry_ready', 'oops_triggered', 'strong_start_triggered',
+        'entry_high', 'entry_sl', 'entry_price', 'entry_time', 'exit_price', 'exit_time',
+        'pnl', 'rejection_reason', '__dict__',
+    )
+
+    # State and flags mirrored into the monitor's StockIndex on every change
+    state = indexed_state()
+    is_active = indexed_flag('is_active')
+    is_subscribed = indexed_flag('is_subscribed')
+    entered = indexed_flag('entered')
+
     def __init__(self, symbol: str, instrument_key: str, previous_close: float, situation: str = 'reversal_s2'):
+        self._index = None  # Set by StockIndex.add
+
         # Initialize state machine - FIXED: Call parent __init__ properly
         super().__init__()
         
@@ -53,8 +73,8 @@ class ReversalStockState(StateMachineMixin):
         # Market data
         self.open_price: Optional[float] = None
         self.current_price: Optional[float] = None
-        self.daily_high: float = float('-inf')
-        self.daily_low: float = float('inf')
+        self.daily_high: float = NO_HIGH
+        self.daily_low: float = NO_LOW
         self.last_update: Optional[datetime] = None
 
         # Status flags (kept for backward compatibility during transition)
@@ -331,6 +351,8 @@ class ReversalStockMonitor:
 
     def __init__(self):
         self.stocks: Dict[str, ReversalStockState] = {}  # instrument_key -> ReversalStockState
+        self.by_symbol: Dict[str, ReversalStockState] = {}  # symbol -> ReversalStockState
+        self.index = StockIndex()  # Keys by state and flag, kept current by the stocks themselves
         self.session_start_time = None
 
     def add_stock(self, symbol: str, instrument_key: str, previous_close: float, situation: str = 'reversal_s2'):
@@ -339,15 +361,24 @@ class ReversalStockMonitor:
             logger.warning(f"Stock {symbol} already being monitored")
             return
 
-        self.stocks[instrument_key] = ReversalStockState(symbol, instrument_key, previous_close, situation)
+        stock = ReversalStockState(symbol, instrument_key, previous_close, situation)
+        self.stocks[instrument_key] = stock
+        self.by_symbol.setdefault(symbol, stock)
+        self.index.add(stock)
         logger.info(f"Added {symbol} ({situation}) to reversal monitor (prev close: {previous_close:.2f})")
 
     def remove_stock(self, instrument_key: str):
         """Remove a stock from monitoring"""
         if instrument_key in self.stocks:
-            symbol = self.stocks[instrument_key].symbol
-            del self.stocks[instrument_key]
-            logger.info(f"Removed {symbol} from reversal monitor")
+            stock = self.stocks.pop(instrument_key)
+            if self.by_symbol.get(stock.symbol) is stock:
+                del self.by_symbol[stock.symbol]
+            self.index.remove(stock)
+            logger.info(f"Removed {stock.symbol} from reversal monitor")
+
+    def get_stock_by_symbol(self, symbol: str) -> Optional[ReversalStockState]:
+        """Monitored stock for a trading symbol (first added wins, like a scan of stocks)"""
+        return self.by_symbol.get(symbol)
 
     def get_active_stocks(self) -> List[ReversalStockState]:
         """Get list of currently active stocks"""
@@ -482,6 +513,6 @@ class ReversalStockMonitor:
             'total_stocks': len(self.stocks),
             'active_stocks': len(self.get_active_stocks()),
             'qualified_stocks': len(self.get_qualified_stocks()),
-            'entered_positions': len([s for s in self.stocks.values() if s.entered]),
+            'entered_positions': self.index.entered_count,
             'stock_details': {k: v.get_status() for k, v in self.stocks.items()}
         }
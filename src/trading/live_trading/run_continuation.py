@@ -73,8 +73,13 @@ def cleanup_singleton_lock():
     except Exception as e:
         print(f"WARNING: Could not cleanup lock: {e}")
 
-def run_continuation_bot():
-    """Run the continuation trading bot using pure OHLC processing"""
+def run_continuation_bot(clock=None):
+    """
+    Run the continuation trading bot using pure OHLC processing
+
+    Args:
+        clock: WallClock (default) or SimulatedClock - every wait and time check goes through it
+    """
 
     print("STARTING CONTINUATION TRADING BOT (OHLC-ONLY)")
     print("=" * 50)
@@ -89,24 +94,31 @@ def run_continuation_bot():
     from rule_engine import RuleEngine
     from selection_engine import SelectionEngine
     from paper_trader import PaperTrader
-    from simple_data_streamer import SimpleStockStreamer
+    from sharded_streamer import create_streamer
+    from tick_queue import TickDispatcher
+    from tick_latency import TickLatencyRecorder
+    from feed_recorder import FeedRecorder, snapshot_stocks
+    from config import RECORD_FEED, FEED_RECORDING_DIR, USE_FEED_HUB, FEED_HUB_SOCKET
+    from feed_hub import ensure_feed_hub
 
     from volume_profile import volume_profile_calculator
     from src.utils.upstox_fetcher import UpstoxFetcher, iep_manager
     from src.trading.live_trading.continuation_modules.continuation_timing_module import ContinuationTimingManager
     from src.trading.live_trading.continuation_modules.integration import ContinuationIntegration
-    from config import MARKET_OPEN, ENTRY_TIME, PREP_START
+    from config import MARKET_OPEN, ENTRY_TIME, PREP_START, PREWARM_START, IEP_POLL_INTERVAL_SECONDS, IEP_POLL_STOP_SECONDS
+    from clock import SYSTEM_CLOCK
+    clock = clock or SYSTEM_CLOCK
 
     # Create components
     upstox_fetcher = UpstoxFetcher()
-    monitor = StockMonitor()
+    monitor = StockMonitor(clock=clock)
     rule_engine = RuleEngine()
     selection_engine = SelectionEngine()
-    paper_trader = PaperTrader()
+    paper_trader = PaperTrader(clock=clock.now)
 
     IST = pytz.timezone('Asia/Kolkata')
 
-    print(f"Time: {datetime.now(IST).strftime('%Y-%m-%d %H:%M:%S %Z')}")
+    print(f"Time: {clock.now().strftime('%Y-%m-%d %H:%M:%S %Z')}")
     print()
 
     # Load continuation stock configuration
@@ -125,11 +137,28 @@ def run_continuation_bot():
         }.get(situation, situation)
         print(f"   {symbol}: {desc}")
 
-    # Get previous closes using LTP API
-    prev_closes = {}
+    # Load the nightly prep pack (previous closes, keys, ADR, baselines, VAH)
+    from prep_pack import load_prep_pack, get_pack_values
+    prep_pack = load_prep_pack()
+    if prep_pack:
+        print(f"LOADED prep pack for {prep_pack['trading_date']} (session {prep_pack['prev_session']})")
+    else:
+        print("No prep pack for today - fetching prep data live")
+
+    # Previous closes from the prep pack; batched quote requests only for what it lacks
+    prev_closes = get_pack_values(prep_pack, symbols, 'prev_close')
+    pack_keys = get_pack_values(prep_pack, symbols, 'instrument_key')
+    missing_closes = [symbol for symbol in symbols if symbol not in prev_closes]
+    quotes = upstox_fetcher.get_batch_quotes(missing_closes) if missing_closes else {}
     for symbol in symbols:
+        if symbol in prev_closes:
+            print(f"   OK {symbol}: Rs{prev_closes[symbol]:.2f} (prep pack)")
+            continue
         try:
-            data = upstox_fetcher.get_ltp_data(symbol)
+            data = quotes.get(symbol)
+            if not data or data.get('cp') is None:
+                # Fall back to single-symbol LTP API for anything the batch missed
+                data = upstox_fetcher.get_ltp_data(symbol)
             if data and 'cp' in data and data['cp'] is not None:
                 prev_closes[symbol] = float(data['cp'])
                 print(f"   OK {symbol}: Rs{prev_closes[symbol]:.2f}")
@@ -143,7 +172,7 @@ def run_continuation_bot():
     stock_symbols = {}
     for symbol, prev_close in prev_closes.items():
         try:
-            key = upstox_fetcher.get_instrument_key(symbol)
+            key = pack_keys.get(symbol) or upstox_fetcher.get_instrument_key(symbol)
             if key:
                 instrument_keys.append(key)
                 stock_symbols[key] = symbol
@@ -156,7 +185,13 @@ def run_continuation_bot():
 
     # Initialize data streamer with all instruments initially
     # We'll filter this later after validation
-    data_streamer = SimpleStockStreamer(instrument_keys, stock_symbols)
+    # Through the shared feed hub when it is up (one upstream socket for both bots), else direct
+    feed_hub = FEED_HUB_SOCKET if USE_FEED_HUB and ensure_feed_hub(FEED_HUB_SOCKET) else None
+    if USE_FEED_HUB and feed_hub is None:
+        print("Feed hub unavailable - connecting directly to the Market Data Feed")
+    # Direct connections are sharded when the watchlist exceeds one connection's instrument limit
+    data_streamer = create_streamer(instrument_keys, stock_symbols, feed_hub=feed_hub)
+    data_streamer.feed_hub_name = "continuation"
 
     # CREATE MODULAR INTEGRATION
     # Create modular integration BEFORE gap validation
@@ -171,8 +206,20 @@ def run_continuation_bot():
         # Use modular integration for tick processing
         integration.simplified_tick_handler(instrument_key, symbol, price, timestamp, ohlc_list)
 
-    # Set the continuation tick handler
-    data_streamer.tick_handler = tick_handler_continuation
+    # Receive thread only enqueues; the strategy worker runs the handler and owns all stock state
+    # Exchange -> receive -> decoded -> decision latency for every tick (live snapshot for the server API)
+    tick_latency = TickLatencyRecorder()
+    data_streamer.tick_latency = tick_latency
+    tick_dispatcher = TickDispatcher(tick_handler_continuation, latency=tick_latency)
+    data_streamer.tick_handler = tick_dispatcher.put
+    tick_dispatcher.add_sources(data_streamer.feed_sources())
+    tick_dispatcher.start()
+    tick_latency.start_live_dump()
+
+    # Record every raw feed frame this session for replay
+    if RECORD_FEED:
+        data_streamer.feed_recorder = FeedRecorder(FEED_RECORDING_DIR, prefix="continuation_feed")
+        data_streamer.feed_recorder.open({'bot': 'continuation', 'stock_symbols': stock_symbols})
 
     print("\n=== CONTINUATION BOT INITIALIZED ===")
     print("Using pure OHLC processing - no tick-based opening prices")
@@ -182,93 +229,155 @@ def run_continuation_bot():
         # PREP TIME: Load metadata and prepare data
         print("=== PREP TIME: Loading metadata and preparing data ===")
 
-        # Load stock scoring metadata (ADR, volume baselines, etc.)
+        # PREP steps run as dependent tasks, each against a hard deadline:
+        #   metadata -> volume_baselines  (deadline PREP_START, fallback: scanner-minimum baseline)
+        #   vah                            (deadline PREP_START, fallback: VAH saved by an earlier run today)
+        #   iep (polls PREP_START -> open) (deadline MARKET_OPEN, fallback: none - OHLC opening prices)
+        #   prewarm (waits for PREWARM_START) (deadline PREP_START, fallback: cold connect after validation)
         from stock_scorer import stock_scorer
-        stock_scorer.preload_metadata(list(prev_closes.keys()), prev_closes)
-        print("OK Stock metadata loaded for scoring")
-        
-        # Get mean volume baselines from cache during PREP time
-        print("LOADING mean volume baselines from cache...")
-        for stock in monitor.stocks.values():
-            try:
-                metadata = stock_scorer.stock_metadata.get(stock.symbol, {})
-                volume_baseline = metadata.get('volume_baseline', 1000000)
-                stock.volume_baseline = volume_baseline
-                print(f"Mean volume baseline for {stock.symbol}: {volume_baseline:,}")
-            except Exception as e:
-                print(f"ERROR loading mean volume baseline for {stock.symbol}: {e}")
-
-        # Calculate VAH from previous day's volume profile
-        print("Calculating VAH from previous day's volume profile...")
+        from prep_orchestrator import PrepOrchestrator
         continuation_symbols = [symbol for symbol, situation in situations.items() if situation == 'continuation']
-        print(f"Continuation symbols: {continuation_symbols}")
-        if continuation_symbols:
-            try:
-                result = volume_profile_calculator.calculate_vah_for_stocks(continuation_symbols)
-                global_vah_dict = result
-
-                print(f"VAH calculated for {len(global_vah_dict)} continuation stocks")
-
-                # Save VAH results to file for frontend display
-                if global_vah_dict:
-                    import json
-                    vah_results = {
-                        'timestamp': datetime.now().isoformat(),
-                        'mode': 'continuation',
-                        'results': global_vah_dict,
-                        'summary': f"{len(global_vah_dict)} stocks calculated"
-                    }
-
-                    with open('vah_results.json', 'w') as f:
-                        json.dump(vah_results, f, indent=2)
-
-                    print(f"VAH results saved to vah_results.json")
-
-                    # Print VAH results explicitly for UI visibility
-                    if global_vah_dict:
-                        print("VAH CALCULATION RESULTS:")
-                        for symbol, vah in global_vah_dict.items():
-                            print(f"[OK] {symbol}: Upper Range (VAH) = Rs{vah:.2f}")
-                        print(f"Summary: {len(global_vah_dict)} stocks successfully calculated")
 
+        def load_metadata():
+            # Load stock scoring metadata (ADR, volume baselines, etc.)
+            missing_metadata = list(prev_closes.keys())
+            if prep_pack:
+                missing_metadata = stock_scorer.load_from_prep_pack(prep_pack, missing_metadata)
+            if missing_metadata:
+                stock_scorer.preload_metadata(missing_metadata, prev_closes, quotes or None)
+            print("OK Stock metadata loaded for scoring")
+
+        def load_volume_baselines(use_default=False):
+            # Get mean volume baselines from cache during PREP time
+            print("LOADING mean volume baselines from cache...")
+            for stock in monitor.stocks.values():
+                # Past its deadline the fallback owns the baselines - a late run must not overwrite them
+                if not use_default and prep.superseded('volume_baselines'):
+                    print("Volume baselines superseded by fallback - stopping late load")
+                    return
+                try:
+                    metadata = {} if use_default else stock_scorer.stock_metadata.get(stock.symbol, {})
+                    volume_baseline = metadata.get('volume_baseline', 1000000)
+                    stock.volume_baseline = volume_baseline
+                    print(f"Mean volume baseline for {stock.symbol}: {volume_baseline:,}")
+                except Exception as e:
+                    print(f"ERROR loading mean volume baseline for {stock.symbol}: {e}")
+
+        def calculate_vah():
+            # Calculate VAH from previous day's volume profile
+            print("Calculating VAH from previous day's volume profile...")
+            print(f"Continuation symbols: {continuation_symbols}")
+            if not continuation_symbols:
+                print("No continuation stocks to calculate VAH for")
+                return {}
+
+            # Prior-day VAH from the prep pack; calculate only what it lacks
+            result = get_pack_values(prep_pack, continuation_symbols, 'vah')
+            missing_vah = [symbol for symbol in continuation_symbols if symbol not in result]
+            if missing_vah:
+                result.update(volume_profile_calculator.calculate_vah_for_stocks(missing_vah))
+                for symbol, reason in volume_profile_calculator.last_vah_failures.items():
+                    print(f"   VAH skipped for {symbol}: {reason}")
+            print(f"VAH calculated for {len(result)} continuation stocks")
+
+            # Save VAH results to file for frontend display
+            if result:
+                import json
+                vah_results = {
+                    'timestamp': clock.now().isoformat(),
+                    'mode': 'continuation',
+                    'results': result,
+                    'summary': f"{len(result)} stocks calculated"
+                }
+
+                with open('vah_results.json', 'w') as f:
+                    json.dump(vah_results, f, indent=2)
+
+                print(f"VAH results saved to vah_results.json")
+            return result
+
+        def cached_vah():
+            # VAH saved by an earlier run today is for the same previous session
+            import json
+            try:
+                with open('vah_results.json', 'r') as f:
+                    vah_results = json.load(f)
+                if vah_results.get('timestamp', '')[:10] == clock.now().date().isoformat():
+                    return {s: v for s, v in vah_results.get('results', {}).items() if s in continuation_symbols}
             except Exception as e:
-                print(f"VAH calculation error: {e}")
-                global_vah_dict = {}
-        else:
-            global_vah_dict = {}
-            print("No continuation stocks to calculate VAH for")
+                print(f"No cached VAH available: {e}")
+            return {}
+
+        def fetch_iep():
+            # Wait for PREP_START time (30 seconds before market open)
+            prep_start = PREP_START
+            prep_datetime = clock.today_at(prep_start)
+            wait_seconds = clock.seconds_until(prep_datetime)
+            if wait_seconds > 0:
+                print(f"WAITING {wait_seconds:.0f} seconds until PREP_START ({prep_start})...")
+                clock.sleep_until(prep_datetime)
+
+            # Poll IEP for all continuation stocks from PREP_START until just before open;
+            # the last reading goes to gap validation
+            poll_until = clock.today_at(MARKET_OPEN) - timedelta(seconds=IEP_POLL_STOP_SECONDS)
+            print(f"POLLING IEP for {len(symbols)} continuation stocks every {IEP_POLL_INTERVAL_SECONDS}s until {poll_until.time()}...")
+            iep_prices = iep_manager.poll_final_iep(symbols, poll_until, IEP_POLL_INTERVAL_SECONDS, clock=clock)
+            stats = iep_manager.last_poll_stats
+            if stats:
+                print(f"IEP polls: {stats['polls']}, avg latency {stats['avg_latency_ms']:.0f}ms "
+                      f"(max {stats['max_latency_ms']:.0f}ms), {len(stats['drift'])} stocks drifted")
+                for symbol, (first, last) in stats['drift'].items():
+                    print(f"   IEP drift {symbol}: Rs{first:.2f} -> Rs{last:.2f}")
+            return iep_prices
+
+        def prewarm():
+            # Open pooled HTTPS and the websocket (no subscription) a few minutes before PREP_START
+            prewarm_datetime = clock.today_at(PREWARM_START)
+            wait_seconds = clock.seconds_until(prewarm_datetime)
+            if wait_seconds > 0:
+                print(f"WAITING {wait_seconds:.0f} seconds until PREWARM_START ({PREWARM_START})...")
+                clock.sleep_until(prewarm_datetime)
+
+            https_seconds = iep_manager.upstox_fetcher.prewarm_connections()
+            print(f"PRE-WARM: pooled HTTPS connections open in {https_seconds:.2f}s")
+            warm = data_streamer.prewarm()
+            print(f"PRE-WARM: market data websocket {'connected, subscription deferred' if warm else 'not connected'}")
+            return warm
+
+        prep = PrepOrchestrator(max_workers=5, clock=clock)
+        prep.add_task('metadata', load_metadata, deadline=PREP_START,
+                      fallback_note='stocks without metadata are not scored')
+        prep.add_task('volume_baselines', load_volume_baselines, depends_on=['metadata'], deadline=PREP_START,
+                      fallback=lambda: load_volume_baselines(use_default=True),
+                      fallback_note='scanner-minimum baseline (1,000,000)')
+        prep.add_task('vah', calculate_vah, deadline=PREP_START, fallback=cached_vah,
+                      fallback_note="today's cached vah_results.json")
+        prep.add_task('iep', fetch_iep, deadline=MARKET_OPEN, fallback=dict,
+                      fallback_note='no IEP - OHLC opening prices')
+        prep.add_task('prewarm', prewarm, deadline=PREP_START, fallback=lambda: False,
+                      fallback_note='cold websocket connect after validation')
+        prep_results = prep.run()
+        prep.print_report()
+
+        global_vah_dict = prep_results.get('vah') or {}
+
+        # Print VAH results explicitly for UI visibility
+        if global_vah_dict:
+            print("VAH CALCULATION RESULTS:")
+            for symbol, vah in global_vah_dict.items():
+                print(f"[OK] {symbol}: Upper Range (VAH) = Rs{vah:.2f}")
+            print(f"Summary: {len(global_vah_dict)} stocks successfully calculated")
 
         # PRE-MARKET IEP FETCH SEQUENCE
         print("=== PRE-MARKET IEP FETCH SEQUENCE ===")
-        
-        # Wait for PREP_START time (30 seconds before market open)
-        prep_start = PREP_START
-        current_time = datetime.now(IST).time()
-        
-        if current_time < prep_start:
-            prep_datetime = datetime.combine(datetime.now(IST).date(), prep_start)
-            prep_datetime = IST.localize(prep_datetime)
-            current_datetime = datetime.now(IST)
-            wait_seconds = (prep_datetime - current_datetime).total_seconds()
-            if wait_seconds > 0:
-                print(f"WAITING {wait_seconds:.0f} seconds until PREP_START ({prep_start})...")
-                time_module.sleep(wait_seconds)
-        
-        # Fetch IEP for all continuation stocks at PREP_START
-        print(f"FETCHING IEP for {len(symbols)} continuation stocks at PREP_START ({prep_start})...")
-        iep_prices = iep_manager.fetch_iep_batch(symbols)
+        iep_prices = prep_results.get('iep') or {}
         
         if iep_prices:
             print("IEP FETCH COMPLETED SUCCESSFULLY")
             
             # Set opening prices and run gap validation
             for symbol, iep_price in iep_prices.items():
-                # Find stock by symbol
-                stock = None
-                for s in monitor.stocks.values():
-                    if s.symbol == symbol:
-                        stock = s
-                        break
+                stock = monitor.get_stock_by_symbol(symbol)
                 
                 if stock:
                     stock.set_open_price(iep_price)
@@ -301,22 +410,17 @@ def run_continuation_bot():
 
         # Connect to data stream
         print("ATTEMPTING to connect to data stream...")
-        if data_streamer.connect():
-            print("CONNECTED Data stream connected")
+        if data_streamer.connected or data_streamer.connect():
+            print(f"CONNECTED Data stream connected{' (pre-warmed)' if data_streamer.defer_subscription else ''}")
 
             # Wait for market open
-            market_open = MARKET_OPEN
-            current_time = datetime.now(IST).time()
-
-            if current_time < market_open:
-                market_datetime = datetime.combine(datetime.now(IST).date(), market_open)
-                market_datetime = IST.localize(market_datetime)
-                current_datetime = datetime.now(IST)
-                wait_seconds = (market_datetime - current_datetime).total_seconds()
-                if wait_seconds > 0:
-                    print(f"WAITING {wait_seconds:.0f} seconds for market open...")
-                    time_module.sleep(wait_seconds)
+            market_datetime = clock.today_at(MARKET_OPEN)
+            wait_seconds = clock.seconds_until(market_datetime)
+            if wait_seconds > 0:
+                print(f"WAITING {wait_seconds:.0f} seconds for market open...")
+                clock.sleep_until(market_datetime)
 
+            data_streamer.market_open_time = market_datetime
             print("MARKET OPEN! Monitoring live OHLC data...")
             print("NO initial volume capture needed - using current volume directly as cumulative")
 
@@ -360,6 +464,12 @@ def run_continuation_bot():
             if validated_instrument_keys:
                 # USE MODULAR SUBSCRIPTION MANAGEMENT with filtered list
                 integration.prepare_and_subscribe(validated_instrument_keys)
+                # Pre-warmed socket: one subscribe message for the validated stocks
+                data_streamer.subscribe_active()
+                if data_streamer.feed_recorder is not None:
+                    # Prepared stock state lets replay_session.py rebuild this session
+                    data_streamer.feed_recorder.record_meta(
+                        {'event': 'prep', 'stocks': tick_dispatcher.call(snapshot_stocks, monitor)})
                 print(f"OPTIMIZED SUBSCRIPTION: Only {len(validated_stocks)} validated stocks subscribed")
             else:
                 print("NO VALIDATED STOCKS - No subscriptions needed")
@@ -367,47 +477,40 @@ def run_continuation_bot():
 
             # ENFORCE ENTRY TIME: Wait until ENTRY_TIME before preparing entries
             entry_decision_time = ENTRY_TIME
-            current_time = datetime.now(IST).time()
-
-            if current_time < entry_decision_time:
-                decision_datetime = datetime.combine(datetime.now(IST).date(), entry_decision_time)
-                decision_datetime = IST.localize(decision_datetime)
-                current_datetime = datetime.now(IST)
-                wait_seconds = (decision_datetime - current_datetime).total_seconds()
-                if wait_seconds > 0:
-                    print(f"\nWAITING {wait_seconds:.0f} seconds until ENTRY_TIME ({entry_decision_time})...")
-                    print(f"Current time: {current_time}")
-                    print(f"Entry time: {entry_decision_time}")
-                    time_module.sleep(wait_seconds)
+            decision_datetime = clock.today_at(entry_decision_time)
+            wait_seconds = clock.seconds_until(decision_datetime)
+            if wait_seconds > 0:
+                print(f"\nWAITING {wait_seconds:.0f} seconds until ENTRY_TIME ({entry_decision_time})...")
+                print(f"Current time: {clock.now().time()}")
+                print(f"Entry time: {entry_decision_time}")
+                clock.sleep_until(decision_datetime)
 
-            print(f"\n=== ENTRY TIME REACHED: {datetime.now(IST).time()} ===")
+            print(f"\n=== ENTRY TIME REACHED: {clock.now().time()} ===")
             
             # PHASE 2: UNSUBSCRIBE LOW+VOLUME FAILED STOCKS
             # This should happen at 9:20 (30 seconds after market open), but since we're at entry time,
             # we need to check if we're past 9:20 or if we should wait
-            phase_2_time = (datetime.combine(datetime.now(IST).date(), MARKET_OPEN) + timedelta(seconds=30)).time()
-            current_time = datetime.now(IST).time()
+            phase_2_datetime = clock.today_at(MARKET_OPEN) + timedelta(seconds=30)
+            phase_2_time = phase_2_datetime.time()
+            current_time = clock.now().time()
             
             if current_time >= phase_2_time:
                 print("=== PHASE 2: UNSUBSCRIBING LOW+VOLUME FAILED STOCKS ===")
-                monitor.check_violations()
-                monitor.check_volume_validations()
-                integration.phase_2_unsubscribe_after_low_and_volume()
+                tick_dispatcher.call(monitor.check_violations)
+                tick_dispatcher.call(monitor.check_volume_validations)
+                tick_dispatcher.call(integration.phase_2_unsubscribe_after_low_and_volume)
                 integration.log_final_subscription_status()
             else:
                 # Wait until phase 2 time
-                phase_2_datetime = datetime.combine(datetime.now(IST).date(), phase_2_time)
-                phase_2_datetime = IST.localize(phase_2_datetime)
-                current_datetime = datetime.now(IST)
-                wait_seconds = (phase_2_datetime - current_datetime).total_seconds()
+                wait_seconds = clock.seconds_until(phase_2_datetime)
                 if wait_seconds > 0:
                     print(f"WAITING {wait_seconds:.0f} seconds until PHASE 2 ({phase_2_time})...")
-                    time_module.sleep(wait_seconds)
+                    clock.sleep_until(phase_2_datetime)
                 
                 print("=== PHASE 2: UNSUBSCRIBING LOW+VOLUME FAILED STOCKS ===")
-                monitor.check_violations()
-                monitor.check_volume_validations()
-                integration.phase_2_unsubscribe_after_low_and_volume()
+                tick_dispatcher.call(monitor.check_violations)
+                tick_dispatcher.call(monitor.check_volume_validations)
+                tick_dispatcher.call(integration.phase_2_unsubscribe_after_low_and_volume)
                 integration.log_final_subscription_status()
             
             print("=== PREPARING ENTRIES ===")
@@ -464,16 +567,20 @@ def run_continuation_bot():
 
                 print(f"   {stock.symbol} ({situation_desc}): {open_status} | {gap_status} | {low_status} | {volume_status}{rejection_info}")
             
-            monitor.prepare_entries()
+            tick_dispatcher.call(monitor.prepare_entries)
+            tick_dispatcher.call(monitor.log_qualification_report)
 
-            qualified_stocks = monitor.get_qualified_stocks()
+            qualified_stocks = tick_dispatcher.call(monitor.get_qualified_stocks)
             print(f"Qualified stocks: {len(qualified_stocks)}")
 
             # FIRST COME, FIRST SERVE: Mark ALL qualified stocks as ready
             # No pre-selection bottleneck - all qualified stocks can trade
-            for stock in qualified_stocks:
-                stock.entry_ready = True
-                print(f"READY to trade: {stock.symbol} (Entry: Rs{stock.entry_high:.2f}, SL: Rs{stock.entry_sl:.2f})")
+            def mark_entry_ready():
+                for stock in qualified_stocks:
+                    stock.entry_ready = True
+                    print(f"READY to trade: {stock.symbol} (Entry: Rs{stock.entry_high:.2f}, SL: Rs{stock.entry_sl:.2f})")
+
+            tick_dispatcher.call(mark_entry_ready)
 
             # Keep monitoring for entries, exits, and trailing stops
             print("\nMONITORING for entry/exit signals...")
@@ -485,16 +592,31 @@ def run_continuation_bot():
 
     except KeyboardInterrupt:
         print("\nSTOPPED by user")
-
-    # Cleanup
-    print("\n=== CLEANUP ===")
-    summary = monitor.get_summary()
-    paper_trader.log_session_summary(summary)
-    paper_trader.export_trades_csv()
-    paper_trader.close()
-
-    print("=== CONTINUATION BOT SESSION ENDED ===")
-    print(f"Summary: {summary}")
+    finally:
+        # Cleanup - also runs on an early return (nothing to subscribe) and on errors
+        print("\n=== CLEANUP ===")
+        data_streamer.disconnect()
+        tick_dispatcher.stop()
+        print(tick_dispatcher.format_stats())
+        tick_latency.stop_live_dump()
+        tick_latency.dump()
+        print(tick_latency.format_summary())
+        print(f"Tick latency histograms saved to {tick_latency.snapshot_file}")
+        if data_streamer.feed_recorder is not None:
+            # Trims the session file and compresses it to .zst before returning
+            recorder = data_streamer.feed_recorder
+            recording = recorder.close()
+            print(f"Feed recording: {recorder.records:,} frames saved to {recording}")
+        summary = monitor.get_summary()
+        paper_trader.log_session_summary(summary)
+        paper_trader.export_trades_csv()
+        paper_trader.close()
+
+        from src.utils.quote_cache import quote_cache
+        print(f"Quote cache: {quote_cache.calls_saved()} REST calls saved this session")
+
+        print("=== CONTINUATION BOT SESSION ENDED ===")
+        print(f"Summary: {summary}")
 
 if __name__ == "__main__":
     try:
@@ -80,8 +80,13 @@ def cleanup_singleton_lock():
     except Exception as e:
         print(f"WARNING: Could not cleanup lock: {e}")
 
-def run_reversal_bot():
-    """Run the reversal trading bot using API-based opening prices"""
+def run_reversal_bot(clock=None):
+    """
+    Run the reversal trading bot using API-based opening prices
+
+    Args:
+        clock: WallClock (default) or SimulatedClock - every wait and time check goes through it
+    """
 
     print("=== TOP LEVEL DEBUGGING START ===")
     print("STARTING REVERSAL TRADING BOT (API-BASED OPENING PRICES)")
@@ -94,22 +99,30 @@ def run_reversal_bot():
     from rule_engine import RuleEngine
     from selection_engine import SelectionEngine
     from paper_trader import PaperTrader
-    from simple_data_streamer import SimpleStockStreamer
+    from sharded_streamer import create_streamer
+    from tick_queue import TickDispatcher
+    from tick_latency import TickLatencyRecorder
+    from feed_recorder import FeedRecorder, snapshot_stocks
+    from config import RECORD_FEED, FEED_RECORDING_DIR, USE_FEED_HUB, FEED_HUB_SOCKET
+    from feed_hub import ensure_feed_hub
 
     from volume_profile import volume_profile_calculator
     from src.utils.upstox_fetcher import UpstoxFetcher, iep_manager
     from config import MARKET_OPEN, ENTRY_TIME, PREP_START, API_POLL_DELAY_SECONDS, API_RETRY_DELAY_SECONDS
+    from config import IEP_POLL_INTERVAL_SECONDS, IEP_POLL_STOP_SECONDS, PREWARM_START
+    from clock import SYSTEM_CLOCK
+    clock = clock or SYSTEM_CLOCK
 
     # Create components
     upstox_fetcher = UpstoxFetcher()
     monitor = ReversalStockMonitor()
     rule_engine = RuleEngine()
     selection_engine = SelectionEngine()
-    paper_trader = PaperTrader()
+    paper_trader = PaperTrader(clock=clock.now)
 
     IST = pytz.timezone('Asia/Kolkata')
 
-    print(f"Time: {datetime.now(IST).strftime('%Y-%m-%d %H:%M:%S %Z')}")
+    print(f"Time: {clock.now().strftime('%Y-%m-%d %H:%M:%S %Z')}")
     print()
 
     # Load reversal stock configuration
@@ -131,11 +144,28 @@ def run_reversal_bot():
         }.get(situation, situation)
         print(f"   {symbol}: {desc}")
 
-    # Get previous closes using LTP API
-    prev_closes = {}
+    # Load the nightly prep pack (previous closes and instrument keys)
+    from prep_pack import load_prep_pack, get_pack_values
+    prep_pack = load_prep_pack()
+    if prep_pack:
+        print(f"LOADED prep pack for {prep_pack['trading_date']} (session {prep_pack['prev_session']})")
+    else:
+        print("No prep pack for today - fetching prep data live")
+
+    # Previous closes from the prep pack; batched quote requests only for what it lacks
+    prev_closes = get_pack_values(prep_pack, symbols, 'prev_close')
+    pack_keys = get_pack_values(prep_pack, symbols, 'instrument_key')
+    missing_closes = [symbol for symbol in symbols if symbol not in prev_closes]
+    quotes = upstox_fetcher.get_batch_quotes(missing_closes) if missing_closes else {}
     for symbol in symbols:
+        if symbol in prev_closes:
+            print(f"   OK {symbol}: Prev Close Rs{prev_closes[symbol]:.2f} (prep pack)")
+            continue
         try:
-            data = upstox_fetcher.get_ltp_data(symbol)
+            data = quotes.get(symbol)
+            if not data or data.get('cp') is None:
+                # Fall back to single-symbol LTP API for anything the batch missed
+                data = upstox_fetcher.get_ltp_data(symbol)
             if data and 'cp' in data and data['cp'] is not None:
                 prev_closes[symbol] = float(data['cp'])
                 print(f"   OK {symbol}: Prev Close Rs{prev_closes[symbol]:.2f}")
@@ -149,7 +179,7 @@ def run_reversal_bot():
     stock_symbols = {}
     for symbol, prev_close in prev_closes.items():
         try:
-            key = upstox_fetcher.get_instrument_key(symbol)
+            key = pack_keys.get(symbol) or upstox_fetcher.get_instrument_key(symbol)
             if key:
                 instrument_keys.append(key)
                 stock_symbols[key] = symbol
@@ -161,7 +191,13 @@ def run_reversal_bot():
     print(f"\nPREPARED {len(instrument_keys)} reversal instruments")
 
     # Initialize data streamer
-    data_streamer = SimpleStockStreamer(instrument_keys, stock_symbols)
+    # Through the shared feed hub when it is up (one upstream socket for both bots), else direct
+    feed_hub = FEED_HUB_SOCKET if USE_FEED_HUB and ensure_feed_hub(FEED_HUB_SOCKET) else None
+    if USE_FEED_HUB and feed_hub is None:
+        print("Feed hub unavailable - connecting directly to the Market Data Feed")
+    # Direct connections are sharded when the watchlist exceeds one connection's instrument limit
+    data_streamer = create_streamer(instrument_keys, stock_symbols, feed_hub=feed_hub)
+    data_streamer.feed_hub_name = "reversal"
 
     # CREATE INTEGRATION EARLY (needed for unsubscribe phases)
     # Create modular integration BEFORE gap validation
@@ -176,112 +212,133 @@ def run_reversal_bot():
         # Use modular integration for tick processing
         integration.simplified_tick_handler(instrument_key, symbol, price, timestamp, ohlc_list, monitor)
 
-    # Set the reversal tick handler
-    data_streamer.tick_handler = tick_handler_reversal
+    # Receive thread only enqueues; the strategy worker runs the handler and owns all stock state
+    # Exchange -> receive -> decoded -> decision latency for every tick (live snapshot for the server API)
+    tick_latency = TickLatencyRecorder()
+    data_streamer.tick_latency = tick_latency
+    tick_dispatcher = TickDispatcher(tick_handler_reversal, latency=tick_latency)
+    data_streamer.tick_handler = tick_dispatcher.put
+    tick_dispatcher.add_sources(data_streamer.feed_sources())
+    tick_dispatcher.start()
+    tick_latency.start_live_dump()
+
+    # Record every raw feed frame this session for replay
+    if RECORD_FEED:
+        data_streamer.feed_recorder = FeedRecorder(FEED_RECORDING_DIR, prefix="reversal_feed")
+        data_streamer.feed_recorder.open({'bot': 'reversal', 'stock_symbols': stock_symbols})
 
-    # PRE-MARKET IEP FETCH SEQUENCE (Priority 1 Fix)
-    print("=== PRE-MARKET IEP FETCH SEQUENCE ===")
-    
-    # Wait for PREP_START time (30 seconds before market open)
-    prep_start = PREP_START
-    current_time = datetime.now(IST).time()
+    try:
+        # PRE-WARM: open pooled HTTPS and the websocket (no subscription) a few minutes before PREP_START
+        prewarm_datetime = clock.today_at(PREWARM_START)
+        prep_datetime = clock.today_at(PREP_START)
+        if clock.now() < prep_datetime:
+            wait_seconds = clock.seconds_until(prewarm_datetime)
+            if wait_seconds > 0:
+                print(f"WAITING {wait_seconds:.0f} seconds until PREWARM_START ({PREWARM_START})...")
+                clock.sleep_until(prewarm_datetime)
+            from src.utils.upstox_fetcher import iep_manager
+            https_seconds = iep_manager.upstox_fetcher.prewarm_connections()
+            print(f"PRE-WARM: pooled HTTPS connections open in {https_seconds:.2f}s")
+            warm = data_streamer.prewarm()
+            print(f"PRE-WARM: market data websocket {'connected, subscription deferred' if warm else 'not connected'}")
+
+        # PRE-MARKET IEP FETCH SEQUENCE (Priority 1 Fix)
+        print("=== PRE-MARKET IEP FETCH SEQUENCE ===")
     
-    if current_time < prep_start:
-        prep_datetime = datetime.combine(datetime.now(IST).date(), prep_start)
-        prep_datetime = IST.localize(prep_datetime)
-        current_datetime = datetime.now(IST)
-        wait_seconds = (prep_datetime - current_datetime).total_seconds()
+        # Wait for PREP_START time (30 seconds before market open)
+        prep_start = PREP_START
+        wait_seconds = clock.seconds_until(prep_datetime)
         if wait_seconds > 0:
             print(f"WAITING {wait_seconds:.0f} seconds until PREP_START ({prep_start})...")
-            time_module.sleep(wait_seconds)
+            clock.sleep_until(prep_datetime)
     
-    # Fetch IEP for all reversal stocks
-    print(f"FETCHING IEP for {len(symbols)} reversal stocks...")
+        # Fetch IEP for all reversal stocks
+        print(f"FETCHING IEP for {len(symbols)} reversal stocks...")
     
-    # Clean symbols from reversal_list.txt (remove postfix like -u11, -d14)
-    clean_symbols = []
-    for symbol in symbols:
-        # Remove postfix after dash if present
-        if '-' in symbol:
-            clean_symbol = symbol.split('-')[0]
-            clean_symbols.append(clean_symbol)
-        else:
-            clean_symbols.append(symbol)
+        # Clean symbols from reversal_list.txt (remove postfix like -u11, -d14)
+        clean_symbols = []
+        for symbol in symbols:
+            # Remove postfix after dash if present
+            if '-' in symbol:
+                clean_symbol = symbol.split('-')[0]
+                clean_symbols.append(clean_symbol)
+            else:
+                clean_symbols.append(symbol)
     
-    print(f"Clean symbols for IEP: {clean_symbols}")
+        print(f"Clean symbols for IEP: {clean_symbols}")
     
-    # Import IEP manager
-    from src.utils.upstox_fetcher import iep_manager
-    iep_prices = iep_manager.fetch_iep_batch(clean_symbols)
+        # Import IEP manager
+        from src.utils.upstox_fetcher import iep_manager
+        # Poll until just before open; the last reading goes to gap validation
+        poll_until = clock.today_at(MARKET_OPEN) - timedelta(seconds=IEP_POLL_STOP_SECONDS)
+        iep_prices = iep_manager.poll_final_iep(clean_symbols, poll_until, IEP_POLL_INTERVAL_SECONDS, clock=clock)
+        stats = iep_manager.last_poll_stats
+        if stats:
+            print(f"IEP polls: {stats['polls']}, avg latency {stats['avg_latency_ms']:.0f}ms "
+                  f"(max {stats['max_latency_ms']:.0f}ms), {len(stats['drift'])} stocks drifted")
     
-    if iep_prices:
-        print("IEP FETCH COMPLETED SUCCESSFULLY")
+        if iep_prices:
+            print("IEP FETCH COMPLETED SUCCESSFULLY")
         
-        # Set opening prices and run gap validation
-        for symbol in symbols:
-            # Find the clean symbol for IEP lookup
-            clean_symbol = symbol.split('-')[0] if '-' in symbol else symbol
+            # Set opening prices and run gap validation
+            for symbol in symbols:
+                # Find the clean symbol for IEP lookup
+                clean_symbol = symbol.split('-')[0] if '-' in symbol else symbol
             
-            if clean_symbol in iep_prices:
-                iep_price = iep_prices[clean_symbol]
-                # Find stock by symbol
-                stock = None
-                for s in monitor.stocks.values():
-                    if s.symbol == symbol:
-                        stock = s
-                        break
+                if clean_symbol in iep_prices:
+                    iep_price = iep_prices[clean_symbol]
+                    stock = monitor.get_stock_by_symbol(symbol)
                 
-                if stock:
-                    stock.set_open_price(iep_price)
-                    print(f"Set opening price for {symbol}: Rs{iep_price:.2f}")
+                    if stock:
+                        stock.set_open_price(iep_price)
+                        print(f"Set opening price for {symbol}: Rs{iep_price:.2f}")
                     
-                    # Run gap validation immediately (at 9:14:30)
-                    if hasattr(stock, 'validate_gap'):
-                        stock.validate_gap()
-                        if stock.gap_validated:
-                            print(f"Gap validated for {symbol}")
-                        else:
-                            print(f"Gap validation failed for {symbol}")
+                        # Run gap validation immediately (at 9:14:30)
+                        if hasattr(stock, 'validate_gap'):
+                            stock.validate_gap()
+                            if stock.gap_validated:
+                                print(f"Gap validated for {symbol}")
+                            else:
+                                print(f"Gap validation failed for {symbol}")
+                    else:
+                        print(f"Stock not found for symbol: {symbol}")
                 else:
-                    print(f"Stock not found for symbol: {symbol}")
-            else:
-                print(f"IEP price not found for symbol: {symbol}")
-    else:
-        print("IEP FETCH FAILED - MANUAL OPENING PRICE CAPTURE REQUIRED")
-        print("WARNING: Opening prices will need to be set manually or via alternative method")
-
-    # OPTIMIZATION: ONLY SUBSCRIBE TO GAP-VALIDATED STOCKS
-    # Since gap validation completed at 9:14:30, we can filter stocks before subscription
-    print("\n" + "=" * 55)
-    print("OPTIMIZATION: FILTERING GAP-VALIDATED STOCKS")
-    print("=" * 55)
+                    print(f"IEP price not found for symbol: {symbol}")
+        else:
+            print("IEP FETCH FAILED - MANUAL OPENING PRICE CAPTURE REQUIRED")
+            print("WARNING: Opening prices will need to be set manually or via alternative method")
+
+        # OPTIMIZATION: ONLY SUBSCRIBE TO GAP-VALIDATED STOCKS
+        # Since gap validation completed at 9:14:30, we can filter stocks before subscription
+        print("\n" + "=" * 55)
+        print("OPTIMIZATION: FILTERING GAP-VALIDATED STOCKS")
+        print("=" * 55)
     
-    # Get gap-validated stocks
-    gap_validated_stocks = []
-    for stock in monitor.stocks.values():
-        if stock.gap_validated:
-            gap_validated_stocks.append(stock)
-
-    # Create filtered instrument keys list
-    gap_validated_instrument_keys = [stock.instrument_key for stock in gap_validated_stocks]
-
-    print(f"GAP-VALIDATED STOCKS: {len(gap_validated_stocks)} out of {len(monitor.stocks)}")
-    print(f"GAP-VALIDATED SYMBOLS: {[stock.symbol for stock in gap_validated_stocks]}")
-
-    # OPTIMIZATION: Subscribe only to gap-validated stocks
-    # This eliminates the need for Phase 1 unsubscription
-    if gap_validated_instrument_keys:
-        integration.prepare_and_subscribe(gap_validated_instrument_keys)
-        print(f"OPTIMIZED SUBSCRIPTION: Only {len(gap_validated_stocks)} gap-validated stocks subscribed")
-    else:
-        print("NO GAP-VALIDATED STOCKS - No subscriptions needed")
-        return
+        # Get gap-validated stocks
+        gap_validated_stocks = []
+        for stock in monitor.stocks.values():
+            if stock.gap_validated:
+                gap_validated_stocks.append(stock)
+
+        # Create filtered instrument keys list
+        gap_validated_instrument_keys = [stock.instrument_key for stock in gap_validated_stocks]
+
+        print(f"GAP-VALIDATED STOCKS: {len(gap_validated_stocks)} out of {len(monitor.stocks)}")
+        print(f"GAP-VALIDATED SYMBOLS: {[stock.symbol for stock in gap_validated_stocks]}")
+
+        # OPTIMIZATION: Subscribe only to gap-validated stocks
+        # This eliminates the need for Phase 1 unsubscription
+        if gap_validated_instrument_keys:
+            integration.prepare_and_subscribe(gap_validated_instrument_keys)
+            print(f"OPTIMIZED SUBSCRIPTION: Only {len(gap_validated_stocks)} gap-validated stocks subscribed")
+        else:
+            print("NO GAP-VALIDATED STOCKS - No subscriptions needed")
+            return
 
-    # REMOVED: integration.phase_1_unsubscribe_after_gap_validation()
-    # Reason: Optimization implemented - only gap-validated stocks are subscribed
-    print()
+        # REMOVED: integration.phase_1_unsubscribe_after_gap_validation()
+        # Reason: Optimization implemented - only gap-validated stocks are subscribed
+        print()
 
-    try:
         # PREP TIME: Load metadata and prepare data
         print("=== PREP TIME: Loading metadata and preparing data ===")
 
@@ -294,38 +351,32 @@ def run_reversal_bot():
         # No VIP/Secondary/Tertiary classification or quality ranking needed
 
         # Wait for market open (no prep end needed)
-        current_time = datetime.now(IST).time()
-        market_open = MARKET_OPEN
-
-        if current_time < market_open:
-            market_datetime = datetime.combine(datetime.now(IST).date(), market_open)
-            market_datetime = IST.localize(market_datetime)
-            current_datetime = datetime.now(IST)
-            wait_seconds = (market_datetime - current_datetime).total_seconds()
-            if wait_seconds > 0:
-                print(f"WAITING {wait_seconds:.0f} seconds until market open...")
-                time_module.sleep(wait_seconds)
+        market_datetime = clock.today_at(MARKET_OPEN)
+        wait_seconds = clock.seconds_until(market_datetime)
+        if wait_seconds > 0:
+            print(f"WAITING {wait_seconds:.0f} seconds until market open...")
+            clock.sleep_until(market_datetime)
 
         print("=== STARTING REVERSAL TRADING PHASE ===")
 
         # Connect to data stream
         print("ATTEMPTING to connect to data stream...")
-        if data_streamer.connect():
-            print("CONNECTED Data stream connected")
+        if data_streamer.connected or data_streamer.connect():
+            print(f"CONNECTED Data stream connected{' (pre-warmed)' if data_streamer.defer_subscription else ''}")
 
             # Wait for market open
-            market_open = MARKET_OPEN
-            current_time = datetime.now(IST).time()
-
-            if current_time < market_open:
-                market_datetime = datetime.combine(datetime.now(IST).date(), market_open)
-                market_datetime = IST.localize(market_datetime)
-                current_datetime = datetime.now(IST)
-                wait_seconds = (market_datetime - current_datetime).total_seconds()
-                if wait_seconds > 0:
-                    print(f"WAITING {wait_seconds:.0f} seconds for market open...")
-                    time_module.sleep(wait_seconds)
-
+            wait_seconds = clock.seconds_until(market_datetime)
+            if wait_seconds > 0:
+                print(f"WAITING {wait_seconds:.0f} seconds for market open...")
+                clock.sleep_until(market_datetime)
+
+            data_streamer.market_open_time = market_datetime
+            # Pre-warmed socket: one subscribe message for the gap-validated stocks
+            data_streamer.subscribe_active()
+            if data_streamer.feed_recorder is not None:
+                # Prepared stock state lets replay_session.py rebuild this session
+                data_streamer.feed_recorder.record_meta(
+                    {'event': 'prep', 'stocks': tick_dispatcher.call(snapshot_stocks, monitor)})
             print("MARKET OPEN! Monitoring live tick data...")
 
             # MARKET OPEN: Make OOPS stocks ready immediately
@@ -335,26 +386,24 @@ def run_reversal_bot():
             
             if oops_stocks:
                 print(f"OOPS CANDIDATES READY FOR IMMEDIATE TRADING ({len(oops_stocks)}):")
-                for stock in oops_stocks:
-                    stock.entry_ready = True
-                    print(f"   {stock.symbol} (OOPS): Previous Close Rs{stock.previous_close:.2f} - Ready for trigger")
+
+                def mark_oops_ready():
+                    for stock in oops_stocks:
+                        stock.entry_ready = True
+                        print(f"   {stock.symbol} (OOPS): Previous Close Rs{stock.previous_close:.2f} - Ready for trigger")
+
+                tick_dispatcher.call(mark_oops_ready)
             else:
                 print("No OOPS candidates ready")
             
             print(f"OOPS stocks ready: {len(oops_stocks)}")
 
             # Continue with normal entry timing for Strong Start stocks
-            entry_time = ENTRY_TIME
-            current_time = datetime.now(IST).time()
-
-            if current_time < entry_time:
-                entry_datetime = datetime.combine(datetime.now(IST).date(), entry_time)
-                entry_datetime = IST.localize(entry_datetime)
-                current_datetime = datetime.now(IST)
-                wait_seconds = (entry_datetime - current_datetime).total_seconds()
-                if wait_seconds > 0:
-                    print(f"\nWAITING {wait_seconds:.0f} seconds until entry time...")
-                    time_module.sleep(wait_seconds)
+            entry_datetime = clock.today_at(ENTRY_TIME)
+            wait_seconds = clock.seconds_until(entry_datetime)
+            if wait_seconds > 0:
+                print(f"\nWAITING {wait_seconds:.0f} seconds until entry time...")
+                clock.sleep_until(entry_datetime)
 
             # Prepare entries and select stocks
             print("\n=== PREPARING ENTRIES ===")
@@ -386,14 +435,14 @@ def run_reversal_bot():
                 print(f"   {stock.symbol} ({situation_desc}): {open_status} | {gap_status} | {low_status}{rejection_info}")
 
             print("About to call monitor.prepare_entries()")
-            monitor.prepare_entries()
+            tick_dispatcher.call(monitor.prepare_entries)
             print("monitor.prepare_entries() completed")
 
             # PHASE 2: CHECK LOW VIOLATIONS AND UNSUBSCRIBE
             # This happens at entry time (12:33:00) before preparing entries
-            integration.phase_2_unsubscribe_after_low_violation()
+            tick_dispatcher.call(integration.phase_2_unsubscribe_after_low_violation)
 
-            qualified_stocks = monitor.get_qualified_stocks()
+            qualified_stocks = tick_dispatcher.call(monitor.get_qualified_stocks)
             print(f"Qualified stocks: {len(qualified_stocks)}")
 
             # SKIP SELECTION PHASE - Keep all qualified stocks subscribed for first-come-first-serve
@@ -406,9 +455,13 @@ def run_reversal_bot():
             
             if strong_start_stocks:
                 print(f"STRONG START CANDIDATES READY FOR TRADING ({len(strong_start_stocks)}):")
-                for stock in strong_start_stocks:
-                    stock.entry_ready = True
-                    print(f"   {stock.symbol} (Strong Start): High Rs{stock.daily_high:.2f}, SL Rs{stock.entry_sl:.2f} - Ready for trigger")
+
+                def mark_strong_start_ready():
+                    for stock in strong_start_stocks:
+                        stock.entry_ready = True
+                        print(f"   {stock.symbol} (Strong Start): High Rs{stock.daily_high:.2f}, SL Rs{stock.entry_sl:.2f} - Ready for trigger")
+
+                tick_dispatcher.call(mark_strong_start_ready)
             else:
                 print("No Strong Start candidates ready")
             
@@ -435,28 +488,43 @@ def run_reversal_bot():
 
     except KeyboardInterrupt:
         print("\nSTOPPED by user")
-
-    # Cleanup
-    print("\n=== CLEANUP ===")
+    finally:
+        # Cleanup - also runs on an early return (nothing to subscribe) and on errors
+        print("\n=== CLEANUP ===")
+        data_streamer.disconnect()
+        tick_dispatcher.stop()
+        print(tick_dispatcher.format_stats())
+        tick_latency.stop_live_dump()
+        tick_latency.dump()
+        print(tick_latency.format_summary())
+        print(f"Tick latency histograms saved to {tick_latency.snapshot_file}")
+        if data_streamer.feed_recorder is not None:
+            # Trims the session file and compresses it to .zst before returning
+            recorder = data_streamer.feed_recorder
+            recording = recorder.close()
+            print(f"Feed recording: {recorder.records:,} frames saved to {recording}")
     
-    # Show final high/low values for Strong Start candidates
-    print("FINAL HIGH/LOW VALUES FOR STRONG START CANDIDATES:")
-    active_stocks = monitor.get_active_stocks()
-    ss_stocks = [stock for stock in active_stocks if stock.situation == 'reversal_s1']
+        # Show final high/low values for Strong Start candidates
+        print("FINAL HIGH/LOW VALUES FOR STRONG START CANDIDATES:")
+        active_stocks = monitor.get_active_stocks()
+        ss_stocks = [stock for stock in active_stocks if stock.situation == 'reversal_s1']
     
-    if ss_stocks:
-        for stock in ss_stocks:
-            print(f"   {stock.symbol}: High: Rs{stock.daily_high:.2f}, Low: Rs{stock.daily_low:.2f}")
-    else:
-        print("   No Strong Start candidates active")
+        if ss_stocks:
+            for stock in ss_stocks:
+                print(f"   {stock.symbol}: High: Rs{stock.daily_high:.2f}, Low: Rs{stock.daily_low:.2f}")
+        else:
+            print("   No Strong Start candidates active")
     
-    summary = monitor.get_summary()
-    paper_trader.log_session_summary(summary)
-    paper_trader.export_trades_csv()
-    paper_trader.close()
+        summary = monitor.get_summary()
+        paper_trader.log_session_summary(summary)
+        paper_trader.export_trades_csv()
+        paper_trader.close()
+
+        from src.utils.quote_cache import quote_cache
+        print(f"Quote cache: {quote_cache.calls_saved()} REST calls saved this session")
 
-    print("=== REVERSAL BOT SESSION ENDED ===")
-    print(f"Summary: {summary}")
+        print("=== REVERSAL BOT SESSION ENDED ===")
+        print(f"Summary: {summary}")
 
 if __name__ == "__main__":
     try:
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sharded Market Data Streamer
+Spreads a watchlist larger than one websocket may carry over several upstream
+connections; each shard connects, reconnects and re-subscribes on its own, and
+every shard's ticks go to the one tick handler (the bot's TickDispatcher)
+"""
+
+import time
+import logging
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
+import pytz
+
+try:
+    from .simple_data_streamer import SimpleStockStreamer, DEFAULT_DECODE_MODE
+    from .config import FEED_SHARD_INSTRUMENTS, FEED_MAX_CONNECTIONS
+except ImportError:
+    from simple_data_streamer import SimpleStockStreamer, DEFAULT_DECODE_MODE
+    from config import FEED_SHARD_INSTRUMENTS, FEED_MAX_CONNECTIONS
+
+logger = logging.getLogger(__name__)
+IST = pytz.timezone('Asia/Kolkata')
+
+
+class ShardedStockStreamer:
+    """
+    SimpleStockStreamer interface over several SimpleStockStreamer shards
+
+    Instruments are split into shards of at most shard_size keys, each with its
+    own connection and active_instruments, so a dropped socket only reconnects
+    (and re-subscribes) that shard while the others keep streaming. The tick
+    handler, latency recorder, feed recorder and market open time are shared
+    by every shard; ticks from all shards meet in the handler, which for the
+    bots is TickDispatcher.put (thread-safe, one strategy worker).
+
+    subscribe / unsubscribe / add_instruments / remove_instruments route each
+    key to the shard that holds it; new keys go to the least loaded shard, and
+    a further shard is opened when every shard is full.
+
+    Connection state is per shard: connected is True only while every shard
+    is connected, and connect() opens just the shards that are neither
+    connected nor reconnecting, so "connected or connect()" never duplicates
+    a live connection. Shards re-read the access token on each (re)connect
+    and live as long as their bot or feed hub (which exits with its session).
+
+    Args:
+        instrument_keys: Instruments to stream
+        stock_symbols: instrument_key -> symbol
+        shard_size: Instruments per connection (FEED_SHARD_INSTRUMENTS)
+        max_shards: Connections the account may hold (FEED_MAX_CONNECTIONS)
+        shard_factory: Callable(keys, stock_symbols) returning a shard
+                       (default: SimpleStockStreamer with decode_mode)
+    """
+
+    def __init__(self, instrument_keys, stock_symbols, decode_mode=DEFAULT_DECODE_MODE,
+                 shard_size: int = FEED_SHARD_INSTRUMENTS, max_shards: int = FEED_MAX_CONNECTIONS,
+                 shard_factory: Callable = None):
+        needed = max(1, -(-len(instrument_keys) // shard_size))
+        if needed > max_shards:
+            raise ValueError(f"{len(instrument_keys)} instruments need {needed} connections of {shard_size}; "
+                             f"only {max_shards} allowed (FEED_MAX_CONNECTIONS)")
+
+        self.instrument_keys = instrument_keys
+        self.stock_symbols = stock_symbols
+        self.shard_size = shard_size
+        self.max_shards = max_shards
+        self.shard_factory = shard_factory or (
+            lambda keys, symbols: SimpleStockStreamer(keys, symbols, decode_mode=decode_mode))
+        self.running = True
+        self.feed_hub_name = None
+        self.started = False  # connect() called: shards opened later connect straight away
+
+        # Shared by every shard (see the property setters)
+        self._tick_handler = None
+        self._tick_latency = None
+        self._feed_recorder = None
+        self._market_open_time = None
+
+        self.shards: List[SimpleStockStreamer] = []
+        self.shard_of: Dict[str, int] = {}  # instrument_key -> shard index
+        self.loads: List[int] = []  # Keys assigned per shard
+        for start in range(0, max(len(instrument_keys), 1), shard_size):
+            self._add_shard(list(instrument_keys[start:start + shard_size]))
+
+        logger.info(f"Sharded streamer monitoring {len(instrument_keys)} stocks over {len(self.shards)} connection(s)")
+
+    def _add_shard(self, keys: List[str]) -> SimpleStockStreamer:
+        index = len(self.shards)
+        shard = self.shard_factory(keys, self.stock_symbols)
+        if self._tick_handler is not None:
+            shard.tick_handler = self._tick_handler
+        shard.tick_latency = self._tick_latency
+        shard.feed_recorder = self._feed_recorder
+        shard.market_open_time = self._market_open_time
+        shard.feed_hub_name = f"{self.feed_hub_name or 'sharded'}-{index}"
+        self.shards.append(shard)
+        self.loads.append(len(keys))
+        for key in keys:
+            self.shard_of[key] = index
+        return shard
+
+    def _route(self, instrument_keys: Iterable[str], assign: bool = False) -> Dict[int, List[str]]:
+        """Keys grouped by the shard holding them (assign=True places unknown keys first)"""
+        routed: Dict[int, List[str]] = {}
+        for key in instrument_keys:
+            index = self.shard_of.get(key)
+            if index is None:
+                if not assign:
+                    continue
+                index = self._assign(key)
+                if index is None:
+                    continue
+            routed.setdefault(index, []).append(key)
+        return routed
+
+    def _assign(self, key: str) -> Optional[int]:
+        """Place a new key on the least loaded shard, opening a shard when all are full"""
+        loads = self.loads
+        index = min(range(len(loads)), key=loads.__getitem__)
+        if loads[index] >= self.shard_size:
+            if len(self.shards) >= self.max_shards:
+                logger.error(f"Cannot stream {key}: all {self.max_shards} connections hold {self.shard_size} instruments")
+                return None
+            index = len(self.shards)
+            shard = self._add_shard([])
+            if self.started:
+                shard.connect()
+        self.shard_of[key] = index
+        loads[index] += 1
+        return index
+
+    def _release(self, keys: Iterable[str]):
+        """Free the shard slots of unsubscribed keys"""
+        for key in keys:
+            index = self.shard_of.pop(key, None)
+            if index is not None:
+                self.loads[index] -= 1
+
+    def feed_sources(self) -> Dict[str, SimpleStockStreamer]:
+        """Upstream connections feeding tick_handler, by name"""
+        return {f"shard-{index}": shard for index, shard in enumerate(self.shards)}
+
+    # --- Shared settings, applied to every shard ---
+
+    @property
+    def tick_handler(self):
+        return self._tick_handler
+
+    @tick_handler.setter
+    def tick_handler(self, handler):
+        self._tick_handler = handler
+        for shard in self.shards:
+            shard.tick_handler = handler
+
+    @property
+    def tick_latency(self):
+        return self._tick_latency
+
+    @tick_latency.setter
+    def tick_latency(self, recorder):
+        self._tick_latency = recorder
+        for shard in self.shards:
+            shard.tick_latency = recorder
+
+    @property
+    def feed_recorder(self):
+        return self._feed_recorder
+
+    @feed_recorder.setter
+    def feed_recorder(self, recorder):
+        self._feed_recorder = recorder
+        for shard in self.shards:
+            shard.feed_recorder = recorder
+
+    @property
+    def market_open_time(self):
+        return self._market_open_time
+
+    @market_open_time.setter
+    def market_open_time(self, value):
+        self._market_open_time = value
+        for shard in self.shards:
+            shard.market_open_time = value
+
+    # --- SimpleStockStreamer interface ---
+
+    @property
+    def connected(self) -> bool:
+        """Every shard is connected (see connected_shards for the per-shard state)"""
+        return all(shard.connected for shard in self.shards)
+
+    @property
+    def connected_shards(self) -> List[int]:
+        return [index for index, shard in enumerate(self.shards) if shard.connected]
+
+    @property
+    def streamer(self):
+        """Routes subscribe / unsubscribe to the shards once any shard has a connection"""
+        return _ShardRouter(self) if any(shard.streamer for shard in self.shards) else None
+
+    @property
+    def defer_subscription(self) -> bool:
+        return any(shard.defer_subscription for shard in self.shards)
+
+    @property
+    def active_instruments(self) -> set:
+        active = set()
+        for shard in self.shards:
+            active |= shard.active_instruments
+        return active
+
+    @property
+    def last_trade_time(self) -> Dict[str, int]:
+        merged = {}
+        for shard in self.shards:
+            merged.update(shard.last_trade_time)
+        return merged
+
+    @property
+    def last_volume(self) -> Dict[str, int]:
+        merged = {}
+        for shard in self.shards:
+            merged.update(shard.last_volume)
+        return merged
+
+    def connect(self) -> bool:
+        """
+        Open the connection of every shard that has none (each subscribes its own
+        instruments on open); connected shards and shards already running their
+        own reconnect are left alone
+        """
+        self.started = True
+        results = [shard.connect() for shard in self.shards if not (shard.connected or shard.reconnecting)]
+        return all(results)
+
+    def prewarm(self, timeout=10) -> bool:
+        """Open every shard ahead of open without subscribing (see SimpleStockStreamer.prewarm)"""
+        for shard in self.shards:
+            shard.defer_subscription = True
+        self.started = True
+        ok = all([shard.connect() for shard in self.shards])
+
+        deadline = time.time() + timeout
+        while ok and not self.connected and time.time() < deadline:
+            time.sleep(0.05)
+
+        if not ok or not self.connected:
+            cold = [index for index, shard in enumerate(self.shards) if not shard.connected]
+            print(f"Pre-warm: shard(s) {cold} not open after {timeout}s - will connect cold")
+            for shard in self.shards:
+                shard.defer_subscription = False
+            return False
+        return True
+
+    def subscribe_active(self) -> bool:
+        """Send every pre-warmed shard's deferred subscription"""
+        return all([shard.subscribe_active() for shard in self.shards])
+
+    def update_active_instruments(self, new_instrument_keys):
+        self._set_active(new_instrument_keys)
+        print(f"Active instruments updated to {len(new_instrument_keys)} validated stocks")
+
+    def update_active_instruments_reversal(self, new_instrument_keys):
+        self._set_active(new_instrument_keys)
+        print(f"Active instruments updated to {len(new_instrument_keys)} gap-validated stocks")
+
+    def _set_active(self, new_instrument_keys):
+        routed = self._route(new_instrument_keys, assign=True)
+        for index, shard in enumerate(self.shards):
+            shard.active_instruments = set(routed.get(index, ()))
+
+    def subscribe(self, instrument_keys, mode="full"):
+        """Add keys to their shards' active sets and subscribe them on the live shards"""
+        for index, keys in self._route(instrument_keys, assign=True).items():
+            shard = self.shards[index]
+            shard.active_instruments.update(keys)
+            if shard.streamer:
+                shard.streamer.subscribe(keys, mode)
+
+    def _unsubscribe(self, instrument_keys):
+        for index, keys in self._route(instrument_keys).items():
+            shard = self.shards[index]
+            shard.active_instruments.difference_update(keys)
+            if shard.streamer:
+                shard.streamer.unsubscribe(keys)
+        self._release(instrument_keys)
+
+    def unsubscribe(self, instrument_keys):
+        """Unsubscribe on the shards holding the keys and drop them from their active sets"""
+        self._unsubscribe(instrument_keys)
+        print(f"Unsubscribed from {len(instrument_keys)} instruments")
+        print(f"Active instruments remaining: {len(self.active_instruments)}")
+
+    def add_instruments(self, instrument_keys: List[str]):
+        for index, keys in self._route(instrument_keys, assign=True).items():
+            self.shards[index].add_instruments(keys)
+
+    def remove_instruments(self, instrument_keys: List[str]):
+        self._unsubscribe(instrument_keys)
+
+    def run(self):
+        """Stream until stopped or every shard has given up reconnecting"""
+        if not self.started:
+            if not self.connect():
+                return False
+
+        print(f"Streaming on {len(self.shards)} connection(s) - monitoring for signals...")
+        try:
+            while self.running and any(shard.connected or shard.reconnecting for shard in self.shards):
+                time.sleep(1)
+        except KeyboardInterrupt:
+            print("Stopped by user")
+            self.disconnect()
+            return True
+
+        if not self.running:
+            print("Stopped by user")
+            return True
+        print(f"All {len(self.shards)} connections lost at {datetime.now(IST).strftime('%H:%M:%S')}")
+        return False
+
+    def disconnect(self):
+        """Disconnect every shard - intentional disconnection"""
+        self.running = False
+        for shard in self.shards:
+            shard.disconnect()
+
+    def shard_stats(self) -> List[Dict]:
+        return [{'instruments': len(shard.active_instruments), 'connected': shard.connected,
+                 'connections': shard.connection_attempts, 'messages': shard.messages_received}
+                for shard in self.shards]
+
+
+class _ShardRouter:
+    """MarketDataStreamerV3-style subscribe / unsubscribe for callers that talk to data_streamer.streamer"""
+
+    def __init__(self, sharded: ShardedStockStreamer):
+        self.sharded = sharded
+
+    def subscribe(self, instrument_keys, mode="full"):
+        self.sharded.subscribe(instrument_keys, mode)
+
+    def unsubscribe(self, instrument_keys):
+        self.sharded._unsubscribe(instrument_keys)
+
+
+def create_streamer(instrument_keys, stock_symbols, feed_hub=None, shard_size: int = FEED_SHARD_INSTRUMENTS):
+    """
+    Streamer for a bot: through the feed hub when given (the hub shards its
+    own upstream), sharded when a direct connection would exceed shard_size,
+    else a single SimpleStockStreamer
+    """
+    if feed_hub is None and len(instrument_keys) > shard_size:
+        return ShardedStockStreamer(instrument_keys, stock_symbols, shard_size=shard_size)
+    return SimpleStockStreamer(instrument_keys, stock_symbols, feed_hub=feed_hub)
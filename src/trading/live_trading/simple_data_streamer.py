@@ -8,18 +8,49 @@ import upstox_client
 import json
 import os
 import sys
+import time
 import logging
 from datetime import datetime, timedelta
 import pytz
 
+try:
+    from .feed_decoder import FeedDecoder
+except ImportError:
+    try:
+        from feed_decoder import FeedDecoder
+    except ImportError:
+        # protobuf runtime missing - only the SDK dict path is available
+        FeedDecoder = None
+
 # Minimal setup
 logger = logging.getLogger(__name__)
 IST = pytz.timezone('Asia/Kolkata')
 
+# 'protobuf': parse raw feed bytes with MarketDataFeedV3_pb2; 'dict': SDK MessageToDict output
+DEFAULT_DECODE_MODE = 'protobuf'
+
+UPSTOX_CONFIG_FILE = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'upstox_config.json')
+
+
+def load_access_token(config_file=UPSTOX_CONFIG_FILE):
+    """Access token from upstox_config.json - tokens expire daily, so read it on every connect"""
+    with open(config_file, 'r') as f:
+        return json.load(f)['access_token']
+
+
+class RawFeedStreamerV3(upstox_client.MarketDataStreamerV3):
+    """MarketDataStreamerV3 that hands raw FeedResponse bytes to raw_handler instead of converting to dicts"""
+
+    raw_handler = None
+
+    def handle_message(self, ws, message):
+        self.raw_handler(message)
+
+
 class SimpleStockStreamer:
     """Minimal WebSocket streamer for testing"""
 
-    def __init__(self, instrument_keys, stock_symbols):
+    def __init__(self, instrument_keys, stock_symbols, decode_mode=DEFAULT_DECODE_MODE, feed_hub=None):
         self.instrument_keys = instrument_keys
         self.stock_symbols = stock_symbols
         self.streamer = None
@@ -37,12 +68,40 @@ class SimpleStockStreamer:
         
         # Track intentional disconnections to prevent unwanted reconnections
         self.intentional_disconnect = False
+
+        # Pre-warm: connect before open and hold the subscription until subscribe_active()
+        self.defer_subscription = False
+        self.market_open_time = None  # Set by the bot to report open -> first tick
+        self.connect_started_at = None
+        self.subscribed_at = None
+        self.first_tick_at = None
+
+        # Optional feed hub socket: subscribe through the shared hub process instead of a direct websocket
+        self.feed_hub = feed_hub
+        self.feed_hub_name = None  # Client name shown in the hub's log (default: bot-<pid>)
+
+        # Protobuf fast path; last trade time (ms) and day volume per instrument from the feed
+        # (the hub always forwards raw frames, so a hub client always decodes protobuf)
+        use_protobuf = decode_mode == 'protobuf' or feed_hub is not None
+        self.feed_decoder = FeedDecoder(stock_symbols) if use_protobuf and FeedDecoder else None
+        self.last_trade_time = {}
+        self.last_volume = {}
+
+        # Optional TickLatencyRecorder; when set, tick_handler gets a latency stamp as 6th argument
+        self.tick_latency = None
+
+        # Optional FeedRecorder; every raw message is appended before decoding
+        self.feed_recorder = None
+
+        # Raw messages received on this connection (per-connection rate in the dispatcher stats)
+        self.messages_received = 0
         
-        # Load access token directly
-        config_file = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'upstox_config.json')
-        with open(config_file, 'r') as f:
-            config = json.load(f)
-        self.access_token = config['access_token']
+        # Load access token directly (the hub holds the upstream connection for hub clients)
+        self.access_token = None
+        if feed_hub is not None:
+            logger.info(f"Simple streamer monitoring {len(instrument_keys)} stocks via feed hub {feed_hub}")
+            return
+        self.access_token = load_access_token()
 
         logger.info(f"Simple streamer monitoring {len(instrument_keys)} stocks")
     
@@ -70,11 +129,27 @@ class SimpleStockStreamer:
         logger.info(f"Updated active instruments to {len(new_instrument_keys)} gap-validated stocks")
         print(f"Active instruments updated to {len(new_instrument_keys)} gap-validated stocks")
 
+    def add_instruments(self, instrument_keys):
+        """Add instruments to the active set and subscribe them now if the socket is live"""
+        self.active_instruments.update(instrument_keys)
+        if self.connected and self.streamer and not self.defer_subscription:
+            self._subscribe(list(instrument_keys))
+
+    def feed_sources(self):
+        """Upstream connections feeding tick_handler, by name (one for a single streamer)"""
+        return {'feed': self}
+
     def on_message(self, message):
         """Handle WebSocket messages"""
         try:
+            self.messages_received += 1
+            if self.feed_recorder is not None:
+                self.feed_recorder.record(message)
+
             # Handle different message formats
-            if isinstance(message, list):
+            if isinstance(message, (bytes, bytearray)):
+                self._process_feed_bytes(message)
+            elif isinstance(message, list):
                 # Sometimes messages come as a list of dicts
                 for msg_item in message:
                     self._process_message_dict(msg_item)
@@ -89,11 +164,39 @@ class SimpleStockStreamer:
             error_msg = str(e) if e is not None else "Unknown error"
             logger.error(f"Message processing error: {error_msg}")
 
+    def _process_feed_bytes(self, payload):
+        """Process a raw FeedResponse with the protobuf decoder"""
+        received = time.time()
+        current_time = datetime.now(IST)
+        tick_handler = getattr(self, 'tick_handler', None)
+        ticks = self.feed_decoder.decode(payload)
+        decoded = time.time()
+        latency = self.tick_latency
+
+        for instrument_key, symbol, ltp, ltt, vtt, ohlc_list in ticks:
+            # Only a new trade carries a fresh exchange timestamp
+            new_trade = ltt if ltt != self.last_trade_time.get(instrument_key) else 0
+            self.last_trade_time[instrument_key] = ltt
+            if vtt:
+                self.last_volume[instrument_key] = vtt
+
+            if self.first_tick_at is None and self.subscribed_at is not None:
+                self._report_first_tick(symbol, current_time)
+
+            if tick_handler:
+                if latency is not None:
+                    tick_handler(instrument_key, symbol, ltp, current_time, ohlc_list,
+                                 latency.stamp(new_trade, received, decoded))
+                else:
+                    tick_handler(instrument_key, symbol, ltp, current_time, ohlc_list)
+
     def _process_message_dict(self, message):
         """Process a single message dictionary"""
         if 'feeds' in message:
             feeds = message['feeds']
+            received = time.time()
             current_time = datetime.now(IST)
+            latency = self.tick_latency
 
             for instrument_key, feed_data in feeds.items():
                 if instrument_key not in self.stock_symbols:
@@ -103,6 +206,7 @@ class SimpleStockStreamer:
 
                 # Extract LTP
                 ltp = None
+                ltt = None
                 ohlc_list = []
 
                 if isinstance(feed_data, dict):
@@ -117,6 +221,7 @@ class SimpleStockStreamer:
                                     ltpc_data = market_ff['ltpc']
                                     if isinstance(ltpc_data, dict):
                                         ltp = ltpc_data.get('ltp')
+                                        ltt = ltpc_data.get('ltt')
                                 
                                 # Extract OHLC for continuation 1-min capture
                                 if 'marketOHLC' in market_ff:
@@ -128,9 +233,22 @@ class SimpleStockStreamer:
                     ltp = float(ltp)
                     # Removed tick printing for cleaner output
 
+                    # Only a new trade carries a fresh exchange timestamp
+                    ltt = int(ltt) if ltt else 0
+                    new_trade = ltt if ltt != self.last_trade_time.get(instrument_key) else 0
+                    self.last_trade_time[instrument_key] = ltt
+
+                    if self.first_tick_at is None and self.subscribed_at is not None:
+                        self._report_first_tick(symbol, current_time)
+
                     # Call tick handler if set
                     if hasattr(self, 'tick_handler'):
-                        self.tick_handler(instrument_key, symbol, ltp, current_time, ohlc_list)
+                        if latency is not None:
+                            # SDK already decoded the message: receive and decode times coincide
+                            self.tick_handler(instrument_key, symbol, ltp, current_time, ohlc_list,
+                                              latency.stamp(new_trade, received, received))
+                        else:
+                            self.tick_handler(instrument_key, symbol, ltp, current_time, ohlc_list)
 
     def on_open(self):
         """WebSocket opened"""
@@ -146,17 +264,72 @@ class SimpleStockStreamer:
 
         self.connected = True
 
+        if self.defer_subscription:
+            # Pre-warmed socket: subscribe_active() sends the subscription at open
+            warm_seconds = (self.last_connection_time - self.connect_started_at).total_seconds()
+            print(f"WebSocket WARM in {warm_seconds:.2f}s - subscription deferred until market open")
+            return
+
         # Wait a bit then subscribe
         import time
         time.sleep(1)
 
+        self._subscribe(list(self.active_instruments))
+
+    def _subscribe(self, active_list):
+        """Subscribe to instruments in 'full' mode and record when"""
         try:
-            # Subscribe only to active instruments (those not unsubscribed)
-            active_list = list(self.active_instruments)
             self.streamer.subscribe(active_list, "full")
+            if self.subscribed_at is None:
+                self.subscribed_at = datetime.now(IST)
             print(f"Subscribed to {len(active_list)} active instruments in 'full' mode (LTP + OHLC) at {datetime.now(IST).strftime('%H:%M:%S')}")
+            return True
         except Exception as e:
             print(f"Subscription error at {datetime.now(IST).strftime('%H:%M:%S')}: {e}")
+            return False
+
+    def prewarm(self, timeout=10):
+        """
+        Connect and authenticate the feed ahead of open without subscribing
+
+        Resolving the authorized feed URL and the websocket handshake happen
+        now, so at open subscribe_active() is a single message on a warm socket.
+
+        Returns:
+            True if the socket is open
+        """
+        self.defer_subscription = True
+        if not self.connect():
+            self.defer_subscription = False
+            return False
+
+        import time
+        deadline = time.time() + timeout
+        while not self.connected and time.time() < deadline:
+            time.sleep(0.05)
+
+        if not self.connected:
+            print(f"Pre-warm: WebSocket not open after {timeout}s - will connect cold")
+            self.defer_subscription = False
+        return self.connected
+
+    def subscribe_active(self):
+        """Send the deferred subscription for the active instruments on the pre-warmed socket"""
+        if not self.defer_subscription or not self.connected:
+            return False
+        self.defer_subscription = False
+        return self._subscribe(list(self.active_instruments))
+
+    def _report_first_tick(self, symbol, tick_time):
+        """Print how long the first tick took after subscribe, connect start and market open"""
+        self.first_tick_at = tick_time
+        line = (f"FIRST TICK {symbol} at {tick_time.strftime('%H:%M:%S.%f')[:-3]}: "
+                f"{(tick_time - self.subscribed_at).total_seconds() * 1000:.0f}ms after subscribe")
+        if self.connect_started_at:
+            line += f", {(tick_time - self.connect_started_at).total_seconds():.2f}s after connect start"
+        if self.market_open_time:
+            line += f", {(tick_time - self.market_open_time).total_seconds():.2f}s after market open"
+        print(line)
 
     def on_error(self, error):
         """WebSocket error"""
@@ -183,16 +356,28 @@ class SimpleStockStreamer:
 
     def connect(self):
         """Connect to WebSocket using Market Data Feed endpoint with auto-redirect"""
+        if self.feed_hub is not None:
+            return self._connect_feed_hub()
         try:
+            # A reconnect after the daily token refresh must not reuse the expired token
+            try:
+                self.access_token = load_access_token()
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Could not re-read access token ({e}) - using the one loaded at start")
             configuration = upstox_client.Configuration()
             configuration.access_token = self.access_token
             # Enable auto-redirect as recommended by Upstox experts
             configuration.redirect_uri = None  # Let API handle redirects
 
             # Use MarketDataStreamerV3 which handles auto-redirect internally
-            self.streamer = upstox_client.MarketDataStreamerV3(
-                upstox_client.ApiClient(configuration)
-            )
+            if self.feed_decoder is not None:
+                # Raw bytes go straight to the protobuf decoder
+                self.streamer = RawFeedStreamerV3(upstox_client.ApiClient(configuration))
+                self.streamer.raw_handler = self.on_message
+            else:
+                self.streamer = upstox_client.MarketDataStreamerV3(
+                    upstox_client.ApiClient(configuration)
+                )
 
             # Register callbacks
             self.streamer.on("open", self.on_open)
@@ -201,6 +386,7 @@ class SimpleStockStreamer:
             self.streamer.on("close", self.on_close)
 
             print("Connecting to Market Data Feed...")
+            self.connect_started_at = datetime.now(IST)
             self.streamer.connect()
             return True
 
@@ -208,6 +394,34 @@ class SimpleStockStreamer:
             print(f"Connection failed: {e}")
             return False
 
+    def _connect_feed_hub(self):
+        """Connect to the shared feed hub; it behaves like the websocket (same callbacks)"""
+        try:
+            from .feed_hub import FeedHubConnection, ensure_feed_hub
+        except ImportError:
+            from feed_hub import FeedHubConnection, ensure_feed_hub
+
+        # (Re)start the hub if it exited (idle, end of session) or holds an old access token
+        if not ensure_feed_hub(self.feed_hub):
+            print(f"Feed hub at {self.feed_hub} unavailable")
+            return False
+
+        try:
+            self.streamer = FeedHubConnection(self.feed_hub, name=self.feed_hub_name)
+            self.streamer.on("open", self.on_open)
+            self.streamer.on("message", self.on_message)
+            self.streamer.on("error", self.on_error)
+            self.streamer.on("close", self.on_close)
+
+            print(f"Connecting to feed hub at {self.feed_hub}...")
+            self.connect_started_at = datetime.now(IST)
+            self.streamer.connect()
+            return True
+
+        except Exception as e:
+            print(f"Feed hub connection failed: {e}")
+            return False
+
     def fetch_recent_data_rest(self, symbol, minutes_back=5):
         """Fetch recent data via REST API for data recovery during disconnects"""
         try:
@@ -341,10 +555,9 @@ class SimpleStockStreamer:
             time.sleep(wait_time)
             
             try:
-                if self.connect():
-                    if self.connected:
-                        print(f"Reconnection successful at {datetime.now(IST).strftime('%H:%M:%S')}")
-                        break
+                if self.connect() and self._wait_connected():
+                    print(f"Reconnection successful at {datetime.now(IST).strftime('%H:%M:%S')}")
+                    break
             except Exception as e:
                 print(f"Reconnect attempt {attempt} failed: {e}")
             
@@ -358,6 +571,14 @@ class SimpleStockStreamer:
         
         return True
 
+    def _wait_connected(self, timeout=10):
+        """Wait for on_open after connect() (the socket opens on the SDK / hub thread)"""
+        import time
+        deadline = time.time() + timeout
+        while not self.connected and time.time() < deadline:
+            time.sleep(0.05)
+        return self.connected
+
     def reconnect(self):
         """Attempt to reconnect with proper exponential backoff"""
         if self.reconnecting:
@@ -376,10 +597,9 @@ class SimpleStockStreamer:
             time.sleep(wait_time)
             
             try:
-                if self.connect():
-                    if self.connected:
-                        print(f"Reconnection successful at {datetime.now(IST).strftime('%H:%M:%S')}")
-                        break
+                if self.connect() and self._wait_connected():
+                    print(f"Reconnection successful at {datetime.now(IST).strftime('%H:%M:%S')}")
+                    break
             except Exception as e:
                 print(f"Reconnect attempt {attempt} failed: {e}")
             
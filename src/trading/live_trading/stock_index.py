@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Incremental Stock Index for the Monitors
+Per-flag and per-state sets of instrument keys, updated on every transition,
+so position and unsubscribe checks read the sets instead of scanning all stocks
+"""
+
+from collections import defaultdict
+from operator import attrgetter
+from typing import Dict, Iterable, List, Sequence, Set
+
+# Flags mirrored into StockIndex: flags[name] holds keys with the flag set, cleared[name] the rest
+INDEXED_FLAGS = ('is_active', 'is_subscribed', 'entered')
+
+# Shared daily high/low sentinels for stocks that have not traded yet
+NO_HIGH = float('-inf')
+NO_LOW = float('inf')
+
+
+def indexed_flag(name: str) -> property:
+    """
+    Stock attribute stored as _<name> whose changes are mirrored into the
+    owning monitor's StockIndex (a stock outside a monitor has _index None;
+    slotted stock classes must list both _index and _<name> in __slots__)
+    """
+    private = '_' + name
+
+    def set_flag(self, value):
+        index = self._index
+        if index is not None:
+            index.set_flag(name, self.instrument_key, value)
+        setattr(self, private, value)
+
+    return property(attrgetter(private), set_flag)
+
+
+def indexed_state() -> property:
+    """Stock state enum stored as _state and mirrored into StockIndex.states"""
+
+    def set_state(self, value):
+        index = self._index
+        if index is not None:
+            index.move_state(self.instrument_key, getattr(self, '_state', None), value)
+        self._state = value
+
+    return property(attrgetter('_state'), set_state)
+
+
+class StockIndex:
+    """
+    Instrument keys by flag and by state for one monitor
+
+    Stocks report their own changes through indexed_flag / indexed_state
+    properties, so sets are current after any assignment (state methods,
+    subscription managers, replay restore). Key lists come back in the
+    order the stocks were added to the monitor, matching a scan of
+    monitor.stocks. version changes whenever any membership changes, so
+    callers can cache lists built from the sets.
+
+    Args:
+        flags: Flag names to track (each must be an indexed_flag on the stock class)
+    """
+
+    def __init__(self, flags: Sequence[str] = INDEXED_FLAGS):
+        self.flag_names = tuple(flags)
+        self.flags: Dict[str, Set[str]] = {name: set() for name in self.flag_names}
+        self.cleared: Dict[str, Set[str]] = {name: set() for name in self.flag_names}
+        self.states: Dict[object, Set[str]] = defaultdict(set)
+        self._order: Dict[str, int] = {}
+        self._next = 0
+        self.version = 0
+
+    def add(self, stock):
+        """Start tracking a stock with its current flags and state"""
+        key = stock.instrument_key
+        self._order[key] = self._next
+        self._next += 1
+        for name in self.flag_names:
+            self.set_flag(name, key, getattr(stock, name, False))
+        state = getattr(stock, 'state', None)
+        if state is not None:
+            self.states[state].add(key)
+        stock._index = self
+        self.version += 1
+
+    def remove(self, stock):
+        key = stock.instrument_key
+        stock._index = None
+        self._order.pop(key, None)
+        for name in self.flag_names:
+            self.flags[name].discard(key)
+            self.cleared[name].discard(key)
+        for keys in self.states.values():
+            keys.discard(key)
+        self.version += 1
+
+    def set_flag(self, name: str, key: str, value):
+        keys = self.flags[name]
+        if value:
+            if key not in keys:
+                keys.add(key)
+                self.cleared[name].discard(key)
+                self.version += 1
+        elif key in keys or key not in self.cleared[name]:
+            keys.discard(key)
+            self.cleared[name].add(key)
+            self.version += 1
+
+    def move_state(self, key: str, old, new):
+        if old == new:
+            return
+        if old is not None:
+            self.states[old].discard(key)
+        if new is not None:
+            self.states[new].add(key)
+        self.version += 1
+
+    @property
+    def active(self) -> Set[str]:
+        return self.flags['is_active']
+
+    @property
+    def subscribed(self) -> Set[str]:
+        return self.flags['is_subscribed']
+
+    @property
+    def entered(self) -> Set[str]:
+        return self.flags['entered']
+
+    @property
+    def entered_count(self) -> int:
+        """Stocks that have entered a position (exits keep the flag, as before)"""
+        return len(self.flags['entered'])
+
+    @property
+    def inactive(self) -> Set[str]:
+        """Rejected or unsubscribed stocks (is_active cleared)"""
+        return self.cleared['is_active']
+
+    def with_flags(self, *names: str) -> Set[str]:
+        """Keys with every one of the named flags set"""
+        keys = self.flags[names[0]]
+        for name in names[1:]:
+            keys = keys & self.flags[name]
+        return set(keys) if len(names) == 1 else keys
+
+    def in_state(self, state, subscribed_only: bool = False) -> Set[str]:
+        keys = self.states.get(state, set())
+        if subscribed_only:
+            return keys & self.flags['is_subscribed']
+        return set(keys)
+
+    def ordered(self, keys: Iterable[str]) -> List[str]:
+        """Keys sorted into monitor order (the order a scan of monitor.stocks visits them)"""
+        order = self._order
+        return sorted((key for key in keys if key in order), key=order.__getitem__)
@@ -29,11 +29,17 @@ class StockScorer:
     def __init__(self):
         self.stock_metadata = {}  # Cache for pre-calculated values
 
-    def preload_metadata(self, symbols: list, prev_closes: dict = None):
-        """Pre-calculate ADR and price data at prep time"""
+    def preload_metadata(self, symbols: list, prev_closes: dict = None, quotes: dict = None):
+        """Pre-calculate ADR and price data at prep time
+
+        quotes: symbol -> quote dict from upstox_fetcher.get_batch_quotes(); fetched
+        here in one batch if not supplied so prices never cost one request per symbol
+        """
         logger.info(f"Preloading metadata for {len(symbols)} stocks")
         if prev_closes is None:
             prev_closes = {}
+        if quotes is None:
+            quotes = upstox_fetcher.get_batch_quotes(symbols)
 
         for symbol in symbols:
             try:
@@ -50,8 +56,10 @@ class StockScorer:
                 logger.debug(f"[{symbol}] ADR loaded: {current_adr:.2f}%")
 
                 # Get current price (use fallback in test mode)
-                ltp_data = upstox_fetcher.get_ltp_data(symbol)
-                if ltp_data and 'ltp' in ltp_data:
+                ltp_data = quotes.get(symbol)
+                if not ltp_data or ltp_data.get('ltp') is None:
+                    ltp_data = upstox_fetcher.get_ltp_data(symbol)
+                if ltp_data and ltp_data.get('ltp') is not None:
                     current_price = float(ltp_data['ltp'])
                     logger.debug(f"[{symbol}] Price loaded: Rs{current_price:.2f}")
                 else:
@@ -85,6 +93,29 @@ class StockScorer:
                 # Don't add to metadata - stock will be skipped from scoring
                 continue
 
+    def load_from_prep_pack(self, pack: dict, symbols: list) -> list:
+        """Load ADR and volume baselines from a nightly prep pack
+
+        The previous close stands in for the current price, so no quote is
+        needed before PREP_START. Returns the symbols the pack did not cover.
+        """
+        stocks = pack.get('stocks', {})
+        missing = []
+        for symbol in symbols:
+            entry = stocks.get(symbol, {})
+            if entry.get('adr_percent') is None or entry.get('prev_close') is None or not entry.get('volume_baseline'):
+                missing.append(symbol)
+                continue
+
+            self.stock_metadata[symbol] = {
+                'adr_percent': entry['adr_percent'],
+                'current_price': entry['prev_close'],
+                'volume_baseline': entry['volume_baseline']
+            }
+
+        logger.info(f"Loaded metadata for {len(symbols) - len(missing)} stocks from prep pack")
+        return missing
+
     def _get_volume_baseline(self, symbol: str) -> float:
         """Get volume baseline for scoring"""
         try:
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tick Latency Instrumentation for the Live Bots
+HDR-style log-linear histograms of exchange trade time -> receive -> decoded ->
+handler complete, overall and per instrument, with a live JSON snapshot the
+server API serves and a summary at session end
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+import pytz
+
+logger = logging.getLogger(__name__)
+IST = pytz.timezone('Asia/Kolkata')
+
+# Snapshot file served by /api/live-trading/latency
+LATENCY_SNAPSHOT_FILE = 'tick_latency.json'
+LATENCY_SNAPSHOT_INTERVAL_SECONDS = 5
+
+# 128 linear sub-buckets per power of two: every value is kept to within 1/64 (~1.6%)
+SUB_BUCKET_BITS = 7
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+SUB_BUCKET_HALF = SUB_BUCKET_COUNT >> 1
+
+# Stage order for reports
+STAGES = (
+    'exchange_to_receive',   # exchange last-trade time -> websocket message received (wall clocks)
+    'decode',                # message received -> tick decoded
+    'queue',                 # decoded -> strategy worker picks it up
+    'handler',               # strategy handler run time
+    'receive_to_decision',   # message received -> handler complete
+    'exchange_to_decision',  # exchange last-trade time -> handler complete
+)
+INSTRUMENT_STAGES = ('receive_to_decision', 'exchange_to_decision')
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+class LatencyHistogram:
+    """
+    Log-linear histogram of microsecond values
+
+    Values below 128us get their own bucket; above that each power of two is
+    split into 64 buckets. Counts are a sparse dict, so recording is a
+    bit_length, a shift and a dict update, and an idle instrument costs nothing.
+    """
+
+    __slots__ = ('counts', 'count', 'total', 'min', 'max')
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    def record(self, micros: float):
+        value = int(micros)
+        if value < 0:
+            value = 0
+        if value < SUB_BUCKET_COUNT:
+            index = value
+        else:
+            shift = value.bit_length() - SUB_BUCKET_BITS
+            index = shift * SUB_BUCKET_HALF + (value >> shift)
+        counts = self.counts
+        counts[index] = counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+        if self.min is None or value < self.min:
+            self.min = value
+
+    @staticmethod
+    def bucket_upper(index: int) -> int:
+        """Highest value recorded into a bucket"""
+        if index < SUB_BUCKET_COUNT:
+            return index
+        shift = index // SUB_BUCKET_HALF - 1
+        mantissa = index - shift * SUB_BUCKET_HALF
+        return ((mantissa + 1) << shift) - 1
+
+    def percentile(self, pct: float) -> int:
+        """Value at or below which pct% of recordings fall (bucket upper bound, capped at max)"""
+        if not self.count:
+            return 0
+        target = max(1, int(round(self.count * pct / 100.0)))
+        seen = 0
+        counts = dict(self.counts)
+        for index in sorted(counts):
+            seen += counts[index]
+            if seen >= target:
+                return min(self.bucket_upper(index), self.max)
+        return self.max
+
+    def merge(self, other: 'LatencyHistogram'):
+        for index, n in dict(other.counts).items():
+            self.counts[index] = self.counts.get(index, 0) + n
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+
+    def summary(self) -> Dict[str, float]:
+        """Count, mean, min/max and percentiles in milliseconds"""
+        result = {'count': self.count}
+        if not self.count:
+            return result
+        result['mean_ms'] = round(self.total / self.count / 1000, 3)
+        result['min_ms'] = round(self.min / 1000, 3)
+        for pct in PERCENTILES:
+            result[f'p{pct:g}_ms'] = round(self.percentile(pct) / 1000, 3)
+        result['max_ms'] = round(self.max / 1000, 3)
+        return result
+
+
+class TickLatencyRecorder:
+    """
+    Per-stage latency histograms for every tick, overall and per instrument
+
+    The streamer stamps each tick on the receive thread (stamp() records the
+    exchange and decode stages and returns the stamp that travels with the tick);
+    the strategy worker calls complete() once the handler returns. Each
+    histogram is written by one thread only, so recording takes no locks.
+
+    Exchange stages compare wall clocks and only use ticks carrying a new trade,
+    since a quote-only update repeats the previous last-trade time.
+    """
+
+    def __init__(self, snapshot_file: str = LATENCY_SNAPSHOT_FILE):
+        self.snapshot_file = snapshot_file
+        self.stages = {stage: LatencyHistogram() for stage in STAGES}
+        self.instruments: Dict[str, Dict[str, LatencyHistogram]] = {}
+        self.started_at = datetime.now(IST)
+        self._dump_thread = None
+        self._dump_stop = threading.Event()
+
+    def stamp(self, exchange_ms: int, received: float, decoded: float) -> tuple:
+        """Record exchange->receive and decode stages (receive thread); returns the tick's stamp"""
+        if exchange_ms:
+            self.stages['exchange_to_receive'].record((received - exchange_ms / 1000.0) * 1e6)
+        self.stages['decode'].record((decoded - received) * 1e6)
+        return (exchange_ms, received, decoded)
+
+    def complete(self, symbol: str, stamp: tuple, handler_started: float, handler_done: float):
+        """Record queue, handler and end-to-end stages for a processed tick (strategy worker)"""
+        exchange_ms, received, decoded = stamp
+        stages = self.stages
+        stages['queue'].record((handler_started - decoded) * 1e6)
+        stages['handler'].record((handler_done - handler_started) * 1e6)
+
+        instrument = self.instruments.get(symbol)
+        if instrument is None:
+            instrument = self.instruments[symbol] = {stage: LatencyHistogram() for stage in INSTRUMENT_STAGES}
+        receive_to_decision = (handler_done - received) * 1e6
+        stages['receive_to_decision'].record(receive_to_decision)
+        instrument['receive_to_decision'].record(receive_to_decision)
+        if exchange_ms:
+            exchange_to_decision = (handler_done - exchange_ms / 1000.0) * 1e6
+            stages['exchange_to_decision'].record(exchange_to_decision)
+            instrument['exchange_to_decision'].record(exchange_to_decision)
+
+    def snapshot(self, include_instruments: bool = True) -> Dict:
+        """JSON-ready summary of all stages (and per instrument)"""
+        data = {
+            'started_at': self.started_at.isoformat(),
+            'timestamp': datetime.now(IST).isoformat(),
+            'stages': {stage: histogram.summary() for stage, histogram in self.stages.items()},
+        }
+        if include_instruments:
+            data['instruments'] = {
+                symbol: {stage: histogram.summary() for stage, histogram in stages.items()}
+                for symbol, stages in list(self.instruments.items())
+            }
+        return data
+
+    def dump(self, path: Optional[str] = None) -> bool:
+        """Write the snapshot atomically (default: snapshot_file)"""
+        path = path or self.snapshot_file
+        try:
+            tmp_file = f"{path}.tmp"
+            with open(tmp_file, 'w') as f:
+                json.dump(self.snapshot(), f, indent=2)
+            os.replace(tmp_file, path)
+            return True
+        except Exception as e:
+            logger.error(f"Error writing tick latency snapshot {path}: {e}")
+            return False
+
+    def start_live_dump(self, interval: float = LATENCY_SNAPSHOT_INTERVAL_SECONDS):
+        """Refresh the snapshot file every interval seconds for the server API"""
+        if self._dump_thread is not None:
+            return
+        self._dump_stop.clear()
+
+        def loop():
+            while not self._dump_stop.wait(interval):
+                self.dump()
+
+        self._dump_thread = threading.Thread(target=loop, name="latency-dump", daemon=True)
+        self._dump_thread.start()
+
+    def stop_live_dump(self):
+        self._dump_stop.set()
+        if self._dump_thread is not None:
+            self._dump_thread.join(2)
+            self._dump_thread = None
+
+    def format_summary(self, top: int = 5) -> str:
+        """Stage table plus the slowest instruments by p99 exchange->decision"""
+        lines = ["TICK LATENCY (ms)        count      p50      p90      p99    p99.9      max"]
+        for stage in STAGES:
+            s = self.stages[stage].summary()
+            if not s['count']:
+                lines.append(f"   {stage:<22} {0:>7}")
+                continue
+            lines.append(f"   {stage:<22} {s['count']:>7} {s['p50_ms']:>8.2f} {s['p90_ms']:>8.2f} "
+                         f"{s['p99_ms']:>8.2f} {s['p99.9_ms']:>8.2f} {s['max_ms']:>8.2f}")
+
+        stage = 'exchange_to_decision' if self.stages['exchange_to_decision'].count else 'receive_to_decision'
+        ranked = sorted(((h[stage].percentile(99), symbol) for symbol, h in list(self.instruments.items())
+                         if h[stage].count), reverse=True)[:top]
+        if ranked:
+            lines.append(f"   Slowest p99 {stage}: " + ", ".join(f"{symbol} {p99 / 1000:.1f}" for p99, symbol in ranked))
+        return "\n".join(lines)
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Bounded Tick Queue for the Live Bots
+Decouples the websocket receive thread from strategy processing: the receive
+thread only decodes and enqueues, a single strategy worker thread runs the tick
+handler and every other call that touches stock state
+"""
+
+import time
+import logging
+import threading
+from concurrent.futures import Future
+from collections import deque
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+# Ring buffer slots (ticks waiting for the strategy worker)
+TICK_QUEUE_CAPACITY = 4096
+# Depth at which a new tick replaces the instrument's pending tick instead of queueing
+TICK_CONFLATE_DEPTH = 1024
+
+
+class TickDispatcher:
+    """
+    Bounded ring buffer of ticks drained by one strategy worker thread
+
+    put() is the streamer's tick_handler and never blocks. Ticks are queued in
+    arrival order until the depth reaches conflate_depth; beyond that a tick for
+    an instrument that already has one pending overwrites it in place (latest
+    price, I1 candles merged by timestamp, original enqueue time kept so lag
+    stays honest). A tick that finds the ring full with nothing to conflate is
+    dropped and counted.
+
+    call() runs a function on the worker after the ticks queued before it, so
+    the main thread never mutates stock state concurrently with tick processing.
+
+    With a latency recorder, ticks stamped by the streamer get their queue,
+    handler and end-to-end latency recorded once the handler returns.
+
+    add_sources() registers the upstream connections feeding put() (the
+    shards of a ShardedStockStreamer), so stats() also reports each
+    connection's message rate.
+    """
+
+    def __init__(self, handler: Callable, capacity: int = TICK_QUEUE_CAPACITY,
+                 conflate_depth: int = TICK_CONFLATE_DEPTH, name: str = "strategy-worker",
+                 latency=None):
+        self.handler = handler
+        self.latency = latency
+        self.capacity = capacity
+        self.conflate_depth = min(conflate_depth, capacity)
+        self.name = name
+
+        # Slot: [instrument_key, symbol, price, timestamp, ohlc_list, enqueued_at, latency stamp]
+        self._slots = [None] * capacity
+        self._head = 0  # Sequence number of the next tick to process
+        self._tail = 0  # Sequence number of the next free slot
+        self._pending: Dict[str, int] = {}  # instrument_key -> sequence of its newest queued tick
+        self._calls = deque()  # (tail at submit, fn, args, kwargs, future)
+        self._cond = threading.Condition()
+        self._thread = None
+        self._running = False
+
+        # Counters
+        self.enqueued = 0
+        self.processed = 0
+        self.conflated = 0
+        self.dropped = 0
+        self.handler_errors = 0
+        self.max_depth = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self._total_lag = 0.0
+
+        # Upstream connections feeding put(): name -> [streamer, messages at last report, report time]
+        self._sources: Dict[str, list] = {}
+
+    def start(self):
+        """Start the strategy worker thread"""
+        if self._thread is not None:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, drain: bool = True, timeout: float = 5.0):
+        """Stop the worker, by default after processing everything already queued"""
+        with self._cond:
+            if not drain:
+                self._head = self._tail
+                self._pending.clear()
+            self._running = False
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    @property
+    def depth(self) -> int:
+        return self._tail - self._head
+
+    def put(self, instrument_key, symbol, price, timestamp, ohlc_list=None, stamp=None):
+        """Enqueue a tick from the receive thread (tick_handler signature plus optional latency stamp)"""
+        now = time.monotonic()
+        with self._cond:
+            depth = self._tail - self._head
+            if depth >= self.conflate_depth:
+                seq = self._pending.get(instrument_key)
+                if seq is not None:
+                    slot = self._slots[seq % self.capacity]
+                    slot[2] = price
+                    slot[3] = timestamp
+                    slot[4] = self._merge_candles(slot[4], ohlc_list)
+                    self.conflated += 1
+                    return
+                if depth >= self.capacity:
+                    self.dropped += 1
+                    if self.dropped == 1 or self.dropped % 1000 == 0:
+                        logger.warning(f"Tick queue full ({self.capacity}) - dropped {self.dropped} tick(s)")
+                    return
+
+            seq = self._tail
+            self._slots[seq % self.capacity] = [instrument_key, symbol, price, timestamp, ohlc_list, now, stamp]
+            self._pending[instrument_key] = seq
+            self._tail = seq + 1
+            self.enqueued += 1
+            if depth + 1 > self.max_depth:
+                self.max_depth = depth + 1
+            self._cond.notify()
+
+    def call(self, fn: Callable, *args, timeout: float = None, **kwargs) -> Any:
+        """Run fn on the strategy worker after the ticks queued so far and return its result"""
+        if self._thread is None or threading.current_thread() is self._thread:
+            return fn(*args, **kwargs)
+        future = Future()
+        with self._cond:
+            self._calls.append((self._tail, fn, args, kwargs, future))
+            self._cond.notify()
+        return future.result(timeout)
+
+    @staticmethod
+    def _merge_candles(queued, latest):
+        """Latest tick's candles win; keep queued I1 candles the latest tick no longer carries"""
+        if not queued:
+            return latest
+        if not latest:
+            return queued
+        by_ts = {candle.get('ts'): candle for candle in queued if candle.get('interval') == 'I1'}
+        for candle in latest:
+            if candle.get('interval') == 'I1':
+                by_ts[candle.get('ts')] = candle
+        others = [candle for candle in latest if candle.get('interval') != 'I1']
+        return others + [by_ts[ts] for ts in sorted(by_ts, key=lambda ts: int(ts or 0))]
+
+    def _run(self):
+        """Strategy worker: process calls and ticks in submission order"""
+        while True:
+            with self._cond:
+                while self._running and self._head == self._tail and not self._calls:
+                    self._cond.wait()
+                if self._calls and self._calls[0][0] <= self._head:
+                    call = self._calls.popleft()
+                    tick = None
+                elif self._head < self._tail:
+                    call = None
+                    seq = self._head
+                    index = seq % self.capacity
+                    tick = self._slots[index]
+                    self._slots[index] = None
+                    self._head = seq + 1
+                    if self._pending.get(tick[0]) == seq:
+                        del self._pending[tick[0]]
+                else:
+                    # Stopped and drained - fail any calls that can no longer run
+                    while self._calls:
+                        self._calls.popleft()[4].set_exception(RuntimeError("Tick dispatcher stopped"))
+                    return
+
+            if call is not None:
+                _, fn, args, kwargs, future = call
+                try:
+                    future.set_result(fn(*args, **kwargs))
+                except Exception as e:
+                    future.set_exception(e)
+                continue
+
+            lag = time.monotonic() - tick[5]
+            self.last_lag = lag
+            self._total_lag += lag
+            if lag > self.max_lag:
+                self.max_lag = lag
+            stamp = tick[6]
+            if stamp is not None and self.latency is not None:
+                handler_started = time.time()
+            try:
+                self.handler(tick[0], tick[1], tick[2], tick[3], tick[4])
+            except Exception as e:
+                self.handler_errors += 1
+                logger.error(f"Tick handler error for {tick[1]}: {e}")
+            if stamp is not None and self.latency is not None:
+                self.latency.complete(tick[1], stamp, handler_started, time.time())
+            self.processed += 1
+
+    def add_sources(self, sources: Dict[str, Any]):
+        """Report message rates for these streamers (name -> object with messages_received)"""
+        now = time.monotonic()
+        for name, streamer in sources.items():
+            self._sources[name] = [streamer, streamer.messages_received, now]
+
+    def source_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Messages and message rate per source since the previous call (or registration)"""
+        now = time.monotonic()
+        stats = {}
+        for name, source in self._sources.items():
+            streamer, last_count, last_time = source
+            count = streamer.messages_received
+            elapsed = now - last_time
+            stats[name] = {
+                'messages': count,
+                'msg_per_sec': (count - last_count) / elapsed if elapsed > 0 else 0.0,
+                'connected': bool(getattr(streamer, 'connected', False)),
+            }
+            source[1] = count
+            source[2] = now
+        return stats
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, throughput, conflation/drop counts and lag (ms)"""
+        processed = self.processed
+        return {
+            'depth': self.depth,
+            'max_depth': self.max_depth,
+            'capacity': self.capacity,
+            'enqueued': self.enqueued,
+            'processed': processed,
+            'conflated': self.conflated,
+            'dropped': self.dropped,
+            'handler_errors': self.handler_errors,
+            'last_lag_ms': self.last_lag * 1000,
+            'max_lag_ms': self.max_lag * 1000,
+            'avg_lag_ms': (self._total_lag / processed * 1000) if processed else 0.0,
+            'sources': self.source_stats(),
+        }
+
+    def format_stats(self) -> str:
+        s = self.stats()
+        return (f"Tick queue: {s['processed']:,} processed, depth {s['depth']} (max {s['max_depth']}/{s['capacity']}), "
+                f"{s['conflated']:,} conflated, {s['dropped']:,} dropped, "
+                f"lag avg {s['avg_lag_ms']:.2f}ms / max {s['max_lag_ms']:.1f}ms"
+                + ''.join(f" | {name}: {source['msg_per_sec']:.1f} msg/s"
+                          f"{'' if source['connected'] else ' (down)'}"
+                          for name, source in s['sources'].items()))
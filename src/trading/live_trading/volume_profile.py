@@ -3,22 +3,28 @@ Volume Profile Calculator for Live Trading Bot
 Calculates Value Area High (VAH) from previous day's volume profile
 """
 
+import time
 import logging
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta, date
+from datetime import datetime, date
 from typing import Dict, Optional, List
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import pytz
 
 try:
     # Try relative import first (when run as part of package)
     from ...utils.upstox_fetcher import UpstoxFetcher
+    from ...utils.history_cache import history_cache
+    from ...utils.trading_calendar import trading_calendar
 except ImportError:
     # Fallback to absolute import (when run standalone)
     import sys
     import os
     sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
     from utils.upstox_fetcher import UpstoxFetcher
+    from utils.history_cache import history_cache
+    from utils.trading_calendar import trading_calendar
 
 logger = logging.getLogger(__name__)
 
@@ -37,6 +43,14 @@ else:
     logger.setLevel(logging.INFO)
 IST = pytz.timezone('Asia/Kolkata')
 
+# Volume profile bin size as a fraction of price (rounded to whole ticks)
+BIN_PRICE_FRACTION = 0.0002
+
+# Concurrent candle fetches for a VAH batch (requests are still paced by the rate limiter)
+VAH_FETCH_WORKERS = 8
+# Profile computations run alongside the fetches
+VAH_COMPUTE_WORKERS = 4
+
 
 class VolumeProfileCalculator:
     """Calculates volume profile and VAH for stocks"""
@@ -45,11 +59,12 @@ class VolumeProfileCalculator:
         self.upstox_fetcher = UpstoxFetcher()
         self.bin_size = 0.05  # Price bin size for volume distribution
         self.value_area_pct = 0.70  # 70% of volume for value area
+        self.last_vah_failures = {}  # symbol -> reason from the last calculate_vah_for_stocks
 
     def get_previous_trading_day(self, current_date: date = None) -> date:
         """
         Get the previous trading day, skipping weekends and holidays
-        Tests data availability to confirm it's a trading day
+        Uses the local NSE trading calendar - no API calls
 
         Args:
             current_date: Date to calculate from (default: today)
@@ -60,21 +75,9 @@ class VolumeProfileCalculator:
         if current_date is None:
             current_date = datetime.now(IST).date()
 
-        prev_day = current_date - timedelta(days=1)
-        test_symbol = "BSE"  # Use a reliable stock for testing
-
-        while True:
-            df = self.fetch_intraday_data(test_symbol, prev_day)
-            if df is not None and not df.empty:
-                logger.info(f"Found trading day: {prev_day}")
-                return prev_day
-
-            logger.warning(f"No data for {prev_day} - likely holiday/weekend. Trying previous.")
-            prev_day -= timedelta(days=1)
-
-            # Safety: Prevent infinite loop (max 10 days back)
-            if (current_date - prev_day).days > 10:
-                raise ValueError("No trading day found in last 10 days - check API or market status.")
+        prev_day = trading_calendar.previous_trading_day(current_date)
+        logger.info(f"Found trading day: {prev_day}")
+        return prev_day
 
     def fetch_intraday_data(self, symbol: str, target_date: date) -> Optional[pd.DataFrame]:
         """
@@ -88,34 +91,43 @@ class VolumeProfileCalculator:
             DataFrame with OHLCV data or None if failed
         """
         try:
-            import requests
-
             instrument_key = self.upstox_fetcher.get_instrument_key(symbol)
             if not instrument_key:
                 logger.error(f"No instrument key found for {symbol}")
                 return None
 
-            # V3 URL: Note 'minutes/1' for 1-min; to_date and from_date same for one day
-            date_str = target_date.strftime('%Y-%m-%d')
-            url = f"https://api.upstox.com/v3/historical-candle/{instrument_key}/minutes/1/{date_str}/{date_str}"
+            # Completed sessions never change - serve them from the on-disk cache
+            candles = history_cache.get(instrument_key, 'minutes/1', target_date, target_date)
 
-            headers = {
-                "Accept": "application/json",
-                "Authorization": f"Bearer {self.upstox_fetcher.access_token}"
-            }
+            if candles is None:
+                # V3 URL: Note 'minutes/1' for 1-min; to_date and from_date same for one day
+                date_str = target_date.strftime('%Y-%m-%d')
+                url = f"https://api.upstox.com/v3/historical-candle/{instrument_key}/minutes/1/{date_str}/{date_str}"
 
-            response = requests.get(url, headers=headers)
-            if response.status_code != 200:
-                logger.error(f"API error for {symbol}: {response.status_code} - {response.text}")
-                return None
+                headers = {
+                    "Accept": "application/json",
+                    "Authorization": f"Bearer {self.upstox_fetcher.access_token}"
+                }
+
+                response = self.upstox_fetcher.http_get(url, headers)
+                if response.status_code != 200:
+                    logger.error(f"API error for {symbol}: {response.status_code} - {response.text}")
+                    return None
+
+                data = response.json()
+                if data.get('status') != 'success':
+                    logger.warning(f"No candles for {symbol} on {target_date}")
+                    return None
 
-            data = response.json()
-            if data.get('status') != 'success' or not data.get('data', {}).get('candles'):
+                candles = data.get('data', {}).get('candles') or []
+                history_cache.put(instrument_key, 'minutes/1', target_date, target_date, candles)
+
+            if not candles:
                 logger.warning(f"No candles for {symbol} on {target_date}")
                 return None
 
             # To DataFrame (candles descending; reverse if needed)
-            df = pd.DataFrame(data['data']['candles'], columns=['timestamp', 'open', 'high', 'low', 'close', 'volume', 'oi'])
+            df = pd.DataFrame(candles, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume', 'oi'])
             df = df[['open', 'high', 'low', 'close', 'volume']]  # Drop timestamp/oi if not needed
 
             # Convert numeric
@@ -130,12 +142,37 @@ class VolumeProfileCalculator:
             logger.error(f"Error fetching for {symbol}: {e}")
             return None
 
-    def calculate_volume_profile(self, ohlcv_df: pd.DataFrame) -> Dict:
+    def get_bin_size(self, price: float, tick_size: float = None) -> float:
+        """
+        Pick a price bin size that scales with the stock price
+
+        Bins are BIN_PRICE_FRACTION of the price, rounded to a whole number of
+        ticks and never smaller than one tick, so a Rs2000 stock gets ~Rs0.40
+        bins instead of thousands of Rs0.05 bins. For multi-day research series
+        only - the live VAH gate keeps the legacy bins (see _vah_for_symbol).
+
+        Args:
+            price: Reference price (e.g. previous close)
+            tick_size: Instrument tick size (default: self.bin_size)
+
+        Returns:
+            Bin size in rupees
+        """
+        tick = tick_size if tick_size and tick_size > 0 else self.bin_size
+        ticks = max(1, int(round(price * BIN_PRICE_FRACTION / tick)))
+        return round(ticks * tick, 6)
+
+    def calculate_volume_profile(self, ohlcv_df: pd.DataFrame, bin_size: float = None) -> Dict:
         """
         Calculate volume profile and VAH from OHLCV data
 
+        Each bar's volume is spread evenly over the bins between its low and
+        high in one vectorized pass: bin edge ranges come from searchsorted and
+        the per-bar shares are accumulated with a difference array + cumsum.
+
         Args:
             ohlcv_df: DataFrame with OHLCV data
+            bin_size: Price bin size (default: self.bin_size)
 
         Returns:
             Dict with 'poc', 'vah', 'val', 'profile'
@@ -145,76 +182,53 @@ class VolumeProfileCalculator:
                 logger.warning("Insufficient OHLCV data for volume profile calculation")
                 return {'poc': None, 'vah': None, 'val': None, 'profile': {}}
 
+            bin_size = bin_size or self.bin_size
+            lows = ohlcv_df['low'].to_numpy(dtype=float)
+            highs = ohlcv_df['high'].to_numpy(dtype=float)
+            bar_volumes = ohlcv_df['volume'].to_numpy(dtype=float)
+
             # Step 1: Define price bins
-            min_price = ohlcv_df['low'].min()
-            max_price = ohlcv_df['high'].max()
+            min_price = lows.min()
+            max_price = highs.max()
 
             if min_price >= max_price:
                 logger.warning("Invalid price range for volume profile")
                 return {'poc': None, 'vah': None, 'val': None, 'profile': {}}
 
-            bins = np.arange(min_price, max_price + self.bin_size, self.bin_size)
+            bins = np.arange(min_price, max_price + bin_size, bin_size)
             bin_centers = (bins[:-1] + bins[1:]) / 2
 
-            # Step 2: Initialize volume per bin
-            volume_profile = {price: 0 for price in bin_centers}
-
-            # Step 3: Distribute volume for each bar
-            for _, bar in ohlcv_df.iterrows():
-                bar_low = bar['low']
-                bar_high = bar['high']
-                bar_volume = bar['volume']
-
-                # Find bins in this bar's range
-                bar_bins = bins[(bins >= bar_low) & (bins <= bar_high)]
-                if len(bar_bins) > 1:
-                    # Evenly distribute volume across bins
-                    vol_per_bin = bar_volume / (len(bar_bins) - 1)
-                    for i in range(len(bar_bins) - 1):
-                        center = (bar_bins[i] + bar_bins[i+1]) / 2
-                        if center in volume_profile:
-                            volume_profile[center] += vol_per_bin
-
-            # Step 4: Find POC and calculate value area
-            profile_items = sorted(volume_profile.items())
-            prices = [p for p, v in profile_items]
-            volumes = np.array([v for p, v in profile_items])
-            total_volume = volumes.sum()
+            # Step 2: Bin edges inside each bar's [low, high] range
+            first_edge = np.searchsorted(bins, lows, side='left')
+            last_edge = np.searchsorted(bins, highs, side='right') - 1
+            bins_per_bar = last_edge - first_edge
 
+            # Step 3: Distribute volume evenly over each bar's bins (difference array + cumsum)
+            spread = bins_per_bar > 0
+            vol_per_bin = bar_volumes[spread] / bins_per_bar[spread]
+            diff = np.zeros(len(bins))
+            np.add.at(diff, first_edge[spread], vol_per_bin)
+            np.add.at(diff, last_edge[spread], -vol_per_bin)
+            volumes = np.cumsum(diff)[:len(bin_centers)]
+
+            total_volume = volumes.sum()
             if total_volume == 0:
                 logger.warning("No volume data for profile calculation")
                 return {'poc': None, 'vah': None, 'val': None, 'profile': {}}
 
-            # Find POC
-            poc_idx = np.argmax(volumes)
-            poc_price = prices[poc_idx]
+            # Step 4: Find POC and expand to the 70% value area
+            poc_idx = int(np.argmax(volumes))
+            left_idx, right_idx = self._expand_value_area(volumes, poc_idx, total_volume * self.value_area_pct)
 
-            # Expand to 70% value area
-            accumulated_volume = volumes[poc_idx]
-            left_idx, right_idx = poc_idx - 1, poc_idx + 1
-            target_volume = total_volume * self.value_area_pct
-
-            while accumulated_volume < target_volume and (left_idx >= 0 or right_idx < len(volumes)):
-                left_vol = volumes[left_idx] if left_idx >= 0 else 0
-                right_vol = volumes[right_idx] if right_idx < len(volumes) else 0
-
-                if left_vol >= right_vol and left_idx >= 0:
-                    accumulated_volume += left_vol
-                    left_idx -= 1
-                elif right_idx < len(volumes):
-                    accumulated_volume += right_vol
-                    right_idx += 1
-                else:
-                    break
-
-            val_price = prices[max(0, left_idx + 1)]
-            vah_price = prices[min(len(prices) - 1, right_idx - 1)]
+            poc_price = bin_centers[poc_idx]
+            val_price = bin_centers[max(0, left_idx + 1)]
+            vah_price = bin_centers[min(len(bin_centers) - 1, right_idx - 1)]
 
             result = {
-                'poc': round(poc_price, 2),
-                'vah': round(vah_price, 2),
-                'val': round(val_price, 2),
-                'profile': dict(profile_items)
+                'poc': round(float(poc_price), 2),
+                'vah': round(float(vah_price), 2),
+                'val': round(float(val_price), 2),
+                'profile': dict(zip(bin_centers.tolist(), volumes.tolist()))
             }
 
             logger.info(f"Volume profile calculated - POC: {result['poc']}, VAH: {result['vah']}, VAL: {result['val']}")
@@ -224,44 +238,106 @@ class VolumeProfileCalculator:
             logger.error(f"Error calculating volume profile: {e}")
             return {'poc': None, 'vah': None, 'val': None, 'profile': {}}
 
-    def calculate_vah_for_stocks(self, symbols: List[str]) -> Dict[str, float]:
+    @staticmethod
+    def _expand_value_area(volumes: np.ndarray, poc_idx: int, target_volume: float):
+        """
+        Expand outward from the POC, taking the larger neighbour (left on ties),
+        until the value area holds target_volume
+
+        Returns:
+            (left_idx, right_idx) - the first bins outside the value area on each side
+        """
+        # Outward-ordered neighbours; the greedy merge only ever compares the two heads
+        left = volumes[poc_idx - 1::-1].tolist() if poc_idx > 0 else []
+        right = volumes[poc_idx + 1:].tolist()
+        accumulated_volume = float(volumes[poc_idx])
+        li = ri = 0
+
+        while accumulated_volume < target_volume and (li < len(left) or ri < len(right)):
+            left_vol = left[li] if li < len(left) else 0
+            right_vol = right[ri] if ri < len(right) else 0
+
+            if left_vol >= right_vol and li < len(left):
+                accumulated_volume += left_vol
+                li += 1
+            elif ri < len(right):
+                accumulated_volume += right_vol
+                ri += 1
+            else:
+                break
+
+        return poc_idx - 1 - li, poc_idx + 1 + ri
+
+    def _vah_for_symbol(self, symbol: str, ohlcv_df: pd.DataFrame) -> float:
+        """
+        Compute one symbol's VAH from its fetched candles (raises on failure)
+
+        Entries are gated on price crossing VAH, so the gate always uses the
+        legacy Rs0.05 bins - tick-sized or price-scaled bins would move VAH.
+        """
+        profile_result = self.calculate_volume_profile(ohlcv_df)
+        if profile_result['vah'] is None:
+            raise ValueError("volume profile has no value area")
+        return profile_result['vah']
+
+    def calculate_vah_for_stocks(self, symbols: List[str], prev_day: date = None) -> Dict[str, float]:
         """
         Calculate VAH for multiple stocks
 
+        Candle fetches run in a bounded pool (the shared rate limiter still
+        paces the actual requests) and each symbol's profile is computed in a
+        worker pool as soon as its candles arrive. A failing symbol is skipped
+        and recorded in self.last_vah_failures without affecting the others.
+
         Args:
             symbols: List of stock symbols
+            prev_day: Session to build the profile from (default: previous trading day)
 
         Returns:
             Dict mapping symbol to VAH price
         """
         vah_dict = {}
+        failures = {}
 
         # Get previous trading day
-        prev_day = self.get_previous_trading_day()
+        if prev_day is None:
+            prev_day = self.get_previous_trading_day()
         logger.info(f"Calculating VAH using data from previous trading day: {prev_day}")
 
-        for symbol in symbols:
-            try:
-                # Fetch intraday data
-                ohlcv_df = self.fetch_intraday_data(symbol, prev_day)
+        start = time.time()
+        with ThreadPoolExecutor(max_workers=VAH_FETCH_WORKERS, thread_name_prefix='vah-fetch') as fetch_pool, \
+                ThreadPoolExecutor(max_workers=VAH_COMPUTE_WORKERS, thread_name_prefix='vah-compute') as compute_pool:
+            fetches = {fetch_pool.submit(self.fetch_intraday_data, symbol, prev_day): symbol for symbol in symbols}
+            computes = {}
+
+            for future in as_completed(fetches):
+                symbol = fetches[future]
+                try:
+                    ohlcv_df = future.result()
+                except Exception as e:
+                    failures[symbol] = f"fetch failed: {e}"
+                    continue
 
                 if ohlcv_df is None or ohlcv_df.empty:
-                    logger.warning(f"Skipping {symbol} - no intraday data available")
+                    failures[symbol] = "no intraday data"
                     continue
 
-                # Calculate volume profile
-                profile_result = self.calculate_volume_profile(ohlcv_df)
+                computes[compute_pool.submit(self._vah_for_symbol, symbol, ohlcv_df)] = symbol
 
-                if profile_result['vah'] is not None:
-                    vah_dict[symbol] = profile_result['vah']
-                    logger.info(f"{symbol}: VAH = ₹{profile_result['vah']:.2f}")
-                else:
-                    logger.warning(f"Could not calculate VAH for {symbol}")
+            for future in as_completed(computes):
+                symbol = computes[future]
+                try:
+                    vah_dict[symbol] = future.result()
+                    logger.info(f"{symbol}: VAH = ₹{vah_dict[symbol]:.2f}")
+                except Exception as e:
+                    failures[symbol] = f"profile failed: {e}"
 
-            except Exception as e:
-                logger.error(f"Error processing {symbol}: {e}")
+        self.last_vah_failures = failures
+        for symbol, reason in sorted(failures.items()):
+            logger.warning(f"Skipping {symbol} - {reason}")
 
-        logger.info(f"VAH calculated for {len(vah_dict)} out of {len(symbols)} stocks")
+        logger.info(f"VAH calculated for {len(vah_dict)} out of {len(symbols)} stocks in {time.time() - start:.1f}s")
+        history_cache.log_stats()
         return vah_dict
 
 
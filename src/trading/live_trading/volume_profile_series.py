@@ -0,0 +1,267 @@
+"""
+Volume Profile Series for Research and Backtesting
+Computes POC/VAH/VAL for every (symbol, session) in a multi-day 1-minute
+dataset in one grouped pass and stores them as a table
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import logging
+from datetime import date
+from typing import Dict, List, Optional, Union
+import numpy as np
+import pandas as pd
+
+# Ensure we can import from the project root
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.trading.live_trading.volume_profile import VolumeProfileCalculator
+
+logger = logging.getLogger(__name__)
+
+SERIES_DB_FILE = 'data/volume_profile_series.db'
+SERIES_COLUMNS = ['symbol', 'date', 'poc', 'vah', 'val', 'bin_size', 'volume', 'bars']
+
+# Same minimum as VolumeProfileCalculator.calculate_volume_profile
+MIN_BARS = 10
+
+# Guards floor/ceil of (price - min) / bin_size against float noise
+_EDGE_EPS = 1e-9
+
+
+def load_intraday_dataset(path: str) -> pd.DataFrame:
+    """
+    Load a stored multi-day 1-minute dataset (.parquet, .csv, .csv.gz or .pkl)
+
+    Expected columns: symbol, timestamp (or date), open, high, low, close, volume
+    """
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path)
+    if path.endswith('.pkl'):
+        return pd.read_pickle(path)
+    return pd.read_csv(path)
+
+
+class VolumeProfileSeries:
+    """
+    Batch engine for historical value-area levels
+
+    All (symbol, date) groups share one difference array: each group gets its
+    own slice of price bins, every bar's volume is spread over its bins with a
+    single np.add.at, and one cumsum produces every profile at once. Only the
+    value-area expansion walks each group, using the calculator's own greedy
+    step so the levels match the live VAH.
+    """
+
+    def __init__(self, db_file: str = SERIES_DB_FILE, calculator: VolumeProfileCalculator = None):
+        self.db_file = db_file
+        if calculator is None:
+            calculator = VolumeProfileCalculator.__new__(VolumeProfileCalculator)
+            calculator.bin_size = 0.05
+            calculator.value_area_pct = 0.70
+        self.calculator = calculator
+
+    def _prepare(self, candles: pd.DataFrame) -> pd.DataFrame:
+        """Normalise columns, derive the session date and sort by group"""
+        df = candles.copy()
+        if 'date' not in df.columns:
+            # Upstox timestamps carry the IST offset, so the first 10 chars are the session date
+            df['date'] = df['timestamp'].astype(str).str[:10]
+        df['date'] = pd.to_datetime(df['date']).dt.date
+
+        for col in ['open', 'high', 'low', 'close', 'volume']:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+        df = df.dropna(subset=['high', 'low', 'close', 'volume'])
+        return df.sort_values(['symbol', 'date'], kind='stable').reset_index(drop=True)
+
+    def _bin_sizes(self, groups: pd.DataFrame, bin_size: Optional[float],
+                   tick_sizes: Optional[Dict[str, float]]) -> np.ndarray:
+        """Bin size per group - fixed, or price-scaled from the session's median close"""
+        if bin_size:
+            return np.full(len(groups), float(bin_size))
+
+        if tick_sizes is None:
+            from src.utils.instrument_index import instrument_index
+            tick_sizes = {}
+            for symbol in groups['symbol'].unique():
+                info = instrument_index.get(symbol) or {}
+                tick_sizes[symbol] = info.get('tick_size')
+
+        return np.array([self.calculator.get_bin_size(price, tick_sizes.get(symbol))
+                         for symbol, price in zip(groups['symbol'], groups['median_close'])])
+
+    def compute(self, candles: pd.DataFrame, bin_size: float = None,
+                tick_sizes: Dict[str, float] = None) -> pd.DataFrame:
+        """
+        Compute value-area levels for every (symbol, date) in a dataset
+
+        Args:
+            candles: 1-minute bars with symbol, timestamp/date, high, low, close, volume
+            bin_size: Fixed bin size for every group (default: price-scaled per group)
+            tick_sizes: symbol -> tick size for price-scaled bins (default: instrument index)
+
+        Returns:
+            DataFrame with SERIES_COLUMNS, one row per group with enough bars
+        """
+        start = time.time()
+        df = self._prepare(candles)
+        if df.empty:
+            return pd.DataFrame(columns=SERIES_COLUMNS)
+
+        grouped = df.groupby(['symbol', 'date'], sort=False)
+        groups = grouped.agg(min_low=('low', 'min'), max_high=('high', 'max'),
+                             median_close=('close', 'median'), volume=('volume', 'sum'),
+                             bars=('low', 'size')).reset_index()
+        group_ids = grouped.ngroup().to_numpy()
+
+        valid = (groups['bars'] >= MIN_BARS) & (groups['max_high'] > groups['min_low'])
+        bin_sizes = self._bin_sizes(groups, bin_size, tick_sizes)
+
+        # Each group's bins occupy [offset, offset + n_bins) of one shared array
+        n_bins = np.floor((groups['max_high'] - groups['min_low']).to_numpy() / bin_sizes + _EDGE_EPS).astype(int) + 1
+        n_bins[~valid.to_numpy()] = 0
+        offsets = np.concatenate([[0], np.cumsum(n_bins)[:-1]])
+
+        # Bin edges inside each bar's [low, high], relative to its group's min low
+        bar_bin = bin_sizes[group_ids]
+        bar_min = groups['min_low'].to_numpy()[group_ids]
+        first_edge = np.ceil((df['low'].to_numpy() - bar_min) / bar_bin - _EDGE_EPS).astype(int)
+        last_edge = np.floor((df['high'].to_numpy() - bar_min) / bar_bin + _EDGE_EPS).astype(int)
+        bins_per_bar = last_edge - first_edge
+
+        spread = (bins_per_bar > 0) & valid.to_numpy()[group_ids]
+        vol_per_bin = df['volume'].to_numpy()[spread] / bins_per_bar[spread]
+        bar_offsets = offsets[group_ids[spread]]
+
+        diff = np.zeros(int(n_bins.sum()) + 1)
+        np.add.at(diff, bar_offsets + first_edge[spread], vol_per_bin)
+        np.add.at(diff, bar_offsets + last_edge[spread], -vol_per_bin)
+        volumes = np.cumsum(diff)[:-1]
+
+        rows = []
+        for g in np.flatnonzero(valid.to_numpy()):
+            # Rebase on the group start so float residue from earlier groups doesn't leak in
+            lo, hi = offsets[g], offsets[g] + n_bins[g]
+            group_volumes = volumes[lo:hi] - (volumes[lo - 1] if lo > 0 else 0.0)
+            total_volume = group_volumes.sum()
+            if total_volume <= 0:
+                continue
+
+            poc_idx = int(np.argmax(group_volumes))
+            left_idx, right_idx = self.calculator._expand_value_area(
+                group_volumes, poc_idx, total_volume * self.calculator.value_area_pct)
+
+            base = groups['min_low'].iat[g] + bin_sizes[g] / 2
+            rows.append({
+                'symbol': groups['symbol'].iat[g],
+                'date': groups['date'].iat[g],
+                'poc': round(float(base + poc_idx * bin_sizes[g]), 2),
+                'vah': round(float(base + min(len(group_volumes) - 1, right_idx - 1) * bin_sizes[g]), 2),
+                'val': round(float(base + max(0, left_idx + 1) * bin_sizes[g]), 2),
+                'bin_size': float(bin_sizes[g]),
+                'volume': float(groups['volume'].iat[g]),
+                'bars': int(groups['bars'].iat[g]),
+            })
+
+        result = pd.DataFrame(rows, columns=SERIES_COLUMNS)
+        logger.info(f"Volume profile series: {len(result)} of {len(groups)} (symbol, date) groups "
+                    f"from {len(df)} bars in {time.time() - start:.2f}s")
+        return result
+
+    def _connect(self) -> sqlite3.Connection:
+        db_dir = os.path.dirname(self.db_file)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        conn = sqlite3.connect(self.db_file)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS volume_profile_series (
+                symbol TEXT NOT NULL,
+                date TEXT NOT NULL,
+                poc REAL,
+                vah REAL,
+                val REAL,
+                bin_size REAL,
+                volume REAL,
+                bars INTEGER,
+                PRIMARY KEY (symbol, date)
+            ) WITHOUT ROWID
+        """)
+        return conn
+
+    def save(self, series: pd.DataFrame):
+        """Insert or replace rows in the stored series table"""
+        if series.empty:
+            return
+        records = [(r.symbol, str(r.date), r.poc, r.vah, r.val, r.bin_size, r.volume, int(r.bars))
+                   for r in series.itertuples(index=False)]
+        with self._connect() as conn:
+            conn.executemany("INSERT OR REPLACE INTO volume_profile_series VALUES (?, ?, ?, ?, ?, ?, ?, ?)", records)
+        logger.info(f"Saved {len(records)} volume profile rows to {self.db_file}")
+
+    def load(self, symbols: List[str] = None, start_date: date = None, end_date: date = None) -> pd.DataFrame:
+        """
+        Load stored levels, ready to join into scans or backtests on (symbol, date)
+
+        Returns:
+            DataFrame with SERIES_COLUMNS ('date' as datetime.date)
+        """
+        query = "SELECT symbol, date, poc, vah, val, bin_size, volume, bars FROM volume_profile_series WHERE 1=1"
+        params = []
+        if symbols:
+            query += f" AND symbol IN ({','.join('?' * len(symbols))})"
+            params.extend(symbols)
+        if start_date:
+            query += " AND date >= ?"
+            params.append(str(start_date))
+        if end_date:
+            query += " AND date <= ?"
+            params.append(str(end_date))
+
+        with self._connect() as conn:
+            series = pd.read_sql_query(query + " ORDER BY symbol, date", conn, params=params)
+        series['date'] = pd.to_datetime(series['date']).dt.date
+        return series
+
+    def update(self, candles: Union[pd.DataFrame, str], bin_size: float = None,
+               tick_sizes: Dict[str, float] = None, recompute: bool = False) -> pd.DataFrame:
+        """
+        Compute and store levels for a dataset, skipping groups already stored
+
+        Args:
+            candles: 1-minute bars, or a path for load_intraday_dataset
+            bin_size: Fixed bin size (default: price-scaled per group)
+            tick_sizes: symbol -> tick size for price-scaled bins
+            recompute: Recompute groups that are already in the table
+
+        Returns:
+            The newly computed rows
+        """
+        if isinstance(candles, str):
+            candles = load_intraday_dataset(candles)
+        candles = self._prepare(candles)
+
+        if not recompute and not candles.empty:
+            stored = self.load(sorted(candles['symbol'].unique()))
+            if not stored.empty:
+                done = pd.MultiIndex.from_frame(stored[['symbol', 'date']])
+                keys = pd.MultiIndex.from_frame(candles[['symbol', 'date']])
+                candles = candles[~keys.isin(done)]
+                logger.info(f"{len(stored)} (symbol, date) groups already stored - skipping")
+
+        series = self.compute(candles, bin_size, tick_sizes)
+        self.save(series)
+        return series
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if len(sys.argv) < 2:
+        print("Usage: python volume_profile_series.py <dataset.parquet|.csv|.pkl> [--recompute]")
+        sys.exit(1)
+    engine = VolumeProfileSeries()
+    new_rows = engine.update(sys.argv[1], recompute='--recompute' in sys.argv)
+    print(f"Stored {len(new_rows)} new (symbol, date) value-area rows in {engine.db_file}")
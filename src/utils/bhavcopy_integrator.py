@@ -15,6 +15,7 @@ from typing import Optional, Dict
 
 from .cache_manager import cache_manager
 from .reporting_system import reporting_system
+from .trading_calendar import trading_calendar
 
 logger = logging.getLogger(__name__)
 
@@ -44,6 +45,9 @@ class BhavcopyIntegrator:
                     'date': target_date
                 }
 
+            # A published bhavcopy confirms the session (e.g. a weekend special session)
+            trading_calendar.record_bhavcopy(target_date, True)
+
             # Step 2: Update all cached stocks
             update_result = self._update_all_cached_stocks(bhavcopy_df, target_date)
 
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+History Cache for MA Stock Trader
+On-disk cache of immutable historical candle responses from Upstox
+"""
+
+import os
+import pickle
+import logging
+import threading
+from datetime import datetime, date
+from typing import Dict, List, Optional
+import pytz
+
+logger = logging.getLogger(__name__)
+
+IST = pytz.timezone('Asia/Kolkata')
+
+# Default size bound for the cache directory (least recently used entries are evicted)
+HISTORY_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+
+class HistoryCache:
+    """
+    Caches raw candle lists keyed by (instrument, interval, from, to)
+
+    Only ranges that end before today's session are cached - candles for
+    completed sessions never change, while today's data is still forming.
+    Empty responses are never cached: they may be a transient gap rather than
+    a holiday (holidays come from the trading calendar instead).
+    """
+
+    def __init__(self, cache_dir: str = "data/cache/history", max_bytes: int = HISTORY_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total_bytes = None
+        self.stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0, 'uncacheable': 0}
+
+    def get_cache_path(self, instrument_key: str, interval: str, from_date: date, to_date: date) -> str:
+        """Get cache file path for a candle request"""
+        safe_key = instrument_key.replace('|', '_').replace(':', '_')
+        safe_interval = interval.replace('/', '')
+        return os.path.join(self.cache_dir, f"{safe_key}_{safe_interval}_{from_date}_{to_date}.pkl")
+
+    def is_cacheable(self, to_date: date) -> bool:
+        """Only completed sessions (strictly before today in IST) are immutable"""
+        return to_date < datetime.now(IST).date()
+
+    def contains(self, instrument_key: str, interval: str, from_date: date, to_date: date) -> bool:
+        """Check if a request would be served from cache"""
+        return (self.is_cacheable(to_date) and
+                os.path.exists(self.get_cache_path(instrument_key, interval, from_date, to_date)))
+
+    def get(self, instrument_key: str, interval: str, from_date: date, to_date: date) -> Optional[List]:
+        """
+        Get cached candles for a request
+
+        Returns:
+            List of candles or None on a miss
+        """
+        if not self.is_cacheable(to_date):
+            with self._lock:
+                self.stats['uncacheable'] += 1
+            return None
+
+        cache_path = self.get_cache_path(instrument_key, interval, from_date, to_date)
+        try:
+            with open(cache_path, 'rb') as f:
+                candles = pickle.load(f)
+            # Touch the file so eviction is least-recently-used
+            os.utime(cache_path, None)
+            with self._lock:
+                self.stats['hits'] += 1
+            return candles
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error(f"Error loading history cache {cache_path}: {e}")
+
+        with self._lock:
+            self.stats['misses'] += 1
+        return None
+
+    def put(self, instrument_key: str, interval: str, from_date: date, to_date: date, candles: List):
+        """Store candles for a completed-session request (no-op for ranges touching today or no candles)"""
+        if not candles or not self.is_cacheable(to_date):
+            return
+
+        cache_path = self.get_cache_path(instrument_key, interval, from_date, to_date)
+        tmp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(list(candles), f, protocol=pickle.HIGHEST_PROTOCOL)
+            size = os.path.getsize(tmp_path)
+            os.replace(tmp_path, cache_path)
+        except Exception as e:
+            logger.error(f"Error saving history cache {cache_path}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+
+        with self._lock:
+            self.stats['stores'] += 1
+            if self._total_bytes is None:
+                self._total_bytes = self._scan_size()
+            else:
+                self._total_bytes += size
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _scan_size(self) -> int:
+        """Total size of cache files on disk"""
+        total = 0
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith('.pkl'):
+                total += entry.stat().st_size
+        return total
+
+    def _evict(self):
+        """Remove least recently used entries until the cache is back under 90% of its bound (lock held)"""
+        entries = sorted(
+            (entry.stat().st_mtime, entry.stat().st_size, entry.path)
+            for entry in os.scandir(self.cache_dir) if entry.name.endswith('.pkl')
+        )
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_bytes * 0.9)
+
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                self.stats['evictions'] += 1
+            except OSError:
+                pass
+
+        self._total_bytes = total
+        logger.info(f"History cache evicted to {total / 1024 / 1024:.1f} MB")
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get hit/miss counters for this process"""
+        with self._lock:
+            return dict(self.stats)
+
+    def log_stats(self):
+        """Log hit/miss summary"""
+        stats = self.get_stats()
+        lookups = stats['hits'] + stats['misses']
+        hit_rate = (stats['hits'] / lookups * 100) if lookups else 0.0
+        logger.info(f"History cache: {stats['hits']} hits, {stats['misses']} misses ({hit_rate:.0f}% hit rate), "
+                    f"{stats['stores']} stored, {stats['evictions']} evicted, {stats['uncacheable']} uncacheable")
+
+    def clear(self):
+        """Remove all cached responses"""
+        with self._lock:
+            if os.path.exists(self.cache_dir):
+                for entry in os.scandir(self.cache_dir):
+                    if entry.name.endswith('.pkl'):
+                        os.remove(entry.path)
+            self._total_bytes = 0
+
+
+# Global instance
+history_cache = HistoryCache()
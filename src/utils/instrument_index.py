@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Instrument Index for MA Stock Trader
+Compact prebuilt SQLite index of NSE equity instruments from the Upstox master file
+"""
+
+import os
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Reads are served through SQLite's memory-mapped I/O so every process
+# using the index shares the same OS page cache instead of its own copy
+INDEX_MMAP_SIZE = 64 * 1024 * 1024
+
+
+class InstrumentIndex:
+    """Prebuilt symbol -> instrument_key/ISIN/lot/tick index shared by all UpstoxFetcher instances"""
+
+    def __init__(self, master_file: str = 'complete.csv.gz', index_file: str = 'data/instrument_index.db'):
+        self.master_file = master_file
+        self.index_file = index_file
+        self._conn = None
+        self._mapping = None
+        self._lock = threading.RLock()
+
+    def _source_signature(self) -> Optional[str]:
+        """Signature of the master file used to detect when the index must be rebuilt"""
+        if not os.path.exists(self.master_file):
+            return None
+        stat = os.stat(self.master_file)
+        return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+    def _indexed_signature(self) -> Optional[str]:
+        """Signature of the master file the current index was built from"""
+        if not os.path.exists(self.index_file):
+            return None
+        try:
+            with sqlite3.connect(self.index_file) as conn:
+                row = conn.execute("SELECT value FROM meta WHERE key = 'source_signature'").fetchone()
+                return row[0] if row else None
+        except sqlite3.Error:
+            return None
+
+    def is_stale(self) -> bool:
+        """True if the index is missing or was built from a different master file"""
+        source = self._source_signature()
+        if source is None:
+            # No master file - use whatever index exists
+            return not os.path.exists(self.index_file)
+        return source != self._indexed_signature()
+
+    def build(self) -> int:
+        """
+        Build the index from the master file
+
+        The index is written to a temporary file and atomically swapped in,
+        so processes reading the old index are never exposed to a partial file.
+
+        Returns:
+            Number of instruments indexed
+        """
+        import gzip
+        import pandas as pd
+
+        if not os.path.exists(self.master_file):
+            logger.warning(f"Master file {self.master_file} not found. Cannot build instrument index.")
+            return 0
+
+        logger.info(f"Building instrument index from {self.master_file}...")
+        signature = self._source_signature()
+
+        with gzip.open(self.master_file, 'rt', encoding='utf-8') as f:
+            df = pd.read_csv(f, usecols=['instrument_key', 'tradingsymbol', 'tick_size', 'lot_size', 'exchange'])
+
+        # Filter only NSE equities
+        nse_eq = df[df['exchange'] == 'NSE_EQ'].drop_duplicates(subset=['tradingsymbol'], keep='first')
+
+        rows = [
+            (str(symbol).upper(), key, key.split('|')[1] if '|' in key else None,
+             int(lot) if pd.notna(lot) else None, float(tick) if pd.notna(tick) else None)
+            for symbol, key, lot, tick in zip(nse_eq['tradingsymbol'], nse_eq['instrument_key'],
+                                              nse_eq['lot_size'], nse_eq['tick_size'])
+        ]
+
+        index_dir = os.path.dirname(self.index_file)
+        if index_dir:
+            os.makedirs(index_dir, exist_ok=True)
+        tmp_file = f"{self.index_file}.{os.getpid()}.tmp"
+
+        with sqlite3.connect(tmp_file) as conn:
+            conn.execute("""
+                CREATE TABLE instruments (
+                    symbol TEXT PRIMARY KEY,
+                    instrument_key TEXT NOT NULL,
+                    isin TEXT,
+                    lot_size INTEGER,
+                    tick_size REAL
+                ) WITHOUT ROWID
+            """)
+            conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+            conn.executemany("INSERT OR REPLACE INTO instruments VALUES (?, ?, ?, ?, ?)", rows)
+            conn.executemany("INSERT INTO meta VALUES (?, ?)", [
+                ('source_signature', signature),
+                ('built_at', datetime.now().isoformat()),
+                ('row_count', str(len(rows))),
+            ])
+        conn.close()
+
+        os.replace(tmp_file, self.index_file)
+        logger.info(f"Instrument index built: {len(rows)} NSE equity instruments -> {self.index_file}")
+        return len(rows)
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        """Open (lazily) a read-only memory-mapped connection, rebuilding the index if stale"""
+        with self._lock:
+            if self._conn is not None:
+                return self._conn
+
+            try:
+                if self.is_stale():
+                    self.build()
+                if not os.path.exists(self.index_file):
+                    return None
+
+                conn = sqlite3.connect(f"file:{self.index_file}?mode=ro", uri=True, check_same_thread=False)
+                conn.execute(f"PRAGMA mmap_size = {INDEX_MMAP_SIZE}")
+                self._conn = conn
+                return conn
+            except Exception as e:
+                logger.error(f"Error opening instrument index: {e}")
+                return None
+
+    def get(self, symbol: str) -> Optional[Dict]:
+        """
+        Get instrument details for a symbol
+
+        Returns:
+            Dict with instrument_key, isin, lot_size, tick_size or None if not found
+        """
+        conn = self._connection()
+        if conn is None:
+            return None
+
+        with self._lock:
+            row = conn.execute(
+                "SELECT instrument_key, isin, lot_size, tick_size FROM instruments WHERE symbol = ?",
+                (symbol.upper(),)
+            ).fetchone()
+
+        if row is None:
+            return None
+        return {'symbol': symbol.upper(), 'instrument_key': row[0], 'isin': row[1],
+                'lot_size': row[2], 'tick_size': row[3]}
+
+    def get_mapping(self) -> Dict[str, str]:
+        """Get the full symbol -> instrument_key mapping (loaded once per process)"""
+        with self._lock:
+            if self._mapping is None:
+                conn = self._connection()
+                if conn is None:
+                    self._mapping = {}
+                else:
+                    self._mapping = dict(conn.execute("SELECT symbol, instrument_key FROM instruments"))
+                    logger.info(f"Loaded {len(self._mapping)} NSE equity instrument mappings from index")
+            return self._mapping
+
+    def refresh(self):
+        """Drop cached state so the next lookup re-checks the master file"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+            self._conn = None
+            self._mapping = None
+
+
+# Global instance shared by every UpstoxFetcher in the process
+instrument_index = InstrumentIndex()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
+    count = InstrumentIndex().build()
+    print(f"Indexed {count} NSE equity instruments")
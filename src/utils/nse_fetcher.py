@@ -12,6 +12,8 @@ from datetime import date
 from pathlib import Path
 from typing import Optional
 
+from .trading_calendar import trading_calendar
+
 logger = logging.getLogger(__name__)
 
 class NSEBhavcopyFetcher:
@@ -342,14 +344,12 @@ class NSEBhavcopyFetcher:
 
     def get_latest_bhavcopy(self) -> Optional[pd.DataFrame]:
         """Get the latest available bhavcopy"""
-        from datetime import timedelta
-
-        # Try yesterday first (most likely available)
-        yesterday = date.today() - timedelta(days=1)
-        df = self.download_bhavcopy(yesterday)
-
+        # Last completed session before today (most likely available)
+        last_session = trading_calendar.previous_trading_day(date.today())
+        df = self.download_bhavcopy(last_session)
         if df is not None:
-            logger.info(f"Using bhavcopy for {yesterday}")
+            trading_calendar.record_bhavcopy(last_session, True)
+            logger.info(f"Using bhavcopy for {last_session}")
             return df
 
         logger.warning("No bhavcopy data available")
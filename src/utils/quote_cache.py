@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Quote Cache for MA Stock Trader
+Short-lived, per-field TTL cache of market quotes with single-flight request de-duplication
+"""
+
+import time
+import logging
+import threading
+from typing import Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# How long each quote field stays fresh (seconds). Previous close is fixed for the
+# whole session; everything that moves with trading is only reused for a moment.
+QUOTE_FIELD_TTLS = {
+    'cp': 6 * 60 * 60,
+    'prev_close': 6 * 60 * 60,
+    'ltp': 2.0,
+    'open': 2.0,
+    'high': 2.0,
+    'low': 2.0,
+    'close': 2.0,
+    'volume': 2.0,
+    'ltq': 2.0,
+}
+DEFAULT_FIELD_TTL = 2.0
+
+
+class QuoteCache:
+    """Per-symbol quote fields with individual expiry, shared by every caller in the process"""
+
+    def __init__(self, field_ttls: Dict[str, float] = None):
+        self.field_ttls = field_ttls or QUOTE_FIELD_TTLS
+        self._quotes = {}       # symbol -> {field: (value, fetched_at)}
+        self._in_flight = {}    # flight key -> (Event, result holder)
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'joined': 0, 'fetches': 0}
+
+    def get(self, symbol: str, fields: Iterable[str], count_hit: bool = True) -> Optional[Dict]:
+        """
+        Get cached fields for a symbol
+
+        Args:
+            symbol: Stock symbol
+            fields: Fields the caller needs - all must still be fresh
+            count_hit: Count a hit as a saved REST call (False when part of a batch)
+
+        Returns:
+            Dict of every fresh field for the symbol if the required ones are fresh, else None
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._quotes.get(symbol.upper())
+            if not entry:
+                return None
+
+            result = {
+                field: value for field, (value, fetched_at) in entry.items()
+                if now - fetched_at <= self.field_ttls.get(field, DEFAULT_FIELD_TTL)
+            }
+            if any(field not in result for field in fields):
+                return None
+
+            if count_hit:
+                self.stats['hits'] += 1
+            return result
+
+    def record_hit(self):
+        """Count a REST call saved by a caller that checked the cache itself"""
+        with self._lock:
+            self.stats['hits'] += 1
+
+    def put(self, symbol: str, quote: Dict):
+        """Store the non-empty fields of a quote"""
+        if not quote:
+            return
+        now = time.monotonic()
+        with self._lock:
+            entry = self._quotes.setdefault(symbol.upper(), {})
+            for field, value in quote.items():
+                if field != 'symbol' and value is not None:
+                    entry[field] = (value, now)
+
+    def single_flight(self, key: str, fetch: Callable[[], Dict]) -> Dict:
+        """
+        Run fetch() for a key, sharing the result with concurrent callers for the same key
+
+        Only the first caller makes the request; callers arriving while it is in
+        flight wait for it and receive the same result.
+        """
+        with self._lock:
+            flight = self._in_flight.get(key)
+            if flight is None:
+                flight = (threading.Event(), {})
+                self._in_flight[key] = flight
+                leader = True
+                self.stats['fetches'] += 1
+            else:
+                leader = False
+                self.stats['joined'] += 1
+
+        event, holder = flight
+        if not leader:
+            event.wait()
+            return holder.get('result', {})
+
+        try:
+            holder['result'] = fetch()
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            event.set()
+        return holder['result']
+
+    def calls_saved(self) -> int:
+        """REST calls avoided by cache hits and shared in-flight requests"""
+        with self._lock:
+            return self.stats['hits'] + self.stats['joined']
+
+    def log_stats(self):
+        """Log how many REST calls were saved this session"""
+        with self._lock:
+            stats = dict(self.stats)
+        logger.info(f"Quote cache: {stats['hits'] + stats['joined']} REST calls saved "
+                    f"({stats['hits']} cache hits, {stats['joined']} shared in-flight), "
+                    f"{stats['fetches']} made")
+
+    def clear(self):
+        """Drop all cached quotes"""
+        with self._lock:
+            self._quotes.clear()
+
+
+# Global instance shared by every UpstoxFetcher in the process
+quote_cache = QuoteCache()
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Rate Limiter for MA Stock Trader
+Cross-process Upstox request coordinator: a shared token bucket with priority classes,
+plus per-minute and per-30-minute request caps
+"""
+
+import os
+import time
+import sqlite3
+import logging
+import threading
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Priority classes - live bot requests preempt bulk history downloads
+PRIORITY_LIVE = 0
+PRIORITY_BULK = 1
+
+# Upstox allows 50 requests/second per user on standard APIs; stay below it
+DEFAULT_RATE = 40.0
+DEFAULT_BURST = 40.0
+# Upstox also caps standard APIs at 500 requests/minute and 2000 per 30 minutes.
+# (window seconds, max requests) - again kept below the published limits
+REQUEST_WINDOWS = ((60.0, 450), (1800.0, 1800))
+# Share of the bucket only live requests may use
+LIVE_RESERVE_PCT = 0.25
+# Lowest rate the bucket will adapt down to after repeated 429s
+MIN_RATE = 2.0
+# A live waiter that has not polled for this long is treated as gone
+LIVE_WAITER_STALE_SECONDS = 2.0
+
+
+class RateLimitCoordinator:
+    """
+    Token bucket shared by every process through a small SQLite file
+
+    Each acquire() runs in an IMMEDIATE transaction, so the bots, the server
+    and ad-hoc scripts all draw from the same bucket. Bulk requests leave a
+    reserve for live requests and yield while any live request is waiting.
+    A 429 halves the rate and pauses the bucket; successes restore it gradually.
+
+    The bucket only shapes the per-second rate. Every request sent is also
+    logged so the per-minute and per-30-minute caps (windows) are counted
+    across processes; bulk requests stop short of each cap by the same live
+    reserve. When a cap is exhausted bulk requests wait for the window to
+    slide however long that takes. Live requests give up after their timeout
+    and are sent anyway, but are still logged so the windows stay accurate.
+    """
+
+    def __init__(self, db_file: str = 'data/rate_limit.db', rate: float = DEFAULT_RATE,
+                 burst: float = DEFAULT_BURST, windows=REQUEST_WINDOWS):
+        self.db_file = db_file
+        self.base_rate = rate
+        self.burst = burst
+        self.windows = tuple(windows)
+        self.longest_window = max((period for period, _ in self.windows), default=0.0)
+        self._conn = None
+        self._disabled = False
+        self._lock = threading.Lock()
+        self.stats = {'acquired': 0, 'waited': 0, 'wait_seconds': 0.0, 'throttled': 0}
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        """Open (lazily) the shared bucket database"""
+        if self._conn is not None or self._disabled:
+            return self._conn
+
+        try:
+            db_dir = os.path.dirname(self.db_file)
+            if db_dir:
+                os.makedirs(db_dir, exist_ok=True)
+
+            conn = sqlite3.connect(self.db_file, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # Bucket state is ephemeral - no need to fsync every request
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS bucket (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    tokens REAL NOT NULL,
+                    rate REAL NOT NULL,
+                    updated REAL NOT NULL,
+                    paused_until REAL NOT NULL DEFAULT 0
+                )
+            """)
+            conn.execute("CREATE TABLE IF NOT EXISTS requests (sent REAL NOT NULL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS requests_sent ON requests (sent)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS live_waiters (
+                    waiter TEXT PRIMARY KEY,
+                    seen REAL NOT NULL
+                )
+            """)
+            conn.execute("INSERT OR IGNORE INTO bucket (id, tokens, rate, updated) VALUES (1, ?, ?, ?)",
+                         (self.burst, self.base_rate, time.time()))
+            self._conn = conn
+        except Exception as e:
+            # Never block trading because the coordinator is unavailable
+            logger.warning(f"Rate limit coordinator unavailable ({e}) - requests will not be coordinated")
+            self._disabled = True
+
+        return self._conn
+
+    def _try_take(self, conn: sqlite3.Connection, priority: int, waiter: str) -> Tuple[float, bool]:
+        """
+        Try to take one token in a single transaction
+
+        Returns:
+            (wait, window_bound) - wait is 0 if a token was taken, otherwise seconds
+            to wait before retrying; window_bound is True if a request window is full
+        """
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            tokens, rate, updated, paused_until = conn.execute(
+                "SELECT tokens, rate, updated, paused_until FROM bucket WHERE id = 1").fetchone()
+
+            tokens = min(self.burst, tokens + max(0.0, now - updated) * rate)
+            window_wait = self._window_wait(conn, now, priority)
+
+            if now < paused_until:
+                wait = paused_until - now
+            elif window_wait > 0:
+                wait = window_wait
+            elif priority == PRIORITY_LIVE:
+                if tokens >= 1:
+                    tokens -= 1
+                    wait = 0.0
+                else:
+                    wait = (1 - tokens) / rate
+            else:
+                # Bulk yields to any live request currently waiting and never dips into the reserve
+                live_waiting = conn.execute("SELECT COUNT(*) FROM live_waiters WHERE seen > ?",
+                                            (now - LIVE_WAITER_STALE_SECONDS,)).fetchone()[0]
+                reserve = self.burst * LIVE_RESERVE_PCT
+                if not live_waiting and tokens >= reserve + 1:
+                    tokens -= 1
+                    wait = 0.0
+                else:
+                    wait = max(0.01, (reserve + 1 - tokens) / rate)
+
+            if priority == PRIORITY_LIVE:
+                if wait > 0:
+                    conn.execute("INSERT OR REPLACE INTO live_waiters (waiter, seen) VALUES (?, ?)", (waiter, now))
+                else:
+                    conn.execute("DELETE FROM live_waiters WHERE waiter = ?", (waiter,))
+
+            if wait == 0:
+                self._record_sent(conn, now)
+
+            conn.execute("UPDATE bucket SET tokens = ?, updated = ? WHERE id = 1", (tokens, now))
+            conn.execute("COMMIT")
+            return wait, now >= paused_until and window_wait > 0
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _record_sent(self, conn: sqlite3.Connection, now: float):
+        """Log a sent request against the request windows"""
+        if self.windows:
+            conn.execute("INSERT INTO requests (sent) VALUES (?)", (now,))
+            conn.execute("DELETE FROM requests WHERE sent <= ?", (now - self.longest_window,))
+
+    def _window_wait(self, conn: sqlite3.Connection, now: float, priority: int) -> float:
+        """Seconds until every request window has room (0 if all have room now)"""
+        wait = 0.0
+        for period, limit in self.windows:
+            if priority != PRIORITY_LIVE:
+                limit = int(limit * (1 - LIVE_RESERVE_PCT))
+            sent = conn.execute("SELECT COUNT(*) FROM requests WHERE sent > ?", (now - period,)).fetchone()[0]
+            if sent >= limit:
+                # Room frees up once enough of the window's oldest requests have slid out
+                oldest = conn.execute("SELECT sent FROM requests WHERE sent > ? ORDER BY sent LIMIT 1 OFFSET ?",
+                                      (now - period, sent - limit)).fetchone()[0]
+                wait = max(wait, oldest + period - now)
+        return wait
+
+    def acquire(self, priority: int = PRIORITY_LIVE, timeout: float = 30.0) -> bool:
+        """
+        Block until a request may be sent
+
+        Args:
+            priority: PRIORITY_LIVE or PRIORITY_BULK
+            timeout: Give up waiting after this many seconds (the request proceeds anyway).
+                     Bulk requests do not count time spent waiting for a full request
+                     window, since sending anyway would break the cap.
+
+        Returns:
+            True if a token was acquired, False on timeout or if coordination is unavailable
+        """
+        start = time.time()
+        deadline = start + timeout
+        waiter = f"{os.getpid()}:{threading.get_ident()}"
+
+        while True:
+            with self._lock:
+                conn = self._connection()
+                if conn is None:
+                    return False
+                try:
+                    wait, window_bound = self._try_take(conn, priority, waiter)
+                except sqlite3.Error as e:
+                    logger.warning(f"Rate limit coordinator error: {e}")
+                    return False
+
+                if wait == 0:
+                    waited = time.time() - start
+                    self.stats['acquired'] += 1
+                    if waited > 0.001:
+                        self.stats['waited'] += 1
+                        self.stats['wait_seconds'] += waited
+                    return True
+
+                # Poll at least every 50ms so live waiters stay registered
+                pause = min(wait, 0.05)
+                if window_bound and priority != PRIORITY_LIVE:
+                    # A full window always frees up within its period - bulk waits it out
+                    deadline += pause
+                elif time.time() + wait > deadline:
+                    logger.warning(f"Rate limit wait exceeded {timeout}s - sending request anyway")
+                    # The request is still sent, so other processes must count it
+                    try:
+                        self._record_sent(conn, time.time())
+                    except sqlite3.Error as e:
+                        logger.warning(f"Rate limit coordinator error: {e}")
+                    return False
+
+            time.sleep(pause)
+
+    def report_throttled(self, retry_after: Optional[float] = None):
+        """Record a 429 - halve the shared rate and pause the bucket"""
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return
+            pause = retry_after if retry_after else 1.0
+            now = time.time()
+            # Reporting a 429 must never raise into the request path
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+            except sqlite3.Error as e:
+                logger.warning(f"Rate limit coordinator error: {e}")
+                return
+            try:
+                conn.execute("""
+                    UPDATE bucket SET rate = MAX(?, rate / 2), tokens = 0, updated = ?,
+                                      paused_until = MAX(paused_until, ?) WHERE id = 1
+                """, (min(MIN_RATE, self.base_rate), now, now + pause))
+                conn.execute("COMMIT")
+                rate = conn.execute("SELECT rate FROM bucket WHERE id = 1").fetchone()[0]
+                self.stats['throttled'] += 1
+                logger.warning(f"Upstox rate limit hit - pausing {pause:.1f}s, shared rate now {rate:.1f} req/s")
+            except sqlite3.Error as e:
+                try:
+                    conn.execute("ROLLBACK")
+                except sqlite3.Error:
+                    pass
+                logger.warning(f"Rate limit coordinator error: {e}")
+
+    def report_success(self):
+        """Record a successful request - recover the rate additively towards the base rate"""
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return
+            try:
+                conn.execute("UPDATE bucket SET rate = MIN(?, rate + 0.5) WHERE id = 1 AND rate < ?",
+                             (self.base_rate, self.base_rate))
+            except sqlite3.Error:
+                pass
+
+    def log_stats(self):
+        """Log acquire/wait/throttle counters for this process"""
+        stats = dict(self.stats)
+        logger.info(f"Rate limiter: {stats['acquired']} requests, {stats['waited']} waited "
+                    f"({stats['wait_seconds']:.1f}s total), {stats['throttled']} throttled")
+
+
+# Global instance shared by every UpstoxFetcher in the process
+rate_limiter = RateLimitCoordinator()
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+NSE Trading Calendar for MA Stock Trader
+Local holiday list (learnable from archived bhavcopy presence) answering
+previous/next trading day, session counts and trading-day ranges without API calls
+"""
+
+import os
+import re
+import json
+import logging
+import threading
+from datetime import datetime, date, timedelta
+from pathlib import Path
+from typing import Iterable, List, Optional, Set
+import numpy as np
+import pytz
+
+logger = logging.getLogger(__name__)
+
+IST = pytz.timezone('Asia/Kolkata')
+
+# Published NSE equity trading holidays that fall on weekdays
+NSE_HOLIDAYS = {
+    # 2025
+    date(2025, 2, 26), date(2025, 3, 14), date(2025, 3, 31), date(2025, 4, 10),
+    date(2025, 4, 14), date(2025, 4, 18), date(2025, 5, 1), date(2025, 8, 15),
+    date(2025, 8, 27), date(2025, 10, 2), date(2025, 10, 21), date(2025, 10, 22),
+    date(2025, 11, 5), date(2025, 12, 25),
+    # 2026
+    date(2026, 1, 15), date(2026, 1, 26), date(2026, 3, 3), date(2026, 3, 26),
+    date(2026, 3, 31), date(2026, 4, 3), date(2026, 4, 14), date(2026, 5, 1),
+    date(2026, 5, 28), date(2026, 6, 26), date(2026, 9, 14), date(2026, 10, 2),
+    date(2026, 10, 20), date(2026, 11, 10), date(2026, 11, 24), date(2026, 12, 25),
+}
+
+# Years whose full published holiday list is in NSE_HOLIDAYS
+NSE_HOLIDAY_YEARS = {2025, 2026}
+
+# Weekend days with a full trading session (e.g. Union Budget on a Sunday)
+NSE_SPECIAL_SESSIONS = {
+    date(2026, 2, 1),
+}
+
+# Days covered by the O(1) lookup tables
+CALENDAR_START = date(2015, 1, 1)
+CALENDAR_END = date(2035, 12, 31)
+
+BHAVCOPY_DATE_PATTERN = re.compile(r'(\d{8})')
+
+
+class TradingCalendar:
+    """
+    NSE sessions as weekdays minus holidays plus special sessions
+
+    Built-in holidays are merged with a local JSON file of learned ones
+    (data/trading_calendar.json). Lookups go through a per-day table of
+    cumulative session counts, so previous/next day and session counts are
+    a couple of array reads.
+
+    Only years with a known holiday list (built in, listed under
+    'holiday_years' in the calendar file, or fully learned from a bhavcopy
+    archive) are accurate; other years fall back to every weekday being a
+    session, and the first lookup in such a year logs a warning.
+    """
+
+    def __init__(self, calendar_file: str = "data/trading_calendar.json"):
+        self.calendar_file = calendar_file
+        self._lock = threading.Lock()
+        self.holidays: Set[date] = set(NSE_HOLIDAYS)
+        self.special_sessions: Set[date] = set(NSE_SPECIAL_SESSIONS)
+        self.holiday_years: Set[int] = set(NSE_HOLIDAY_YEARS)
+        self._warned_years: Set[int] = set()
+        self._load()
+        self._build()
+
+    def _load(self):
+        """Merge learned holidays/sessions from the local calendar file"""
+        if not os.path.exists(self.calendar_file):
+            return
+        try:
+            with open(self.calendar_file, 'r') as f:
+                learned = json.load(f)
+            self.holidays.update(date.fromisoformat(d) for d in learned.get('holidays', []))
+            self.special_sessions.update(date.fromisoformat(d) for d in learned.get('special_sessions', []))
+            self.holiday_years.update(int(y) for y in learned.get('holiday_years', []))
+            # A learned session overrides a built-in holiday (and vice versa)
+            self.holidays -= {date.fromisoformat(d) for d in learned.get('sessions', [])}
+            self.special_sessions -= {date.fromisoformat(d) for d in learned.get('non_sessions', [])}
+        except Exception as e:
+            logger.error(f"Error reading trading calendar {self.calendar_file}: {e}")
+
+    def _build(self):
+        """Rebuild the per-day lookup tables"""
+        days = (CALENDAR_END - CALENDAR_START).days + 1
+        start_ordinal = CALENDAR_START.toordinal()
+
+        weekday = (np.arange(days) + CALENDAR_START.weekday()) % 7
+        is_session = weekday < 5
+        for d in self.holidays:
+            if CALENDAR_START <= d <= CALENDAR_END:
+                is_session[d.toordinal() - start_ordinal] = False
+        for d in self.special_sessions:
+            if CALENDAR_START <= d <= CALENDAR_END:
+                is_session[d.toordinal() - start_ordinal] = True
+
+        self._is_session = is_session
+        # Number of sessions on or before each day
+        self._count = np.cumsum(is_session)
+        # Day offset of the n-th session
+        self._session_offsets = np.flatnonzero(is_session)
+
+    def _check_year(self, d: date):
+        """Warn once per year when a lookup relies on a year without a holiday list"""
+        if d.year not in self.holiday_years and d.year not in self._warned_years:
+            self._warned_years.add(d.year)
+            logger.warning(f"No NSE holiday list for {d.year} - treating every weekday as a session. "
+                           f"Add the year's holidays (and the year under 'holiday_years') to {self.calendar_file} "
+                           f"or learn them from a bhavcopy archive.")
+
+    def _offset(self, d: date) -> int:
+        self._check_year(d)
+        if not CALENDAR_START <= d <= CALENDAR_END:
+            raise ValueError(f"{d} is outside the trading calendar ({CALENDAR_START} to {CALENDAR_END})")
+        return d.toordinal() - CALENDAR_START.toordinal()
+
+    def _session_date(self, n: int) -> date:
+        if not 0 <= n < len(self._session_offsets):
+            raise ValueError("No trading day within the calendar range")
+        return CALENDAR_START + timedelta(days=int(self._session_offsets[n]))
+
+    @staticmethod
+    def _today() -> date:
+        return datetime.now(IST).date()
+
+    def is_trading_day(self, d: date = None) -> bool:
+        """Check if a date is an NSE trading session (weekday rule outside the calendar range)"""
+        d = d or self._today()
+        if not CALENDAR_START <= d <= CALENDAR_END:
+            self._check_year(d)
+            return d.weekday() < 5
+        return bool(self._is_session[self._offset(d)])
+
+    def previous_trading_day(self, d: date = None) -> date:
+        """Last trading day strictly before d (default: today in IST)"""
+        offset = self._offset(d or self._today())
+        sessions_before = self._count[offset] - self._is_session[offset]
+        return self._session_date(int(sessions_before) - 1)
+
+    def next_trading_day(self, d: date = None) -> date:
+        """First trading day strictly after d (default: today in IST)"""
+        return self._session_date(int(self._count[self._offset(d or self._today())]))
+
+    def last_completed_session(self, d: date = None) -> date:
+        """d itself if it is a trading day, otherwise the one before it"""
+        d = d or self._today()
+        return d if self.is_trading_day(d) else self.previous_trading_day(d)
+
+    def sessions_between(self, start: date, end: date) -> int:
+        """Number of trading days in [start, end]"""
+        if end < start:
+            return 0
+        start_offset = self._offset(start)
+        return int(self._count[self._offset(end)] - self._count[start_offset] + self._is_session[start_offset])
+
+    def trading_days(self, start: date, end: date) -> List[date]:
+        """Trading days in [start, end], oldest first"""
+        if end < start:
+            return []
+        start_offset = self._offset(start)
+        first = int(self._count[start_offset] - self._is_session[start_offset])
+        last = int(self._count[self._offset(end)])
+        return [CALENDAR_START + timedelta(days=int(o)) for o in self._session_offsets[first:last]]
+
+    def shift(self, d: date, sessions: int) -> date:
+        """The n-th trading day after d (n > 0) or before d (n < 0); d itself for n == 0"""
+        offset = self._offset(d)
+        if sessions > 0:
+            return self._session_date(int(self._count[offset]) + sessions - 1)
+        if sessions < 0:
+            return self._session_date(int(self._count[offset] - self._is_session[offset]) + sessions)
+        return d
+
+    # --- Learning from bhavcopy presence ---
+
+    def learn_from_sessions(self, session_dates: Iterable[date], start: date = None, end: date = None) -> int:
+        """
+        Learn holidays and special sessions from dates known to have had a session
+
+        Every date in [start, end] (default: span of session_dates) is classified:
+        a weekday without a session is a holiday, a weekend day with one is a
+        special session. Only use complete sources (e.g. a bhavcopy archive).
+        Years spanned in full are marked as having a known holiday list.
+
+        Returns:
+            Number of calendar days whose classification changed
+        """
+        sessions = {d for d in session_dates if CALENDAR_START <= d <= CALENDAR_END}
+        if not sessions:
+            return 0
+        start = start or min(sessions)
+        end = end or max(sessions)
+
+        covered = {year for year in range(start.year, end.year + 1)
+                   if start <= date(year, 1, 1) and date(year, 12, 31) <= end} - self.holiday_years
+
+        changed = 0
+        with self._lock:
+            self.holiday_years |= covered
+            day = start
+            while day <= end:
+                traded = day in sessions
+                if traded != bool(self._is_session[self._offset(day)]):
+                    changed += 1
+                self._classify(day, traded)
+                day += timedelta(days=1)
+            if changed:
+                self._build()
+            if changed or covered:
+                self._save()
+
+        if changed:
+            logger.info(f"Trading calendar learned {changed} day(s) from {len(sessions)} sessions ({start} to {end})")
+        return changed
+
+    def record_bhavcopy(self, d: date, available: bool):
+        """
+        Record whether a bhavcopy was published for a date
+
+        A missing bhavcopy only marks a holiday once the date is more than a day
+        old, since the archive is published in the evening.
+        """
+        if not available and d >= self._today() - timedelta(days=1):
+            return
+        if available == self.is_trading_day(d):
+            return
+        with self._lock:
+            self._classify(d, available)
+            self._build()
+            self._save()
+        logger.info(f"Trading calendar: {d} learned as {'a session' if available else 'a holiday'}")
+
+    def learn_from_bhavcopy_archive(self, directory: str) -> int:
+        """Learn from archived bhavcopy files named with YYYYMMDD (e.g. BhavCopy_NSE_CM_0_0_0_20260106_F_0000.csv)"""
+        sessions = set()
+        for path in Path(directory).glob('*'):
+            match = BHAVCOPY_DATE_PATTERN.search(path.name)
+            if match:
+                try:
+                    sessions.add(datetime.strptime(match.group(1), '%Y%m%d').date())
+                except ValueError:
+                    continue
+        return self.learn_from_sessions(sessions)
+
+    def _classify(self, d: date, traded: bool):
+        weekend = d.weekday() >= 5
+        if traded:
+            self.holidays.discard(d)
+            if weekend:
+                self.special_sessions.add(d)
+        else:
+            self.special_sessions.discard(d)
+            if not weekend:
+                self.holidays.add(d)
+
+    def _save(self):
+        """Persist differences from the built-in lists to the local calendar file"""
+        learned = {
+            'holidays': sorted(str(d) for d in self.holidays - NSE_HOLIDAYS),
+            'special_sessions': sorted(str(d) for d in self.special_sessions - NSE_SPECIAL_SESSIONS),
+            'sessions': sorted(str(d) for d in NSE_HOLIDAYS - self.holidays),
+            'non_sessions': sorted(str(d) for d in NSE_SPECIAL_SESSIONS - self.special_sessions),
+            'holiday_years': sorted(self.holiday_years - NSE_HOLIDAY_YEARS),
+            'updated': datetime.now(IST).isoformat(),
+        }
+        try:
+            calendar_dir = os.path.dirname(self.calendar_file)
+            if calendar_dir:
+                os.makedirs(calendar_dir, exist_ok=True)
+            tmp_file = f"{self.calendar_file}.tmp"
+            with open(tmp_file, 'w') as f:
+                json.dump(learned, f, indent=2)
+            os.replace(tmp_file, self.calendar_file)
+        except Exception as e:
+            logger.error(f"Error saving trading calendar: {e}")
+
+
+# Global instance
+trading_calendar = TradingCalendar()
+
+
+if __name__ == "__main__":
+    import sys
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if len(sys.argv) > 1:
+        print(f"Learned {trading_calendar.learn_from_bhavcopy_archive(sys.argv[1])} day(s) from {sys.argv[1]}")
+    today = datetime.now(IST).date()
+    print(f"Today {today}: {'trading day' if trading_calendar.is_trading_day(today) else 'no session'}")
+    print(f"Previous trading day: {trading_calendar.previous_trading_day(today)}")
+    print(f"Next trading day: {trading_calendar.next_trading_day(today)}")
@@ -8,13 +8,32 @@ import json
 import os
 import logging
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, date
 from typing import Optional, Dict, List, Tuple
 import pandas as pd
+import pytz
 import requests
-import gzip
+
+from .instrument_index import instrument_index
+from .history_cache import history_cache
+from .quote_cache import quote_cache
+from .rate_limiter import rate_limiter, PRIORITY_LIVE, PRIORITY_BULK
 
 logger = logging.getLogger(__name__)
+IST = pytz.timezone('Asia/Kolkata')
+
+# Upstox market-quote endpoints accept at most 500 instrument keys per request
+QUOTE_BATCH_LIMIT = 500
+# Number of quote chunks fetched in parallel
+QUOTE_BATCH_WORKERS = 4
+# Fields every LTP quote lookup needs fresh before it can be served from the quote cache
+LTP_QUOTE_FIELDS = ('ltp', 'cp', 'volume')
+# Fields a batch quote needs fresh before the symbol is left out of the request
+BATCH_QUOTE_FIELDS = ('ltp', 'cp', 'open', 'high', 'low', 'close', 'volume')
+# Cheap quote used to open pooled connections before the session
+PREWARM_INSTRUMENT_KEY = 'NSE_INDEX|Nifty 50'
 
 class UpstoxFetcher:
     """Handles data fetching from Upstox API"""
@@ -22,10 +41,12 @@ class UpstoxFetcher:
     def __init__(self, config_file: str = 'upstox_config.json'):
         self.config_file = config_file
         self.api = None
-        self.instrument_mapping = {}
+        self._instrument_mapping = None
         self._is_initialized = False
+        self._session = None
+        self._session_lock = threading.Lock()
         self._load_config()
-        self._load_instrument_mapping()
+        # Instrument mapping is loaded lazily from the shared prebuilt index
         # Don't initialize client immediately - do it lazily when needed
 
     def _load_config(self):
@@ -73,31 +94,31 @@ class UpstoxFetcher:
                 self.access_token = None
 
     def _load_instrument_mapping(self):
-        """Load instrument key mapping from Upstox master file"""
-        master_file = 'complete.csv.gz'
-
-        if not os.path.exists(master_file):
-            logger.warning(f"Master file {master_file} not found. Using fallback key format.")
-            return
-
+        """Load instrument key mapping from the prebuilt instrument index"""
         try:
-            logger.info("Loading instrument mapping from master file...")
-
-            # Read compressed CSV directly
-            with gzip.open(master_file, 'rt', encoding='utf-8') as f:
-                df = pd.read_csv(f)
-
-            # Filter only NSE equities
-            nse_eq = df[df['exchange'] == 'NSE_EQ']
+            # The index is built once from the master file and shared by every fetcher
+            # instance, instead of re-parsing complete.csv.gz on each construction
+            self._instrument_mapping = instrument_index.get_mapping()
+            if not self._instrument_mapping:
+                logger.warning("Instrument index not available. Using fallback key format.")
+        except Exception as e:
+            logger.error(f"Error loading instrument mapping: {e}")
+            self._instrument_mapping = {}
 
-            # Create mapping: tradingsymbol → instrument_key
-            self.instrument_mapping = dict(zip(nse_eq['tradingsymbol'], nse_eq['instrument_key']))
+    @property
+    def instrument_mapping(self) -> Dict[str, str]:
+        """Symbol -> instrument_key mapping, loaded on first use"""
+        if getattr(self, '_instrument_mapping', None) is None:
+            self._load_instrument_mapping()
+        return self._instrument_mapping
 
-            logger.info(f"Loaded {len(self.instrument_mapping)} NSE equity instrument mappings")
+    @instrument_mapping.setter
+    def instrument_mapping(self, mapping: Dict[str, str]):
+        self._instrument_mapping = mapping
 
-        except Exception as e:
-            logger.error(f"Error loading instrument mapping: {e}")
-            self.instrument_mapping = {}
+    def get_instrument_info(self, symbol: str) -> Optional[Dict]:
+        """Get instrument_key, ISIN, lot size and tick size for a symbol from the index"""
+        return instrument_index.get(symbol)
 
     def _ensure_initialized(self):
         """Ensure Upstox client is initialized before use"""
@@ -138,6 +159,77 @@ class UpstoxFetcher:
         except Exception as e:
             raise ConnectionError(f"Failed to connect to Upstox API: {e}")
 
+    def _get_session(self) -> requests.Session:
+        """Get the pooled HTTP session used for market-quote requests"""
+        with self._session_lock:
+            if self._session is None:
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(pool_connections=QUOTE_BATCH_WORKERS,
+                                                        pool_maxsize=QUOTE_BATCH_WORKERS * 2)
+                session.mount('https://', adapter)
+                self._session = session
+            return self._session
+
+    def prewarm_connections(self, instrument_key: str = PREWARM_INSTRUMENT_KEY) -> float:
+        """
+        Open the pooled HTTPS connections ahead of time
+
+        Sends QUOTE_BATCH_WORKERS concurrent LTP requests over the pooled
+        session so DNS, TCP and TLS setup for each pooled connection is done
+        before the first time-critical call.
+
+        Returns:
+            Seconds taken
+        """
+        if not self.access_token:
+            return 0.0
+
+        url = f"https://api.upstox.com/v3/market-quote/ltp?instrument_key={instrument_key}"
+        headers = {
+            "Accept": "application/json",
+            "Authorization": f"Bearer {self.access_token}"
+        }
+        session = self._get_session()
+
+        start = time.time()
+        with ThreadPoolExecutor(max_workers=QUOTE_BATCH_WORKERS) as executor:
+            responses = list(executor.map(
+                lambda _: self.http_get(url, headers, timeout=10, session=session), range(QUOTE_BATCH_WORKERS)))
+        elapsed = time.time() - start
+
+        ok = sum(1 for r in responses if r.status_code == 200)
+        logger.info(f"Pre-warmed {ok}/{QUOTE_BATCH_WORKERS} pooled HTTPS connections in {elapsed:.2f}s")
+        return elapsed
+
+    def http_get(self, url: str, headers: Dict, priority: int = PRIORITY_LIVE, timeout: Optional[float] = None,
+                 session: Optional[requests.Session] = None) -> requests.Response:
+        """
+        GET an Upstox URL through the cross-process rate-limit coordinator.
+        On a 429 the shared rate is reduced and the request is retried once.
+
+        Args:
+            url: Request URL
+            headers: Request headers
+            priority: PRIORITY_LIVE for bot requests, PRIORITY_BULK for history downloads
+            timeout: Request timeout in seconds
+            session: Optional pooled session to send the request on
+        """
+        http = session or requests
+        for attempt in range(2):
+            rate_limiter.acquire(priority)
+            response = http.get(url, headers=headers, timeout=timeout)
+            if response.status_code != 429:
+                rate_limiter.report_success()
+                return response
+
+            try:
+                retry_after = float(response.headers.get('Retry-After'))
+            except (TypeError, ValueError):
+                retry_after = None
+            rate_limiter.report_throttled(retry_after)
+
+        return response
+
     def get_instrument_key(self, symbol: str) -> Optional[str]:
         """Convert NSE symbol to Upstox instrument key using master file mapping"""
 
@@ -176,44 +268,51 @@ class UpstoxFetcher:
         end_str = end_date.strftime('%Y-%m-%d')
 
         try:
-            # Ensure client is initialized
-            self._ensure_initialized()
-
-            # Get historical candle data (without from_date since it's not supported)
-            response = self.history_api.get_historical_candle_data(
-                instrument_key=instrument_key,
-                interval='day',
-                to_date=end_str,
-                api_version='2.0'
-            )
-
-            # Access response data correctly
-            if hasattr(response, 'data') and hasattr(response.data, 'candles'):
-                candles = response.data.candles
-
-                if not candles:
+            # Completed sessions never change - serve them from the on-disk cache
+            candles = history_cache.get(instrument_key, 'day', start_date, end_date)
+
+            if candles is None:
+                # Ensure client is initialized
+                self._ensure_initialized()
+                rate_limiter.acquire(PRIORITY_BULK)
+
+                # Get historical candle data (without from_date since it's not supported)
+                response = self.history_api.get_historical_candle_data(
+                    instrument_key=instrument_key,
+                    interval='day',
+                    to_date=end_str,
+                    api_version='2.0'
+                )
+
+                # Access response data correctly
+                if not (hasattr(response, 'data') and hasattr(response.data, 'candles')):
                     return pd.DataFrame()
 
-                # Create DataFrame
-                df = pd.DataFrame(candles, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume', 'oi'])
+                # Keep only the requested range - to_date-only requests return the full history
+                candles = [c for c in (response.data.candles or []) if start_str <= str(c[0])[:10] <= end_str]
+                history_cache.put(instrument_key, 'day', start_date, end_date, candles)
 
-                # Convert timestamp to date
-                df['date'] = pd.to_datetime(df['timestamp']).dt.date
-                df = df.drop('timestamp', axis=1)
+            if not candles:
+                return pd.DataFrame()
 
-                # Reorder columns
+            # Create DataFrame
+            df = pd.DataFrame(candles, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume', 'oi'])
 
-                # Set date as index
-                df.set_index('date', inplace=True)
+            # Convert timestamp to date
+            df['date'] = pd.to_datetime(df['timestamp']).dt.date
+            df = df.drop('timestamp', axis=1)
 
-                # Filter to requested chunk range
-                df = df[(df.index >= start_date) & (df.index <= end_date)]
+            # Set date as index
+            df.set_index('date', inplace=True)
 
-                return df
-            else:
-                return pd.DataFrame()
+            # Filter to requested chunk range
+            df = df[(df.index >= start_date) & (df.index <= end_date)]
+
+            return df
 
         except Exception as e:
+            if getattr(e, 'status', None) == 429:
+                rate_limiter.report_throttled()
             logger.error(f"Error fetching chunk {start_str} to {end_str}: {e}")
             return pd.DataFrame()
 
@@ -235,14 +334,15 @@ class UpstoxFetcher:
             logger.info(f"Fetching {len(chunks)} chunks for {symbol} ({start_date} to {end_date})")
 
             for chunk_start, chunk_end in chunks:
+                cached = history_cache.contains(instrument_key, 'day', chunk_start, chunk_end)
                 chunk_df = self._fetch_single_chunk(instrument_key, chunk_start, chunk_end)
 
                 if not chunk_df.empty:
                     all_dfs.append(chunk_df)
                     logger.info(f"Fetched chunk: {chunk_start} to {chunk_end} ({len(chunk_df)} days)")
 
-                # Polite delay between requests
-                if len(chunks) > 1:
+                # Polite delay between requests (not needed for cache hits)
+                if len(chunks) > 1 and not cached:
                     time.sleep(0.7)
 
             if not all_dfs:
@@ -299,6 +399,18 @@ class UpstoxFetcher:
         Get opening price using your exact function logic
         Called at PREP_START timing for both reversal and continuation bots
         """
+        # Reuse an LTP fetched moments ago by any other caller
+        cached = quote_cache.get(symbol, ('ltp',))
+        if cached is not None:
+            return float(cached['ltp'])
+
+        price = quote_cache.single_flight(f"quote:{symbol.upper()}", lambda: self._fetch_opening_price(symbol))
+        if price:
+            quote_cache.put(symbol, {'ltp': price})
+        return price
+
+    def _fetch_opening_price(self, symbol: str) -> Optional[float]:
+        """Fetch last price from the V2 full quote endpoint"""
         try:
             instrument_key = self.get_instrument_key(symbol)
             if not instrument_key:
@@ -312,7 +424,7 @@ class UpstoxFetcher:
                 "Authorization": f"Bearer {self.access_token}"
             }
             
-            response = requests.get(url, headers=headers).json()
+            response = self.http_get(url, headers).json()
             
             if response.get('status') == 'success':
                 # Find the actual key format in the response
@@ -339,16 +451,21 @@ class UpstoxFetcher:
         """
         try:
             # Method 1: Try historical API (most accurate)
-            today = date.today()
-            start_date = today - timedelta(days=7)
-            end_date = today - timedelta(days=1)
+            cached = quote_cache.get(symbol, ('prev_close',))
+            if cached is not None:
+                hist_close = cached['prev_close']
+            else:
+                today = date.today()
+                start_date = today - timedelta(days=7)
+                end_date = today - timedelta(days=1)
 
-            df = self.fetch_historical_data(symbol, start_date, end_date)
+                df = self.fetch_historical_data(symbol, start_date, end_date)
 
-            if not df.empty:
                 # Return the most recent close (last trading day)
-                hist_close = float(df.iloc[-1]['close'])
-                
+                hist_close = float(df.iloc[-1]['close']) if not df.empty else None
+                quote_cache.put(symbol, {'prev_close': hist_close})
+
+            if hist_close is not None:
                 # Get current LTP data but use historical close for 'cp'
                 ltp_data = self._get_ltp_data_fallback(symbol)
                 if ltp_data:
@@ -390,7 +507,7 @@ class UpstoxFetcher:
                 "Authorization": f"Bearer {self.access_token}"
             }
 
-            response = requests.get(url, headers=headers)
+            response = self.http_get(url, headers)
             response_data = response.json()
 
             if response.status_code == 200 and response_data.get('status') == 'success':
@@ -430,6 +547,126 @@ class UpstoxFetcher:
 
         return ohlc_dict
 
+    def _fetch_quote_chunk(self, instrument_keys: List[str], endpoint: str = 'ohlc', query: str = '&interval=1d') -> Dict:
+        """
+        Fetch one chunk of V3 market quotes (at most QUOTE_BATCH_LIMIT keys)
+
+        Args:
+            instrument_keys: Instrument keys for this chunk
+            endpoint: V3 market-quote endpoint ('ohlc' or 'ltp')
+            query: Extra query string appended to the request
+        """
+        try:
+            url = f"https://api.upstox.com/v3/market-quote/{endpoint}?instrument_key={','.join(instrument_keys)}{query}"
+            headers = {
+                "Accept": "application/json",
+                "Authorization": f"Bearer {self.access_token}"
+            }
+
+            response = self.http_get(url, headers, timeout=10, session=self._get_session())
+
+            if response.status_code == 200:
+                response_data = response.json()
+                if response_data.get('status') == 'success':
+                    return response_data.get('data', {})
+
+            logger.error(f"Batch quote HTTP error: {response.status_code} - {response.text}")
+            return {}
+
+        except Exception as e:
+            logger.error(f"Error fetching quote chunk of {len(instrument_keys)} instruments: {e}")
+            return {}
+
+    def _fetch_quote_chunks(self, instrument_keys: List[str], endpoint: str, query: str = '') -> Tuple[List[Dict], int]:
+        """
+        Split instrument keys into QUOTE_BATCH_LIMIT chunks and fetch them concurrently
+
+        Returns:
+            (list of per-chunk response data dicts, number of chunks requested)
+        """
+        chunks = [instrument_keys[i:i + QUOTE_BATCH_LIMIT]
+                  for i in range(0, len(instrument_keys), QUOTE_BATCH_LIMIT)]
+
+        if len(chunks) == 1:
+            return [self._fetch_quote_chunk(chunks[0], endpoint, query)], 1
+
+        with ThreadPoolExecutor(max_workers=min(QUOTE_BATCH_WORKERS, len(chunks))) as executor:
+            results = list(executor.map(lambda chunk: self._fetch_quote_chunk(chunk, endpoint, query), chunks))
+        return results, len(chunks)
+
+    def _map_quote_symbol(self, response_key: str, instrument_data: Dict, symbol_map: Dict[str, str],
+                          wanted: Dict[str, str]) -> Optional[str]:
+        """Map a quote response entry (keyed NSE_EQ:SYMBOL) back to the caller's symbol"""
+        # instrument_token carries the NSE_EQ|ISIN key we requested
+        symbol = symbol_map.get(instrument_data.get('instrument_token'))
+        if not symbol and ':' in response_key:
+            symbol = wanted.get(response_key.split(':')[1].upper())
+        return symbol
+
+    def get_batch_quotes(self, symbols: List[str]) -> Dict[str, Dict]:
+        """
+        Get previous close, LTP and OHLC for many symbols in one pass.
+        Instrument keys are split into chunks of QUOTE_BATCH_LIMIT and the
+        chunks are requested concurrently, so a 200-stock list is one round trip.
+
+        Args:
+            symbols: List of stock symbols
+
+        Returns:
+            Dict mapping symbol to quote dict with the same fields as get_ltp_data()
+            ('ltp', 'cp', 'open', 'high', 'low', 'volume') plus 'close' and 'instrument_key'.
+            Symbols the API did not return are left out.
+        """
+        quotes = {}
+
+        # Map instrument keys back to the caller's symbols, skipping symbols quoted moments ago
+        symbol_map = {}
+        for symbol in symbols:
+            cached = quote_cache.get(symbol, BATCH_QUOTE_FIELDS, count_hit=False)
+            if cached is not None:
+                quotes[symbol] = {'symbol': symbol, **cached}
+                continue
+            key = self.get_instrument_key(symbol)
+            if key:
+                symbol_map[key] = symbol
+
+        if not symbol_map:
+            if quotes:
+                quote_cache.record_hit()
+                logger.info(f"Batch quotes: {len(quotes)}/{len(symbols)} symbols served from quote cache")
+            else:
+                logger.warning("No valid instrument keys found for batch quotes")
+            return quotes
+
+        start = time.time()
+        results, chunk_count = self._fetch_quote_chunks(list(symbol_map.keys()), 'ohlc', '&interval=1d')
+
+        wanted = {symbol.upper(): symbol for symbol in symbol_map.values()}
+        for data in results:
+            for response_key, instrument_data in data.items():
+                symbol = self._map_quote_symbol(response_key, instrument_data, symbol_map, wanted)
+                if not symbol:
+                    continue
+
+                prev_ohlc = instrument_data.get('prev_ohlc') or {}
+                live_ohlc = instrument_data.get('live_ohlc') or {}
+                quotes[symbol] = {
+                    'symbol': symbol,
+                    'instrument_key': instrument_data.get('instrument_token') or self.get_instrument_key(symbol),
+                    'ltp': instrument_data.get('last_price'),
+                    'cp': prev_ohlc.get('close'),  # Previous session close
+                    'open': live_ohlc.get('open'),
+                    'high': live_ohlc.get('high'),
+                    'low': live_ohlc.get('low'),
+                    'close': live_ohlc.get('close'),
+                    'volume': live_ohlc.get('volume'),
+                }
+                quote_cache.put(symbol, quotes[symbol])
+
+        logger.info(f"Batch quotes: {len(quotes)}/{len(symbols)} symbols in {chunk_count} request(s), "
+                    f"{(time.time() - start) * 1000:.0f}ms")
+        return quotes
+
     def get_ohlc_data(self, symbol: str) -> Dict:
         """
         Get OHLC data for current day's opening price using LTP API (which includes opening prices)
@@ -456,8 +693,29 @@ class UpstoxFetcher:
 
     def _get_ltp_data_original(self, symbol: str) -> Dict:
         """
-        Original LTP data fetch using direct HTTP request (for SDK compatibility)
+        Original LTP data fetch using direct HTTP request (for SDK compatibility).
+        Served from the quote cache when fresh; concurrent callers for the same
+        symbol share one in-flight request.
         """
+        cached = quote_cache.get(symbol, LTP_QUOTE_FIELDS)
+        if cached is not None:
+            return {
+                'symbol': symbol,
+                'ltp': cached.get('ltp'),
+                'cp': cached.get('cp'),
+                'open': cached.get('open'),
+                'high': cached.get('high'),
+                'low': cached.get('low'),
+                'volume': cached.get('volume'),
+                'ltq': cached.get('ltq'),
+            }
+
+        ltp_data = quote_cache.single_flight(f"ltp:{symbol.upper()}", lambda: self._fetch_ltp_data(symbol))
+        quote_cache.put(symbol, ltp_data)
+        return dict(ltp_data)
+
+    def _fetch_ltp_data(self, symbol: str) -> Dict:
+        """Fetch LTP, previous close and volume from the V3 LTP endpoint"""
         try:
             import requests
 
@@ -471,7 +729,7 @@ class UpstoxFetcher:
                 "Authorization": f"Bearer {self.access_token}"
             }
 
-            response = requests.get(url, headers=headers)
+            response = self.http_get(url, headers)
 
             if response.status_code == 200:
                 data = response.json()
@@ -540,10 +798,72 @@ class UpstoxFetcher:
             logger.error(f"Error in cache fallback for {symbol}: {e}")
             return {}
 
-    def get_current_volume(self, symbol: str) -> float:
+    def get_volume_snapshot(self, symbols: List[str]) -> Tuple[Dict[str, float], datetime]:
+        """
+        Get cumulative session volume for many symbols from one consistent snapshot.
+        All chunks are requested concurrently from the V3 LTP endpoint, so every
+        symbol's volume refers to (almost) the same instant.
+
+        Args:
+            symbols: List of stock symbols
+
+        Returns:
+            (dict mapping symbol to cumulative volume, snapshot timestamp in IST).
+            Keys missing from the first pass (failed or throttled chunk) are
+            requested once more; symbols still not returned are left out.
+        """
+        volumes = {}
+
+        symbol_map = {}
+        for symbol in symbols:
+            key = self.get_instrument_key(symbol)
+            if key:
+                symbol_map[key] = symbol
+
+        snapshot_time = datetime.now(IST)
+        if not symbol_map:
+            logger.warning("No valid instrument keys found for volume snapshot")
+            return volumes, snapshot_time
+
+        start = time.time()
+        results, chunk_count = self._fetch_quote_chunks(list(symbol_map.keys()), 'ltp')
+
+        wanted = {symbol.upper(): symbol for symbol in symbol_map.values()}
+
+        def collect(results):
+            for data in results:
+                for response_key, instrument_data in data.items():
+                    symbol = self._map_quote_symbol(response_key, instrument_data, symbol_map, wanted)
+                    if symbol:
+                        volumes[symbol] = float(instrument_data.get('volume') or 0)
+
+        collect(results)
+        missing = [key for key, symbol in symbol_map.items() if symbol not in volumes]
+        if missing:
+            logger.warning(f"Volume snapshot: {len(missing)} symbol(s) missing - retrying their chunk(s)")
+            retry_results, retry_chunks = self._fetch_quote_chunks(missing, 'ltp')
+            collect(retry_results)
+            chunk_count += retry_chunks
+
+        logger.info(f"Volume snapshot at {snapshot_time.strftime('%H:%M:%S.%f')[:-3]}: "
+                    f"{len(volumes)}/{len(symbols)} symbols in {chunk_count} request(s), "
+                    f"{(time.time() - start) * 1000:.0f}ms")
+        return volumes, snapshot_time
+
+    def get_current_volume(self, symbol: str, raise_on_error: bool = False) -> float:
         """
         Get only current volume data without historical overhead.
         This method avoids fetching historical data and previous close calculations.
+
+        Args:
+            symbol: Stock symbol
+            raise_on_error: Raise when the request fails (HTTP error, exception)
+                            instead of returning 0.0, so callers can tell a failed
+                            fetch from a symbol that has no volume
+
+        Returns:
+            Cumulative session volume (0.0 if the symbol has none, or on failure
+            unless raise_on_error)
         """
         try:
             instrument_key = self.get_instrument_key(symbol)
@@ -558,7 +878,7 @@ class UpstoxFetcher:
                 "Authorization": f"Bearer {self.access_token}"
             }
 
-            response = requests.get(url, headers=headers)
+            response = self.http_get(url, headers)
 
             if response.status_code == 200:
                 data = response.json()
@@ -581,10 +901,14 @@ class UpstoxFetcher:
                     return float(volume)
 
             logger.error(f"Volume fetch error for {symbol}: {response.status_code} - {response.text}")
+            if raise_on_error:
+                raise RuntimeError(f"Volume fetch failed for {symbol}: HTTP {response.status_code}")
             return 0.0
 
         except Exception as e:
             logger.error(f"Error getting current volume for {symbol}: {e}")
+            if raise_on_error:
+                raise
             return 0.0
 
 # Import IEP module
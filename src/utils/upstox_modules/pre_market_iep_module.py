@@ -7,8 +7,9 @@ Handles Indicative Equilibrium Price (IEP) fetching for pre-market opening price
 
 import logging
 import time
-from datetime import time
-from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +25,7 @@ class PreMarketIEPManager:
             upstox_fetcher: Instance of UpstoxFetcher for API calls
         """
         self.upstox_fetcher = upstox_fetcher
+        self.last_poll_stats = {}
     
     def fetch_iep_batch(self, symbols: List[str]) -> Dict[str, float]:
         """
@@ -41,7 +43,91 @@ class PreMarketIEPManager:
         
         logger.info(f"Fetching IEP for {len(symbols)} symbols: {symbols}")
         
-        # Get instrument keys for all symbols
+        keys, symbol_map = self._resolve_keys(symbols)
+        if not keys:
+            logger.error("No valid instrument keys found for IEP fetch")
+            return {}
+        
+        # Make batch API call for IEP
+        iep_prices = self._fetch_iep_chunks(keys, symbol_map)
+        
+        logger.info(f"Successfully fetched IEP for {len(iep_prices)} symbols")
+        return iep_prices
+    
+    def poll_final_iep(self, symbols: List[str], until: datetime, interval: float = 1.0,
+                       clock=None) -> Dict[str, float]:
+        """
+        Re-poll IEP for all symbols until a cut-off just before market open
+        
+        Each poll refreshes the whole list (chunked and concurrent). The last
+        reading per symbol is returned, so gap validation runs on the price
+        closest to the open rather than the first snapshot. Per-poll latency
+        and IEP drift are logged and kept in self.last_poll_stats.
+        
+        Args:
+            symbols: List of stock symbols
+            until: Timezone-aware datetime to stop polling at (at least one poll is made)
+            interval: Seconds between poll starts
+            clock: Object with now() and sleep() scheduling the polls (default: real time);
+                   latency is always measured in real time
+            
+        Returns:
+            Dictionary mapping symbol to the last IEP seen
+        """
+        if not symbols:
+            logger.warning("No symbols provided for IEP polling")
+            return {}
+        
+        keys, symbol_map = self._resolve_keys(symbols)
+        if not keys:
+            logger.error("No valid instrument keys found for IEP polling")
+            return {}
+        
+        first_iep: Dict[str, float] = {}
+        last_iep: Dict[str, float] = {}
+        latencies_ms: List[float] = []
+        changes = 0
+        
+        while True:
+            poll_start = clock.now().timestamp() if clock else time.time()
+            request_start = time.time()
+            iep_prices = self._fetch_iep_chunks(keys, symbol_map, fallback_individual=False, log_prices=False)
+            latency_ms = (time.time() - request_start) * 1000
+            latencies_ms.append(latency_ms)
+            
+            changed = [s for s, p in iep_prices.items() if s in last_iep and p != last_iep[s]]
+            changes += len(changed)
+            for symbol, price in iep_prices.items():
+                first_iep.setdefault(symbol, price)
+            last_iep.update(iep_prices)
+            logger.info(f"IEP poll {len(latencies_ms)}: {len(iep_prices)}/{len(keys)} prices in {latency_ms:.0f}ms, "
+                        f"{len(changed)} changed")
+            
+            next_poll = poll_start + interval
+            if next_poll >= until.timestamp():
+                break
+            if clock:
+                clock.sleep(max(0.0, next_poll - clock.now().timestamp()))
+            else:
+                time.sleep(max(0.0, next_poll - time.time()))
+        
+        drift = {s: (first_iep[s], last_iep[s]) for s in last_iep if last_iep[s] != first_iep[s]}
+        for symbol, (first, last) in sorted(drift.items()):
+            logger.info(f"IEP drift {symbol}: Rs{first:.2f} -> Rs{last:.2f} ({(last - first) / first * 100:+.2f}%)")
+        
+        self.last_poll_stats = {
+            'polls': len(latencies_ms),
+            'avg_latency_ms': sum(latencies_ms) / len(latencies_ms),
+            'max_latency_ms': max(latencies_ms),
+            'changes': changes,
+            'drift': drift,
+        }
+        logger.info(f"IEP polling done: {len(latencies_ms)} polls, avg {self.last_poll_stats['avg_latency_ms']:.0f}ms, "
+                    f"{len(drift)} symbols drifted, final IEP for {len(last_iep)}/{len(keys)} symbols")
+        return last_iep
+    
+    def _resolve_keys(self, symbols: List[str]) -> Tuple[List[str], Dict[str, str]]:
+        """Get instrument keys for all symbols and the key -> symbol map"""
         keys = []
         symbol_map = {}
         for symbol in symbols:
@@ -49,24 +135,35 @@ class PreMarketIEPManager:
             if key:
                 keys.append(key)
                 symbol_map[key] = symbol
+        return keys, symbol_map
+    
+    def _fetch_iep_chunks(self, instrument_keys: List[str], symbol_map: Dict[str, str],
+                          fallback_individual: bool = True, log_prices: bool = True) -> Dict[str, float]:
+        """Split keys into API-sized chunks and fetch them concurrently"""
+        from ..upstox_fetcher import QUOTE_BATCH_LIMIT, QUOTE_BATCH_WORKERS
         
-        if not keys:
-            logger.error("No valid instrument keys found for IEP fetch")
-            return {}
-        
-        # Make batch API call for IEP
-        iep_prices = self._fetch_iep_from_api(keys, symbol_map)
+        chunks = [instrument_keys[i:i + QUOTE_BATCH_LIMIT]
+                  for i in range(0, len(instrument_keys), QUOTE_BATCH_LIMIT)]
+        if len(chunks) == 1:
+            return self._fetch_iep_from_api(chunks[0], symbol_map, fallback_individual, log_prices)
         
-        logger.info(f"Successfully fetched IEP for {len(iep_prices)} symbols")
-        return iep_prices
+        iep_dict = {}
+        with ThreadPoolExecutor(max_workers=min(QUOTE_BATCH_WORKERS, len(chunks))) as executor:
+            for chunk_result in executor.map(
+                    lambda chunk: self._fetch_iep_from_api(chunk, symbol_map, fallback_individual, log_prices), chunks):
+                iep_dict.update(chunk_result)
+        return iep_dict
     
-    def _fetch_iep_from_api(self, instrument_keys: List[str], symbol_map: Dict[str, str]) -> Dict[str, float]:
+    def _fetch_iep_from_api(self, instrument_keys: List[str], symbol_map: Dict[str, str],
+                            fallback_individual: bool = True, log_prices: bool = True) -> Dict[str, float]:
         """
         Fetch IEP data from Upstox API using batch request
         
         Args:
             instrument_keys: List of instrument keys
             symbol_map: Mapping from instrument key to symbol
+            fallback_individual: Retry this chunk's symbols one by one if the batch request raises
+            log_prices: Log each symbol's IEP
             
         Returns:
             Dictionary mapping symbol to IEP price
@@ -82,9 +179,9 @@ class PreMarketIEPManager:
                 "Authorization": f"Bearer {self.upstox_fetcher.access_token}"
             }
             
-            # Use requests directly like the existing get_opening_price method
-            import requests
-            response = requests.get(url, headers=headers, timeout=10)
+            # Go through the fetcher so the request is rate-limit coordinated
+            response = self.upstox_fetcher.http_get(url, headers, timeout=10,
+                                                    session=self.upstox_fetcher._get_session())
             
             if response.status_code == 200:
                 # Handle encoding properly to avoid charmap issues
@@ -116,7 +213,8 @@ class PreMarketIEPManager:
                             iep = quote_data.get('last_price') or quote_data.get('open')
                             if iep:
                                 iep_dict[symbol] = float(iep)
-                                logger.info(f"IEP for {symbol}: Rs{iep:.2f}")
+                                if log_prices:
+                                    logger.info(f"IEP for {symbol}: Rs{iep:.2f}")
                             else:
                                 logger.warning(f"No IEP data found for {symbol}")
                 else:
@@ -126,9 +224,11 @@ class PreMarketIEPManager:
                 
         except Exception as e:
             logger.error(f"Error fetching IEP from API: {e}")
-            # Fallback: try individual fetching for each symbol
+            if not fallback_individual:
+                return iep_dict
+            # Fallback: try individual fetching for each symbol in this chunk
             logger.info("Falling back to individual symbol fetching...")
-            for symbol in symbol_map.values():
+            for symbol in (symbol_map[key] for key in instrument_keys if key in symbol_map):
                 try:
                     price = self.get_iep_for_symbol(symbol)
                     if price:
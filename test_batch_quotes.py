@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test script to verify batched multi-instrument quote fetching
+Checks chunking to the endpoint limit and symbol mapping without hitting the API
+"""
+
+import sys
+import os
+import threading
+from datetime import datetime
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+def test_batch_quotes_chunking():
+    """Test that 1200 symbols are split into 3 concurrent chunks and mapped back"""
+    print("=== TESTING BATCHED QUOTE FETCH ===\n")
+
+    from src.utils import upstox_fetcher as fetcher_module
+    from src.utils.upstox_fetcher import UpstoxFetcher, QUOTE_BATCH_LIMIT
+
+    fetcher = UpstoxFetcher.__new__(UpstoxFetcher)
+    fetcher.instrument_mapping = {}
+    fetcher.access_token = 'test'
+
+    symbols = [f"STOCK{i}" for i in range(1200)]
+    calls = []
+    lock = threading.Lock()
+
+    def fake_chunk(keys, endpoint='ohlc', query=''):
+        with lock:
+            calls.append(len(keys))
+        return {
+            f"NSE_EQ:{key.split('|')[1]}": {
+                'instrument_token': key,
+                'last_price': 101.0,
+                'prev_ohlc': {'close': 100.0},
+                'live_ohlc': {'open': 100.5, 'high': 102.0, 'low': 99.5, 'close': 101.0, 'volume': 5000},
+            }
+            for key in keys
+        }
+
+    fetcher._fetch_quote_chunk = fake_chunk
+    quotes = fetcher.get_batch_quotes(symbols)
+
+    print(f"   Requests made: {len(calls)} (chunk sizes {sorted(calls, reverse=True)})")
+    assert len(calls) == 3, "Expected 3 chunked requests for 1200 symbols"
+    assert max(calls) <= QUOTE_BATCH_LIMIT, "Chunk exceeded endpoint limit"
+    assert len(quotes) == 1200, "Not all symbols mapped back from response"
+
+    quote = quotes['STOCK7']
+    assert quote['cp'] == 100.0 and quote['ltp'] == 101.0, "Wrong prev close / LTP"
+    assert quote['open'] == 100.5 and quote['volume'] == 5000, "Wrong live OHLC fields"
+    print("   ✓ Prev close, LTP and OHLC returned for all symbols")
+    print("\n=== ALL BATCH QUOTE TESTS PASSED ===")
+
+
+def test_volume_snapshot():
+    """Test that volumes for all pending stocks come from one batched snapshot"""
+    print("=== TESTING BATCHED VOLUME SNAPSHOT ===\n")
+
+    from src.utils.upstox_fetcher import UpstoxFetcher
+
+    fetcher = UpstoxFetcher.__new__(UpstoxFetcher)
+    fetcher.instrument_mapping = {'AAA': 'NSE_EQ|INE000A01', 'BBB': 'NSE_EQ|INE000B01'}
+    fetcher.access_token = 'test'
+
+    endpoints = []
+
+    def fake_chunk(keys, endpoint='ohlc', query=''):
+        endpoints.append(endpoint)
+        # Response keyed by trading symbol, as the live API does
+        return {
+            'NSE_EQ:AAA': {'instrument_token': 'NSE_EQ|INE000A01', 'volume': 120000},
+            'NSE_EQ:BBB': {'instrument_token': 'NSE_EQ|INE000B01', 'volume': 45000},
+        }
+
+    fetcher._fetch_quote_chunk = fake_chunk
+    volumes, snapshot_time = fetcher.get_volume_snapshot(['AAA', 'BBB'])
+
+    print(f"   Snapshot at {snapshot_time}: {volumes}")
+    assert endpoints == ['ltp'], "Expected a single LTP request"
+    assert volumes == {'AAA': 120000.0, 'BBB': 45000.0}, "Volumes not mapped to symbols"
+    print("   ✓ One request, one timestamp for all stocks")
+    assert snapshot_time.tzinfo is not None and snapshot_time.utcoffset().total_seconds() == 19800, "Snapshot not in IST"
+    print("   ✓ Snapshot timestamp is IST")
+
+    # A chunk that fails on the first pass is requested once more
+    calls = []
+
+    def flaky_chunk(keys, endpoint='ohlc', query=''):
+        calls.append(list(keys))
+        if len(calls) == 1:
+            return {'NSE_EQ:AAA': {'instrument_token': 'NSE_EQ|INE000A01', 'volume': 120000}}
+        return {'NSE_EQ:BBB': {'instrument_token': 'NSE_EQ|INE000B01', 'volume': 45000}}
+
+    fetcher._fetch_quote_chunk = flaky_chunk
+    volumes, _ = fetcher.get_volume_snapshot(['AAA', 'BBB'])
+    assert calls[1] == ['NSE_EQ|INE000B01'], f"Retry should only request the missing key: {calls}"
+    assert volumes == {'AAA': 120000.0, 'BBB': 45000.0}, volumes
+    print("   ✓ Missing symbol re-requested on its own")
+    print("\n=== ALL VOLUME SNAPSHOT TESTS PASSED ===")
+
+
+def test_volume_validation_fallback():
+    """Test that symbols missing from the snapshot are fetched individually, not rejected"""
+    print("=== TESTING VOLUME VALIDATION FALLBACK ===\n")
+
+    sys.path.insert(0, 'src/trading/live_trading')
+    from continuation_stock_monitor import StockMonitor
+    from src.utils import upstox_fetcher as fetcher_module
+
+    monitor = StockMonitor()
+    for i, symbol in enumerate(['AAA', 'BBB', 'CCC', 'DDD', 'EEE']):
+        monitor.add_stock(symbol, f"NSE_EQ|INE00{i}", 100.0)
+        stock = monitor.get_stock_by_symbol(symbol)
+        stock.volume_baseline = 100000
+        stock.gap_validated = True
+        stock.low_violation_checked = True
+
+    class FakeResponse:
+        def __init__(self, status_code, volume=None):
+            self.status_code = status_code
+            self.text = '' if status_code == 200 else 'Service Unavailable'
+            self.volume = volume
+
+        def json(self):
+            return {'status': 'success', 'data': {self.key: {'volume': self.volume}}}
+
+    fetched = []
+
+    def fake_http_get(url, headers=None, **kwargs):
+        # Individual LTP quotes through the real get_current_volume
+        key = url.split('instrument_key=')[1]
+        symbol = key.split('_')[-1]
+        fetched.append(symbol)
+        if symbol == 'EEE':
+            raise ConnectionError("timeout")
+        response = FakeResponse(503) if symbol == 'DDD' else FakeResponse(200, {'BBB': 50000, 'CCC': 0}[symbol])
+        response.key = key
+        return response
+
+    fetcher = fetcher_module.upstox_fetcher
+    original = fetcher.get_volume_snapshot, fetcher.http_get, fetcher.get_instrument_key
+    fetcher.get_volume_snapshot = lambda symbols: ({'AAA': 40000.0}, datetime.now())
+    fetcher.http_get = fake_http_get
+    fetcher.get_instrument_key = lambda symbol: f"NSE_EQ|KEY_{symbol}"
+    try:
+        monitor.check_volume_validations()
+        assert fetcher.get_current_volume('DDD') == 0.0, "Default callers still get 0.0 on failure"
+    finally:
+        fetcher.get_volume_snapshot, fetcher.http_get, fetcher.get_instrument_key = original
+
+    stocks = {stock.symbol: stock for stock in monitor.stocks.values()}
+    assert fetched[:4] == ['BBB', 'CCC', 'DDD', 'EEE'], fetched
+    assert stocks['AAA'].volume_validated and stocks['BBB'].volume_validated
+    assert stocks['CCC'].rejection_reason == "No volume data available", stocks['CCC'].rejection_reason
+    for symbol in ('DDD', 'EEE'):
+        assert not stocks[symbol].rejection_reason and not stocks[symbol].volume_validated, symbol
+    print("   ✓ Symbols missing from the snapshot validated from individual quotes")
+    print("   ✓ Only the symbol with no volume rejected; HTTP error and exception stay pending")
+    print("\n=== ALL VOLUME VALIDATION FALLBACK TESTS PASSED ===")
+
+
+if __name__ == "__main__":
+    test_batch_quotes_chunking()
+    test_volume_snapshot()
+    test_volume_validation_fallback()
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test script to verify the shared feed hub
+Checks refcounted upstream subscriptions across two bots, per-client frame
+filtering, release on disconnect and fan-out throughput, hub lifetime (idle,
+end of session, access token change) and the fallback on platforms without
+Unix sockets
+"""
+
+import sys
+import os
+import time
+import tempfile
+from datetime import datetime
+import pytz
+
+IST = pytz.timezone('Asia/Kolkata')
+
+# Add src to path
+sys.path.insert(0, 'src/trading/live_trading')
+
+# The streamer modules import the Upstox SDK - skip these tests when it is not installed
+try:
+    import upstox_client  # noqa: F401
+except ImportError:
+    import pytest
+    pytest.skip("upstox_client (Upstox SDK) not installed", allow_module_level=True)
+
+from test_feed_decode import build_feed_message
+
+
+class FakeUpstream:
+    """Records the hub's upstream subscribe / unsubscribe calls"""
+
+    def __init__(self):
+        self.subscribed = []
+        self.unsubscribed = []
+
+    def add_instruments(self, keys):
+        self.subscribed.extend(keys)
+
+    def remove_instruments(self, keys):
+        self.unsubscribed.extend(keys)
+
+    def disconnect(self):
+        pass
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_feed_hub():
+    """Test two bots sharing one upstream feed through the hub"""
+    print("=== TESTING SHARED FEED HUB ===\n")
+
+    from feed_hub import FeedHub, feed_hub_running
+    from simple_data_streamer import SimpleStockStreamer
+
+    socket_path = os.path.join(tempfile.mkdtemp(), 'feed_hub.sock')
+    upstream = FakeUpstream()
+    hub = FeedHub(socket_path, upstream=upstream)
+    hub.start()
+    assert feed_hub_running(socket_path), "Hub not answering"
+
+    aaa, bbb, ccc = "NSE_EQ|AAA", "NSE_EQ|BBB", "NSE_EQ|CCC"
+    symbols = {aaa: "AAA", bbb: "BBB", ccc: "CCC"}
+
+    # 1. Overlapping subscriptions cost one upstream subscription each
+    print("1. Refcounted upstream subscriptions")
+    streamers = {}
+    received = {}
+    for name, keys in (("continuation", [aaa, bbb]), ("reversal", [bbb, ccc])):
+        streamer = SimpleStockStreamer(keys, {key: symbols[key] for key in keys}, feed_hub=socket_path)
+        streamer.feed_hub_name = name
+        received[name] = []
+        streamer.tick_handler = lambda key, symbol, price, ts, ohlc=None, seen=received[name]: seen.append(symbol)
+        assert streamer.connect(), f"{name} did not connect to the hub"
+        streamers[name] = streamer
+
+    assert wait_for(lambda: len(hub.refcounts) == 3 and all(s.subscribed_at for s in streamers.values())), \
+        f"Subscriptions not registered: {hub.refcounts}"
+    assert sorted(upstream.subscribed) == [aaa, bbb, ccc], f"Upstream subscribed {upstream.subscribed}"
+    assert hub.refcounts[bbb] == 2
+    print(f"   ✓ 4 client subscriptions -> {len(upstream.subscribed)} upstream (BBB shared, refcount 2)")
+
+    # 2. Each bot only sees its own instruments
+    print("\n2. Per-client frame filtering")
+    hub.broadcast(build_feed_message([aaa, bbb, ccc]))
+    hub.broadcast(build_feed_message([aaa]))
+    assert wait_for(lambda: len(received['continuation']) == 3 and len(received['reversal']) == 2), received
+    assert sorted(received['continuation']) == ["AAA", "AAA", "BBB"], received['continuation']
+    assert sorted(received['reversal']) == ["BBB", "CCC"], received['reversal']
+    print(f"   ✓ continuation got {sorted(received['continuation'])}, reversal got {sorted(received['reversal'])}")
+
+    # 3. Unsubscribing a shared instrument only leaves upstream with the last holder
+    print("\n3. Refcounted unsubscribe")
+    streamers['continuation'].unsubscribe([bbb])
+    assert wait_for(lambda: hub.refcounts.get(bbb) == 1), hub.refcounts
+    assert upstream.unsubscribed == [], "BBB left upstream while the reversal bot still holds it"
+    streamers['reversal'].unsubscribe([bbb])
+    assert wait_for(lambda: bbb not in hub.refcounts), hub.refcounts
+    assert upstream.unsubscribed == [bbb], upstream.unsubscribed
+    print("   ✓ BBB unsubscribed upstream only after both bots released it")
+
+    # 4. A bot going away releases everything it held
+    print("\n4. Release on disconnect")
+    streamers['reversal'].disconnect()
+    assert wait_for(lambda: ccc in upstream.unsubscribed and len(hub.clients) == 1), upstream.unsubscribed
+    assert aaa in hub.refcounts and aaa not in upstream.unsubscribed
+    assert wait_for(lambda: not streamers['reversal'].connected)
+    print(f"   ✓ CCC released on disconnect; {len(hub.refcounts)} instrument(s) still upstream")
+
+    # 5. Fan-out cost on the upstream thread
+    print("\n5. Fan-out throughput")
+    keys = [f"NSE_EQ|INE{i:06d}" for i in range(150)]
+    wide = SimpleStockStreamer(keys[:100], {key: f"S{i}" for i, key in enumerate(keys)}, feed_hub=socket_path)
+    wide.feed_hub_name = "wide"
+    wide_ticks = []
+    wide.tick_handler = lambda key, symbol, price, ts, ohlc=None: wide_ticks.append(symbol)
+    assert wide.connect()
+    assert wait_for(lambda: wide.subscribed_at is not None and len(hub.refcounts) == 101), len(hub.refcounts)
+
+    payload = build_feed_message(keys[:150])
+    frames = 2000
+    start = time.perf_counter()
+    for _ in range(frames):
+        hub.broadcast(payload)
+    broadcast_us = (time.perf_counter() - start) / frames * 1e6
+    assert wait_for(lambda: len(wide_ticks) == frames * 100, timeout=30), f"{len(wide_ticks)} ticks delivered"
+    elapsed = time.perf_counter() - start
+    print(f"   broadcast(): {broadcast_us:.0f}us per 150-instrument frame; "
+          f"{frames} frames ({len(wide_ticks):,} ticks) delivered in {elapsed:.2f}s")
+    assert broadcast_us < 5000, "Fan-out is too slow for the upstream thread"
+
+    for streamer in (streamers['continuation'], wide):
+        streamer.disconnect()
+    assert wait_for(lambda: not hub.refcounts), hub.refcounts
+    print(f"   {hub.stats()}")
+    hub.stop()
+    assert not os.path.exists(socket_path), "Socket not removed on stop"
+
+    print("\n=== ALL FEED HUB TESTS PASSED ===")
+
+
+def test_hub_lifetime():
+    """Test that the hub exits when idle, at session end or on a new token, and stale hubs are replaced"""
+    print("=== TESTING FEED HUB LIFETIME ===\n")
+
+    import json
+    import feed_hub as feed_hub_module
+    from feed_hub import FeedHub, FeedHubConnection, feed_hub_status, ensure_feed_hub, token_fingerprint
+
+    tmp = tempfile.mkdtemp()
+    config_file = os.path.join(tmp, 'upstox_config.json')
+    with open(config_file, 'w') as f:
+        json.dump({'access_token': 'monday-token'}, f)
+
+    socket_path = os.path.join(tmp, 'feed_hub.sock')
+    hub = FeedHub(socket_path, upstream=FakeUpstream(), idle_timeout=0.3, config_file=config_file)
+    hub.start()
+
+    # 1. Status carries the token fingerprint, never the token
+    status = feed_hub_status(socket_path)
+    assert status['token'] == token_fingerprint('monday-token') and 'monday-token' not in json.dumps(status)
+    print(f"   ✓ Status: {status}")
+
+    # 2. Idle shutdown only once the last client has left
+    client = FeedHubConnection(socket_path, name="bot")
+    client.connect()
+    time.sleep(0.4)
+    assert hub.lifetime_expired() is None, "Hub expired with a client attached"
+    client.disconnect()
+    assert wait_for(lambda: not hub.clients)
+    assert wait_for(lambda: hub.lifetime_expired() == "no clients for 0.3s", timeout=2), hub.lifetime_expired()
+    print("   ✓ Idle: kept alive while a bot was attached, expired after the last one left")
+
+    # 3. End of session
+    hub.idle_timeout = 2 * 86400
+    assert hub.lifetime_expired(now=hub.stop_at) == "end of session"
+    print(f"   ✓ Session end at {datetime.fromtimestamp(hub.stop_at, IST).strftime('%Y-%m-%d %H:%M')}")
+
+    # 4. Token refresh in upstox_config.json
+    with open(config_file, 'w') as f:
+        json.dump({'access_token': 'tuesday-token'}, f)
+    os.utime(config_file, (time.time() + 5, time.time() + 5))
+    assert hub.lifetime_expired() == "access token changed"
+    print("   ✓ New access token in upstox_config.json expires the hub")
+
+    # 5. A client replaces a hub holding another token instead of attaching to it
+    started = []
+
+    def fake_popen(args, **kwargs):
+        # Stands in for the hub process: an in-process hub on the new token
+        replacement = FeedHub(args[args.index('--socket') + 1], upstream=FakeUpstream(), config_file=config_file)
+        replacement.start()
+        started.append(replacement)
+
+    original = feed_hub_module.current_token_fingerprint, feed_hub_module.subprocess.Popen
+    feed_hub_module.current_token_fingerprint = lambda config=None: token_fingerprint('tuesday-token')
+    feed_hub_module.subprocess.Popen = fake_popen
+    cwd = os.getcwd()
+    os.chdir(tmp)  # ensure_feed_hub appends to logs/feed_hub.log
+    try:
+        assert ensure_feed_hub(socket_path)
+    finally:
+        os.chdir(cwd)
+        feed_hub_module.current_token_fingerprint, feed_hub_module.subprocess.Popen = original
+    assert hub.stop_reason == "shutdown requested" and started
+    assert feed_hub_status(socket_path)['token'] == token_fingerprint('tuesday-token')
+    print("   ✓ Hub on the old token stopped and replaced by one on the current token")
+    started[0].stop()
+
+    print("\n=== ALL FEED HUB LIFETIME TESTS PASSED ===")
+
+
+def test_no_unix_sockets():
+    """Test that the hub reports unavailable instead of raising where AF_UNIX is missing"""
+    print("=== TESTING FEED HUB WITHOUT UNIX SOCKETS ===\n")
+
+    import socket
+    from feed_hub import ensure_feed_hub, feed_hub_running
+
+    af_unix = socket.AF_UNIX
+    del socket.AF_UNIX
+    try:
+        assert not feed_hub_running(os.path.join(tempfile.mkdtemp(), 'feed_hub.sock'))
+        assert not ensure_feed_hub(os.path.join(tempfile.mkdtemp(), 'feed_hub.sock'))
+    finally:
+        socket.AF_UNIX = af_unix
+    print("   ✓ No AF_UNIX: hub reported unavailable, bots connect directly")
+
+    print("\n=== ALL NO-UNIX-SOCKET TESTS PASSED ===")
+
+
+if __name__ == "__main__":
+    test_feed_hub()
+    test_hub_lifetime()
+    test_no_unix_sockets()
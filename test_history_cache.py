@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test script to verify the on-disk historical candle cache
+Checks past-session-only caching, zero re-fetches and size-bounded eviction
+"""
+
+import sys
+import os
+import tempfile
+from datetime import date, timedelta
+from unittest import mock
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+def test_cache_rules():
+    """Test that only past sessions are cached and hits/misses are counted"""
+    print("=== TESTING HISTORY CACHE RULES ===\n")
+
+    from src.utils.history_cache import HistoryCache
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = HistoryCache(cache_dir=tmp)
+        key = 'NSE_EQ|INE002A01018'
+        past = date.today() - timedelta(days=3)
+        candles = [['2024-01-01T09:15:00+05:30', 100, 101, 99, 100.5, 1000, 0]]
+
+        assert cache.get(key, 'minutes/1', past, past) is None, "Empty cache should miss"
+        cache.put(key, 'minutes/1', past, past, candles)
+        assert cache.get(key, 'minutes/1', past, past) == candles, "Stored candles not returned"
+
+        # Empty responses are not cached - the next request asks the API again
+        cache.put(key, 'minutes/1', past - timedelta(days=1), past - timedelta(days=1), [])
+        assert cache.get(key, 'minutes/1', past - timedelta(days=1), past - timedelta(days=1)) is None, "Empty response cached"
+
+        # Ranges touching today are still forming and must never be cached
+        future = date.today() + timedelta(days=1)
+        cache.put(key, 'day', past, future, candles)
+        assert cache.get(key, 'day', past, future) is None, "Range touching today was cached"
+
+        stats = cache.get_stats()
+        print(f"   Stats: {stats}")
+        assert stats['hits'] == 1 and stats['misses'] == 2 and stats['uncacheable'] == 1, "Wrong counters"
+        print("   ✓ Past sessions cached; empty responses and current session bypassed")
+
+    print("\n=== ALL CACHE RULE TESTS PASSED ===")
+
+
+def test_eviction():
+    """Test that the cache stays under its size bound"""
+    print("=== TESTING HISTORY CACHE EVICTION ===\n")
+
+    from src.utils.history_cache import HistoryCache
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = HistoryCache(cache_dir=tmp, max_bytes=2000)
+        candles = [['2024-01-01T09:15:00+05:30', 100, 101, 99, 100.5, 1000, 0]] * 100
+        start = date.today() - timedelta(days=60)
+
+        for i in range(30):
+            day = start + timedelta(days=i)
+            cache.put('NSE_EQ|TEST', 'minutes/1', day, day, candles)
+
+        total = sum(os.path.getsize(os.path.join(tmp, f)) for f in os.listdir(tmp))
+        print(f"   Cache size: {total} bytes, evictions: {cache.stats['evictions']}")
+        assert total <= 2000, "Cache exceeded its size bound"
+        assert cache.stats['evictions'] > 0, "Nothing was evicted"
+        print("   ✓ Least recently used entries evicted")
+
+    print("\n=== ALL EVICTION TESTS PASSED ===")
+
+
+def test_intraday_refetch():
+    """Test that re-running VAH prep for a past day makes zero history requests"""
+    print("=== TESTING INTRADAY RE-FETCH ===\n")
+
+    from src.utils import history_cache as cache_module
+    from src.trading.live_trading.volume_profile import VolumeProfileCalculator
+    import src.trading.live_trading.volume_profile as vp_module
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = cache_module.HistoryCache(cache_dir=tmp)
+        calculator = VolumeProfileCalculator.__new__(VolumeProfileCalculator)
+        calculator.upstox_fetcher = mock.Mock(access_token='test')
+        calculator.upstox_fetcher.get_instrument_key.return_value = 'NSE_EQ|INE002A01018'
+
+        response = mock.Mock(status_code=200)
+        response.json.return_value = {'status': 'success', 'data': {'candles': [
+            ['2024-01-01T09:15:00+05:30', 100, 101, 99, 100.5, 1000, 0]] * 20}}
+
+        calculator.upstox_fetcher.http_get.return_value = response
+        get = calculator.upstox_fetcher.http_get
+
+        past = date.today() - timedelta(days=2)
+        with mock.patch.object(vp_module, 'history_cache', cache):
+            first = calculator.fetch_intraday_data('RELIANCE', past)
+            second = calculator.fetch_intraday_data('RELIANCE', past)
+
+        print(f"   Requests made: {get.call_count}")
+        assert get.call_count == 1, "Second run should be served from cache"
+        assert first.equals(second), "Cached candles differ from fetched candles"
+        print("   ✓ Second run made zero history requests")
+
+    print("\n=== ALL RE-FETCH TESTS PASSED ===")
+
+
+if __name__ == "__main__":
+    test_cache_rules()
+    test_eviction()
+    test_intraday_refetch()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test script to verify final-IEP polling before market open
+Checks that the last reading is returned, chunks are fetched concurrently and drift is recorded,
+and that a failed chunk falls back to fetching only its own symbols
+"""
+
+import sys
+import os
+import time
+import threading
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+import pytz
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+IST = pytz.timezone('Asia/Kolkata')
+
+
+def test_iep_polling():
+    """Test polling 1200 symbols (3 API chunks) with a drifting IEP"""
+    print("=== TESTING FINAL IEP POLLING ===\n")
+
+    from src.utils.upstox_modules.pre_market_iep_module import PreMarketIEPManager
+
+    symbols = [f"STOCK{i}" for i in range(1200)]
+    fetcher = MagicMock()
+    fetcher.get_instrument_key.side_effect = lambda symbol: f"NSE_EQ|{symbol}"
+
+    polls = {'count': 0}
+    in_flight = {'now': 0, 'max': 0}
+    lock = threading.Lock()
+
+    def fake_get(url, headers, timeout=None, session=None):
+        keys = url.split('instrument_key=')[1].split(',')
+        with lock:
+            in_flight['now'] += 1
+            in_flight['max'] = max(in_flight['max'], in_flight['now'])
+            if keys[0] == 'NSE_EQ|STOCK0':
+                polls['count'] += 1
+            poll = polls['count']
+        time.sleep(0.05)
+        with lock:
+            in_flight['now'] -= 1
+        # STOCK1's equilibrium price keeps moving until the auction closes
+        data = {key.replace('|', ':'): {'symbol': key.split('|')[1],
+                                        'last_price': 100.0 + (poll if key == 'NSE_EQ|STOCK1' else 0)}
+                for key in keys}
+        response = MagicMock(status_code=200)
+        response.json.return_value = {'status': 'success', 'data': data}
+        return response
+
+    fetcher.http_get.side_effect = fake_get
+    manager = PreMarketIEPManager(fetcher)
+
+    until = datetime.now(IST) + timedelta(seconds=1.0)
+    start = time.time()
+    iep = manager.poll_final_iep(symbols, until, interval=0.1)
+    elapsed = time.time() - start
+    stats = manager.last_poll_stats
+
+    print(f"   {stats['polls']} polls in {elapsed:.2f}s, avg latency {stats['avg_latency_ms']:.0f}ms, "
+          f"max {in_flight['max']} chunks in flight")
+    assert len(iep) == 1200, "Missing IEP values"
+    assert fetcher.http_get.call_count == stats['polls'] * 3, "Keys not chunked to the API limit"
+    assert in_flight['max'] > 1, "Chunks were not fetched concurrently"
+    assert stats['polls'] >= 3, "Did not keep polling until the cut-off"
+    assert elapsed < 1.3, "Polled past the cut-off"
+    assert iep['STOCK1'] == 100.0 + stats['polls'], "Last IEP not handed over"
+    assert stats['drift'] == {'STOCK1': (101.0, 100.0 + stats['polls'])}, "Drift not recorded"
+    print(f"   ✓ Final IEP handed over: STOCK1 Rs{stats['drift']['STOCK1'][0]:.2f} -> Rs{iep['STOCK1']:.2f}")
+
+    # A cut-off already in the past still gets one reading
+    iep = manager.poll_final_iep(symbols[:10], datetime.now(IST) - timedelta(seconds=1))
+    assert len(iep) == 10 and manager.last_poll_stats['polls'] == 1, "Late start should poll once"
+    print("   ✓ Late start polls exactly once")
+
+    print("\n=== ALL IEP POLLING TESTS PASSED ===")
+
+
+def test_chunk_fallback():
+    """Test that a failed chunk retries only its own symbols one by one"""
+    print("\n=== TESTING FAILED CHUNK FALLBACK ===\n")
+
+    from src.utils.upstox_modules.pre_market_iep_module import PreMarketIEPManager
+
+    symbols = [f"STOCK{i}" for i in range(1200)]
+    fetcher = MagicMock()
+    fetcher.get_instrument_key.side_effect = lambda symbol: f"NSE_EQ|{symbol}"
+    fetcher.get_opening_price.side_effect = lambda symbol: 200.0
+
+    def fake_get(url, headers, timeout=None, session=None):
+        keys = url.split('instrument_key=')[1].split(',')
+        # The second chunk (STOCK500..STOCK999) times out
+        if keys[0] == 'NSE_EQ|STOCK500':
+            raise TimeoutError("read timed out")
+        response = MagicMock(status_code=200)
+        response.json.return_value = {'status': 'success', 'data': {
+            key.replace('|', ':'): {'symbol': key.split('|')[1], 'last_price': 100.0} for key in keys}}
+        return response
+
+    fetcher.http_get.side_effect = fake_get
+    manager = PreMarketIEPManager(fetcher)
+
+    keys, symbol_map = manager._resolve_keys(symbols)
+    iep = manager._fetch_iep_chunks(keys, symbol_map, log_prices=False)
+
+    retried = sorted(call.args[0] for call in fetcher.get_opening_price.call_args_list)
+    print(f"   {len(retried)} symbols retried individually after one chunk failed")
+    assert retried == sorted(f"STOCK{i}" for i in range(500, 1000)), "Fallback went beyond the failed chunk"
+    assert len(iep) == 1200, "Missing IEP values"
+    assert iep['STOCK0'] == 100.0 and iep['STOCK500'] == 200.0 and iep['STOCK1199'] == 100.0
+    print("   ✓ Only the failed chunk's symbols were fetched one by one")
+
+    print("\n=== ALL FALLBACK TESTS PASSED ===")
+
+
+if __name__ == "__main__":
+    test_iep_polling()
+    test_chunk_fallback()
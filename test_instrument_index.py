@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test script to verify the prebuilt SQLite instrument index
+Checks building from a complete.csv.gz master file, symbol lookups and
+rebuilding when the master file changes
+"""
+
+import sys
+import os
+import gzip
+import time
+import tempfile
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+MASTER_HEADER = 'instrument_key,exchange_token,tradingsymbol,name,last_price,expiry,strike,tick_size,lot_size,instrument_type,option_type,exchange\n'
+
+MASTER_ROWS = [
+    'NSE_EQ|INE002A01018,2885,RELIANCE,RELIANCE INDUSTRIES LTD,0.0,,,0.1,1,EQUITY,,NSE_EQ\n',
+    'NSE_EQ|INE467B01029,11536,TCS,TATA CONSULTANCY SERV LT,0.0,,,0.1,1,EQUITY,,NSE_EQ\n',
+    'NSE_EQ|INE118H01025,19585,BSE,BSE LIMITED,0.0,,,0.1,1,EQUITY,,NSE_EQ\n',
+    'NSE_EQ|INE040A01034,1333,HDFCBANK,HDFC BANK LTD,0.0,,,0.05,1,EQUITY,,NSE_EQ\n',
+    # Same symbol listed twice - the first row wins
+    'NSE_EQ|INE040A01999,9999,HDFCBANK,HDFC BANK LTD DUP,0.0,,,0.01,1,EQUITY,,NSE_EQ\n',
+    # Non-NSE equity rows are not indexed
+    'BSE_EQ|INE002A01018,500325,RELIANCE,RELIANCE INDUSTRIES LTD,0.0,,,0.05,1,EQUITY,,BSE_EQ\n',
+    'NSE_FO|35001,35001,NIFTY25JANFUT,NIFTY,0.0,2025-01-30,,0.05,75,FUTIDX,,NSE_FO\n',
+]
+
+
+def write_master(path, rows):
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        f.write(MASTER_HEADER)
+        f.writelines(rows)
+
+
+def test_build_and_lookup():
+    """Test that the index is built from the master file and serves lookups"""
+    print("=== TESTING INDEX BUILD AND LOOKUPS ===\n")
+
+    from src.utils.instrument_index import InstrumentIndex
+
+    with tempfile.TemporaryDirectory() as tmp:
+        master_file = os.path.join(tmp, 'complete.csv.gz')
+        index_file = os.path.join(tmp, 'data', 'instrument_index.db')
+        write_master(master_file, MASTER_ROWS)
+
+        index = InstrumentIndex(master_file=master_file, index_file=index_file)
+        assert index.is_stale(), "Missing index should be stale"
+
+        count = index.build()
+        print(f"   Indexed: {count}")
+        assert count == 4, "Only unique NSE_EQ symbols should be indexed"
+        assert os.path.exists(index_file), "Index file not written"
+        assert not index.is_stale(), "Freshly built index should not be stale"
+        print("   ✓ Built 4 NSE equities from the master file")
+
+        reliance = index.get('reliance')
+        assert reliance == {'symbol': 'RELIANCE', 'instrument_key': 'NSE_EQ|INE002A01018',
+                            'isin': 'INE002A01018', 'lot_size': 1, 'tick_size': 0.1}, reliance
+        print("   ✓ Lookup is case-insensitive and returns key, ISIN, lot and tick")
+
+        assert index.get('HDFCBANK')['instrument_key'] == 'NSE_EQ|INE040A01034', "First listing should win"
+        assert index.get('HDFCBANK')['tick_size'] == 0.05
+        assert index.get('NIFTY25JANFUT') is None, "F&O rows should not be indexed"
+        assert index.get('UNKNOWN') is None
+        print("   ✓ Duplicates, F&O rows and unknown symbols handled")
+
+        mapping = index.get_mapping()
+        assert mapping == {'RELIANCE': 'NSE_EQ|INE002A01018', 'TCS': 'NSE_EQ|INE467B01029',
+                           'BSE': 'NSE_EQ|INE118H01025', 'HDFCBANK': 'NSE_EQ|INE040A01034'}, mapping
+        print("   ✓ Full symbol -> instrument_key mapping loaded")
+        index.refresh()
+
+    print("\n=== ALL BUILD TESTS PASSED ===")
+
+
+def test_stale_rebuild():
+    """Test that a changed master file triggers a rebuild on the next lookup"""
+    print("\n=== TESTING STALENESS REBUILD ===\n")
+
+    from src.utils.instrument_index import InstrumentIndex
+
+    with tempfile.TemporaryDirectory() as tmp:
+        master_file = os.path.join(tmp, 'complete.csv.gz')
+        index_file = os.path.join(tmp, 'instrument_index.db')
+        write_master(master_file, MASTER_ROWS[:2])
+
+        index = InstrumentIndex(master_file=master_file, index_file=index_file)
+        assert index.get('RELIANCE') is not None, "First lookup should build the index"
+        assert index.get('BSE') is None
+        print("   ✓ First lookup built the index lazily")
+
+        # New master file download with an extra listing
+        time.sleep(0.01)
+        write_master(master_file, MASTER_ROWS[:3])
+        assert index.is_stale(), "Changed master file should mark the index stale"
+        print("   ✓ Changed master file detected")
+
+        index.refresh()
+        bse = index.get('BSE')
+        assert bse is not None and bse['instrument_key'] == 'NSE_EQ|INE118H01025', bse
+        assert len(index.get_mapping()) == 3
+        assert not index.is_stale()
+        print("   ✓ Index rebuilt with the new listing after refresh")
+
+        # Without a master file the existing index keeps serving
+        index.refresh()
+        os.remove(master_file)
+        assert not index.is_stale(), "Existing index should be used when the master file is missing"
+        assert index.get('TCS')['instrument_key'] == 'NSE_EQ|INE467B01029'
+        print("   ✓ Existing index used when the master file is missing")
+        index.refresh()
+
+        missing = InstrumentIndex(master_file=master_file, index_file=os.path.join(tmp, 'none.db'))
+        assert missing.get('TCS') is None and missing.get_mapping() == {}
+        print("   ✓ No master file and no index returns no matches")
+
+    print("\n=== ALL STALENESS TESTS PASSED ===")
+
+
+if __name__ == "__main__":
+    test_build_and_lookup()
+    test_stale_rebuild()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test script to verify the deadline-aware PREP orchestrator
+Checks dependency ordering, concurrency, deadline fallbacks and failure fallbacks,
+and that a late task cannot overwrite its fallback's result
+"""
+
+import sys
+import os
+import time
+from datetime import datetime, timedelta
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+def test_prep_orchestrator():
+    """Test that independent tasks overlap and late/failed tasks use their fallbacks"""
+    print("=== TESTING PREP ORCHESTRATOR ===\n")
+
+    from src.trading.live_trading.prep_orchestrator import PrepOrchestrator, IST
+
+    order = []
+    deadline = (datetime.now(IST) + timedelta(seconds=0.5)).time()
+
+    def metadata():
+        time.sleep(0.2)
+        order.append('metadata')
+        return 'meta'
+
+    def baselines():
+        order.append('baselines')
+        return 'baselines'
+
+    def slow_vah():
+        time.sleep(2.0)
+        return {'LIVE': 1.0}
+
+    def broken_iep():
+        raise RuntimeError("API down")
+
+    prep = PrepOrchestrator()
+    prep.add_task('metadata', metadata, deadline=deadline)
+    prep.add_task('baselines', baselines, depends_on=['metadata'], deadline=deadline)
+    prep.add_task('vah', slow_vah, deadline=deadline, fallback=lambda: {'CACHED': 2.0},
+                  fallback_note='cached VAH')
+    prep.add_task('iep', broken_iep, fallback=dict, fallback_note='OHLC opening prices')
+
+    start = time.time()
+    results = prep.run()
+    elapsed = time.time() - start
+    prep.print_report()
+
+    print(f"\n   Prep finished in {elapsed:.2f}s")
+    assert order == ['metadata', 'baselines'], "Dependency order not respected"
+    assert results['baselines'] == 'baselines', "Dependent task result missing"
+    assert elapsed < 1.0, "Slow task was not cut off at its deadline"
+    assert prep.tasks['vah'].status == 'timeout' and results['vah'] == {'CACHED': 2.0}, "VAH fallback not applied"
+    assert prep.tasks['iep'].status == 'failed' and results['iep'] == {}, "IEP failure fallback not applied"
+    print("   ✓ Deadline and failure fallbacks applied, prep did not overrun")
+
+    print("\n=== ALL PREP ORCHESTRATOR TESTS PASSED ===")
+
+
+def test_late_task_superseded():
+    """Test that a late task sees it was superseded and its thread does not block exit"""
+    print("=== TESTING LATE TASK SUPERSEDED ===\n")
+
+    import threading
+    from src.trading.live_trading.prep_orchestrator import PrepOrchestrator, IST
+
+    baselines = {}
+    deadline = (datetime.now(IST) + timedelta(seconds=0.3)).time()
+
+    def load_baselines(use_default=False):
+        for symbol in ['AAA', 'BBB', 'CCC']:
+            if not use_default:
+                time.sleep(0.2)  # slow metadata lookup
+                if prep.superseded('baselines'):
+                    return
+            baselines[symbol] = 1000000 if use_default else 50000
+
+    prep = PrepOrchestrator()
+    prep.add_task('baselines', load_baselines, deadline=deadline,
+                  fallback=lambda: load_baselines(use_default=True), fallback_note='default baseline')
+    prep.run()
+    late = [t for t in threading.enumerate() if t.name == 'prep-baselines']
+    time.sleep(0.6)  # let the late task reach its next write
+
+    print(f"   Baselines after the late task woke up: {baselines}")
+    assert prep.tasks['baselines'].status == 'timeout' and prep.superseded('baselines')
+    assert baselines == {'AAA': 1000000, 'BBB': 1000000, 'CCC': 1000000}, "Late task overwrote the fallback"
+    print("   ✓ Late task stopped instead of overwriting the fallback's baselines")
+    assert late and all(t.daemon for t in late), "Prep tasks must run on daemon threads"
+    print("   ✓ Task ran on a daemon thread - a hung call cannot block exit")
+
+    print("\n=== ALL LATE TASK TESTS PASSED ===")
+
+
+if __name__ == "__main__":
+    test_prep_orchestrator()
+    test_late_task_superseded()
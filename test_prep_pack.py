@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test script to verify the nightly prep pack loading and date validation
+Checks that only a pack for the current session and version is used
+"""
+
+import sys
+import os
+import json
+import time
+import tempfile
+from datetime import date
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+def test_prep_pack_validation():
+    """Test that a pack is only accepted for its trading date and version"""
+    print("=== TESTING PREP PACK VALIDATION ===\n")
+
+    from src.trading.live_trading.prep_pack import (
+        load_prep_pack, get_pack_values, next_trading_day, PREP_PACK_VERSION
+    )
+
+    # Friday night builds Monday's pack
+    assert next_trading_day(date(2026, 1, 9)) == date(2026, 1, 12), "Weekend not skipped"
+
+    pack = {
+        'version': PREP_PACK_VERSION,
+        'trading_date': '2026-01-12',
+        'prev_session': '2026-01-09',
+        'stocks': {
+            'RELIANCE': {'instrument_key': 'NSE_EQ|INE002A01018', 'prev_close': 1250.5,
+                         'adr_percent': 2.1, 'volume_baseline': 8000000.0, 'vah': 1262.3},
+            'TCS': {'instrument_key': 'NSE_EQ|INE467B01029', 'adr_percent': 1.8},
+        }
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pack_file = os.path.join(tmp, 'prep_pack.json')
+        with open(pack_file, 'w') as f:
+            json.dump(pack, f)
+
+        start = time.perf_counter()
+        loaded = load_prep_pack(date(2026, 1, 12), pack_file)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        print(f"   Loaded pack in {elapsed_ms:.2f}ms")
+        assert loaded is not None, "Pack for the right date was rejected"
+
+        assert load_prep_pack(date(2026, 1, 13), pack_file) is None, "Stale pack was accepted"
+
+        closes = get_pack_values(loaded, ['RELIANCE', 'TCS', 'INFY'], 'prev_close')
+        assert closes == {'RELIANCE': 1250.5}, "Symbols without a close should be left for live fetch"
+        print("   ✓ Stale packs rejected, missing fields left for live fetch")
+
+        pack['version'] = PREP_PACK_VERSION + 1
+        with open(pack_file, 'w') as f:
+            json.dump(pack, f)
+        assert load_prep_pack(date(2026, 1, 12), pack_file) is None, "Wrong version was accepted"
+        print("   ✓ Packs from another version ignored")
+
+    print("\n=== ALL PREP PACK TESTS PASSED ===")
+
+
+if __name__ == "__main__":
+    test_prep_pack_validation()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test script to verify websocket pre-warm with a deferred subscription
+Checks that a warm socket subscribes once at open and first-tick latency is recorded
+"""
+
+import sys
+import os
+import time
+import threading
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+# Add src to path
+sys.path.insert(0, 'src/trading/live_trading')
+
+# The streamer modules import the Upstox SDK - skip these tests when it is not installed
+try:
+    import upstox_client  # noqa: F401
+except ImportError:
+    import pytest
+    pytest.skip("upstox_client (Upstox SDK) not installed", allow_module_level=True)
+
+def test_prewarm_streamer():
+    """Test pre-warm connect, deferred subscribe and first-tick measurement"""
+    print("=== TESTING WEBSOCKET PRE-WARM ===\n")
+
+    import simple_data_streamer
+    from simple_data_streamer import SimpleStockStreamer, IST
+
+    instrument_keys = [f"NSE_EQ|{i}" for i in range(5)]
+    stock_symbols = {key: f"STOCK{i}" for i, key in enumerate(instrument_keys)}
+
+    # Constructor reads upstox_config.json - set the state it would
+    streamer = SimpleStockStreamer.__new__(SimpleStockStreamer)
+    streamer.instrument_keys = instrument_keys
+    streamer.stock_symbols = stock_symbols
+    streamer.streamer = None
+    streamer.connected = False
+    streamer.reconnecting = False
+    streamer.connection_attempts = 0
+    streamer.active_instruments = set(instrument_keys)
+    streamer.intentional_disconnect = False
+    streamer.defer_subscription = False
+    streamer.market_open_time = None
+    streamer.connect_started_at = None
+    streamer.subscribed_at = None
+    streamer.first_tick_at = None
+    streamer.feed_decoder = None  # SDK dict path: MarketDataStreamerV3 is patched below
+    streamer.tick_latency = None
+    streamer.feed_recorder = None
+    streamer.feed_hub = None
+    streamer.messages_received = 0
+    streamer.last_trade_time = {}
+    streamer.access_token = 'token'
+
+    fake_feed = MagicMock()
+    callbacks = {}
+    fake_feed.on.side_effect = lambda event, handler: callbacks.__setitem__(event, handler)
+    # The SDK opens the socket on its own thread
+    fake_feed.connect.side_effect = lambda: threading.Timer(0.05, lambda: callbacks['open']()).start()
+
+    with patch.object(simple_data_streamer.upstox_client, 'MarketDataStreamerV3', return_value=fake_feed):
+        start = time.time()
+        assert streamer.prewarm(timeout=2), "Pre-warm did not connect"
+        print(f"   Pre-warm connected in {time.time() - start:.2f}s")
+        assert fake_feed.subscribe.call_count == 0, "Pre-warm should not subscribe"
+        print("   ✓ Socket open with no subscription")
+
+    streamer.update_active_instruments(instrument_keys[:2])
+    streamer.market_open_time = datetime.now(IST)
+    start = time.time()
+    assert streamer.subscribe_active(), "Deferred subscription not sent"
+    subscribe_ms = (time.time() - start) * 1000
+    assert fake_feed.subscribe.call_count == 1, "Subscription should be a single message"
+    assert sorted(fake_feed.subscribe.call_args[0][0]) == sorted(instrument_keys[:2]), "Wrong instruments subscribed"
+    assert not streamer.subscribe_active(), "Subscription sent twice"
+    print(f"   ✓ Subscribed validated stocks in {subscribe_ms:.1f}ms (no 1s on_open sleep)")
+
+    streamer.on_message({'feeds': {instrument_keys[0]: {'fullFeed': {'marketFF': {'ltpc': {'ltp': 101.5}}}}}})
+    assert streamer.first_tick_at is not None, "First tick not recorded"
+    print("   ✓ First tick latency recorded")
+
+    print("\n=== ALL PRE-WARM TESTS PASSED ===")
+
+
+if __name__ == "__main__":
+    test_prewarm_streamer()
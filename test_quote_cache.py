@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test script to verify the single-flight, per-field TTL quote cache
+Checks request de-duplication across threads and field expiry without hitting the API
+"""
+
+import sys
+import os
+import time
+import threading
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+def test_single_flight():
+    """Test that concurrent callers for one symbol share a single request"""
+    print("=== TESTING SINGLE-FLIGHT QUOTES ===\n")
+
+    from src.utils import upstox_fetcher as fetcher_module
+    from src.utils.upstox_fetcher import UpstoxFetcher
+    from src.utils.quote_cache import QuoteCache
+
+    cache = QuoteCache()
+    fetcher_module.quote_cache = cache
+
+    fetcher = UpstoxFetcher.__new__(UpstoxFetcher)
+    calls = []
+
+    def fake_fetch(symbol):
+        calls.append(symbol)
+        time.sleep(0.2)  # Slow enough for every thread to arrive while in flight
+        return {'symbol': symbol, 'ltp': 101.0, 'cp': 100.0, 'volume': 5000}
+
+    fetcher._fetch_ltp_data = fake_fetch
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(fetcher._get_ltp_data_original('RELIANCE')))
+               for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    # A later caller within the TTL is served from cache
+    results.append(fetcher._get_ltp_data_original('RELIANCE'))
+
+    print(f"   Requests made: {len(calls)}, REST calls saved: {cache.calls_saved()}")
+    assert len(calls) == 1, "Concurrent callers should share one request"
+    assert cache.calls_saved() == 8, "Expected 7 joined + 1 cache hit"
+    assert all(r['ltp'] == 101.0 and r['cp'] == 100.0 for r in results), "Callers got different quotes"
+    print("   ✓ One request served 9 callers")
+    print("\n=== ALL SINGLE-FLIGHT TESTS PASSED ===")
+
+
+def test_field_ttls():
+    """Test that fast-moving fields expire while previous close stays cached"""
+    print("=== TESTING PER-FIELD TTLS ===\n")
+
+    from src.utils.quote_cache import QuoteCache
+
+    cache = QuoteCache(field_ttls={'cp': 60.0, 'ltp': 0.1})
+    cache.put('TCS', {'symbol': 'TCS', 'ltp': 3500.0, 'cp': 3480.0})
+
+    assert cache.get('TCS', ('ltp', 'cp')) == {'ltp': 3500.0, 'cp': 3480.0}, "Fresh quote not served"
+    time.sleep(0.15)
+    assert cache.get('TCS', ('ltp',)) is None, "Expired LTP was served"
+    assert cache.get('TCS', ('cp',)) == {'cp': 3480.0}, "Previous close expired with LTP"
+    print("   ✓ LTP expired, previous close still cached")
+    print("\n=== ALL TTL TESTS PASSED ===")
+
+
+if __name__ == "__main__":
+    test_single_flight()
+    test_field_ttls()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test script to verify the cross-process Upstox rate-limit coordinator
+Checks a shared bucket across processes, live-over-bulk priority, 429 back-off
+and the per-minute style request windows, including sends after a timeout
+"""
+
+import sys
+import os
+import time
+import tempfile
+import multiprocessing
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.utils.rate_limiter import RateLimitCoordinator, PRIORITY_LIVE, PRIORITY_BULK
+
+
+def _worker(db_file, count):
+    limiter = RateLimitCoordinator(db_file=db_file, rate=20.0, burst=5.0)
+    for _ in range(count):
+        limiter.acquire(PRIORITY_LIVE)
+
+
+def test_shared_bucket():
+    """Test that two processes draw from one bucket"""
+    print("=== TESTING SHARED BUCKET ACROSS PROCESSES ===\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = os.path.join(tmp, 'rate_limit.db')
+        RateLimitCoordinator(db_file=db_file, rate=20.0, burst=5.0)._connection()
+
+        start = time.time()
+        procs = [multiprocessing.Process(target=_worker, args=(db_file, 15)) for _ in range(2)]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
+        elapsed = time.time() - start
+
+        # 30 requests, 5 from the initial burst, the rest at 20/s => at least 1.25s
+        print(f"   30 requests from 2 processes took {elapsed:.2f}s")
+        assert elapsed >= 1.2, "Processes did not share the bucket"
+        print("   ✓ Combined rate stayed within the shared limit")
+
+    print("\n=== ALL SHARED BUCKET TESTS PASSED ===")
+
+
+def test_priority_and_throttle():
+    """Test that bulk keeps a reserve for live requests and 429s halve the rate"""
+    print("=== TESTING PRIORITY AND 429 BACK-OFF ===\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        limiter = RateLimitCoordinator(db_file=os.path.join(tmp, 'rate_limit.db'), rate=4.0, burst=8.0)
+
+        # Bulk stops at the live reserve (25% of 8 = 2 tokens)
+        bulk_taken = sum(limiter.acquire(PRIORITY_BULK, timeout=0.1) for _ in range(8))
+        live_taken = sum(limiter.acquire(PRIORITY_LIVE, timeout=0.1) for _ in range(2))
+        print(f"   Bulk took {bulk_taken}, live took {live_taken} from the reserve")
+        assert bulk_taken == 6 and live_taken == 2, "Bulk dipped into the live reserve"
+        print("   ✓ Live reserve protected from bulk downloads")
+
+        limiter.report_throttled(retry_after=0.2)
+        rate = limiter._connection().execute("SELECT rate FROM bucket").fetchone()[0]
+        assert rate == 2.0, "429 should halve the shared rate"
+        assert not limiter.acquire(PRIORITY_LIVE, timeout=0.1), "Bucket should pause after a 429"
+        print("   ✓ 429 paused the bucket and reduced the shared rate")
+
+    print("\n=== ALL PRIORITY TESTS PASSED ===")
+
+
+def test_request_windows():
+    """Test that a request window caps requests even while the bucket has tokens"""
+    print("=== TESTING REQUEST WINDOWS ===\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Bucket allows 100/s, the window only 4 per 0.5s (bulk: 3)
+        limiter = RateLimitCoordinator(db_file=os.path.join(tmp, 'rate_limit.db'), rate=100.0, burst=100.0,
+                                       windows=((0.5, 4),))
+        bulk_taken = sum(limiter.acquire(PRIORITY_BULK, timeout=0.1) for _ in range(3))
+        live_taken = sum(limiter.acquire(PRIORITY_LIVE, timeout=0.1) for _ in range(2))
+        print(f"   Bulk took {bulk_taken}, live took {live_taken} of the 4-request window")
+        assert bulk_taken == 3 and live_taken == 1, "Window cap or live reserve not applied"
+        print("   ✓ Window capped requests with tokens still in the bucket")
+
+        sent = limiter._connection().execute("SELECT COUNT(*) FROM requests").fetchone()[0]
+        assert sent == 5, "Live request sent after a timeout was not logged"
+        print("   ✓ Live request sent after its timeout still counted against the window")
+
+        start = time.time()
+        assert limiter.acquire(PRIORITY_LIVE, timeout=2.0), "Window did not slide"
+        elapsed = time.time() - start
+        print(f"   Next request waited {elapsed:.2f}s for the window to slide")
+        assert 0.2 < elapsed < 0.7, "Wait should end when the oldest request leaves the window"
+        print("   ✓ Request sent once the oldest request left the window")
+
+        # Two more bulk requests fill the bulk share; the third outlasts its timeout
+        start = time.time()
+        assert all(limiter.acquire(PRIORITY_BULK, timeout=0.1) for _ in range(3)), "Bulk gave up on a full window"
+        elapsed = time.time() - start
+        print(f"   Bulk request waited {elapsed:.2f}s on a full window with a 0.1s timeout")
+        assert elapsed > 0.3, "Bulk should have waited for the window instead of sending anyway"
+        print("   ✓ Bulk requests wait out a full window instead of bypassing the cap")
+
+    print("\n=== ALL REQUEST WINDOW TESTS PASSED ===")
+
+if __name__ == "__main__":
+    test_shared_bucket()
+    test_priority_and_throttle()
+    test_request_windows()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test script to verify deterministic replay of a recorded continuation session
+Records a synthetic session, replays it twice through the production modules and
+checks the paper-trader output is identical, plus paced replay speed
+"""
+
+import sys
+import os
+import time
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+
+import pytz
+
+# Add src to path
+sys.path.insert(0, 'src')
+sys.path.insert(0, 'src/trading/live_trading')
+
+IST = pytz.timezone('Asia/Kolkata')
+SESSION_OPEN = IST.localize(datetime(2026, 2, 18, 9, 15, 0))
+
+# symbol -> (instrument_key, previous_close, open, volume baseline)
+STOCKS = {
+    'AAA': ('NSE_EQ|AAA', 95.0, 100.0, 100000),   # Enters on a new high after 9:20, stopped out
+    'BBB': ('NSE_EQ|BBB', 190.0, 200.0, 100000),  # Low violation before 9:20
+    'CCC': ('NSE_EQ|CCC', 47.5, 50.0, 100000),    # Too little volume for SVRO
+}
+
+
+def price_at(symbol, second):
+    """Synthetic price path by seconds after open"""
+    if symbol == 'AAA':
+        if second < 300:
+            return 100.0 + 2.0 * second / 300      # Up to 102 by 9:20
+        if second < 420:
+            return 101.5                           # Pullback
+        if second < 480:
+            return 102.5                           # Breakout -> entry
+        return 98.0                                # Below 4% SL -> exit
+    if symbol == 'BBB':
+        return 200.0 - (4.0 if 120 <= second < 180 else 0.0)
+    return 50.0 + (second % 10) * 0.01
+
+
+def record_session(directory):
+    """Synthetic session: prep snapshot + 15 minutes of 1-second full-feed frames"""
+    from MarketDataFeedV3_pb2 import FeedResponse
+    from feed_recorder import FeedRecorder, snapshot_stocks
+    from continuation_stock_monitor import StockMonitor
+
+    monitor = StockMonitor()
+    for symbol, (key, previous_close, open_price, baseline) in STOCKS.items():
+        monitor.add_stock(symbol, key, previous_close, 'continuation')
+        stock = monitor.stocks[key]
+        stock.set_open_price(open_price)
+        stock.gap_validated = True
+        stock.volume_baseline = baseline
+        stock.vah_price = open_price * 0.98
+
+    recorder = FeedRecorder(directory, prefix='continuation_feed')
+    recorder.open({'bot': 'continuation', 'stock_symbols': {key: symbol for symbol, (key, *_) in STOCKS.items()}})
+    recorder.record_meta({'event': 'prep', 'stocks': snapshot_stocks(monitor)})
+
+    open_ns = int(SESSION_OPEN.timestamp() * 1e9)
+    for second in range(900):
+        response = FeedResponse()
+        for symbol, (key, *_) in STOCKS.items():
+            market_ff = response.feeds[key].fullFeed.marketFF
+            market_ff.ltpc.ltp = round(price_at(symbol, second), 2)
+            market_ff.ltpc.ltt = int(SESSION_OPEN.timestamp() * 1000) + second * 1000
+            market_ff.vtt = (10 if symbol == 'CCC' else 100) * (second + 1)
+        recorder.record(response.SerializeToString(), received_ns=open_ns + second * 1_000_000_000 + 150_000_000)
+    return recorder.close()
+
+
+def test_replay_session():
+    """Test replay determinism, bot decisions and pacing"""
+    print("=== TESTING DETERMINISTIC SESSION REPLAY ===\n")
+
+    from replay_session import replay_session
+
+    directory = tempfile.mkdtemp()
+    try:
+        recording = record_session(directory)
+        print(f"Recorded synthetic session: {os.path.basename(recording)}")
+
+        # 1. Max speed replay through the production continuation modules
+        print("\n1. Replay as fast as possible")
+        start = time.perf_counter()
+        first = replay_session(recording, session_name='replay_test', log_dir=os.path.join(directory, 'run1'))
+        elapsed = time.perf_counter() - start
+        trades = [(t['type'], t['symbol'], t['entry_price'] if t['type'] == 'ENTRY' else t['exit_price'])
+                  for t in first['trades']]
+        print(f"   Trades: {trades}")
+        assert [t[:2] for t in trades] == [('ENTRY', 'AAA'), ('EXIT', 'AAA')], trades
+        assert trades[0][2] == 102.5 and trades[1][2] == 98.0, trades
+        assert first['trades'][0]['timestamp'].startswith('2026-02-18T09:22:00'), first['trades'][0]['timestamp']
+        rejected = {s['symbol'] for s in first['summary']['stock_details'].values() if not s['is_active']}
+        assert rejected == {'BBB', 'CCC'}, rejected
+        print(f"   ✓ 15 minutes ({first['ticks']:,} ticks) replayed in {elapsed:.2f}s: AAA entered 102.50, exited 98.00; BBB/CCC rejected")
+
+        # 2. Same recording -> byte-identical paper-trader output
+        print("\n2. Determinism across runs")
+        second = replay_session(recording, session_name='replay_test', log_dir=os.path.join(directory, 'run2'))
+        with open(first['trades_file']) as f1, open(second['trades_file']) as f2:
+            assert f1.read() == f2.read(), "Paper-trader output differs between replays"
+        print("   ✓ paper_trades_replay_test.json identical across two replays")
+
+        # 3. Paced replay: 900s of feed at 900x takes about a second
+        print("\n3. Paced replay at 900x")
+        start = time.perf_counter()
+        paced = replay_session(recording, speed=900, session_name='replay_test', log_dir=os.path.join(directory, 'run3'))
+        paced_elapsed = time.perf_counter() - start
+        assert 0.95 <= paced_elapsed < 5, f"Paced replay took {paced_elapsed:.2f}s"
+        assert paced['trades'] == first['trades'], "Paced replay made different decisions"
+        print(f"   ✓ {paced_elapsed:.2f}s for 900s of feed, same trades")
+
+        print("\n=== ALL REPLAY TESTS PASSED ===")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_replay_session()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test script to verify the sharded streamer
+Checks instruments are split within the per-connection limit, ticks from every
+shard reach the one tick dispatcher, one shard reconnects on its own while the
+others keep streaming, and the dispatcher reports per-shard message rates
+"""
+
+import sys
+import os
+import time
+import tempfile
+import threading
+
+# Add src to path
+sys.path.insert(0, 'src/trading/live_trading')
+
+# The streamer modules import the Upstox SDK - skip these tests when it is not installed
+try:
+    import upstox_client  # noqa: F401
+except ImportError:
+    import pytest
+    pytest.skip("upstox_client (Upstox SDK) not installed", allow_module_level=True)
+
+from test_feed_decode import build_feed_message
+from test_feed_hub import FakeUpstream, wait_for
+
+
+def test_sharded_streamer():
+    """Test a 50-instrument watchlist over three 20-instrument connections"""
+    print("=== TESTING SHARDED STREAMER ===\n")
+
+    from feed_hub import FeedHub
+    from simple_data_streamer import SimpleStockStreamer
+    from sharded_streamer import ShardedStockStreamer, create_streamer
+    from tick_queue import TickDispatcher
+
+    # Shards are feed hub clients, so each one is a real connection with the
+    # production open / subscribe / close / reconnect path
+    socket_path = os.path.join(tempfile.mkdtemp(), 'feed_hub.sock')
+    upstream = FakeUpstream()
+    hub = FeedHub(socket_path, upstream=upstream)
+    hub.start()
+
+    keys = [f"NSE_EQ|INE{i:06d}" for i in range(50)]
+    symbols = {key: f"S{i}" for i, key in enumerate(keys)}
+    factory = lambda shard_keys, stock_symbols: SimpleStockStreamer(shard_keys, stock_symbols, feed_hub=socket_path)
+
+    # 1. Split within the per-connection limit
+    print("1. Shard assignment")
+    try:
+        ShardedStockStreamer(keys, symbols, shard_size=20, max_shards=2, shard_factory=factory)
+        raise AssertionError("50 instruments fit in two 20-instrument connections")
+    except ValueError as e:
+        print(f"   ✓ Refused: {e}")
+    streamer = ShardedStockStreamer(keys, symbols, shard_size=20, max_shards=4, shard_factory=factory)
+    sizes = [len(shard.active_instruments) for shard in streamer.shards]
+    assert sizes == [20, 20, 10], sizes
+    assert streamer.active_instruments == set(keys)
+    assert isinstance(create_streamer(keys[:5], symbols, feed_hub=socket_path), SimpleStockStreamer)
+    print(f"   ✓ 50 instruments over {len(streamer.shards)} connections {sizes}")
+
+    # 2. Every shard feeds the one dispatcher
+    print("\n2. Merged dispatch")
+    received = []
+    dispatcher = TickDispatcher(lambda key, symbol, price, ts, ohlc=None: received.append(key))
+    streamer.tick_handler = dispatcher.put
+    dispatcher.add_sources(streamer.feed_sources())
+    dispatcher.start()
+    # Pre-warm opened only the first connection: the bots' "connected or connect()" opens the rest
+    streamer.shards[0].connect()
+    assert wait_for(lambda: streamer.shards[0].connected)
+    assert not streamer.connected and streamer.connected_shards == [0]
+    assert streamer.connected or streamer.connect()
+    assert wait_for(lambda: len(hub.refcounts) == 50 and all(s.subscribed_at for s in streamer.shards)), hub.refcounts
+    assert wait_for(lambda: len(hub.clients) == 3), len(hub.clients)
+    assert [shard.connection_attempts for shard in streamer.shards] == [1, 1, 1]
+    print("   ✓ connect() opened only the two shards without a connection")
+    hub.broadcast(build_feed_message(keys))
+    assert wait_for(lambda: len(received) == 50), len(received)
+    assert sorted(received) == sorted(keys)
+    print(f"   ✓ One frame for 50 instruments arrived as 3 shard messages and 50 ticks on one dispatcher")
+
+    # 3. A dropped shard reconnects alone
+    print("\n3. Independent reconnect")
+    dropped = streamer.shards[1]
+    dropped_keys = set(dropped.active_instruments)
+    client = next(c for c in hub.clients.values() if c.subscriptions == dropped_keys)
+    client.close()
+    assert wait_for(lambda: not dropped.connected), "Shard 1 did not notice the drop"
+    assert streamer.shards[0].connected and streamer.shards[2].connected
+    received.clear()
+    hub.broadcast(build_feed_message(keys))
+    assert wait_for(lambda: len(received) == 30), len(received)
+    assert not dropped_keys & set(received)
+    print("   ✓ Shards 0 and 2 kept streaming while shard 1 was down")
+    assert wait_for(lambda: dropped.reconnecting)
+    assert streamer.connected or streamer.connect()  # the bots' check must not open duplicates
+    assert wait_for(lambda: dropped.connected and len(hub.refcounts) == 50, timeout=15), "Shard 1 did not reconnect"
+    assert dropped.connection_attempts == 2 and streamer.shards[0].connection_attempts == 1
+    assert wait_for(lambda: len(hub.clients) == 3), len(hub.clients)
+    assert wait_for(lambda: any(c.subscriptions == dropped_keys for c in hub.clients.values()))
+    received.clear()
+    hub.broadcast(build_feed_message(keys))
+    assert wait_for(lambda: len(received) == 50), len(received)
+    print("   ✓ Shard 1 reconnected and re-subscribed its 20 instruments on its own")
+
+    # 4. Routing of unsubscribe / new instruments
+    print("\n4. Subscription routing")
+    streamer.streamer.unsubscribe(keys[:5])  # data_streamer.streamer path used by the reversal manager
+    assert wait_for(lambda: len(hub.refcounts) == 45), len(hub.refcounts)
+    assert streamer.loads == [15, 20, 10]
+    extra = [f"NSE_EQ|NEW{i:03d}" for i in range(30)]
+    symbols.update({key: key[-6:] for key in extra})
+    streamer.add_instruments(extra)
+    assert streamer.loads == [20, 20, 20, 15], streamer.loads
+    assert wait_for(lambda: len(hub.refcounts) == 75 and len(hub.clients) == 4), (len(hub.refcounts), len(hub.clients))
+    print(f"   ✓ New instruments filled the least loaded shards, then a 4th connection: {streamer.loads}")
+
+    # 5. Per-shard message rates and concurrent fan-out
+    print("\n5. Per-shard message rates")
+    dispatcher.add_sources(streamer.feed_sources())
+    received.clear()
+    frames = 300
+    payload = build_feed_message(keys[5:] + extra)
+    threads = [threading.Thread(target=lambda: [hub.broadcast(payload) for _ in range(frames)]) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert wait_for(lambda: dispatcher.processed + dispatcher.conflated >= 75 * 3 * frames - 75, timeout=30)
+    sources = dispatcher.stats()['sources']
+    assert set(sources) == {"shard-0", "shard-1", "shard-2", "shard-3"}, sources
+    assert all(source['messages'] > 0 and source['msg_per_sec'] > 0 for source in sources.values()), sources
+    assert hub.frames_received == 3 + 3 * frames, hub.frames_received
+    for name, source in sources.items():
+        print(f"   {name}: {source['messages']:,} messages, {source['msg_per_sec']:.0f} msg/s")
+    print(f"   ✓ {3 * frames} frames broadcast from 3 threads; rates reported for every shard")
+
+    streamer.disconnect()
+    dispatcher.stop()
+    assert wait_for(lambda: not hub.refcounts), len(hub.refcounts)
+    hub.stop()
+
+    print("\n=== ALL SHARDED STREAMER TESTS PASSED ===")
+
+
+if __name__ == "__main__":
+    test_sharded_streamer()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test script to verify the injectable bot clock
+Checks that a SimulatedClock jumps straight through the bot's waits (timing
+manager, PREP orchestrator, IEP polling), drives the monitor's time checks and
+lets recorded days replay back to back
+"""
+
+import sys
+import os
+import time
+import shutil
+import tempfile
+import threading
+from datetime import datetime, time as dt_time, timedelta
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+import pytz
+
+# Add src to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, 'src')
+sys.path.insert(0, 'src/trading/live_trading')
+
+IST = pytz.timezone('Asia/Kolkata')
+SESSION_DATE = datetime(2026, 2, 18)
+
+
+def at(hour, minute, second=0):
+    return IST.localize(SESSION_DATE.replace(hour=hour, minute=minute, second=second))
+
+
+def test_simulated_clock():
+    """Test simulated waits, scheduled events and monitor time checks"""
+    print("=== TESTING INJECTABLE BOT CLOCK ===\n")
+
+    from clock import SimulatedClock, WallClock
+    from config import MARKET_OPEN, PREP_START, ENTRY_TIME
+
+    # 1. Waits jump straight to their target, scheduled callbacks fire in order on the way
+    print("1. SimulatedClock waits and scheduled events")
+    clock = SimulatedClock(at(9, 0))
+    fired = []
+    clock.call_at(at(9, 20), lambda: fired.append(('entry', clock.now())))
+    clock.call_at(at(9, 15), lambda: fired.append(('open', clock.now())))
+    start = time.perf_counter()
+    waited = clock.sleep_until(clock.today_at(ENTRY_TIME))
+    assert time.perf_counter() - start < 0.1
+    assert waited == 20 * 60 and clock.now() == at(9, 20)
+    assert fired == [('open', at(9, 15)), ('entry', at(9, 20))], fired
+    assert clock.sleep_until(at(9, 10)) == 0 and clock.now() == at(9, 20), "Clock must never move backwards"
+    clock.sleep(90)
+    assert clock.now() == at(9, 21, 30)
+    assert abs((WallClock().now() - datetime.now(IST)).total_seconds()) < 1
+    print("   ✓ 20 minute wait returned immediately; 09:15 and 09:20 events ran in order at their times")
+
+    # 2. Timing manager waits for market open on the injected clock
+    print("\n2. ContinuationTimingManager.wait_for_market_open")
+    from src.trading.live_trading.continuation_modules.continuation_timing_module import ContinuationTimingManager
+    import config
+    clock = SimulatedClock(at(9, 0))
+    timing = ContinuationTimingManager(config, clock=clock)
+    assert timing.wait_for_market_open()
+    assert clock.now() == clock.today_at(MARKET_OPEN)
+    assert timing.get_current_time_info()['current_datetime'] == clock.now()
+    print(f"   ✓ 09:00 -> {clock.now().time()} without sleeping")
+
+    # 3. PREP tasks waiting on the clock finish at once, deadlines judged in simulated time
+    print("\n3. PrepOrchestrator on a simulated clock")
+    from prep_orchestrator import PrepOrchestrator
+    clock = SimulatedClock(at(9, 0))
+    prep = PrepOrchestrator(clock=clock)
+
+    def wait_then(when, result):
+        clock.sleep_until(when)
+        return result
+
+    prep.add_task('prewarm', lambda: wait_then(at(9, 11, 30), 'warm'), deadline=PREP_START)
+    prep.add_task('iep', lambda: wait_then(clock.today_at(PREP_START), 'iep'),
+                  depends_on=['prewarm'], deadline=MARKET_OPEN)
+    start = time.perf_counter()
+    results = prep.run()
+    assert time.perf_counter() - start < 1.0
+    assert results == {'prewarm': 'warm', 'iep': 'iep'}, results
+    assert clock.now() == clock.today_at(PREP_START)
+    assert prep.tasks['iep'].finished - prep.tasks['prewarm'].started == (clock.today_at(PREP_START) - at(9, 0)).total_seconds()
+    print("   ✓ prewarm and IEP tasks spanned 14.5 simulated minutes in real milliseconds")
+
+    # 4. IEP polls scheduled on the clock: 30 one-second polls without waiting
+    print("\n4. poll_final_iep on a simulated clock")
+    from src.utils.upstox_modules.pre_market_iep_module import PreMarketIEPManager
+    fetcher = MagicMock()
+    fetcher.get_instrument_key.side_effect = lambda symbol: f"NSE_EQ|{symbol}"
+
+    def fake_get(url, headers, timeout=None, session=None):
+        keys = url.split('instrument_key=')[1].split(',')
+        data = {key.replace('|', ':'): {'symbol': key.split('|')[1], 'last_price': 100.0} for key in keys}
+        response = MagicMock(status_code=200)
+        response.json.return_value = {'status': 'success', 'data': data}
+        return response
+
+    fetcher.http_get.side_effect = fake_get
+    clock = SimulatedClock(clock.today_at(PREP_START))
+    manager = PreMarketIEPManager(fetcher)
+    start = time.perf_counter()
+    iep = manager.poll_final_iep(['AAA', 'BBB'], clock.today_at(MARKET_OPEN) - timedelta(seconds=1), 1.0, clock=clock)
+    assert time.perf_counter() - start < 1.0
+    assert manager.last_poll_stats['polls'] == 29, manager.last_poll_stats['polls']
+    assert iep == {'AAA': 100.0, 'BBB': 100.0}
+    print(f"   ✓ {manager.last_poll_stats['polls']} polls from PREP_START to open, clock at {clock.now().time()}")
+
+    # 5. Monitor time checks read the injected clock
+    print("\n5. StockMonitor entry time and volume window")
+    from continuation_stock_monitor import StockMonitor
+    clock = SimulatedClock(at(9, 19, 59))
+    monitor = StockMonitor(clock=clock)
+    monitor.add_stock('AAA', 'NSE_EQ|AAA', 95.0, 'continuation')
+    stock = monitor.stocks['NSE_EQ|AAA']
+    stock.set_open_price(100.0)
+    stock.update_price(101.0, clock.now())
+    stock.gap_validated = stock.low_violation_checked = stock.volume_validated = True
+    monitor.accumulate_volume('NSE_EQ|AAA', 500)
+    monitor.prepare_entries()
+    assert not stock.entry_ready, "Entry armed before ENTRY_TIME"
+    clock.sleep(1)
+    monitor.prepare_entries()
+    assert stock.entry_ready and stock.entry_time_reached
+    clock.sleep(60)
+    monitor.accumulate_volume('NSE_EQ|AAA', 700)
+    assert stock.early_volume == 500, stock.early_volume
+    print("   ✓ entry armed at 09:20:00 simulated, volume outside the window ignored")
+
+    # 6. Recorded days replayed back to back on their own simulated clocks
+    print("\n6. Batch replay of two recorded days")
+    from test_replay_session import record_session
+    from replay_session import replay_sessions
+    directory = tempfile.mkdtemp()
+    try:
+        first = record_session(directory)
+        second = record_session(directory)
+        start = time.perf_counter()
+        results = replay_sessions([first, second], log_dir=os.path.join(directory, 'logs'))
+        elapsed = time.perf_counter() - start
+        assert [len(r['trades']) for r in results] == [2, 2]
+        assert results[0]['trades'][0]['timestamp'] == results[1]['trades'][0]['timestamp']
+        print(f"   ✓ 2 sessions (30 simulated minutes) replayed in {elapsed:.2f}s")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    print("\n=== ALL CLOCK TESTS PASSED ===")
+
+
+if __name__ == "__main__":
+    test_simulated_clock()
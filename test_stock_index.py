@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test script to verify the monitors' incremental stock index
+Checks the per-state sets and entered counter follow every transition, the
+unsubscribe phases find the same stocks a full scan would, and the per-tick
+positions-filled check no longer scales with the number of stocks
+"""
+
+import sys
+import os
+import time
+
+# Add src to path
+sys.path.insert(0, 'src/trading/live_trading')
+
+
+class MockDataStreamer:
+    def __init__(self):
+        self.streamer = None
+        self.active_instruments = set()
+        self.unsubscribed = []
+
+    def unsubscribe(self, instrument_keys):
+        self.unsubscribed.extend(instrument_keys)
+        self.active_instruments.difference_update(instrument_keys)
+
+
+def scan(monitor, state, subscribed=True):
+    """What the subscription manager used to compute by walking every stock"""
+    return [key for key, stock in monitor.stocks.items() if stock.state == state and stock.is_subscribed == subscribed]
+
+
+def test_stock_index():
+    """Test index upkeep in both monitors and the indexed unsubscribe paths"""
+    print("=== TESTING INCREMENTAL STOCK INDEX ===\n")
+
+    from continuation_stock_monitor import StockMonitor
+    from reversal_stock_monitor import ReversalStockMonitor
+    from reversal_modules.state_machine import StockState
+    from reversal_modules.subscription_manager import SubscriptionManager
+    from reversal_modules.integration import ReversalIntegration
+    from continuation_modules.subscription_manager import ContinuationSubscriptionManager
+    from feed_recorder import snapshot_stocks
+    from replay_session import restore_stocks
+
+    # 1. Reversal states and flags follow every transition
+    print("1. Reversal state sets")
+    monitor = ReversalStockMonitor()
+    for i in range(6):
+        monitor.add_stock(f"R{i}", f"KEY_R{i}", 100.0, 'reversal_s2')
+    stocks = list(monitor.stocks.values())
+    for stock in stocks:
+        stock.set_open_price(97.0)
+        stock.validate_gap()
+    stocks[0].daily_low = 90.0
+    stocks[1].daily_low = 90.0
+    monitor.check_violations()
+    stocks[2].state = StockState.REJECTED  # direct assignment goes through the index too
+    stocks[3].enter_position(100.5, None)
+    stocks[4].enter_position(100.5, None)
+
+    index = monitor.index
+    assert index.in_state(StockState.REJECTED) == {"KEY_R0", "KEY_R1", "KEY_R2"}, index.states
+    assert index.in_state(StockState.ENTERED) == {"KEY_R3", "KEY_R4"}
+    assert index.entered_count == 2 and monitor.get_summary()['entered_positions'] == 2
+    assert index.inactive == {"KEY_R0", "KEY_R1"}
+    manager = SubscriptionManager(MockDataStreamer(), monitor)
+    for state in (StockState.REJECTED, StockState.NOT_SELECTED, StockState.EXITED):
+        assert manager._subscribed_in_state(state) == scan(monitor, state), state
+    assert manager.get_rejected_stocks() == ["KEY_R2"]
+    print(f"   ✓ {len(index.states)} states tracked; rejected/unselected/exited match a full scan")
+
+    # 2. Positions filled: the remaining subscribed stock is unsubscribed
+    print("\n2. Reversal positions-filled unsubscribe")
+    integration = ReversalIntegration(MockDataStreamer(), monitor)
+    integration.data_streamer.active_instruments = set(index.subscribed)
+    integration._check_and_unsubscribe_after_positions_filled()
+    assert integration.data_streamer.active_instruments == {"KEY_R3", "KEY_R4"}
+    assert index.in_state(StockState.UNSUBSCRIBED) == {"KEY_R2", "KEY_R5"}
+    assert index.subscribed == {"KEY_R3", "KEY_R4"} and manager.get_rejected_stocks() == []
+    print("   ✓ R2 and R5 unsubscribed once two positions were entered")
+
+    # 3. Continuation phase 2 finds the failed stocks from the inactive set
+    print("\n3. Continuation phase 2 from the index")
+    monitor = StockMonitor()
+    for i in range(5):
+        monitor.add_stock(f"C{i}", f"KEY_C{i}", 100.0, 'continuation')
+    stocks = list(monitor.stocks.values())
+    for stock in stocks:
+        stock.set_open_price(102.0)
+        stock.validate_gap()
+    stocks[2].daily_low = 99.0
+    monitor.check_violations()
+    stocks[1].reject("No volume data available")
+    stocks[3].volume_validated = True
+    stocks[3].reject("volume")
+    manager = ContinuationSubscriptionManager(MockDataStreamer(), monitor)
+    manager.subscribe_all(list(monitor.stocks))
+    manager.unsubscribe_low_and_volume_failed()
+    assert manager.data_streamer.unsubscribed == ["KEY_C1", "KEY_C3"], manager.data_streamer.unsubscribed
+    assert monitor.index.inactive == {"KEY_C1", "KEY_C2", "KEY_C3"}
+    print("   ✓ Volume-failed C1 and C3 unsubscribed (C2 was rejected at the low check itself, as before)")
+
+    # 4. Snapshot/restore keeps the index in step
+    print("\n4. Replay restore")
+    stocks[0].prepare_entry()
+    stocks[0].enter_position(103.0, None)
+    restored = StockMonitor()
+    restore_stocks(restored, snapshot_stocks(monitor))
+    assert restored.index.entered == {"KEY_C0"}
+    assert restored.index.inactive == {"KEY_C1", "KEY_C2", "KEY_C3"}
+    assert restored.stocks["KEY_C1"].is_subscribed is False
+    print("   ✓ Restored stocks carry their flags into the new monitor's index")
+
+    # 5. Per-tick positions check
+    print("\n5. Per-tick positions-filled check with 500 stocks")
+    monitor = StockMonitor()
+    for i in range(500):
+        monitor.add_stock(f"S{i}", f"KEY_S{i}", 100.0, 'continuation')
+    manager = ContinuationSubscriptionManager(MockDataStreamer(), monitor)
+    manager.subscribe_all(list(monitor.stocks))
+    monitor.stocks["KEY_S7"].entered = True
+    calls = 20000
+    start = time.perf_counter()
+    for _ in range(calls):
+        manager.unsubscribe_remaining_after_positions_filled()
+    check_us = (time.perf_counter() - start) / calls * 1e6
+    start = time.perf_counter()
+    for _ in range(200):
+        sum(1 for stock in monitor.stocks.values() if stock.instrument_key in manager.subscribed_keys and stock.entered)
+    scan_us = (time.perf_counter() - start) / 200 * 1e6
+    print(f"   indexed check: {check_us:.2f}us per tick vs {scan_us:.0f}us for the old scan")
+    assert not manager.data_streamer.unsubscribed
+    monitor.stocks["KEY_S9"].entry_high = 101.0
+    monitor.stocks["KEY_S9"].enter_position(101.0, None)
+    manager.unsubscribe_remaining_after_positions_filled()
+    assert len(manager.data_streamer.unsubscribed) == 498 and manager.subscribed_keys == {"KEY_S7", "KEY_S9"}
+    assert check_us < scan_us / 10, "Indexed check is not cheaper than the scan"
+    print("   ✓ 498 remaining stocks unsubscribed at the second entry")
+
+    print("\n=== ALL STOCK INDEX TESTS PASSED ===")
+
+
+if __name__ == "__main__":
+    test_stock_index()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test script to verify the StockMonitor registry
+Checks symbol lookups, the cached active / qualified lists (rebuilt only after
+a transition and equal to the old full scans), and that the qualification
+status report is only logged on demand
+"""
+
+import sys
+import os
+import time
+import logging
+
+# Add src to path
+sys.path.insert(0, 'src/trading/live_trading')
+
+
+class LogCapture(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+
+    def emit(self, record):
+        self.lines.append(record.getMessage())
+
+
+def scan_qualified(monitor):
+    """What get_qualified_stocks used to compute by walking every stock"""
+    qualified = []
+    for stock in monitor.stocks.values():
+        if stock.is_active and stock.gap_validated and stock.low_violation_checked:
+            if stock.situation != 'continuation' or stock.volume_validated:
+                qualified.append(stock)
+    return qualified
+
+
+def test_stock_registry():
+    """Test symbol lookup, cached stage lists and the on-demand report"""
+    print("=== TESTING STOCK MONITOR REGISTRY ===\n")
+
+    import continuation_stock_monitor
+    from continuation_stock_monitor import StockMonitor
+    from reversal_stock_monitor import ReversalStockMonitor
+
+    # 1. Symbol lookups
+    print("1. Symbol lookup")
+    monitor = StockMonitor()
+    for i in range(6):
+        situation = 'continuation' if i < 4 else 'reversal_s1'
+        monitor.add_stock(f"C{i}", f"KEY_C{i}", 100.0, situation)
+    assert monitor.get_stock_by_symbol("C3") is monitor.stocks["KEY_C3"]
+    assert monitor.get_stock_by_symbol("MISSING") is None
+    monitor.remove_stock("KEY_C5")
+    assert monitor.get_stock_by_symbol("C5") is None
+    reversal = ReversalStockMonitor()
+    reversal.add_stock("R0", "KEY_R0", 100.0)
+    assert reversal.get_stock_by_symbol("R0") is reversal.stocks["KEY_R0"]
+    print("   ✓ Continuation and reversal monitors resolve symbols without a scan")
+
+    # 2. Qualified list matches the old scan through every transition
+    print("\n2. Qualified list across transitions")
+    stocks = list(monitor.stocks.values())
+    assert monitor.get_qualified_stocks() == scan_qualified(monitor) == []
+    for stock in stocks:
+        stock.set_open_price(102.0)
+        stock.validate_gap()
+    stocks[1].daily_low = 99.0
+    monitor.check_violations()
+    assert monitor.get_qualified_stocks() == scan_qualified(monitor), [s.symbol for s in monitor.get_qualified_stocks()]
+    assert [s.symbol for s in monitor.get_qualified_stocks()] == ["C4"]  # reversal needs no volume check
+    stocks[3].volume_validated = True
+    stocks[0].volume_validated = True
+    stocks[2].reject("volume")
+    qualified = monitor.get_qualified_stocks()
+    assert qualified == scan_qualified(monitor)
+    assert [s.symbol for s in qualified] == ["C0", "C3", "C4"], [s.symbol for s in qualified]
+    assert [s.symbol for s in monitor.get_active_stocks()] == ["C0", "C3", "C4"]
+    print(f"   ✓ Qualified {[s.symbol for s in qualified]} in monitor order, same as a full scan")
+
+    # 3. Cached until the next transition; callers get their own list
+    print("\n3. Snapshot cache")
+    first = monitor.get_qualified_stocks()
+    first.clear()
+    again = monitor.get_qualified_stocks()
+    assert [s.symbol for s in again] == ["C0", "C3", "C4"]
+    assert monitor._snapshots['qualified'][0] == monitor.index.version
+    stocks[0].update_price(103.0, None)  # ticks are not transitions
+    assert monitor._snapshots['qualified'][0] == monitor.index.version
+    stocks[3].reject("test")
+    assert [s.symbol for s in monitor.get_qualified_stocks()] == ["C0", "C4"]
+    print("   ✓ Rebuilt only after a stage change; price updates keep the snapshot")
+
+    # 4. Report only on demand
+    print("\n4. On-demand qualification report")
+    capture = LogCapture()
+    continuation_stock_monitor.logger.addHandler(capture)
+    continuation_stock_monitor.logger.setLevel(logging.INFO)
+    try:
+        for _ in range(5):
+            monitor.get_qualified_stocks()
+        assert capture.lines == [], capture.lines
+        monitor.log_qualification_report()
+    finally:
+        continuation_stock_monitor.logger.removeHandler(capture)
+    assert capture.lines[0].startswith("QUALIFIED STOCKS (2)"), capture.lines[0]
+    assert capture.lines[-1] == "SUMMARY: 2 qualified, 3 rejected", capture.lines[-1]
+    print(f"   ✓ get_qualified_stocks() logs nothing; report is {len(capture.lines)} lines")
+
+    # 5. IEP application and per-call cost with 500 stocks
+    print("\n5. IEP lookup and qualified list with 500 stocks")
+    monitor = StockMonitor()
+    for i in range(500):
+        monitor.add_stock(f"S{i}", f"KEY_S{i}", 100.0, 'continuation')
+    iep_prices = {f"S{i}": 102.0 for i in range(500)}
+    start = time.perf_counter()
+    for symbol, price in iep_prices.items():
+        monitor.get_stock_by_symbol(symbol).set_open_price(price)
+    lookup_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    for symbol in iep_prices:
+        next(s for s in monitor.stocks.values() if s.symbol == symbol)
+    scan_ms = (time.perf_counter() - start) * 1000
+    print(f"   IEP application: {lookup_ms:.2f}ms by symbol vs {scan_ms:.1f}ms scanning")
+
+    for stock in monitor.stocks.values():
+        stock.validate_gap()
+        stock.low_violation_checked = True
+        stock.volume_validated = True
+    calls = 2000
+    start = time.perf_counter()
+    for _ in range(calls):
+        monitor.get_qualified_stocks()
+    cached_us = (time.perf_counter() - start) / calls * 1e6
+    start = time.perf_counter()
+    for _ in range(200):
+        scan_qualified(monitor)
+    scan_us = (time.perf_counter() - start) / 200 * 1e6
+    print(f"   get_qualified_stocks(): {cached_us:.1f}us cached vs {scan_us:.0f}us full scan")
+    assert len(monitor.get_qualified_stocks()) == 500
+    assert lookup_ms < scan_ms and cached_us < scan_us
+    print("   ✓ Lookups and cached lists are cheaper than the scans they replace")
+
+    print("\n=== ALL STOCK REGISTRY TESTS PASSED ===")
+
+
+if __name__ == "__main__":
+    test_stock_registry()
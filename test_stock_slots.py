@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test script to verify the slotted stock state classes
+Checks per-stock memory against a dict-backed object with the same fields,
+that cost stays flat from a 20-stock list to 2000 instruments, and that the
+attribute API (ad-hoc attributes, hasattr checks, snapshot/restore) is unchanged
+"""
+
+import sys
+import os
+import time
+import tracemalloc
+
+# Add src to path
+sys.path.insert(0, 'src/trading/live_trading')
+
+
+class PlainStock:
+    """Dict-backed object with the same attributes, as the stock classes used to be"""
+
+
+def monitor_memory(monitor_class, count, situation):
+    """Bytes allocated per stock when adding count stocks to a fresh monitor"""
+    tracemalloc.start()
+    monitor = monitor_class()
+    before = tracemalloc.get_traced_memory()[0]
+    for i in range(count):
+        monitor.add_stock(f"S{i}", f"NSE_EQ|INE{i:06d}", 100.0 + i, situation)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return monitor, used / count
+
+
+def test_stock_slots():
+    """Test memory, access cost and attribute compatibility of slotted stocks"""
+    print("=== TESTING SLOTTED STOCK STATE ===\n")
+
+    import logging
+    logging.disable(logging.INFO)
+    from continuation_stock_monitor import StockMonitor, StockState
+    from reversal_stock_monitor import ReversalStockMonitor, ReversalStockState
+    from feed_recorder import snapshot_stocks, _stock_attributes
+    from replay_session import restore_stocks
+
+    # 1. Per-stock memory vs a dict-backed object
+    print("1. Per-stock memory")
+    for stock_class, situation in ((StockState, 'continuation'), (ReversalStockState, 'reversal_s2')):
+        stocks = [stock_class(f"S{i}", f"NSE_EQ|INE{i:06d}", 100.0 + i, situation) for i in range(2000)]
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        slotted = [stock_class(stock.symbol, stock.instrument_key, stock.previous_close, situation) for stock in stocks]
+        slotted_bytes = (tracemalloc.get_traced_memory()[0] - before) / 2000
+        before = tracemalloc.get_traced_memory()[0]
+        plain = []
+        for stock in stocks:
+            copy = PlainStock()
+            for name, value in _stock_attributes(stock):
+                setattr(copy, name, value)
+            plain.append(copy)
+        plain_bytes = (tracemalloc.get_traced_memory()[0] - before) / 2000
+        tracemalloc.stop()
+        print(f"   {stock_class.__name__}: {slotted_bytes:.0f} bytes per stock vs {plain_bytes:.0f} dict-backed")
+        assert slotted_bytes < plain_bytes * 0.8, "Slotted stock is not smaller than a dict-backed one"
+    print("   ✓ Slotted stocks are smaller than dict-backed objects with the same fields")
+
+    # 2. Flat from 20 to 2000 stocks
+    print("\n2. 20 vs 2000 monitored stocks")
+    _, small = monitor_memory(StockMonitor, 20, 'continuation')
+    monitor, large = monitor_memory(StockMonitor, 2000, 'continuation')
+    stocks = list(monitor.stocks.values())
+    timings = {}
+    for count in (20, 2000):
+        batch = stocks[:count]
+        rounds = 200000 // count
+        start = time.perf_counter()
+        for round_no in range(rounds):
+            price = 100.0 + round_no % 7
+            for stock in batch:
+                if stock.is_subscribed:
+                    stock.update_price(price, None)
+        timings[count] = (time.perf_counter() - start) / (rounds * count) * 1e9
+    print(f"   monitor memory: {small:.0f} bytes/stock at 20, {large:.0f} at 2000 (maps and index included)")
+    print(f"   tick update: {timings[20]:.0f}ns/stock at 20, {timings[2000]:.0f}ns at 2000")
+    assert large < small * 1.5, "Per-stock memory grows with the watchlist"
+    assert timings[2000] < timings[20] * 3, "Per-stock tick cost grows with the watchlist"
+    print("   ✓ Memory and tick cost per stock stay flat")
+
+    # 3. Attribute API unchanged
+    print("\n3. Attribute compatibility")
+    stock = StockState("TEST", "TEST_KEY", 100.0, 'continuation')
+    assert stock.daily_high == float('-inf') and stock.daily_low == float('inf')
+    assert not hasattr(stock, 'vah_price'), "vah_price must stay unset until VAH validation"
+    stock.set_open_price(101.0)
+    stock.validate_vah_rejection(100.0)
+    assert stock.vah_price == 100.0
+    stock.enter_position_called = False  # ad-hoc attributes and method patches still work
+    stock.enter_position = lambda price, timestamp: setattr(stock, 'enter_position_called', True)
+    stock.enter_position(101.0, None)
+    assert stock.enter_position_called
+    print("   ✓ Sentinels, hasattr checks and ad-hoc attributes behave as before")
+
+    # 4. Snapshot / restore round trip
+    print("\n4. Snapshot and restore")
+    source = StockMonitor()
+    source.add_stock("AAA", "KEY_A", 100.0, 'continuation')
+    source.add_stock("BBB", "KEY_B", 100.0, 'continuation')
+    for stock in source.stocks.values():
+        stock.set_open_price(102.0)
+        stock.validate_gap()
+        stock.vah_price = 101.0
+    source.stocks["KEY_B"].reject("test")
+    snapshot = snapshot_stocks(source)
+    assert snapshot[0]['vah_price'] == 101.0 and snapshot[0]['gap_validated'] is True
+    assert '_index' not in snapshot[0] and 'index' not in snapshot[0]
+    restored = StockMonitor()
+    restore_stocks(restored, snapshot)
+    assert snapshot_stocks(restored) == snapshot
+    assert restored.index.inactive == {"KEY_B"}
+    reversal = ReversalStockMonitor()
+    reversal.add_stock("RRR", "KEY_R", 100.0)
+    assert snapshot_stocks(reversal)[0]['state'] == 'initialized'
+    print(f"   ✓ {len(snapshot[0])} attributes per stock survive snapshot/restore")
+
+    print("\n=== ALL SLOTTED STOCK STATE TESTS PASSED ===")
+
+
+if __name__ == "__main__":
+    test_stock_slots()
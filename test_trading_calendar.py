@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test script to verify the local NSE trading calendar
+Checks holiday handling, session counts and learning from bhavcopy presence
+"""
+
+import sys
+import os
+import time
+import json
+import tempfile
+from datetime import date, timedelta
+from pathlib import Path
+from unittest import mock
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+def test_trading_calendar():
+    """Test previous/next day, ranges and learning"""
+    print("=== TESTING TRADING CALENDAR ===\n")
+
+    from src.utils.trading_calendar import TradingCalendar
+
+    with tempfile.TemporaryDirectory() as tmp:
+        calendar_file = os.path.join(tmp, 'trading_calendar.json')
+        calendar = TradingCalendar(calendar_file)
+
+        # Republic Day 2026 is a Monday holiday
+        assert calendar.previous_trading_day(date(2026, 1, 27)) == date(2026, 1, 23), "Holiday not skipped"
+        assert calendar.next_trading_day(date(2026, 1, 23)) == date(2026, 1, 27), "Weekend + holiday not skipped"
+        # Budget Day 2026 falls on a Sunday with a special session
+        assert calendar.is_trading_day(date(2026, 2, 1)), "Special session missing"
+        assert calendar.previous_trading_day(date(2026, 2, 2)) == date(2026, 2, 1), "Special session skipped"
+        print("   ✓ Holidays and special sessions handled")
+
+        days = calendar.trading_days(date(2026, 1, 19), date(2026, 1, 30))
+        assert len(days) == 9 and date(2026, 1, 26) not in days, "Trading-day range wrong"
+        assert calendar.sessions_between(date(2026, 1, 19), date(2026, 1, 30)) == 9, "Session count wrong"
+        assert calendar.shift(date(2026, 1, 23), 1) == date(2026, 1, 27), "Forward shift wrong"
+        assert calendar.shift(date(2026, 1, 27), -2) == date(2026, 1, 22), "Backward shift wrong"
+        print("   ✓ Ranges, counts and shifts consistent")
+
+        start = time.perf_counter()
+        for _ in range(10000):
+            calendar.previous_trading_day(date(2026, 1, 27))
+        per_call_us = (time.perf_counter() - start) / 10000 * 1e6
+        print(f"   previous_trading_day: {per_call_us:.1f}us per call")
+
+        # Archive without 2027-01-05 (a Tuesday) teaches a new holiday, which persists
+        archive = Path(tmp) / 'bhavcopy'
+        archive.mkdir()
+        for day in (4, 6, 7, 8):
+            (archive / f"BhavCopy_NSE_CM_0_0_0_202701{day:02d}_F_0000.csv").touch()
+        assert calendar.learn_from_bhavcopy_archive(str(archive)) == 1, "Holiday not learned"
+        assert TradingCalendar(calendar_file).previous_trading_day(date(2027, 1, 6)) == date(2027, 1, 4), \
+            "Learned holiday not persisted"
+        print("   ✓ Holiday learned from bhavcopy archive and persisted")
+
+    print("\n=== ALL TRADING CALENDAR TESTS PASSED ===")
+
+
+def test_holiday_coverage():
+    """Test that years without a holiday list are flagged and can be supplied"""
+    print("\n=== TESTING HOLIDAY LIST COVERAGE ===\n")
+
+    from src.utils import trading_calendar as calendar_module
+    from src.utils.trading_calendar import TradingCalendar
+
+    with tempfile.TemporaryDirectory() as tmp:
+        calendar_file = os.path.join(tmp, 'trading_calendar.json')
+        calendar = TradingCalendar(calendar_file)
+
+        with mock.patch.object(calendar_module.logger, 'warning') as warning:
+            calendar.previous_trading_day(date(2026, 1, 27))
+            assert warning.call_count == 0, "Covered year should not warn"
+            calendar.previous_trading_day(date(2028, 3, 15))
+            calendar.next_trading_day(date(2028, 6, 1))
+            calendar.is_trading_day(date(2040, 1, 2))
+            assert warning.call_count == 2, "Uncovered years should warn once each"
+            assert '2028' in warning.call_args_list[0][0][0] and '2040' in warning.call_args_list[1][0][0]
+        print("   ✓ Lookups in years without a holiday list warn once per year")
+
+        # Holidays for a new year supplied through the calendar file
+        with open(calendar_file, 'w') as f:
+            json.dump({'holidays': ['2028-01-26'], 'holiday_years': [2028]}, f)
+        supplied = TradingCalendar(calendar_file)
+        with mock.patch.object(calendar_module.logger, 'warning') as warning:
+            assert not supplied.is_trading_day(date(2028, 1, 26)), "Supplied holiday not applied"
+            assert warning.call_count == 0, "Supplied year should not warn"
+        print("   ✓ Holiday list for a new year loaded from the calendar file")
+
+        # A session record spanning a full year covers it; a partial year does not
+        sessions = [date(2024, 1, 1) + timedelta(days=n) for n in range(366)]
+        sessions = [d for d in sessions if d.weekday() < 5 and d != date(2024, 1, 26)]
+        supplied.learn_from_sessions(sessions, start=date(2024, 1, 1), end=date(2024, 12, 31))
+        supplied.learn_from_sessions([date(2029, 1, 2), date(2029, 1, 3)])
+        reloaded = TradingCalendar(calendar_file)
+        assert 2024 in reloaded.holiday_years and 2028 in reloaded.holiday_years, "Coverage not persisted"
+        assert 2029 not in reloaded.holiday_years, "Partial year marked as covered"
+        assert not reloaded.is_trading_day(date(2024, 1, 26)), "Learned holiday not persisted"
+        print("   ✓ Year learned in full marked as covered and persisted")
+
+    print("\n=== ALL HOLIDAY COVERAGE TESTS PASSED ===")
+
+
+if __name__ == "__main__":
+    test_trading_calendar()
+    test_holiday_coverage()
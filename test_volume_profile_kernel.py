@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test script to verify the vectorized volume-profile kernel
+Compares POC/VAH/VAL against the original per-bar loop and benchmarks a full
+day of 1-minute bars (375 bars)
+"""
+
+import sys
+import os
+import time
+import numpy as np
+import pandas as pd
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def legacy_volume_profile(ohlcv_df, bin_size=0.05, value_area_pct=0.70):
+    """Original iterrows/dict implementation, kept here as the reference"""
+    min_price = ohlcv_df['low'].min()
+    max_price = ohlcv_df['high'].max()
+    bins = np.arange(min_price, max_price + bin_size, bin_size)
+    bin_centers = (bins[:-1] + bins[1:]) / 2
+    volume_profile = {price: 0 for price in bin_centers}
+
+    for _, bar in ohlcv_df.iterrows():
+        bar_bins = bins[(bins >= bar['low']) & (bins <= bar['high'])]
+        if len(bar_bins) > 1:
+            vol_per_bin = bar['volume'] / (len(bar_bins) - 1)
+            for i in range(len(bar_bins) - 1):
+                center = (bar_bins[i] + bar_bins[i+1]) / 2
+                if center in volume_profile:
+                    volume_profile[center] += vol_per_bin
+
+    profile_items = sorted(volume_profile.items())
+    prices = [p for p, v in profile_items]
+    volumes = np.array([v for p, v in profile_items])
+    total_volume = volumes.sum()
+    poc_idx = np.argmax(volumes)
+    accumulated_volume = volumes[poc_idx]
+    left_idx, right_idx = poc_idx - 1, poc_idx + 1
+    target_volume = total_volume * value_area_pct
+
+    while accumulated_volume < target_volume and (left_idx >= 0 or right_idx < len(volumes)):
+        left_vol = volumes[left_idx] if left_idx >= 0 else 0
+        right_vol = volumes[right_idx] if right_idx < len(volumes) else 0
+        if left_vol >= right_vol and left_idx >= 0:
+            accumulated_volume += left_vol
+            left_idx -= 1
+        elif right_idx < len(volumes):
+            accumulated_volume += right_vol
+            right_idx += 1
+        else:
+            break
+
+    return {
+        'poc': round(prices[poc_idx], 2),
+        'vah': round(prices[min(len(prices) - 1, right_idx - 1)], 2),
+        'val': round(prices[max(0, left_idx + 1)], 2),
+    }
+
+
+class StubFetcher:
+    """Instrument info as the instrument index returns it"""
+
+    def __init__(self, tick_size=0.05):
+        self.tick_size = tick_size
+
+    def get_instrument_info(self, symbol):
+        return {'tick_size': self.tick_size}
+
+
+def make_session(price, seed, bars=375):
+    """Random-walk day of 1-minute bars around a price"""
+    rng = np.random.default_rng(seed)
+    closes = price * np.exp(np.cumsum(rng.normal(0, 0.0015, bars)))
+    opens = np.concatenate([[price], closes[:-1]])
+    spread = price * np.abs(rng.normal(0, 0.001, bars))
+    return pd.DataFrame({
+        'open': opens,
+        'high': np.maximum(opens, closes) + spread,
+        'low': np.minimum(opens, closes) - spread,
+        'close': closes,
+        'volume': rng.integers(1000, 200000, bars).astype(float),
+    })
+
+
+def test_kernel_matches_legacy():
+    """Test that the kernel matches the original loop at the same bin size"""
+    print("=== TESTING VOLUME PROFILE KERNEL EQUIVALENCE ===\n")
+
+    from src.trading.live_trading.volume_profile import VolumeProfileCalculator
+    calculator = VolumeProfileCalculator.__new__(VolumeProfileCalculator)
+    calculator.bin_size = 0.05
+    calculator.value_area_pct = 0.70
+    calculator.upstox_fetcher = StubFetcher()
+
+    for seed, price in enumerate([85.0, 420.0, 1480.0, 2000.0]):
+        df = make_session(price, seed)
+        expected = legacy_volume_profile(df)
+        result = calculator.calculate_volume_profile(df)
+        for level in ('poc', 'vah', 'val'):
+            assert abs(result[level] - expected[level]) <= 0.05 + 1e-9, \
+                f"{level.upper()} differs at Rs{price}: {result[level]} vs {expected[level]}"
+        print(f"   ✓ Rs{price:.0f}: POC {result['poc']}, VAH {result['vah']}, VAL {result['val']} match")
+
+        # The live VAH gate must stay within one tick of the reference whatever
+        # the instrument's tick size (0.01 for most NSE EQ, 0.1 for e.g. RELIANCE)
+        for tick_size in (0.01, 0.05, 0.1):
+            calculator.upstox_fetcher = StubFetcher(tick_size)
+            live_vah = calculator._vah_for_symbol('TEST', df)
+            assert abs(live_vah - expected['vah']) <= 0.01 + 1e-9, \
+                f"Live VAH differs at Rs{price} (tick {tick_size}): {live_vah} vs {expected['vah']}"
+        print(f"   ✓ Live VAH gate {live_vah} within one tick of {expected['vah']} for 0.01/0.05/0.1 ticks")
+
+    print("\n=== ALL KERNEL EQUIVALENCE TESTS PASSED ===")
+
+
+def benchmark_kernel():
+    """Benchmark original loop vs vectorized kernel on a full session"""
+    print("=== BENCHMARK: FULL DAY OF 1-MINUTE BARS ===\n")
+
+    from src.trading.live_trading.volume_profile import VolumeProfileCalculator
+    calculator = VolumeProfileCalculator.__new__(VolumeProfileCalculator)
+    calculator.bin_size = 0.05
+    calculator.value_area_pct = 0.70
+
+    df = make_session(2000.0, 42)
+    runs = 5
+
+    start = time.perf_counter()
+    for _ in range(runs):
+        legacy_volume_profile(df)
+    legacy_ms = (time.perf_counter() - start) / runs * 1000
+
+    start = time.perf_counter()
+    for _ in range(runs):
+        calculator.calculate_volume_profile(df)
+    kernel_ms = (time.perf_counter() - start) / runs * 1000
+
+    bin_size = calculator.get_bin_size(2000.0, 0.05)
+    start = time.perf_counter()
+    for _ in range(runs):
+        calculator.calculate_volume_profile(df, bin_size)
+    scaled_ms = (time.perf_counter() - start) / runs * 1000
+
+    print(f"   Original loop (Rs0.05 bins):    {legacy_ms:8.2f} ms")
+    print(f"   Vectorized kernel (Rs0.05):     {kernel_ms:8.2f} ms ({legacy_ms / kernel_ms:.0f}x)")
+    print(f"   Vectorized kernel (Rs{bin_size} bins): {scaled_ms:8.2f} ms ({legacy_ms / scaled_ms:.0f}x)")
+
+
+if __name__ == "__main__":
+    test_kernel_matches_legacy()
+    benchmark_kernel()